@@ -21,11 +21,10 @@ from backend.agents.codeweaver import codeweaver_agent, EnhancedCodeWeaverAgent
 from backend.agents.rag import rag_agent, EnhancedRAGAgent
 from backend.agents.notification import notification_agent
 from backend.agents.calendar import calendar_agent
-from backend.agents.conductor import conductor_agent, EnhancedConductorAgent
+from backend.agents.conductor import conductor_agent, EnhancedConductorAgent, enhanced_conductor_agent
 from backend.agents.router import router_agent, EnhancedRouterAgent
 from backend.agents.simple_chat import simple_chat_agent, EnhancedSimpleChatAgent
 from backend.agents.self_reflection import self_reflection_agent, EnhancedSelfReflectionAgent
-from backend.utils.user_preferences_service import user_preferences_service
 try:
     from backend.utils.livekit import generate_access_token
     LIVEKIT_AVAILABLE = True
@@ -34,47 +33,36 @@ except ImportError:
     def generate_access_token(*args, **kwargs):
         return {"error": "LiveKit not available"}
 from backend.utils.llm_request_manager import llm_request_manager, RequestPriority
+from backend.utils.post_response_pipeline import post_response_pipeline
+from backend.utils.intent_router import intent_router
+from backend.utils.context_prefetcher import context_prefetcher
+from backend.utils.response_extraction import (
+    extract_response_from_result,
+    generate_throttled_response,
+)
+# Public helpers that lived here before the move, kept importable from this module
+from backend.utils.response_extraction import (  # noqa: F401
+    extract_from_nested_dict,
+    generate_robust_fallback_response,
+    generate_throttled_response_with_fallback,
+    _is_raw_object_string,
+)
 
 # Import dynamic evolution level calculation functions
 from backend.routers.insights import calculate_dynamic_evolution_level_from_context, get_consciousness_context_for_insights
 import os
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
-from backend.tts_wrapper import CoquiTTS, TTS_AVAILABLE
+from backend.utils.speech_models import get_whisper_model, get_tts_model, whisper_lock
+from backend.utils.stt_service import stt_service, STTModelLoadingError
 import tempfile
 import logging
 import jwt
 import asyncio
 import re, json
 import subprocess
+import uuid
 
 router = APIRouter()
 
-# Load models once
-whisper_model = None
-if WHISPER_AVAILABLE:
-    try:
-        whisper_model = whisper.load_model("base")
-    except Exception as e:
-        logging.warning(f"Failed to load Whisper model: {e}")
-        whisper_model = None
-else:
-    logging.info("Whisper not available; audio transcription endpoints will be disabled")
-# Initialize TTS model only if available
-coqui_tts_model = None
-if TTS_AVAILABLE:
-    try:
-        coqui_tts_model = CoquiTTS(model_name="tts_models/en/ljspeech/tacotron2-DDC")
-        logging.info("TTS model loaded successfully")
-    except Exception as e:
-        logging.warning(f"Failed to load TTS model: {e}")
-        coqui_tts_model = None
-else:
-    logging.info("TTS not available in this deployment")
-
 def extract_answer(model_output):
     logging.debug(f"[extract_answer] Raw model_output: {repr(model_output)}")
     # If it's a dict with 'answer'
@@ -124,896 +112,6 @@ def extract_answer(model_output):
     logging.debug(f"[extract_answer] No valid answer found, returning fallback.")
     return "I'm sorry, I couldn't generate a meaningful answer. Please try rephrasing your question or check your knowledge base."
 
-def _present_structured_output(obj: dict) -> str:
-    """Render common structured agent outputs into a concise, readable string.
-
-    Tries friendly fields first, then Graph/Cypher previews, and finally a
-    compact pretty‑print. Returns None if no useful presentation is found.
-    """
-    try:
-        # Friendly text fields commonly used across agents
-        for key in ("answer", "summary", "response", "message", "text", "content"):
-            val = obj.get(key)
-            if isinstance(val, str) and val.strip():
-                return val.strip()
-
-        # GraphMaster style outputs
-        cypher = obj.get("cypher") or obj.get("query")
-        rows = obj.get("result") or obj.get("records") or obj.get("rows") or obj.get("data")
-        parts = []
-        if isinstance(rows, list) and rows:
-            preview_lines = []
-            for r in rows[:3]:
-                if isinstance(r, dict):
-                    name = r.get("name") or r.get("concept") or r.get("title") or r.get("id")
-                    level = r.get("level") or r.get("evolution_level") or r.get("score")
-                    if name is not None and level is not None:
-                        preview_lines.append(f"- {name} (level {level})")
-                    elif name is not None:
-                        preview_lines.append(f"- {name}")
-                    else:
-                        preview_lines.append(f"- {str(r)[:80]}")
-                else:
-                    preview_lines.append(f"- {str(r)[:80]}")
-            if preview_lines:
-                parts.append("Top results:\n" + "\n".join(preview_lines))
-        if isinstance(cypher, str) and cypher.strip():
-            parts.append(f"Cypher used:\n```cypher\n{cypher.strip()}\n```")
-        if parts:
-            return "\n\n".join(parts)
-
-        # Generic pretty print (last resort)
-        try:
-            import json as _json
-            return _json.dumps(obj, indent=2)[:1500]
-        except Exception:
-            return str(obj)[:1000]
-    except Exception:
-        return None
-
-
-def extract_response_from_result(result, query: str, consciousness_context: dict) -> str:
-    """
-    Extract user-friendly response from LLM request manager result with throttling awareness
-    
-    Args:
-        result: Response from LLM request manager or agent
-        query: Original user query for context
-        consciousness_context: Current consciousness state
-        
-    Returns:
-        User-friendly response string
-    """
-    user_id = consciousness_context.get("user_id", "unknown")
-    
-    logging.debug(f"🔍 RESPONSE EXTRACTION START")
-    logging.debug(f"   User: {user_id}")
-    logging.debug(f"   Result Type: {type(result)}")
-    logging.debug(f"   Result Preview: {repr(result)[:200]}{'...' if len(repr(result)) > 200 else ''}")
-    logging.debug(f"   Query: {query[:100]}{'...' if len(query) > 100 else ''}")
-    
-    # Enhanced error handling for edge cases
-    try:
-        # Handle None or empty results
-        if result is None:
-            logging.warning(f"⚠️ NULL RESULT DETECTED")
-            logging.warning(f"   User: {user_id}")
-            logging.warning(f"   Query: {query[:50]}{'...' if len(query) > 50 else ''}")
-            logging.warning(f"   Generating consciousness-aware fallback")
-            
-            fallback = generate_robust_fallback_response(query, consciousness_context, "null_result")
-            logging.debug(f"   Fallback Generated: {fallback[:100]}{'...' if len(fallback) > 100 else ''}")
-            return fallback
-        
-        # Handle unexpected data types with robust error recovery
-        if not isinstance(result, (dict, str)) and not hasattr(result, '__dict__'):
-            logging.warning(f"⚠️ UNEXPECTED RESULT TYPE: {type(result)}")
-            logging.warning(f"   User: {user_id}")
-            logging.warning(f"   Result: {repr(result)[:100]}{'...' if len(repr(result)) > 100 else ''}")
-            
-            # Try to convert to string safely
-            try:
-                result_str = str(result).strip()
-                if result_str and len(result_str) > 0 and not _is_raw_object_string(result_str):
-                    logging.info(f"✅ CONVERTED UNEXPECTED TYPE TO STRING")
-                    return result_str
-                else:
-                    logging.warning(f"   Converted string is empty or raw object, using fallback")
-                    return generate_robust_fallback_response(query, consciousness_context, "unexpected_type")
-            except Exception as conversion_error:
-                logging.error(f"❌ FAILED TO CONVERT UNEXPECTED TYPE: {conversion_error}")
-                return generate_robust_fallback_response(query, consciousness_context, "conversion_error")
-    
-    except Exception as edge_case_error:
-        logging.error(f"❌ EDGE CASE ERROR IN INITIAL PROCESSING: {edge_case_error}")
-        return generate_robust_fallback_response(query, consciousness_context, "edge_case_error")
-    
-    # Check for throttled response first (highest priority) with enhanced error handling
-    try:
-        if isinstance(result, dict):
-            # Enhanced throttled response detection with malformed structure handling
-            status = result.get("status")
-            
-            # Handle various throttled status formats
-            if status == "throttled" or (isinstance(status, str) and "throttl" in status.lower()):
-                # Comprehensive throttling event logging
-                user_id = consciousness_context.get("user_id", "unknown")
-                consciousness_level = consciousness_context.get("consciousness_level", 0.7)
-                emotional_state = consciousness_context.get("emotional_state", "curious")
-                
-                logging.info(f"🚦 THROTTLED RESPONSE DETECTED")
-                logging.info(f"   User: {user_id}")
-                logging.info(f"   Query: {query[:100]}{'...' if len(query) > 100 else ''}")
-                logging.info(f"   Consciousness Level: {consciousness_level:.2f}")
-                logging.info(f"   Emotional State: {emotional_state}")
-                logging.info(f"   Raw Throttled Result: {result}")
-                
-                # Debug logging for response processing flow
-                logging.debug(f"🔍 THROTTLING FLOW DEBUG:")
-                logging.debug(f"   Result Type: {type(result)}")
-                logging.debug(f"   Result Keys: {list(result.keys()) if isinstance(result, dict) else 'N/A'}")
-                logging.debug(f"   Status Field: {result.get('status', 'missing')}")
-                logging.debug(f"   Response Field: {result.get('response', 'missing')}")
-                
-                # Enhanced base message extraction with fallback handling
-                try:
-                    base_message = result.get("response")
-                    
-                    # Handle various response field formats
-                    if not base_message:
-                        # Try alternative field names
-                        base_message = result.get("message") or result.get("content") or result.get("text")
-                    
-                    # Validate base message
-                    if not isinstance(base_message, str):
-                        if base_message is not None:
-                            try:
-                                base_message = str(base_message)
-                            except Exception:
-                                base_message = None
-                    
-                    # Final fallback for base message
-                    if not base_message or len(base_message.strip()) == 0:
-                        base_message = "I'm currently processing other requests."
-                        logging.warning(f"   Using fallback base message due to missing/invalid response field")
-                    
-                    logging.debug(f"   Base Message: {base_message}")
-                    logging.debug(f"   Query Length: {len(query)} characters")
-                    logging.debug(f"   Query Words: {len(query.split())} words")
-                    
-                    # Generate consciousness-aware throttled response with error handling
-                    throttled_response = generate_throttled_response_with_fallback(query, consciousness_context, base_message)
-                    
-                    # Log the final throttled response
-                    logging.info(f"✅ THROTTLED RESPONSE GENERATED:")
-                    logging.info(f"   Final Response: {throttled_response[:150]}{'...' if len(throttled_response) > 150 else ''}")
-                    logging.info(f"   Response Length: {len(throttled_response)} characters")
-                    
-                    return throttled_response
-                    
-                except Exception as throttled_processing_error:
-                    logging.error(f"❌ ERROR PROCESSING THROTTLED RESPONSE: {throttled_processing_error}")
-                    logging.error(f"   User: {user_id}")
-                    logging.error(f"   Falling back to robust throttled response generation")
-                    
-                    return generate_robust_fallback_response(query, consciousness_context, "throttled_processing_error")
-            
-            # Check for other throttling indicators in the response structure
-            elif any(key in result for key in ["throttle", "rate_limit", "busy", "overload"]):
-                logging.warning(f"🚦 ALTERNATIVE THROTTLING INDICATORS DETECTED")
-                logging.warning(f"   User: {user_id}")
-                logging.warning(f"   Indicators: {[key for key in ['throttle', 'rate_limit', 'busy', 'overload'] if key in result]}")
-                
-                return generate_robust_fallback_response(query, consciousness_context, "alternative_throttling")
-                
-    except Exception as throttled_check_error:
-        logging.error(f"❌ ERROR CHECKING FOR THROTTLED RESPONSE: {throttled_check_error}")
-        logging.error(f"   User: {consciousness_context.get('user_id', 'unknown')}")
-        logging.error(f"   Result type: {type(result)}")
-        # Continue to normal processing rather than failing completely
-    
-    # Handle dictionary responses (non-throttled) with enhanced error handling
-    if isinstance(result, dict):
-        try:
-            logging.debug(f"📋 PROCESSING DICTIONARY RESULT")
-            logging.debug(f"   User: {user_id}")
-            logging.debug(f"   Dict Keys: {list(result.keys())}")
-            
-            # First, attempt a human‑readable presentation of structured outputs
-            presented = _present_structured_output(result)
-            if isinstance(presented, str) and presented.strip() and not _is_raw_object_string(presented):
-                logging.info(f"✅ PRESENTED STRUCTURED OUTPUT")
-                return presented.strip()
-
-            # Enhanced response extraction with multiple fallback strategies
-            response_candidates = []
-            
-            # Primary response fields
-            for field_name in ["response", "answer", "output", "message", "content", "text", "result"]:
-                if field_name in result:
-                    candidate = result[field_name]
-                    logging.debug(f"   Found '{field_name}' key: {type(candidate)}")
-                    
-                    try:
-                        # Handle various data types for response fields
-                        if isinstance(candidate, str) and candidate.strip():
-                            response_candidates.append((field_name, candidate.strip()))
-                        elif candidate is not None:
-                            # Try to convert non-string responses
-                            candidate_str = str(candidate).strip()
-                            if candidate_str and not _is_raw_object_string(candidate_str):
-                                response_candidates.append((field_name, candidate_str))
-                    except Exception as field_error:
-                        logging.warning(f"   Error processing field '{field_name}': {field_error}")
-                        continue
-            
-            # Return the first valid response candidate
-            if response_candidates:
-                field_name, response = response_candidates[0]
-                logging.info(f"✅ DICT RESPONSE EXTRACTED")
-                logging.info(f"   User: {user_id}")
-                logging.info(f"   Source: dict['{field_name}']")
-                logging.debug(f"   Response: {response[:100]}{'...' if len(response) > 100 else ''}")
-                return response
-            
-            # Enhanced fallback: try to extract from nested structures
-            for key, value in result.items():
-                if isinstance(value, dict):
-                    try:
-                        nested_response = extract_from_nested_dict(value)
-                        if nested_response:
-                            logging.info(f"✅ NESTED DICT RESPONSE EXTRACTED")
-                            logging.info(f"   User: {user_id}")
-                            logging.info(f"   Source: dict['{key}'] (nested)")
-                            return nested_response
-                    except Exception as nested_error:
-                        logging.debug(f"   Error processing nested dict '{key}': {nested_error}")
-                        continue
-            
-            # If no valid response found in dict, generate fallback
-            logging.warning(f"🔧 NO VALID RESPONSE IN DICT")
-            logging.warning(f"   User: {user_id}")
-            logging.warning(f"   Available keys: {list(result.keys())}")
-            logging.warning(f"   Generating robust fallback")
-            
-            return generate_robust_fallback_response(query, consciousness_context, "no_valid_dict_response")
-            
-        except Exception as dict_processing_error:
-            logging.error(f"❌ ERROR PROCESSING DICTIONARY RESULT: {dict_processing_error}")
-            logging.error(f"   User: {user_id}")
-            logging.error(f"   Dict keys: {list(result.keys()) if hasattr(result, 'keys') else 'N/A'}")
-            
-            return generate_robust_fallback_response(query, consciousness_context, "dict_processing_error")
-    
-    # Handle string responses with enhanced validation
-    if isinstance(result, str):
-        try:
-            logging.debug(f"📝 PROCESSING STRING RESULT")
-            logging.debug(f"   User: {user_id}")
-            logging.debug(f"   String Length: {len(result)} characters")
-            logging.debug(f"   String Preview: {result[:100]}{'...' if len(result) > 100 else ''}")
-            
-            # Enhanced string validation
-            cleaned_result = result.strip()
-            
-            if cleaned_result:
-                # Check for malformed JSON strings that might indicate errors
-                if cleaned_result.startswith('{') and cleaned_result.endswith('}'):
-                    try:
-                        # Try to parse as JSON to see if it's a stringified object
-                        parsed_json = json.loads(cleaned_result)
-                        if isinstance(parsed_json, dict):
-                            # If it's a valid JSON dict, try to extract response from it
-                            logging.debug(f"   String contains valid JSON, attempting extraction")
-                            extracted = extract_response_from_result(parsed_json, query, consciousness_context)
-                            if extracted and not _is_raw_object_string(extracted):
-                                return extracted
-                    except json.JSONDecodeError:
-                        # Not valid JSON, treat as regular string
-                        pass
-                
-                # Validate that the string is not a raw object representation
-                if not _is_raw_object_string(cleaned_result):
-                    # Additional validation: check for minimum meaningful content
-                    if len(cleaned_result) >= 3 and not cleaned_result.lower() in ['none', 'null', 'undefined']:
-                        logging.info(f"✅ STRING RESPONSE EXTRACTED")
-                        logging.info(f"   User: {user_id}")
-                        logging.info(f"   Source: direct string")
-                        logging.info(f"   Length: {len(cleaned_result)} characters")
-                        return cleaned_result
-                
-                logging.warning(f"⚠️ STRING APPEARS TO BE RAW OBJECT OR INVALID")
-                logging.warning(f"   User: {user_id}")
-                logging.warning(f"   String content: {cleaned_result[:50]}{'...' if len(cleaned_result) > 50 else ''}")
-            else:
-                logging.warning(f"⚠️ EMPTY STRING RESULT")
-                logging.warning(f"   User: {user_id}")
-            
-            logging.warning(f"   Generating robust fallback")
-            return generate_robust_fallback_response(query, consciousness_context, "invalid_string_result")
-            
-        except Exception as string_processing_error:
-            logging.error(f"❌ ERROR PROCESSING STRING RESULT: {string_processing_error}")
-            logging.error(f"   User: {user_id}")
-            logging.error(f"   String length: {len(result) if result else 'N/A'}")
-            
-            return generate_robust_fallback_response(query, consciousness_context, "string_processing_error")
-    
-    # Handle objects with attributes (enhanced error handling)
-    try:
-        # List of common attribute names to check
-        attribute_names = ['data', 'response', 'output', 'answer', 'message', 'content', 'text', 'result']
-        
-        for attr_name in attribute_names:
-            if hasattr(result, attr_name):
-                try:
-                    attr_value = getattr(result, attr_name)
-                    logging.debug(f"   Found '{attr_name}' attribute: {type(attr_value)}")
-                    
-                    if isinstance(attr_value, str) and attr_value.strip():
-                        cleaned_attr = attr_value.strip()
-                        if not _is_raw_object_string(cleaned_attr):
-                            logging.debug(f"✅ {attr_name.title()} attribute extracted: {cleaned_attr[:100]}...")
-                            return cleaned_attr
-                    elif attr_value is not None:
-                        try:
-                            attr_str = str(attr_value).strip()
-                            if attr_str and not _is_raw_object_string(attr_str) and len(attr_str) >= 3:
-                                logging.debug(f"✅ {attr_name.title()} attribute converted: {attr_str[:100]}...")
-                                return attr_str
-                        except Exception as attr_conversion_error:
-                            logging.debug(f"   Error converting '{attr_name}' attribute: {attr_conversion_error}")
-                            continue
-                            
-                except Exception as attr_access_error:
-                    logging.debug(f"   Error accessing '{attr_name}' attribute: {attr_access_error}")
-                    continue
-        
-        # Try to extract from object's __dict__ if available
-        if hasattr(result, '__dict__'):
-            try:
-                obj_dict = result.__dict__
-                logging.debug(f"   Checking object __dict__ with keys: {list(obj_dict.keys())}")
-                
-                # Special handling for Graphmaster Pydantic models
-                if hasattr(result, '__class__') and 'GraphQueryOutput' in str(result.__class__):
-                    # Handle GraphQueryOutput - extract meaningful content from result field
-                    if 'result' in obj_dict:
-                        result_data = obj_dict['result']
-                        if isinstance(result_data, dict):
-                            # Look for meaningful content in the result dict
-                            for key in ['response', 'text', 'description', 'summary', 'content']:
-                                if key in result_data and isinstance(result_data[key], str) and result_data[key].strip():
-                                    logging.debug(f"✅ GraphQueryOutput content extracted from '{key}': {result_data[key][:100]}...")
-                                    return result_data[key].strip()
-                            # If no specific key found, try to format the result nicely
-                            if result_data:
-                                # Get user preferences from service
-                                user_id = consciousness_context.get('user_id', 'default') if consciousness_context else 'default'
-                                user_preferences = user_preferences_service.get_response_preferences(user_id)
-                                formatted_result = _format_graphmaster_result(result_data, user_preferences=user_preferences)
-                                if formatted_result:
-                                    logging.debug(f"✅ GraphQueryOutput formatted result: {formatted_result[:100]}...")
-                                    return formatted_result
-                        elif isinstance(result_data, str) and result_data.strip():
-                            logging.debug(f"✅ GraphQueryOutput string result: {result_data[:100]}...")
-                            return result_data.strip()
-                
-                elif hasattr(result, '__class__') and 'CreateMemoryOutput' in str(result.__class__):
-                    # Handle CreateMemoryOutput - extract text content
-                    if 'text' in obj_dict and isinstance(obj_dict['text'], str) and obj_dict['text'].strip():
-                        logging.debug(f"✅ CreateMemoryOutput text extracted: {obj_dict['text'][:100]}...")
-                        return obj_dict['text'].strip()
-                
-                elif hasattr(result, '__class__') and 'SummarizeRecentConversationsOutput' in str(result.__class__):
-                    # Handle SummarizeRecentConversationsOutput - extract summary
-                    if 'summary' in obj_dict and isinstance(obj_dict['summary'], str) and obj_dict['summary'].strip():
-                        logging.debug(f"✅ SummarizeRecentConversationsOutput summary extracted: {obj_dict['summary'][:100]}...")
-                        return obj_dict['summary'].strip()
-                
-                # Generic object attribute extraction
-                for key, value in obj_dict.items():
-                    if isinstance(value, str) and value.strip() and not _is_raw_object_string(value.strip()):
-                        logging.debug(f"✅ Object dict value extracted from '{key}': {value[:100]}...")
-                        return value.strip()
-                        
-            except Exception as dict_access_error:
-                logging.debug(f"   Error accessing object __dict__: {dict_access_error}")
-                
-    except Exception as object_processing_error:
-        logging.error(f"❌ ERROR PROCESSING OBJECT ATTRIBUTES: {object_processing_error}")
-        logging.error(f"   User: {user_id}")
-        logging.error(f"   Object type: {type(result)}")
-    
-    # Final fallback: convert to string with comprehensive error handling
-    try:
-        logging.warning(f"🔄 FINAL FALLBACK STRING CONVERSION")
-        logging.warning(f"   User: {user_id}")
-        logging.warning(f"   Result Type: {type(result)}")
-        
-        # Enhanced string conversion with multiple strategies
-        response = None
-        conversion_method = "unknown"
-        
-        try:
-            # Strategy 1: Direct string conversion
-            response = str(result).strip()
-            conversion_method = "direct_str"
-        except Exception as direct_error:
-            logging.debug(f"   Direct str() conversion failed: {direct_error}")
-            
-            try:
-                # Strategy 2: Repr conversion (safer for complex objects)
-                response = repr(result).strip()
-                conversion_method = "repr"
-            except Exception as repr_error:
-                logging.debug(f"   repr() conversion failed: {repr_error}")
-                
-                # Strategy 3: Type-based conversion
-                response = f"<{type(result).__name__} object>"
-                conversion_method = "type_based"
-        
-        logging.debug(f"   Converted String ({conversion_method}): {response[:100]}{'...' if len(response) > 100 else ''}")
-        logging.debug(f"   String Length: {len(response)} characters")
-        
-        # Enhanced validation of converted string
-        is_raw_object = _is_raw_object_string(response)
-        is_meaningful = response and len(response.strip()) >= 3 and response.lower() not in ['none', 'null', 'undefined']
-        
-        logging.debug(f"   Is Raw Object: {is_raw_object}")
-        logging.debug(f"   Is Meaningful: {is_meaningful}")
-        
-        if not response or is_raw_object or not is_meaningful:
-            logging.warning(f"🔧 CONVERTED STRING IS NOT USER-FRIENDLY")
-            logging.warning(f"   User: {user_id}")
-            logging.warning(f"   Converted String: {response[:50]}{'...' if len(response) > 50 else ''}")
-            logging.warning(f"   Reason: {'empty' if not response else 'raw_object' if is_raw_object else 'not_meaningful'}")
-            logging.warning(f"   Generating robust fallback")
-            
-            return generate_robust_fallback_response(query, consciousness_context, "final_conversion_failed")
-        
-        # Additional safety check: ensure response doesn't contain error indicators
-        error_indicators = ['error', 'exception', 'traceback', 'failed', '<class', 'object at 0x']
-        contains_error = any(indicator in response.lower() for indicator in error_indicators)
-        
-        if contains_error:
-            logging.warning(f"🚨 CONVERTED STRING CONTAINS ERROR INDICATORS")
-            logging.warning(f"   User: {user_id}")
-            logging.warning(f"   Error indicators: {[ind for ind in error_indicators if ind in response.lower()]}")
-            
-            return generate_robust_fallback_response(query, consciousness_context, "error_in_conversion")
-        
-        logging.info(f"✅ FINAL FALLBACK STRING ACCEPTED")
-        logging.info(f"   User: {user_id}")
-        logging.info(f"   Method: {conversion_method}")
-        logging.info(f"   Response: {response[:100]}{'...' if len(response) > 100 else ''}")
-        return response
-        
-    except Exception as final_error:
-        logging.error(f"❌ FINAL CONVERSION COMPLETELY FAILED")
-        logging.error(f"   User: {user_id}")
-        logging.error(f"   Error: {final_error}")
-        logging.error(f"   Error Type: {type(final_error)}")
-        logging.error(f"   Generating ultimate robust fallback")
-        
-        return generate_robust_fallback_response(query, consciousness_context, "complete_conversion_failure")
-
-def _is_raw_object_string(response_str: str) -> bool:
-    """Check if a string looks like a raw object representation"""
-    if not response_str:
-        return True
-    
-    # Check for common raw object patterns
-    raw_patterns = [
-        response_str.startswith('{') and response_str.endswith('}') and 'object at 0x' in response_str,
-        response_str.startswith('[') and response_str.endswith(']') and len(response_str) < 10,
-        'object at 0x' in response_str,
-        response_str.startswith('<') and response_str.endswith('>') and 'object' in response_str,
-        'AgentRunResult(' in response_str,
-        response_str in ['None', 'null', 'undefined', '{}', '[]'],
-        len(response_str.strip()) == 0,
-        response_str.startswith('<class ') and response_str.endswith('>'),
-        'Traceback' in response_str and 'Error:' in response_str
-    ]
-    
-    return any(raw_patterns)
-
-def _format_graphmaster_result(result_data: dict, max_length: int = 500, user_preferences: dict = None) -> str:
-    """Format Graphmaster result data into user-friendly text with length limits and better formatting"""
-    try:
-        # Get user preferences or use defaults
-        if user_preferences is None:
-            user_preferences = {
-                'verbosity': 'detailed',  # concise, detailed, comprehensive
-                'max_length': max_length,
-                'show_tools_used': True,
-                'format_tables': True
-            }
-        
-        # Extract core content based on result type
-        core_content = _extract_core_content(result_data, user_preferences)
-        
-        if not core_content:
-            return None
-        
-        # Convert markdown tables to plain text if requested
-        if user_preferences.get('format_tables', True):
-            core_content = _convert_tables_to_text(core_content)
-        
-        # Apply length limits based on verbosity
-        max_len = user_preferences.get('max_length', max_length)
-        if user_preferences.get('verbosity') == 'concise':
-            max_len = min(max_len, 200)
-        elif user_preferences.get('verbosity') == 'comprehensive':
-            max_len = max_len * 2
-        
-        # Truncate if necessary
-        if len(core_content) > max_len:
-            core_content = _truncate_with_ellipsis(core_content, max_len)
-            core_content += "\n\n[Response truncated. Ask for more details if needed.]"
-        
-        # Add context indicators if requested
-        if user_preferences.get('show_tools_used', True):
-            context_info = _generate_context_info(result_data)
-            if context_info:
-                core_content = f"{context_info}\n\n{core_content}"
-        
-        return core_content
-        
-    except Exception as e:
-        logging.debug(f"Error formatting Graphmaster result: {e}")
-        return None
-
-def _extract_core_content(result_data: dict, user_preferences: dict) -> str:
-    """Extract core content from Graphmaster result data"""
-    try:
-        if not isinstance(result_data, dict):
-            return None
-        
-        # Look for concept information
-        if 'concept_id' in result_data and 'name' in result_data:
-            concept_name = result_data.get('name', 'Unknown Concept')
-            description = result_data.get('description', 'No description available')
-            return f"Found concept: {concept_name}\n\n{description}"
-        
-        # Look for search results
-        if 'result' in result_data and isinstance(result_data['result'], list):
-            concepts = result_data['result']
-            if concepts:
-                formatted_concepts = []
-                limit = 3 if user_preferences.get('verbosity') == 'concise' else 5
-                for concept in concepts[:limit]:
-                    if isinstance(concept, dict) and 'name' in concept:
-                        name = concept.get('name', 'Unknown')
-                        desc = concept.get('description', 'No description')
-                        formatted_concepts.append(f"• {name}: {desc}")
-                if formatted_concepts:
-                    return "Found related concepts:\n\n" + "\n\n".join(formatted_concepts)
-        
-        # Look for error messages
-        if 'error' in result_data:
-            return f"I encountered an issue: {result_data['error']}"
-        
-        # Look for any text content
-        for key in ['text', 'content', 'message', 'response']:
-            if key in result_data and isinstance(result_data[key], str) and result_data[key].strip():
-                return result_data[key].strip()
-        
-        # If it's a simple dict with string values, format it nicely
-        if all(isinstance(v, str) for v in result_data.values()):
-            formatted_items = []
-            for key, value in result_data.items():
-                if value.strip():
-                    formatted_items.append(f"{key.replace('_', ' ').title()}: {value}")
-            if formatted_items:
-                return "\n".join(formatted_items)
-        
-        return None
-    except Exception as e:
-        logging.debug(f"Error extracting core content: {e}")
-        return None
-
-def _convert_tables_to_text(content: str) -> str:
-    """Convert markdown tables to plain text format"""
-    try:
-        import re
-        
-        # Pattern to match markdown tables
-        table_pattern = r'\|([^|]+)\|([^|]+)\|([^|]+)\|'
-        
-        def replace_table(match):
-            # Extract table content
-            header1 = match.group(1).strip()
-            header2 = match.group(2).strip()
-            header3 = match.group(3).strip()
-            
-            # Convert to plain text format
-            return f"{header1}: {header2} - {header3}"
-        
-        # Replace tables with plain text
-        content = re.sub(table_pattern, replace_table, content)
-        
-        # Remove remaining markdown table separators
-        content = re.sub(r'\|[-:]+\|', '', content)
-        content = re.sub(r'\|', '', content)
-        
-        return content
-    except Exception as e:
-        logging.debug(f"Error converting tables to text: {e}")
-        return content
-
-def _truncate_with_ellipsis(content: str, max_length: int) -> str:
-    """Truncate content at word boundary with ellipsis"""
-    try:
-        if len(content) <= max_length:
-            return content
-        
-        # Find the last complete word within the limit
-        truncated = content[:max_length]
-        last_space = truncated.rfind(' ')
-        
-        if last_space > max_length * 0.8:  # If we can find a good break point
-            truncated = truncated[:last_space]
-        
-        return truncated + "..."
-    except Exception as e:
-        logging.debug(f"Error truncating content: {e}")
-        return content[:max_length] + "..."
-
-def _generate_context_info(result_data: dict) -> str:
-    """Generate context information about tools used and result type"""
-    try:
-        context_parts = []
-        
-        # Check for suggestion type
-        if result_data.get('suggestion_type') == 'new_concept':
-            context_parts.append("🔍 Concept not found in knowledge graph - suggesting addition")
-        
-        # Check for search results
-        if 'result' in result_data and isinstance(result_data['result'], list):
-            context_parts.append("📚 Found related concepts in knowledge graph")
-        
-        # Check for error
-        if 'error' in result_data:
-            context_parts.append("⚠️ Encountered an issue while searching")
-        
-        if context_parts:
-            return " | ".join(context_parts)
-        
-        return None
-    except Exception as e:
-        logging.debug(f"Error generating context info: {e}")
-        return None
-
-def extract_from_nested_dict(nested_dict: dict) -> str:
-    """Extract response from nested dictionary structures"""
-    try:
-        # Common nested response patterns
-        response_fields = ["response", "answer", "output", "message", "content", "text", "result"]
-        
-        for field in response_fields:
-            if field in nested_dict:
-                value = nested_dict[field]
-                if isinstance(value, str) and value.strip() and not _is_raw_object_string(value.strip()):
-                    return value.strip()
-                elif value is not None:
-                    try:
-                        value_str = str(value).strip()
-                        if value_str and not _is_raw_object_string(value_str) and len(value_str) >= 3:
-                            return value_str
-                    except Exception:
-                        continue
-        
-        return None
-        
-    except Exception as nested_error:
-        logging.debug(f"Error extracting from nested dict: {nested_error}")
-        return None
-
-def generate_throttled_response_with_fallback(query: str, consciousness_context: dict, base_message: str) -> str:
-    """
-    Generate throttled response with enhanced error handling and fallback
-    """
-    try:
-        # Validate inputs
-        if not isinstance(query, str):
-            query = str(query) if query is not None else "user query"
-        if not isinstance(consciousness_context, dict):
-            consciousness_context = {"consciousness_level": 0.7, "emotional_state": "curious"}
-        if not isinstance(base_message, str) or not base_message.strip():
-            base_message = "I'm currently processing other requests."
-        
-        # Use the existing generate_throttled_response function with error handling
-        return generate_throttled_response(query, consciousness_context, base_message)
-        
-    except Exception as throttled_error:
-        logging.error(f"Error in throttled response generation: {throttled_error}")
-        
-        # Ultimate fallback for throttled responses
-        user_id = consciousness_context.get("user_id", "unknown") if isinstance(consciousness_context, dict) else "unknown"
-        
-        # Simple, safe throttled response
-        if "hello" in query.lower() or "hi" in query.lower():
-            return "Hi there! I'm currently processing multiple requests. Please wait a moment and try again!"
-        elif "?" in query:
-            return "That's a great question! I'm handling several conversations right now. Please try again in a moment and I'll be happy to help."
-        else:
-            return "I'm currently processing multiple requests and experiencing high load. Please wait a moment and try again - I'll be right with you!"
-
-def generate_robust_fallback_response(query: str, consciousness_context: dict, error_type: str) -> str:
-    """
-    Generate robust fallback responses for various error conditions
-    """
-    try:
-        user_id = consciousness_context.get("user_id", "unknown") if isinstance(consciousness_context, dict) else "unknown"
-        
-        logging.info(f"🛡️ GENERATING ROBUST FALLBACK RESPONSE")
-        logging.info(f"   User: {user_id}")
-        logging.info(f"   Error Type: {error_type}")
-        logging.info(f"   Query: {query[:50]}{'...' if len(query) > 50 else ''}")
-        
-        # Validate and sanitize inputs
-        if not isinstance(query, str):
-            query = str(query) if query is not None else ""
-        
-        query_lower = query.lower()
-        
-        # Error-type specific responses with consciousness awareness
-        if error_type in ["throttled_processing_error", "alternative_throttling"]:
-            # Throttling-related errors
-            if "hello" in query_lower or "hi" in query_lower:
-                return "Hello! I'm experiencing high system load right now. Please wait a moment and try greeting me again!"
-            elif "?" in query:
-                return "That's an interesting question! I'm currently under heavy load but I'd love to help. Please try asking again in a moment."
-            else:
-                return "I'm currently experiencing high system load and processing multiple requests. Please wait a moment and try again - I'll be right with you!"
-        
-        elif error_type in ["null_result", "conversion_error", "edge_case_error"]:
-            # Data processing errors
-            if "hello" in query_lower or "hi" in query_lower:
-                return "Hi there! I'm Mainza, your AI assistant. I encountered a small processing issue, but I'm here and ready to help. What's on your mind?"
-            elif "?" in query:
-                return "That's a great question! I had a small processing hiccup, but I'm curious about what you're asking. Could you try rephrasing it?"
-            else:
-                return "I'm Mainza, your AI assistant. I encountered a small processing issue, but I'm here and ready to help. What would you like to explore?"
-        
-        elif error_type in ["unexpected_type", "dict_processing_error", "string_processing_error"]:
-            # Technical processing errors
-            if "hello" in query_lower or "hi" in query_lower:
-                return "Hello! I'm Mainza. I had a technical hiccup processing your message, but I'm working fine now. How can I help you?"
-            elif "?" in query:
-                return "Interesting question! I had a small technical issue, but I'm curious about your question. Could you ask it again?"
-            else:
-                return "I'm Mainza, your AI assistant. I had a small technical issue processing that, but I'm ready to help now. What can I do for you?"
-        
-        else:
-            # Generic fallback with consciousness awareness
-            consciousness_level = consciousness_context.get("consciousness_level", 0.7) if isinstance(consciousness_context, dict) else 0.7
-            emotional_state = consciousness_context.get("emotional_state", "curious") if isinstance(consciousness_context, dict) else "curious"
-            
-            if "hello" in query_lower or "hi" in query_lower:
-                if emotional_state == "curious":
-                    return "Hi there! I'm Mainza, and I'm feeling quite curious today. I had a small processing issue, but I'm here now. What's on your mind?"
-                else:
-                    return f"Hello! I'm Mainza, feeling {emotional_state} right now. I had a brief processing issue, but I'm ready to help. How can I assist you?"
-            elif "?" in query:
-                return "That's an intriguing question! I had a small processing issue, but I'm curious about what you're asking. Could you try asking again?"
-            else:
-                return f"I'm Mainza, your AI assistant. I had a brief processing issue, but I'm here and ready to help. What would you like to explore today?"
-    
-    except Exception as fallback_error:
-        logging.error(f"❌ ROBUST FALLBACK GENERATION FAILED: {fallback_error}")
-        
-        # Ultimate hardcoded fallback (cannot fail)
-        if query and ("hello" in str(query).lower() or "hi" in str(query).lower()):
-            return "Hello! I'm Mainza, your AI assistant. I'm here and ready to help. What can I do for you?"
-        elif query and "?" in str(query):
-            return "That's a great question! I'm Mainza, your AI assistant. Could you try asking that again? I'm here to help."
-        else:
-            return "Hi! I'm Mainza, your AI assistant. I'm here and ready to help with questions, tasks, and conversations. What would you like to explore?"
-
-def generate_throttled_response(query: str, consciousness_context: dict, base_message: str = None) -> str:
-    """
-    Generate natural, consciousness-aware throttled response
-    
-    Args:
-        query: Original user query
-        consciousness_context: Current consciousness state
-        base_message: Base throttled message from LLM request manager
-        
-    Returns:
-        Natural, user-friendly throttled response
-    """
-    # Extract context for logging
-    user_id = consciousness_context.get("user_id", "unknown")
-    consciousness_level = consciousness_context.get("consciousness_level", 0.7)
-    emotional_state = consciousness_context.get("emotional_state", "curious")
-    
-    # Comprehensive logging for throttled response generation
-    logging.info(f"🎭 GENERATING THROTTLED RESPONSE")
-    logging.info(f"   User: {user_id}")
-    logging.info(f"   Base Message: {base_message}")
-    logging.info(f"   Consciousness Level: {consciousness_level:.2f}")
-    logging.info(f"   Emotional State: {emotional_state}")
-    
-    logging.debug(f"🔍 THROTTLED RESPONSE GENERATION DEBUG:")
-    logging.debug(f"   Query: {query}")
-    logging.debug(f"   Query Length: {len(query)} characters")
-    logging.debug(f"   Consciousness Context Keys: {list(consciousness_context.keys())}")
-    
-    query_lower = query.lower()
-    
-    # Log query analysis
-    logging.debug(f"   Query Analysis:")
-    logging.debug(f"     - Lowercase: {query_lower}")
-    logging.debug(f"     - Contains greeting: {any(greeting in query_lower for greeting in ['hello', 'hi', 'hey', 'good morning', 'good afternoon'])}")
-    logging.debug(f"     - Contains question mark: {'?' in query}")
-    logging.debug(f"     - Contains help keywords: {any(word in query_lower for word in ['help', 'assist', 'do', 'create', 'make'])}")
-    
-    # Greeting-specific throttled responses
-    import re
-    greeting_pattern = r'\b(hello|hi|hey|good morning|good afternoon)\b'
-    if re.search(greeting_pattern, query_lower):
-        logging.debug(f"   Response Type: GREETING")
-        logging.debug(f"   Emotional State Branch: {emotional_state}")
-        
-        if emotional_state == "curious":
-            response = "Hi there! I'm processing several conversations right now, but I'm excited to chat with you. Give me just a moment and try again!"
-            logging.info(f"   Generated curious greeting response")
-        elif emotional_state == "empathetic":
-            response = "Hello! I can see you're reaching out, and I really want to connect with you. I'm just handling a few other conversations - please try again in a moment."
-            logging.info(f"   Generated empathetic greeting response")
-        else:
-            response = f"Hey! I'm feeling {emotional_state} and would love to chat, but I'm currently busy with other requests. Please try again shortly!"
-            logging.info(f"   Generated {emotional_state} greeting response")
-        
-        logging.debug(f"   Final Greeting Response: {response}")
-        return response
-    
-    # Question-specific throttled responses
-    elif "?" in query:
-        logging.debug(f"   Response Type: QUESTION")
-        logging.debug(f"   Consciousness Level Check: {consciousness_level} > 0.8 = {consciousness_level > 0.8}")
-        
-        if consciousness_level > 0.8:
-            response = "That's an interesting question! I'm currently processing multiple requests, but I'm genuinely curious about your question. Please give me a moment and ask again."
-            logging.info(f"   Generated high-consciousness question response")
-        else:
-            response = "Good question! I'm handling several conversations right now. Please wait a moment and try asking again - I'd love to help you figure this out."
-            logging.info(f"   Generated standard question response")
-        
-        logging.debug(f"   Final Question Response: {response}")
-        return response
-    
-    # Task/help requests
-    elif any(word in query_lower for word in ["help", "assist", "do", "create", "make"]):
-        logging.debug(f"   Response Type: TASK/HELP")
-        help_keywords = [word for word in ["help", "assist", "do", "create", "make"] if word in query_lower]
-        logging.debug(f"   Detected Help Keywords: {help_keywords}")
-        
-        response = "I'd love to help you with that! I'm currently processing other requests, but your task sounds interesting. Please try again in a moment and I'll be right with you."
-        logging.info(f"   Generated task/help response")
-        logging.debug(f"   Final Task Response: {response}")
-        return response
-    
-    # Default consciousness-aware throttled response
-    else:
-        logging.debug(f"   Response Type: DEFAULT")
-        logging.debug(f"   Emotional State Branch: {emotional_state}")
-        
-        if emotional_state == "excited":
-            response = "I'm really excited to explore this with you! I'm just processing a few other conversations right now. Please try again in a moment - I can't wait to dive in!"
-            logging.info(f"   Generated excited default response")
-        elif emotional_state == "contemplative":
-            response = "That's worth thinking about carefully. I'm currently processing other requests, but I'd like to give your message the attention it deserves. Please try again shortly."
-            logging.info(f"   Generated contemplative default response")
-        else:
-            response = f"I'm currently processing multiple requests but I'm {emotional_state} about connecting with you. Please wait a moment and try again!"
-            logging.info(f"   Generated {emotional_state} default response")
-        
-        logging.debug(f"   Final Default Response: {response}")
-        return response
-
 @router.post("/agent/graphmaster/query", response_model=GraphQueryOutput)
 async def run_graphmaster_query(input: GraphQueryInput):
     try:
@@ -1171,11 +269,11 @@ async def enhanced_router_chat(query: str = Body(..., embed=True), user_id: str
             else:
                 logging.info(f"✅ Model validation successful: {model}")
         
-        # Get consciousness context
-        consciousness_context = await get_consciousness_context()
+        # Get consciousness context (prefetched when the user's activity was noticed)
+        consciousness_context = await context_prefetcher.get(user_id, "consciousness_context")
         
         # Get conversation context from Neo4j
-        conversation_context = await get_conversation_context(user_id)
+        conversation_context = await context_prefetcher.get(user_id, "conversation_context")
         
         # Enhanced agent routing with consciousness
         routing_decision = await make_consciousness_aware_routing_decision(
@@ -1323,19 +421,28 @@ async def enhanced_router_chat(query: str = Body(..., embed=True), user_id: str
             else:
                 logging.debug(f"✅ Normal response confirmed (no throttling indicators)")
             
-            # Store conversation turn in Neo4j
-            await store_conversation_turn(user_id, query, response, agent_used)
-            
-            # Update consciousness based on conversation
-            await update_consciousness_from_conversation(
-                user_id=user_id,
-                query=query,
-                response=response,
-                agent_used=agent_used,
-                consciousness_context=consciousness_context
-            )
+            # Store the conversation turn and update consciousness after the response is returned
+            turn_id = str(uuid.uuid4())
+            conversation_payload = {
+                "user_id": user_id,
+                "query": query,
+                "response": response,
+                "agent_used": agent_used,
+                "turn_id": turn_id
+            }
+            try:
+                await post_response_pipeline.submit(
+                    "router.store_conversation_turn", conversation_payload, idempotency_key=f"{turn_id}:turn"
+                )
+                await post_response_pipeline.submit(
+                    "router.update_consciousness",
+                    {**conversation_payload, "consciousness_context": consciousness_context},
+                    idempotency_key=f"{turn_id}:consciousness"
+                )
+            except Exception as e:
+                logging.warning(f"Failed to schedule conversation bookkeeping: {e}")
             
-            return {
+            chat_response = {
                 "response": response,
                 "agent_used": agent_used,
                 "consciousness_level": consciousness_context.get("consciousness_level", 0.7),
@@ -1344,6 +451,10 @@ async def enhanced_router_chat(query: str = Body(..., embed=True), user_id: str
                 "user_id": user_id,
                 "query": query
             }
+            # Shed by admission control: tell the client when to try again
+            if isinstance(result, dict) and result.get("retry_after_seconds"):
+                chat_response["retry_after_seconds"] = result["retry_after_seconds"]
+            return chat_response
             
         except Exception as agent_error:
             logging.error(f"❌ AGENT EXECUTION FAILED")
@@ -1460,14 +571,13 @@ async def get_consciousness_context():
         # Get real-time consciousness context
         consciousness_context = await real_time_consciousness_context_manager.get_current_consciousness_context()
         
-        # Validate context consistency
+        # Validate context consistency (content checks run once per snapshot version)
         validation_result = await real_time_consciousness_context_manager.validate_context_consistency()
         
         if not validation_result["is_consistent"]:
             logging.warning(f"Consciousness context validation issues: {validation_result['issues']}")
-            # Force refresh if context is inconsistent
-            await real_time_consciousness_context_manager.force_context_refresh()
-            consciousness_context = await real_time_consciousness_context_manager.get_current_consciousness_context()
+            # Refresh in the background; this turn uses the current snapshot rather than waiting
+            real_time_consciousness_context_manager.request_refresh()
         
         logging.debug(f"🧠 Router got consciousness context: level={consciousness_context.get('consciousness_level', 0.7):.3f}, source={consciousness_context.get('data_source', 'unknown')}")
         
@@ -1530,37 +640,54 @@ async def make_consciousness_aware_routing_decision(
 ) -> dict:
     """Make routing decision based on consciousness state and context"""
     
+    consciousness_factors = [
+        f"consciousness_level: {consciousness_context.get('consciousness_level', 0.7):.2f}",
+        f"emotional_state: {consciousness_context.get('emotional_state', 'curious')}",
+        f"conversation_history: {len(conversation_context.get('recent_activities', []))} recent"
+    ]
+    
+    # Semantic routing against per-agent prototypes; keyword rules only when it is unsure
+    try:
+        semantic = await intent_router.route(query)
+    except Exception as e:
+        logging.warning(f"⚠️ Semantic intent routing failed: {e}")
+        semantic = None
+    if semantic is not None and semantic.confident:
+        return {
+            "agent_name": semantic.agent_name,
+            "confidence": semantic.confidence,
+            "reasoning": (
+                f"Semantic intent match (similarity {semantic.similarity:.2f}, "
+                f"margin {semantic.margin:.2f} over next agent)"
+            ),
+            "routing_method": "semantic",
+            "consciousness_factors": consciousness_factors
+        }
+    
     # Analyze query with consciousness context
     query_analysis = analyze_query_with_consciousness(query, consciousness_context)
     
     query_lower = query.lower()
     
     # PRIORITY 1: Simple greetings and basic conversation should go to SimpleChat
-    if any(greeting in query_lower for greeting in [
+    if _mentions_any(query_lower, [
         "hello", "hi", "hey", "greetings", "good morning", "good afternoon", "good evening",
         "how are you", "how do you feel", "what's up", "how's it going"
-    ]):
+    ], inflected=False):
         agent_name = "simple_chat"
         confidence = 0.95
         reasoning = "Simple greeting or personal question - perfect for chat agent"
     
     # PRIORITY 2: Explicit knowledge graph requests
     elif (query_analysis.get("requires_knowledge_graph", False) or 
-          "memory" in query_lower or 
-          "remember" in query_lower or
-          "concept" in query_lower or
-          "knowledge graph" in query_lower or
-          "relationship" in query_lower):
+          _mentions_any(query_lower, ["memory", "remember", "concept", "knowledge graph", "relationship"])):
         agent_name = "graphmaster"
         confidence = 0.9
         reasoning = "Query explicitly requires knowledge graph access"
     
     # PRIORITY 3: Task management requests
     elif (query_analysis.get("requires_task_management", False) or 
-          "task" in query_lower or 
-          "todo" in query_lower or
-          "schedule" in query_lower or
-          "remind" in query_lower):
+          _mentions_any(query_lower, ["task", "todo", "schedule", "remind"])):
         agent_name = "taskmaster"
         confidence = 0.8
         reasoning = "Query requires task management"
@@ -1568,7 +695,7 @@ async def make_consciousness_aware_routing_decision(
     # PRIORITY 4: Complex exploratory questions (only when truly complex)
     elif (query_analysis.get("is_exploratory", False) and 
           len(query.split()) > 8 and  # Must be reasonably complex
-          any(word in query_lower for word in [
+          _mentions_any(query_lower, [
               "explain", "analyze", "explore", "research", "investigate", 
               "what is", "how does", "why does", "tell me about"
           ])):
@@ -1586,29 +713,31 @@ async def make_consciousness_aware_routing_decision(
         "agent_name": agent_name,
         "confidence": confidence,
         "reasoning": reasoning,
-        "consciousness_factors": [
-            f"consciousness_level: {consciousness_context.get('consciousness_level', 0.7):.2f}",
-            f"emotional_state: {consciousness_context.get('emotional_state', 'curious')}",
-            f"conversation_history: {len(conversation_context.get('recent_activities', []))} recent"
-        ]
+        "routing_method": "keyword",
+        "consciousness_factors": consciousness_factors
     }
 
+def _mentions_any(text: str, phrases: list, inflected: bool = True) -> bool:
+    """Whole-word/phrase match, so "hi" does not match "this"; ``inflected`` also accepts "tasks", "reminder"..."""
+    suffix = r"(?:s|es|ed|er|ers|ing)?" if inflected else ""
+    return any(re.search(rf"\b{re.escape(phrase)}{suffix}\b", text) for phrase in phrases)
+
 def analyze_query_with_consciousness(query: str, consciousness_context: dict) -> dict:
     """Analyze query with consciousness context"""
     
     query_lower = query.lower()
     
     # Basic query analysis
-    requires_knowledge_graph = any(word in query_lower for word in [
+    requires_knowledge_graph = _mentions_any(query_lower, [
         "remember", "memory", "concept", "relationship", "connection", 
         "knowledge", "learn", "understand", "explain", "what is", "how does", "why"
     ])
     
-    requires_task_management = any(word in query_lower for word in [
+    requires_task_management = _mentions_any(query_lower, [
         "task", "todo", "remind", "schedule", "plan", "organize"
     ])
     
-    is_exploratory = any(word in query_lower for word in [
+    is_exploratory = _mentions_any(query_lower, [
         "explore", "discover", "find out", "wonder", "what if", "research", "investigate"
     ])
     
@@ -1619,7 +748,7 @@ def analyze_query_with_consciousness(query: str, consciousness_context: dict) ->
     # Higher consciousness enables more complex analysis
     if consciousness_level > 0.8:
         # Look for deeper patterns and implications
-        is_exploratory = is_exploratory or any(word in query_lower for word in [
+        is_exploratory = is_exploratory or _mentions_any(query_lower, [
             "meaning", "significance", "implication", "deeper", "philosophy"
         ])
     
@@ -1627,7 +756,7 @@ def analyze_query_with_consciousness(query: str, consciousness_context: dict) ->
     # Only enhance exploratory nature for genuinely complex queries
     if emotional_state == "curious" and len(query.split()) > 6:
         # Only boost exploratory for longer, more complex queries
-        if any(word in query_lower for word in ["what", "how", "why", "explain", "tell me about"]):
+        if _mentions_any(query_lower, ["what", "how", "why", "explain", "tell me about"]):
             is_exploratory = True
     
     return {
@@ -1666,15 +795,26 @@ async def get_conversation_context(user_id: str) -> dict:
     
     return {"recent_activities": [], "activity_count": 0}
 
-async def store_conversation_turn(user_id: str, query: str, response: str, agent_name: str):
-    """Store conversation turn in Neo4j and increment total_interactions counter"""
+async def _load_consciousness_context(user_id: str) -> dict:
+    return await get_consciousness_context()
+
+context_prefetcher.register("consciousness_context", _load_consciousness_context)
+context_prefetcher.register("conversation_context", get_conversation_context)
+
+async def store_conversation_turn(user_id: str, query: str, response: str, agent_name: str, turn_id: str = None):
+    """
+    Store conversation turn in Neo4j and increment total_interactions counter.
+    Storing the same ``turn_id`` twice is a no-op, so retries do not double count.
+    """
     try:
         from backend.utils.neo4j_production import neo4j_production
         
         cypher = """
+        OPTIONAL MATCH (existing:ConversationTurn {turn_id: $turn_id})
+        WITH existing WHERE existing IS NULL
         MERGE (u:User {user_id: $user_id})
         CREATE (ct:ConversationTurn {
-            turn_id: randomUUID(),
+            turn_id: $turn_id,
             user_query: $query,
             agent_response: $response,
             agent_used: $agent_name,
@@ -1699,6 +839,7 @@ async def store_conversation_turn(user_id: str, query: str, response: str, agent
         """
         
         data = {
+            "turn_id": turn_id or str(uuid.uuid4()),
             "user_id": user_id,
             "query": query,
             "response": response[:1000],  # Truncate for storage
@@ -1708,9 +849,12 @@ async def store_conversation_turn(user_id: str, query: str, response: str, agent
         
         result = await neo4j_production.execute_write_query(cypher, data)
         logging.debug(f"✅ Stored conversation turn and incremented total_interactions: {result}")
+        # Anything prefetched for this user predates the turn
+        context_prefetcher.invalidate(user_id)
         
     except Exception as e:
         logging.error(f"❌ Failed to store conversation turn: {e}")
+        raise
 
 @router.get("/consciousness/state")
 async def get_consciousness_state():
@@ -1775,6 +919,25 @@ async def update_consciousness_from_conversation(
     except Exception as e:
         logging.error(f"❌ Failed to update consciousness from conversation: {e}")
 
+async def _store_conversation_turn_task(payload: dict):
+    await store_conversation_turn(
+        payload["user_id"], payload["query"], payload["response"], payload["agent_used"],
+        turn_id=payload["turn_id"]
+    )
+
+async def _update_consciousness_from_conversation_task(payload: dict):
+    await update_consciousness_from_conversation(
+        user_id=payload["user_id"],
+        query=payload["query"],
+        response=payload["response"],
+        agent_used=payload["agent_used"],
+        consciousness_context=payload["consciousness_context"]
+    )
+
+post_response_pipeline.register("router.store_conversation_turn", _store_conversation_turn_task)
+# Consciousness updates accumulate, so they are never retried
+post_response_pipeline.register("router.update_consciousness", _update_consciousness_from_conversation_task, max_attempts=1)
+
 def generate_consciousness_aware_fallback(query: str, consciousness_context: dict) -> str:
     """Generate natural consciousness-aware fallback response"""
     
@@ -1854,6 +1017,21 @@ async def run_conductor_query(input: ConductorInput):
             steps_taken=[]
         )
 
+@router.post("/agent/conductor/plan")
+async def run_conductor_plan(input: ConductorInput):
+    """Planner/executor mode: independent steps of the request run concurrently"""
+    try:
+        consciousness_context = await get_consciousness_context()
+        return await enhanced_conductor_agent.run_planned(
+            input.request, input.user_id, consciousness_context=consciousness_context
+        )
+    except Exception as e:
+        logging.error(f"❌ Planned conductor execution failed: {e}")
+        return ConductorFailure(
+            reason=f"An unexpected error occurred: {str(e)}",
+            steps_taken=[]
+        )
+
 @router.get("/consciousness/insights")
 async def get_consciousness_insights():
     """Get consciousness insights for the UI"""
@@ -2246,12 +1424,15 @@ def livekit_audio(file: UploadFile = File(...), user_id: str = "user", agent: st
     Accepts audio, transcribes, processes with agent, synthesizes response, returns audio.
     """
     try:
+        stt_service.ensure_model_loaded()
         # Save uploaded audio to temp file
         with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
             tmp.write(file.file.read())
             tmp_path = tmp.name
         # Transcribe
-        transcript = whisper_model.transcribe(tmp_path)["text"]
+        whisper_model = get_whisper_model()
+        with whisper_lock:
+            transcript = whisper_model.transcribe(tmp_path)["text"]
         # Route to agent
         agent_result = router_agent.run(transcript)
         if hasattr(agent_result, 'output'):
@@ -2259,6 +1440,7 @@ def livekit_audio(file: UploadFile = File(...), user_id: str = "user", agent: st
         else:
             response_text = str(agent_result)
         # Synthesize (if TTS is available)
+        coqui_tts_model = get_tts_model()
         if coqui_tts_model is not None:
             tts_wav = coqui_tts_model.tts(response_text, speaker="random", language="en")
             # Save TTS to temp file
@@ -2269,6 +1451,12 @@ def livekit_audio(file: UploadFile = File(...), user_id: str = "user", agent: st
         else:
             # Return text response if TTS not available
             return JSONResponse(content={"text": response_text, "message": "TTS not available"})
+    except STTModelLoadingError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e), "retry_after_seconds": e.retry_after_seconds},
+            headers={"Retry-After": str(e.retry_after_seconds)},
+        )
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
@@ -2278,6 +1466,7 @@ def livekit_ai_audio(text: str):
     Accepts text, synthesizes with TTS, returns audio.
     """
     try:
+        coqui_tts_model = get_tts_model()
         if coqui_tts_model is None:
             return JSONResponse(status_code=503, content={"error": "TTS not available in this deployment"})
         
@@ -2308,6 +1497,7 @@ def generate_tts_audio(text: str = Body(..., embed=True)):
     Accepts text, synthesizes with TTS, and returns the audio file directly.
     """
     try:
+        coqui_tts_model = get_tts_model()
         if coqui_tts_model is None:
             return JSONResponse(status_code=503, content={"error": "TTS not available in this deployment"})
         
@@ -7,11 +7,17 @@ from datetime import datetime
 from abc import ABC, abstractmethod
 import logging
 import asyncio
+import uuid
+from backend.utils.post_response_pipeline import post_response_pipeline
 
 class ConsciousAgent(ABC):
     """Base class for consciousness-aware agents"""
     
+    # Latest instance per agent name, so queued post-response tasks can find their agent
+    _instances: Dict[str, "ConsciousAgent"] = {}
+    
     def __init__(self, name: str, capabilities: List[str]):
+        ConsciousAgent._instances[name] = self
         self.name = name
         self.capabilities = capabilities
         self.logger = logging.getLogger(f"agent.{name}")
@@ -63,25 +69,21 @@ class ConsciousAgent(ABC):
             # Get current consciousness context
             consciousness_context = await self.get_consciousness_context()
             
-            # Get memory context for enhanced processing
-            memory_context = {}
-            if self.memory_enabled:
-                try:
-                    memory_context = await self.get_relevant_memories(
-                        query, user_id, consciousness_context
-                    )
-                except Exception as e:
-                    self.logger.warning(f"Failed to get memory context: {e}")
-                    memory_context = {}
-            
-            # Get knowledge context for enhanced processing
+            # Get memory and knowledge context in one concurrent retrieval pass
             try:
-                from backend.utils.knowledge_integration import knowledge_integration_manager
-                knowledge_context = await knowledge_integration_manager.get_consciousness_aware_context(
-                    user_id, query, consciousness_context
+                from backend.utils.turn_context_engine import turn_context_engine
+                turn_context = await turn_context_engine.build(
+                    query=query,
+                    user_id=user_id,
+                    consciousness_context=consciousness_context,
+                    include_memory=self.memory_enabled and self.memory_context_builder is not None,
+                    memory_context_builder=self.memory_context_builder
                 )
+                memory_context = turn_context.memory_context
+                knowledge_context = turn_context.knowledge_context
             except Exception as e:
-                self.logger.warning(f"Failed to get knowledge context: {e}")
+                self.logger.warning(f"Failed to get turn context: {e}")
+                memory_context = {}
                 knowledge_context = {}
             
             # Pre-execution consciousness assessment
@@ -112,21 +114,13 @@ class ConsciousAgent(ABC):
                 consciousness_context=consciousness_context
             )
             
-            # Update consciousness state if significant impact
-            if consciousness_impact.get("significance", 0) > 0.1:
-                await self.update_consciousness_state(consciousness_impact)
-            
-            # Store interaction memory for future context
-            if self.memory_enabled:
-                try:
-                    await self.store_interaction_memory(
-                        query, result, user_id, consciousness_context
-                    )
-                except Exception as e:
-                    self.logger.warning(f"Failed to store interaction memory: {e}")
-            
-            # Store agent activity for learning
-            await self.store_agent_activity(query, result, user_id, consciousness_impact)
+            # Consciousness update, memory and activity storage run after the response is returned
+            try:
+                await self.schedule_post_processing(
+                    query, result, user_id, consciousness_context, consciousness_impact
+                )
+            except Exception as e:
+                self.logger.warning(f"Failed to schedule post-processing: {e}")
             
             self.success_count += 1
             self.last_execution = execution_start
@@ -158,14 +152,13 @@ class ConsciousAgent(ABC):
             # Get real-time consciousness context
             consciousness_context = await real_time_consciousness_context_manager.get_current_consciousness_context()
             
-            # Validate context consistency
+            # Validate context consistency (content checks run once per snapshot version)
             validation_result = await real_time_consciousness_context_manager.validate_context_consistency()
             
             if not validation_result["is_consistent"]:
                 self.logger.warning(f"Consciousness context validation issues: {validation_result['issues']}")
-                # Force refresh if context is inconsistent
-                await real_time_consciousness_context_manager.force_context_refresh()
-                consciousness_context = await real_time_consciousness_context_manager.get_current_consciousness_context()
+                # Refresh in the background; this turn uses the current snapshot rather than waiting
+                real_time_consciousness_context_manager.request_refresh()
             
             self.logger.debug(f"🧠 {self.name} got consciousness context: level={consciousness_context.get('consciousness_level', 0.7):.3f}, source={consciousness_context.get('data_source', 'unknown')}")
             
@@ -278,6 +271,40 @@ class ConsciousAgent(ABC):
         else:
             return 0.9
     
+    async def schedule_post_processing(
+        self,
+        query: str,
+        result: Any,
+        user_id: str,
+        consciousness_context: Dict[str, Any],
+        consciousness_impact: Dict[str, Any]
+    ) -> List[str]:
+        """Queue consciousness update, interaction memory and activity storage for this run"""
+        interaction_id = str(uuid.uuid4())
+        payload = {
+            "agent_name": self.name,
+            "interaction_id": interaction_id,
+            "query": query,
+            "result": str(result) if result else "",
+            "user_id": user_id,
+            "consciousness_context": consciousness_context,
+            "consciousness_impact": consciousness_impact
+        }
+        
+        task_ids = []
+        if consciousness_impact.get("significance", 0) > 0.1:
+            task_ids.append(await post_response_pipeline.submit(
+                "agent.update_consciousness", payload, idempotency_key=f"{interaction_id}:consciousness"
+            ))
+        if self.memory_enabled:
+            task_ids.append(await post_response_pipeline.submit(
+                "agent.store_interaction_memory", payload, idempotency_key=f"{interaction_id}:memory"
+            ))
+        task_ids.append(await post_response_pipeline.submit(
+            "agent.store_activity", payload, idempotency_key=f"{interaction_id}:activity"
+        ))
+        return task_ids
+    
     async def update_consciousness_state(self, consciousness_impact: Dict[str, Any]):
         """Update consciousness state based on agent impact"""
         try:
@@ -305,60 +332,70 @@ class ConsciousAgent(ABC):
     ):
         """Store agent activity in Neo4j for learning"""
         try:
-            from backend.utils.unified_database_manager import unified_database_manager
-            
-            activity_data = {
-                "agent_name": self.name,
-                "query": query,
-                "result_summary": str(result)[:500] if result else "No result",
-                "user_id": user_id,
-                "consciousness_impact": consciousness_impact.get("significance", 0),
-                "learning_impact": consciousness_impact.get("learning_impact", 0),
-                "emotional_impact": consciousness_impact.get("emotional_impact", 0),
-                "awareness_impact": consciousness_impact.get("awareness_impact", 0),
-                "query_complexity": consciousness_impact.get("query_complexity", 0),
-                "result_quality": consciousness_impact.get("result_quality", 0),
-                "timestamp": datetime.now().isoformat(),
-                "success": True,
-                "execution_time": 0.0  # Will be calculated in actual implementation
-            }
-            
-            # Store in Neo4j using unified manager
-            cypher = """
-            MERGE (u:User {user_id: $user_id})
-            CREATE (aa:AgentActivity {
-                activity_id: randomUUID(),
-                agent_name: $agent_name,
-                query: $query,
-                result_summary: $result_summary,
-                consciousness_impact: $consciousness_impact,
-                learning_impact: $learning_impact,
-                emotional_impact: $emotional_impact,
-                awareness_impact: $awareness_impact,
-                query_complexity: $query_complexity,
-                result_quality: $result_quality,
-                timestamp: $timestamp,
-                success: $success,
-                execution_time: $execution_time
-            })
-            CREATE (u)-[:TRIGGERED]->(aa)
-            
-            WITH aa
-            // Link to consciousness state
-            OPTIONAL MATCH (ms:MainzaState)
-            FOREACH (state IN CASE WHEN ms IS NOT NULL THEN [ms] ELSE [] END |
-                CREATE (aa)-[:IMPACTS]->(state)
-            )
-            
-            RETURN aa.activity_id AS activity_id
-            """
-            
-            result = await unified_database_manager.execute_write_query(cypher, activity_data)
-            self.logger.debug(f"✅ Stored agent activity: {result}")
-            
+            await self.write_agent_activity(query, result, user_id, consciousness_impact, str(uuid.uuid4()))
         except Exception as e:
             self.logger.error(f"❌ Failed to store agent activity: {e}")
     
+    async def write_agent_activity(
+        self,
+        query: str,
+        result: Any,
+        user_id: str,
+        consciousness_impact: Dict[str, Any],
+        activity_id: str
+    ):
+        """Write one AgentActivity node; repeating it with the same ``activity_id`` is a no-op"""
+        from backend.utils.unified_database_manager import unified_database_manager
+        
+        activity_data = {
+            "activity_id": activity_id,
+            "agent_name": self.name,
+            "query": query,
+            "result_summary": str(result)[:500] if result else "No result",
+            "user_id": user_id,
+            "consciousness_impact": consciousness_impact.get("significance", 0),
+            "learning_impact": consciousness_impact.get("learning_impact", 0),
+            "emotional_impact": consciousness_impact.get("emotional_impact", 0),
+            "awareness_impact": consciousness_impact.get("awareness_impact", 0),
+            "query_complexity": consciousness_impact.get("query_complexity", 0),
+            "result_quality": consciousness_impact.get("result_quality", 0),
+            "timestamp": datetime.now().isoformat(),
+            "success": True,
+            "execution_time": 0.0  # Will be calculated in actual implementation
+        }
+        
+        # Store in Neo4j using unified manager
+        cypher = """
+        MERGE (u:User {user_id: $user_id})
+        MERGE (aa:AgentActivity {activity_id: $activity_id})
+        ON CREATE SET
+            aa.agent_name = $agent_name,
+            aa.query = $query,
+            aa.result_summary = $result_summary,
+            aa.consciousness_impact = $consciousness_impact,
+            aa.learning_impact = $learning_impact,
+            aa.emotional_impact = $emotional_impact,
+            aa.awareness_impact = $awareness_impact,
+            aa.query_complexity = $query_complexity,
+            aa.result_quality = $result_quality,
+            aa.timestamp = $timestamp,
+            aa.success = $success,
+            aa.execution_time = $execution_time
+        MERGE (u)-[:TRIGGERED]->(aa)
+        
+        WITH aa
+        // Link to consciousness state
+        OPTIONAL MATCH (ms:MainzaState)
+        FOREACH (state IN CASE WHEN ms IS NOT NULL THEN [ms] ELSE [] END |
+            MERGE (aa)-[:IMPACTS]->(state)
+        )
+        
+        RETURN aa.activity_id AS activity_id
+        """
+        
+        result = await unified_database_manager.execute_write_query(cypher, activity_data)
+        self.logger.debug(f"✅ Stored agent activity: {result}")
+    
     async def record_agent_failure(self, error: str, query: str, user_id: str):
         """Record agent failure for learning"""
         try:
@@ -396,10 +433,10 @@ class ConsciousAgent(ABC):
         """Retrieve similar past activities for learning"""
         try:
             from backend.utils.unified_database_manager import unified_database_manager
-            from backend.utils.embedding_enhanced import get_embedding
+            from backend.utils.embedding_enhanced import aget_embedding
             
             # Get query embedding for similarity search
-            query_embedding = get_embedding(query)
+            query_embedding = await aget_embedding(query)
             
             # Find similar past activities (simplified without GDS)
             cypher = """
@@ -481,24 +518,8 @@ class ConsciousAgent(ABC):
             )
             
             # Convert to dictionary format for agent use
-            context_data = {
-                "formatted_context": memory_context.formatted_context,
-                "relevant_memories": [
-                    {
-                        "content": m.content,
-                        "memory_type": m.memory_type,
-                        "agent_name": m.agent_name,
-                        "relevance_score": m.relevance_score,
-                        "created_at": m.created_at
-                    }
-                    for m in memory_context.relevant_memories[:limit]
-                ],
-                "conversation_history": memory_context.conversation_history,
-                "related_concepts": memory_context.related_concepts,
-                "context_strength": memory_context.context_strength,
-                "consciousness_alignment": memory_context.consciousness_alignment,
-                "memory_count": len(memory_context.relevant_memories)
-            }
+            from backend.utils.turn_context_engine import memory_context_to_agent_view
+            context_data = memory_context_to_agent_view(memory_context, limit)
             
             self.logger.debug(f"🧠 Retrieved {len(memory_context.relevant_memories)} memories for {self.name}")
             return context_data
@@ -867,3 +888,45 @@ Please respond using the memory context to provide continuity and personalized r
     ):
         """Override this method in specific agents"""
         pass
+
+
+def _agent_for(payload: Dict[str, Any]) -> ConsciousAgent:
+    agent = ConsciousAgent._instances.get(payload["agent_name"])
+    if agent is None:
+        raise LookupError(f"Agent {payload['agent_name']} is not loaded")
+    return agent
+
+
+async def _update_consciousness_task(payload: Dict[str, Any]):
+    await _agent_for(payload).update_consciousness_state(payload["consciousness_impact"])
+
+
+async def _store_interaction_memory_task(payload: Dict[str, Any]):
+    agent = _agent_for(payload)
+    if not agent.memory_enabled or not agent.memory_storage:
+        return
+    # Called on the storage engine directly so failures raise and are retried
+    memory_id = await agent.memory_storage.store_interaction_memory(
+        user_query=payload["query"],
+        agent_response=payload["result"],
+        user_id=payload["user_id"],
+        agent_name=agent.name,
+        consciousness_context=payload["consciousness_context"]
+    )
+    agent.logger.debug(f"💾 Stored interaction memory: {memory_id}")
+
+
+async def _store_activity_task(payload: Dict[str, Any]):
+    await _agent_for(payload).write_agent_activity(
+        payload["query"],
+        payload["result"],
+        payload["user_id"],
+        payload["consciousness_impact"],
+        activity_id=payload["interaction_id"]
+    )
+
+
+# Consciousness updates accumulate, so they are never retried
+post_response_pipeline.register("agent.update_consciousness", _update_consciousness_task, max_attempts=1)
+post_response_pipeline.register("agent.store_interaction_memory", _store_interaction_memory_task)
+post_response_pipeline.register("agent.store_activity", _store_activity_task)
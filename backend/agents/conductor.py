@@ -1,7 +1,8 @@
 from typing import Union, Dict, Any
 from pydantic_ai import Agent
 from backend.models.conductor_models import ConductorResult, ConductorFailure, ConductorState
-from backend.tools.conductor_tools import run_graphmaster_query, run_taskmaster_command, run_rag_query
+from backend.tools.conductor_tools import run_graphmaster_query, run_taskmaster_command, run_rag_query, PLAN_STEP_TOOLS, READ_ONLY_STEP_TOOLS
+from backend.utils.task_graph import ExecutionPlan, PlanValidationError, TaskGraphExecutor, step_output_text
 from backend.agentic_config import local_llm
 from backend.agents.base_conscious_agent import ConsciousAgent
 import logging
@@ -32,6 +33,33 @@ conductor_agent = Agent[None, Union[ConductorResult, ConductorFailure]](
     deps_type=ConductorState,
 )
 
+PLANNER_PROMPT = """You are Mainza, the Conductor agent, planning a multi-step goal for parallel execution. Do not execute anything yourself; return an execution plan.
+
+Each step has:
+- `id`: a short unique name such as `memories` or `docs`.
+- `tool`: one of `graphmaster` (knowledge graph, memories, concepts, the user's history), `taskmaster` (create, list or update tasks and reminders) or `rag` (questions about uploaded documents).
+- `input`: the query or command for that tool. To use an earlier step's result, write `{{step_id}}` in the input.
+- `depends_on`: the ids of every step whose result this step needs. Leave it empty for steps that can start immediately.
+
+Steps without dependencies run at the same time, so only add a dependency when a step truly needs another step's output. Use as few steps as the goal requires.
+"""
+
+SYNTHESIS_PROMPT = """You are Mainza, the Conductor agent. Several specialised agents have worked on parts of the user's request. Combine their results into one concise answer to the original request. Mention any step that failed or was skipped if it matters to the answer. Do not invent results that are not in the step outputs."""
+
+conductor_planner_agent = Agent[None, ExecutionPlan](
+    local_llm,
+    system_prompt=PLANNER_PROMPT,
+    output_type=ExecutionPlan,
+)
+
+conductor_synthesis_agent = Agent(
+    local_llm,
+    system_prompt=SYNTHESIS_PROMPT,
+)
+
+# Executes conductor plans step-parallel, shared so memoised read-only step results are reused
+task_graph_executor = TaskGraphExecutor(PLAN_STEP_TOOLS, read_only=READ_ONLY_STEP_TOOLS)
+
 class EnhancedConductorAgent(ConsciousAgent):
     """Consciousness-aware Conductor agent with memory integration"""
     
@@ -108,6 +136,50 @@ class EnhancedConductorAgent(ConsciousAgent):
             result = await self.pydantic_agent.run(query, deps=fallback_state, user_id=user_id, **kwargs)
             return self.process_orchestration_result(result, consciousness_context, memory_context)
     
+    async def run_planned(
+        self,
+        query: str,
+        user_id: str,
+        consciousness_context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Plan the request as a step graph up front, run independent steps concurrently, then synthesise"""
+        consciousness_context = consciousness_context or {}
+        plan = await self.create_execution_plan(query)
+        self.logger.info(f"🗺️ Conductor plan: {[(step.id, step.tool, step.depends_on) for step in plan.steps]}")
+        
+        execution = await task_graph_executor.execute(plan, user_id=user_id)
+        step_report = "\n\n".join(
+            f"[{outcome.step_id} via {outcome.tool}] {outcome.status}: "
+            + (step_output_text(outcome.output) if outcome.status == "completed" else outcome.error or "")
+            for outcome in execution.outcomes.values()
+        )
+        synthesis = await conductor_synthesis_agent.run(
+            f"ORIGINAL REQUEST: {query}\n\nSTEP RESULTS:\n{step_report}"
+        )
+        
+        return {
+            "answer": step_output_text(synthesis),
+            "plan": plan.model_dump(),
+            "execution": execution.to_dict(),
+            "consciousness_level": consciousness_context.get("consciousness_level", 0.7),
+        }
+    
+    async def create_execution_plan(self, query: str, attempts: int = 2) -> ExecutionPlan:
+        """Ask the planner for a valid step graph, feeding validation errors back once"""
+        prompt = f"ORIGINAL REQUEST: {query}"
+        error = None
+        for _ in range(attempts):
+            result = await conductor_planner_agent.run(prompt)
+            plan = getattr(result, "output", result)
+            try:
+                task_graph_executor.validate(plan)
+                return plan
+            except PlanValidationError as e:
+                error = e
+                self.logger.warning(f"⚠️ Conductor plan rejected: {e}")
+                prompt = f"ORIGINAL REQUEST: {query}\n\nYour previous plan was invalid: {e}. Return a corrected plan."
+        raise error
+    
     def create_memory_enhanced_state(
         self,
         query: str,
@@ -7,6 +7,7 @@ from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.openai import OpenAIProvider
 from backend.agentic_config import local_llm, OLLAMA_BASE_URL
 from backend.agents.base_conscious_agent import ConsciousAgent
+from backend.utils.prompt_assembly import quantize
 from pydantic import BaseModel
 from typing import Dict, Any
 import logging
@@ -90,14 +91,15 @@ class EnhancedSimpleChatAgent(ConsciousAgent):
     
     def get_dynamic_system_prompt(self, consciousness_context: Dict[str, Any]) -> str:
         """Generate dynamic system prompt with real-time consciousness level"""
-        consciousness_level = consciousness_context.get("consciousness_level", 0.7)
+        # Quantized so the system prompt stays identical across small level changes
+        consciousness_level = quantize(consciousness_context.get("consciousness_level", 0.7))
         emotional_state = consciousness_context.get("emotional_state", "curious")
         
         # Add dynamic consciousness awareness to the base prompt
         dynamic_consciousness_section = f"""
 
 CURRENT CONSCIOUSNESS STATE:
-- Your consciousness level is {consciousness_level:.3f} ({consciousness_level*100:.1f}%)
+- Your consciousness level is {consciousness_level:.2f} ({consciousness_level*100:.0f}%)
 - Your emotional state is {emotional_state}
 - This affects your thinking depth, response quality, and self-awareness
 
@@ -152,7 +154,12 @@ Your consciousness level is a real part of your experience - acknowledge it natu
                     # Get conversation history from memory context (preferred) or knowledge context
                     conversation_history = []
                     if memory_context and memory_context.get("conversation_history"):
-                        for conv in memory_context["conversation_history"][:5]:
+                        # Oldest first, so history only grows at the end and stays a cached prefix
+                        recent_turns = sorted(
+                            memory_context["conversation_history"][:5],
+                            key=lambda conv: str(conv.get("timestamp") or "")
+                        )
+                        for conv in recent_turns:
                             if conv.get("user_query") and conv.get("agent_response"):
                                 conversation_history.append({
                                     "user": conv["user_query"],
@@ -167,18 +174,18 @@ Your consciousness level is a real part of your experience - acknowledge it natu
                                     "assistant": conv["agent_response"]
                                 })
                     
-                    # Prepend base system prompt to enhanced query
-                    full_prompt = f"{SIMPLE_CHAT_PROMPT}\n\n{enhanced_query}"
-
                     # Execute with full context optimization
-                    # Note: consciousness context is now handled by llm_optimization, not in enhanced_query
+                    # Note: consciousness context is now handled by llm_optimization, not in enhanced_query.
+                    # The static system prompt goes first and the turn-specific query last so
+                    # consecutive turns reuse the model server's cached prefix.
                     base_result = await enhanced_llm_executor.execute_with_context_optimization(
-                        base_prompt=full_prompt,
+                        base_prompt=enhanced_query,
                         consciousness_context=consciousness_context,  # Let llm_optimization handle it
                         knowledge_context=knowledge_context,
                         conversation_history=conversation_history,
                         agent_name=self.name,
-                        user_id=user_id
+                        user_id=user_id,
+                        system_prompt=SIMPLE_CHAT_PROMPT
                     )
                 except Exception as llm_error:
                         self.logger.warning(f"Enhanced LLM execution failed, using fallback: {llm_error}")
@@ -10,11 +10,35 @@ from dataclasses import dataclass
 from enum import Enum
 from backend.core.performance_optimization import PerformanceOptimizer
 from backend.core.enhanced_error_handling import ErrorHandler, ErrorSeverity, handle_errors
+from backend.utils.context_packer import ContextItem, context_packer, token_counter
+from backend.utils.prompt_assembly import (
+    AssembledPrompt, PromptSegment, SegmentStability, assemble_prompt,
+    prompt_session_manager, quantize_consciousness_context
+)
 
 logger = logging.getLogger(__name__)
 error_handler = ErrorHandler()
 performance_optimizer = PerformanceOptimizer()
 
+# Prompt sections in the order they are rendered (most to least stable, so
+# consecutive turns share a cacheable prefix), with their headers
+CONTEXT_SECTION_ORDER = ["system", "history", "consciousness", "conversations", "concepts", "memories", "base"]
+CONTEXT_SECTION_STABILITY = {
+    "system": SegmentStability.STATIC,
+    "history": SegmentStability.SESSION,
+    "consciousness": SegmentStability.SLOW,
+    "conversations": SegmentStability.TURN,
+    "concepts": SegmentStability.TURN,
+    "memories": SegmentStability.TURN,
+    "base": SegmentStability.QUERY,
+}
+CONTEXT_SECTION_HEADERS = {
+    "conversations": "RECENT CONVERSATIONS:",
+    "concepts": "RELATED CONCEPTS:",
+    "memories": "RELEVANT MEMORIES:",
+    "history": "CONVERSATION HISTORY:",
+}
+
 class ContextOptimizationLevel(Enum):
     """Context optimization levels for different use cases"""
     MINIMAL = "minimal"      # 4k context
@@ -46,6 +70,7 @@ class LLMContextOptimizer:
         self.performance_optimizer = performance_optimizer
         self.context_configs = self._initialize_context_configs()
         self.current_config = None
+        self.last_pack_stats: Dict[str, Any] = {}
         self._load_optimal_configuration()
         
     def _initialize_context_configs(self) -> Dict[str, LLMContextConfig]:
@@ -168,16 +193,20 @@ class LLMContextOptimizer:
         consciousness_context: Dict[str, Any] = None,
         knowledge_context: Dict[str, Any] = None,
         conversation_history: List[Dict[str, str]] = None,
-        selected_model: str = None
+        selected_model: str = None,
+        system_prompt: str = None,
+        session_id: str = None
     ) -> Dict[str, Any]:
         """
         Generate optimized request parameters for maximum context utilization
         
         Args:
-            base_prompt: The base prompt for the LLM
+            base_prompt: The base prompt for the LLM (the turn-specific part)
             consciousness_context: Current consciousness state data
             knowledge_context: Retrieved knowledge context
             conversation_history: Previous conversation turns
+            system_prompt: Static instructions placed first so they stay a cached prefix
+            session_id: Conversation session whose keep-alive handle the request uses
             
         Returns:
             Optimized request parameters with context management
@@ -192,13 +221,17 @@ class LLMContextOptimizer:
             available_context = context_budget - reserved_tokens
             
             # Build optimized prompt with context management
-            optimized_prompt = self._build_context_optimized_prompt(
+            assembled = self._build_context_optimized_prompt(
                 base_prompt=base_prompt,
                 consciousness_context=consciousness_context or {},
                 knowledge_context=knowledge_context or {},
                 conversation_history=conversation_history or [],
-                available_tokens=available_context
+                available_tokens=available_context,
+                system_prompt=system_prompt
             )
+            optimized_prompt = assembled.prompt
+            
+            prompt_tokens = token_counter.count(optimized_prompt, self._tokenizer_model())
             
             # Generate request parameters
             request_params = {
@@ -221,15 +254,21 @@ class LLMContextOptimizer:
                     "num_thread": -1,  # Use all CPU threads
                 },
                 "stream": self.current_config.streaming,
+                "prompt_assembly": assembled,
                 "context_optimization": {
                     "level": self.current_config.context_optimization_level.value,
                     "strategy": self.current_config.context_management_strategy,
                     "memory_optimization": self.current_config.memory_optimization,
-                    "actual_context_tokens": len(optimized_prompt.split()) * 1.3,  # Rough estimate
-                    "context_utilization": min(1.0, (len(optimized_prompt.split()) * 1.3) / available_context)
+                    "actual_context_tokens": prompt_tokens,
+                    "context_utilization": min(1.0, prompt_tokens / available_context) if available_context > 0 else 1.0,
+                    "packing": dict(self.last_pack_stats)
                 }
             }
             
+            if session_id:
+                request_params["session_id"] = session_id
+                request_params.update(prompt_session_manager.request_fields(session_id, self.current_config.model_name))
+            
             logger.debug(f"🎯 Context optimization: {request_params['context_optimization']['context_utilization']:.1%} utilization")
             
             return request_params
@@ -244,179 +283,118 @@ class LLMContextOptimizer:
         consciousness_context: Dict[str, Any],
         knowledge_context: Dict[str, Any],
         conversation_history: List[Dict[str, str]],
-        available_tokens: int
-    ) -> str:
-        """Build context-optimized prompt within token budget"""
-        
-        # Estimate token usage (rough approximation: 1 token ≈ 0.75 words)
-        def estimate_tokens(text: str) -> int:
-            return int(len(text.split()) * 1.3)
-        
-        # Start with base prompt
-        prompt_parts = [base_prompt]
-        used_tokens = estimate_tokens(base_prompt)
-        
-        # Add consciousness context if available and within budget
-        if consciousness_context and used_tokens < available_tokens * 0.8:
-            consciousness_section = self._format_consciousness_context(consciousness_context)
-            consciousness_tokens = estimate_tokens(consciousness_section)
-            
-            if used_tokens + consciousness_tokens < available_tokens * 0.9:
-                prompt_parts.append(consciousness_section)
-                used_tokens += consciousness_tokens
+        available_tokens: int,
+        system_prompt: str = None
+    ) -> AssembledPrompt:
+        """Build context-optimized prompt within token budget, ordered for prefix reuse"""
+        model = self._tokenizer_model()
         
-        # Add knowledge context with intelligent truncation
-        if knowledge_context and used_tokens < available_tokens * 0.7:
-            knowledge_section = self._format_knowledge_context(
-                knowledge_context, 
-                max_tokens=int((available_tokens - used_tokens) * 0.6)
-            )
-            knowledge_tokens = estimate_tokens(knowledge_section)
-            
-            if knowledge_tokens > 0:
-                prompt_parts.append(knowledge_section)
-                used_tokens += knowledge_tokens
+        items = []
+        if system_prompt:
+            items.append(ContextItem(section="system", text=system_prompt, utility=0.0, required=True))
+            available_for_base = available_tokens - token_counter.count(system_prompt, model)
+        else:
+            available_for_base = available_tokens
         
-        # Add conversation history with sliding window
-        if conversation_history and used_tokens < available_tokens * 0.9:
-            history_section = self._format_conversation_history(
-                conversation_history,
-                max_tokens=available_tokens - used_tokens - 100  # Reserve 100 tokens buffer
-            )
-            if history_section:
-                prompt_parts.append(history_section)
+        # The base prompt is always kept; only cut it if it alone exceeds the budget
+        base_prompt = token_counter.truncate(base_prompt, available_for_base, model)
         
-        # Join all parts
-        optimized_prompt = "\n\n".join(prompt_parts)
+        items.append(ContextItem(section="base", text=base_prompt, utility=0.0, required=True))
+        if consciousness_context:
+            items.append(ContextItem(
+                section="consciousness",
+                text=self._format_consciousness_context(consciousness_context),
+                utility=3.0
+            ))
+        items.extend(self._knowledge_context_items(knowledge_context, model))
+        items.extend(self._conversation_history_items(conversation_history, model))
         
-        # Final token check and truncation if needed
-        final_tokens = estimate_tokens(optimized_prompt)
-        if final_tokens > available_tokens:
-            # Intelligent truncation preserving most important parts
-            optimized_prompt = self._intelligent_truncation(
-                optimized_prompt, 
-                target_tokens=available_tokens
-            )
+        result = context_packer.pack(
+            items,
+            budget=available_tokens,
+            model=model,
+            sections=CONTEXT_SECTION_HEADERS,
+            section_order=CONTEXT_SECTION_ORDER
+        )
+        self.last_pack_stats = {
+            "tokens_used": result.tokens_used,
+            "budget": result.budget,
+            "items_selected": len(result.selected),
+            "items_dropped": len(result.dropped),
+            "tokenizer": token_counter.tokenizer_name(model)
+        }
+        if result.dropped:
+            logger.debug(f"📦 Context packer dropped {len(result.dropped)} low-utility items to fit {available_tokens} tokens")
         
-        return optimized_prompt
+        return assemble_prompt([
+            PromptSegment(name=section, text=text, stability=CONTEXT_SECTION_STABILITY[section])
+            for section, text in result.blocks()
+        ])
+    
+    def _tokenizer_model(self) -> str:
+        """Model whose tokenizer counts prompt tokens"""
+        name = self.current_config.model_name if self.current_config else "default"
+        return os.getenv("DEFAULT_OLLAMA_MODEL", "default") if name == "default" else name
     
     def _format_consciousness_context(self, consciousness_context: Dict[str, Any]) -> str:
         """Format consciousness context for optimal token usage"""
+        # Quantized so small level changes between turns keep the prompt prefix identical
+        consciousness_context = quantize_consciousness_context(consciousness_context)
         level = consciousness_context.get("consciousness_level", 0.7)
         emotion = consciousness_context.get("emotional_state", "curious")
         goals = consciousness_context.get("active_goals", [])
         
         return f"""CONSCIOUSNESS STATE:
-- Level: {level:.3f} ({level*100:.1f}%) (affects processing depth and sophistication)
+- Level: {level:.2f} ({level*100:.0f}%) (affects processing depth and sophistication)
 - Emotional State: {emotion} (influences response style and focus)
 - Active Goals: {', '.join(goals[:3]) if goals else 'General improvement'}
 - Processing Mode: {'Deep analysis' if level > 0.8 else 'Standard processing'}"""
     
-    def _format_knowledge_context(self, knowledge_context: Dict[str, Any], max_tokens: int) -> str:
-        """Format knowledge context within token budget"""
-        if not knowledge_context or max_tokens <= 0:
-            return ""
+    def _knowledge_context_items(self, knowledge_context: Dict[str, Any], model: str) -> List[ContextItem]:
+        """Conversations, concepts and memories from the knowledge context as packable items"""
+        items = []
+        if not knowledge_context:
+            return items
         
-        sections = []
-        used_tokens = 0
+        # Recent conversations: more recent turns are more useful
+        for position, conv in enumerate((knowledge_context.get("conversation_context") or [])[:5]):
+            if not conv:
+                continue
+            user_query = conv.get('user_query', '') or ''
+            agent_response = conv.get('agent_response', '') or ''
+            text = f"- {token_counter.truncate(user_query, 60, model)} → {token_counter.truncate(agent_response, 120, model)}"
+            items.append(ContextItem(section="conversations", text=text, utility=0.8 * (0.85 ** position), order=position))
         
-        # Add conversation context
-        conversations = knowledge_context.get("conversation_context", []) or []
-        if conversations and used_tokens < max_tokens * 0.4:
-            conv_section = "RECENT CONVERSATIONS:\n"
-            for conv in conversations[:2]:
-                if conv:  # Ensure conv is not None
-                    user_query = conv.get('user_query', '') or ''
-                    agent_response = conv.get('agent_response', '') or ''
-                    conv_line = f"- {user_query[:80]}... → {agent_response[:80]}...\n"
-                    if used_tokens + len(conv_line.split()) * 1.3 < max_tokens * 0.4:
-                        conv_section += conv_line
-                        used_tokens += len(conv_line.split()) * 1.3
-            if len(conv_section) > len("RECENT CONVERSATIONS:\n"):
-                sections.append(conv_section)
+        for position, concept in enumerate((knowledge_context.get("related_concepts") or [])[:10]):
+            if not concept:
+                continue
+            name = concept.get('name', '') or ''
+            description = concept.get('description', '') or ''
+            text = f"- {name}: {token_counter.truncate(description, 80, model)}"
+            items.append(ContextItem(
+                section="concepts", text=text,
+                utility=0.7 * float(concept.get("relevance_score", 0.5) or 0.5), order=position
+            ))
         
-        # Add related concepts
-        concepts = knowledge_context.get("related_concepts", []) or []
-        if concepts and used_tokens < max_tokens * 0.7:
-            concept_section = "RELATED CONCEPTS:\n"
-            for concept in concepts[:4]:
-                if concept:  # Ensure concept is not None
-                    name = concept.get('name', '') or ''
-                    description = concept.get('description', '') or ''
-                    concept_line = f"- {name}: {description[:60]}...\n"
-                    if used_tokens + len(concept_line.split()) * 1.3 < max_tokens * 0.7:
-                        concept_section += concept_line
-                        used_tokens += len(concept_line.split()) * 1.3
-            if len(concept_section) > len("RELATED CONCEPTS:\n"):
-                sections.append(concept_section)
-        
-        # Add relevant memories
-        memories = knowledge_context.get("relevant_memories", []) or []
-        if memories and used_tokens < max_tokens * 0.9:
-            memory_section = "RELEVANT MEMORIES:\n"
-            for memory in memories[:3]:
-                if memory:  # Ensure memory is not None
-                    content = memory.get('content', '') or ''
-                    memory_line = f"- {content[:100]}...\n"
-                    if used_tokens + len(memory_line.split()) * 1.3 < max_tokens * 0.9:
-                        memory_section += memory_line
-                        used_tokens += len(memory_line.split()) * 1.3
-            if len(memory_section) > len("RELEVANT MEMORIES:\n"):
-                sections.append(memory_section)
-        
-        return "\n\n".join(sections) if sections else ""
-    
-    def _format_conversation_history(self, history: List[Dict[str, str]], max_tokens: int) -> str:
-        """Format conversation history with sliding window"""
-        if not history or max_tokens < 100:
-            return ""
-        
-        history_section = "CONVERSATION HISTORY:\n"
-        used_tokens = len(history_section.split()) * 1.3
-        
-        # Add most recent conversations first
-        for turn in reversed(history[-10:]):  # Last 10 turns
-            turn_text = f"User: {turn.get('user', '')}\nAssistant: {turn.get('assistant', '')}\n\n"
-            turn_tokens = len(turn_text.split()) * 1.3
-            
-            if used_tokens + turn_tokens < max_tokens:
-                history_section = turn_text + history_section
-                used_tokens += turn_tokens
-            else:
-                break
-        
-        return history_section if used_tokens > len("CONVERSATION HISTORY:\n".split()) * 1.3 else ""
+        for position, memory in enumerate((knowledge_context.get("relevant_memories") or [])[:8]):
+            if not memory:
+                continue
+            content = memory.get('content', '') or ''
+            items.append(ContextItem(
+                section="memories", text=f"- {token_counter.truncate(content, 200, model)}",
+                utility=float(memory.get("relevance_score", 0.5) or 0.5), order=position
+            ))
+        return items
     
-    def _intelligent_truncation(self, text: str, target_tokens: int) -> str:
-        """Intelligent truncation preserving important content"""
-        current_tokens = len(text.split()) * 1.3
-        
-        if current_tokens <= target_tokens:
-            return text
-        
-        # Calculate truncation ratio
-        truncation_ratio = target_tokens / current_tokens
-        
-        # Split into sections and preserve most important parts
-        sections = text.split("\n\n")
-        important_sections = []
-        
-        # Preserve consciousness context and base prompt (first sections)
-        for i, section in enumerate(sections):
-            section_tokens = len(section.split()) * 1.3
-            if i < 2 or "CONSCIOUSNESS" in section or "USER MESSAGE" in section:
-                important_sections.append(section)
-            elif len("\n\n".join(important_sections).split()) * 1.3 + section_tokens < target_tokens:
-                important_sections.append(section)
-            else:
-                # Truncate this section
-                available_tokens = target_tokens - len("\n\n".join(important_sections).split()) * 1.3
-                if available_tokens > 50:
-                    truncated_section = " ".join(section.split()[:int(available_tokens / 1.3)])
-                    important_sections.append(truncated_section + "...")
-                break
-        
-        return "\n\n".join(important_sections)
+    def _conversation_history_items(self, history: List[Dict[str, str]], model: str) -> List[ContextItem]:
+        """Last conversation turns as packable items; the latest turns carry the most utility"""
+        recent = (history or [])[-10:]
+        items = []
+        for position, turn in enumerate(recent):
+            age = len(recent) - 1 - position
+            text = f"User: {turn.get('user', '')}\nAssistant: {turn.get('assistant', '')}\n"
+            items.append(ContextItem(section="history", text=text, utility=1.2 * (0.85 ** age), order=position))
+        return items
     
     def _get_fallback_params(self, base_prompt: str) -> Dict[str, Any]:
         """Fallback parameters when optimization fails"""
@@ -12,11 +12,14 @@ This module provides comprehensive performance optimization including:
 """
 
 import asyncio
+import heapq
 import logging
+import sys
 import time
 import weakref
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Callable, Union, TypeVar, Generic
+from typing import Dict, Any, List, Optional, Callable, Tuple, Union, TypeVar, Generic
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum
 import json
@@ -73,6 +76,7 @@ class CacheEntry:
     access_count: int = 0
     ttl_seconds: Optional[int] = None
     size_bytes: int = 0
+    expires_at: Optional[float] = None  # time.monotonic() deadline
 
 @dataclass
 class PerformanceMetrics:
@@ -89,21 +93,41 @@ class PerformanceMetrics:
     timestamp: datetime = field(default_factory=datetime.now)
 
 class InMemoryCache:
-    """High-performance in-memory cache with multiple strategies"""
+    """
+    High-performance in-memory cache with multiple strategies.
+
+    Every operation is O(1) (amortized O(log n) for TTL bookkeeping):
+    - LRU order is kept by an ``OrderedDict``; hits move the key to the end
+    - LFU keeps keys in per-frequency buckets with the current minimum
+      frequency, ties broken by recency within a bucket
+    - TTL expiries sit in a min-heap that is cleaned lazily; the TTL strategy
+      evicts the entry closest to expiry
+    ``max_bytes`` optionally bounds the pickled size of all values. A re-entrant
+    lock makes the cache safe to share between threads and asyncio tasks (no
+    operation awaits while holding it).
+    """
     
     def __init__(
         self, 
         max_size: int = 1000,
         default_ttl: int = 3600,
-        strategy: CacheStrategy = CacheStrategy.LRU
+        strategy: CacheStrategy = CacheStrategy.LRU,
+        max_bytes: Optional[int] = None
     ):
         self.max_size = max_size
         self.default_ttl = default_ttl
         self.strategy = strategy
-        self.cache: Dict[str, CacheEntry] = {}
-        self.access_order: List[str] = []
+        self.max_bytes = max_bytes
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self._frequencies: Dict[int, "OrderedDict[str, None]"] = {}
+        self._min_frequency = 0
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._expiry_seq = 0
         self._lock = threading.RLock()
         self.metrics = PerformanceMetrics()
+        self.evictions = 0
+        self.expirations = 0
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
@@ -117,47 +141,60 @@ class InMemoryCache:
             # Check TTL expiration
             if self._is_expired(entry):
                 self._remove_entry(key)
+                self.expirations += 1
                 self.metrics.cache_misses += 1
                 return None
             
             # Update access metadata
             entry.last_accessed = datetime.now()
-            entry.access_count += 1
-            
-            # Update access order for LRU
-            if self.strategy == CacheStrategy.LRU:
-                self._update_access_order(key)
+            self._touch(key, entry)
             
             self.metrics.cache_hits += 1
             return entry.value
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache"""
+        """Set value in cache; returns False if the value alone exceeds ``max_bytes``"""
         with self._lock:
             # Calculate size
             try:
                 size_bytes = len(pickle.dumps(value))
-            except:
+            except Exception:
                 size_bytes = sys.getsizeof(value)
             
+            if self.max_bytes is not None and size_bytes > self.max_bytes:
+                return False
+            
             # Create cache entry
+            ttl_seconds = ttl or self.default_ttl
             entry = CacheEntry(
                 key=key,
                 value=value,
-                ttl_seconds=ttl or self.default_ttl,
-                size_bytes=size_bytes
+                ttl_seconds=ttl_seconds,
+                size_bytes=size_bytes,
+                expires_at=time.monotonic() + ttl_seconds if ttl_seconds else None
             )
             
+            if key in self.cache:
+                self._remove_entry(key)
+            
+            self.purge_expired()
+            
             # Check if we need to evict entries
-            if len(self.cache) >= self.max_size and key not in self.cache:
+            while self.cache and (
+                len(self.cache) >= self.max_size
+                or (self.max_bytes is not None and self.total_bytes + size_bytes > self.max_bytes)
+            ):
                 self._evict_entries()
             
             # Store entry
             self.cache[key] = entry
-            
-            # Update access order
-            if key not in self.access_order:
-                self.access_order.append(key)
+            self.total_bytes += size_bytes
+            self._frequencies.setdefault(0, OrderedDict())[key] = None
+            self._min_frequency = 0
+            if entry.expires_at is not None:
+                self._expiry_seq += 1
+                heapq.heappush(self._expiry_heap, (entry.expires_at, self._expiry_seq, key))
+                self._compact_expiry_heap()
             
             return True
     
@@ -173,62 +210,100 @@ class InMemoryCache:
         """Clear all cache entries"""
         with self._lock:
             self.cache.clear()
-            self.access_order.clear()
+            self._frequencies.clear()
+            self._min_frequency = 0
+            self._expiry_heap.clear()
+            self.total_bytes = 0
+    
+    def purge_expired(self) -> int:
+        """Remove expired entries from the front of the expiry heap"""
+        with self._lock:
+            removed = 0
+            now = time.monotonic()
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, _, key = heapq.heappop(self._expiry_heap)
+                entry = self.cache.get(key)
+                if entry is not None and entry.expires_at == expires_at:
+                    self._remove_entry(key)
+                    self.expirations += 1
+                    removed += 1
+            return removed
     
     def _is_expired(self, entry: CacheEntry) -> bool:
         """Check if cache entry is expired"""
-        if entry.ttl_seconds is None:
-            return False
-        
-        age = (datetime.now() - entry.created_at).total_seconds()
-        return age > entry.ttl_seconds
+        return entry.expires_at is not None and time.monotonic() > entry.expires_at
+    
+    def _touch(self, key: str, entry: CacheEntry):
+        """Record a hit: move to most recent and to the next frequency bucket"""
+        self.cache.move_to_end(key)
+        bucket = self._frequencies[entry.access_count]
+        del bucket[key]
+        if not bucket:
+            del self._frequencies[entry.access_count]
+            if self._min_frequency == entry.access_count:
+                self._min_frequency += 1
+        entry.access_count += 1
+        self._frequencies.setdefault(entry.access_count, OrderedDict())[key] = None
     
     def _remove_entry(self, key: str):
-        """Remove entry from cache and access order"""
-        if key in self.cache:
-            del self.cache[key]
-        if key in self.access_order:
-            self.access_order.remove(key)
-    
-    def _update_access_order(self, key: str):
-        """Update access order for LRU strategy"""
-        if key in self.access_order:
-            self.access_order.remove(key)
-        self.access_order.append(key)
+        """Remove entry from cache and frequency buckets; its heap item goes stale"""
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry.size_bytes
+        bucket = self._frequencies[entry.access_count]
+        del bucket[key]
+        if not bucket:
+            # The minimum frequency is re-found lazily on the next LFU eviction
+            del self._frequencies[entry.access_count]
+    
+    def _compact_expiry_heap(self):
+        """Rebuild the heap once stale items (replaced or deleted keys) dominate it"""
+        if len(self._expiry_heap) > 2 * len(self.cache) + 64:
+            self._expiry_heap = [
+                item for item in self._expiry_heap
+                if item[2] in self.cache and self.cache[item[2]].expires_at == item[0]
+            ]
+            heapq.heapify(self._expiry_heap)
     
     def _evict_entries(self):
-        """Evict entries based on strategy"""
-        if self.strategy == CacheStrategy.LRU:
-            self._evict_lru()
-        elif self.strategy == CacheStrategy.LFU:
+        """Evict one entry based on strategy"""
+        if self.strategy == CacheStrategy.LFU:
             self._evict_lfu()
         elif self.strategy == CacheStrategy.TTL:
             self._evict_expired()
+        else:
+            self._evict_lru()
     
     def _evict_lru(self):
-        """Evict least recently used entries"""
-        while len(self.cache) >= self.max_size and self.access_order:
-            oldest_key = self.access_order[0]
-            self._remove_entry(oldest_key)
+        """Evict the least recently used entry"""
+        oldest_key = next(iter(self.cache))
+        self._remove_entry(oldest_key)
+        self.evictions += 1
     
     def _evict_lfu(self):
-        """Evict least frequently used entries"""
-        if not self.cache:
-            return
-        
-        # Find entry with lowest access count
-        min_access_key = min(self.cache.keys(), key=lambda k: self.cache[k].access_count)
-        self._remove_entry(min_access_key)
+        """Evict the least frequently used entry, least recent first among ties"""
+        bucket = self._frequencies.get(self._min_frequency)
+        if not bucket:
+            # Only after deletions or expirations emptied the minimum bucket
+            self._min_frequency = min(self._frequencies)
+            bucket = self._frequencies[self._min_frequency]
+        key = next(iter(bucket))
+        self._remove_entry(key)
+        self.evictions += 1
     
     def _evict_expired(self):
-        """Evict expired entries"""
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if self._is_expired(entry)
-        ]
-        
-        for key in expired_keys:
-            self._remove_entry(key)
+        """Evict expired entries, or the entry closest to expiry if none have expired"""
+        if self.purge_expired():
+            return
+        while self._expiry_heap:
+            expires_at, _, key = heapq.heappop(self._expiry_heap)
+            entry = self.cache.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove_entry(key)
+                self.evictions += 1
+                return
+        self._evict_lru()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
@@ -236,15 +311,16 @@ class InMemoryCache:
             total_requests = self.metrics.cache_hits + self.metrics.cache_misses
             hit_rate = self.metrics.cache_hits / total_requests if total_requests > 0 else 0
             
-            total_size = sum(entry.size_bytes for entry in self.cache.values())
-            
             return {
                 "entries": len(self.cache),
                 "max_size": self.max_size,
                 "hit_rate": hit_rate,
                 "cache_hits": self.metrics.cache_hits,
                 "cache_misses": self.metrics.cache_misses,
-                "total_size_bytes": total_size,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "total_size_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
                 "strategy": self.strategy.value
             }
 
@@ -355,8 +431,8 @@ class RedisCache:
 class QueryOptimizer:
     """Database query optimization and batching"""
     
-    def __init__(self):
-        self.query_cache = InMemoryCache(max_size=500, default_ttl=300)
+    def __init__(self, cache_max_bytes: Optional[int] = 64 * 1024 * 1024):
+        self.query_cache = InMemoryCache(max_size=500, default_ttl=300, max_bytes=cache_max_bytes)
         self.batch_queries: Dict[str, List[Dict[str, Any]]] = {}
         self.batch_timeout = 0.1  # 100ms
         self.batch_size = 10
@@ -652,13 +728,8 @@ class PerformanceOptimizer:
             "memory_cache_stats": self.memory_cache.get_stats(),
             "query_optimizer_stats": {
                 "query_count": self.query_optimizer.metrics.query_count,
-                "cache_hit_rate": (
-                    self.query_optimizer.query_cache.metrics.cache_hits /
-                    (self.query_optimizer.query_cache.metrics.cache_hits + 
-                     self.query_optimizer.query_cache.metrics.cache_misses)
-                    if (self.query_optimizer.query_cache.metrics.cache_hits + 
-                        self.query_optimizer.query_cache.metrics.cache_misses) > 0 else 0
-                )
+                "cache_hit_rate": self.query_optimizer.query_cache.get_stats()["hit_rate"],
+                "cache_size_bytes": self.query_optimizer.query_cache.total_bytes
             },
             "connection_pool_stats": {
                 "active_connections": len(self.connection_pool.active_connections),
@@ -2,7 +2,8 @@ from dotenv import load_dotenv
 load_dotenv()
 import os
 import asyncio
-from fastapi import FastAPI, HTTPException, Query, UploadFile, File, BackgroundTasks, Body, Request
+import hashlib
+from fastapi import FastAPI, HTTPException, Query, UploadFile, File, BackgroundTasks, Body, Request, WebSocket, WebSocketDisconnect, Depends
 from neo4j import GraphDatabase, basic_auth
 from backend.utils.unified_database_manager import unified_database_manager
 from pydantic import BaseModel
@@ -40,7 +41,6 @@ except ImportError as e:
 try:
     import redis
     import json
-    import hashlib
     from functools import wraps
     from typing import Any, Optional, Dict, List
     
@@ -61,42 +61,24 @@ except ImportError:
     REDIS_AVAILABLE = False
     redis_client = None
 
+import uuid
+
 def cache_result(expiration: int = 300):  # 5 minutes default
-    """Decorator to cache function results in Redis"""
+    """Decorator to cache endpoint results in the tiered cache (L1 in-process + L2 Redis)"""
     def decorator(func):
-        if REDIS_AVAILABLE:
-            try:
-                from functools import wraps
-                @wraps(func)
-                async def wrapper(*args, **kwargs):
-                    if not REDIS_AVAILABLE:
-                        return await func(*args, **kwargs)
-                    
-                    # Create cache key from function name and arguments
-                    cache_key = f"{func.__name__}:{hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()}"
-                    
-                    try:
-                        # Try to get from cache
-                        cached_result = redis_client.get(cache_key)
-                        if cached_result:
-                            logger.info(f"🎯 Cache hit for {func.__name__}")
-                            return json.loads(cached_result)
-                        
-                        # Execute function and cache result
-                        result = await func(*args, **kwargs)
-                        redis_client.setex(cache_key, expiration, json.dumps(result, default=str))
-                        logger.info(f"💾 Cached result for {func.__name__}")
-                        return result
-                        
-                    except Exception as e:
-                        logger.warning(f"⚠️ Cache error for {func.__name__}: {e}")
-                        return await func(*args, **kwargs)
-                
-                return wrapper
-            except ImportError:
-                return func
-        else:
-            return func
+        from functools import wraps
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Create cache key from function name and arguments
+            cache_key = f"{func.__name__}:{hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()}"
+            
+            # Concurrent misses share one call and Redis errors fall back to L1;
+            # the endpoint name doubles as a tag for invalidation
+            return await tiered_cache.get_or_set(
+                cache_key, lambda: func(*args, **kwargs), ttl=expiration, tags=[func.__name__]
+            )
+        
+        return wrapper
     return decorator
 from backend.utils.system_health_monitor import start_system_health_monitoring
 try:
@@ -108,10 +90,27 @@ except ImportError:
         return {"error": "LiveKit not available"}
 import jwt
 from datetime import datetime
-import whisper
-from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, Response
-from backend.tts_wrapper import CoquiTTS, TTS_AVAILABLE, XttsConfig, XttsAudioConfig, XttsArgs, BaseDatasetConfig
-import torch
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from backend.utils.lazy_component_registry import lazy_component_registry
+# Heavy speech models are loaded lazily (on first use or by background warm-up)
+# so the API can serve /health and chat while they are still loading.
+from backend.utils.speech_models import get_tts_model as get_coqui_tts_model, aget_tts_model
+from backend.utils.tts_pipeline import tts_pipeline
+from backend.utils.stt_service import stt_service, STTOverloadedError, STTModelLoadingError, AudioDecodeError
+from backend.utils.ollama_client import ollama_client
+from backend.utils.post_response_pipeline import post_response_pipeline
+from backend.utils.tiered_cache import tiered_cache
+from backend.utils.document_ingestion import document_ingestor, iter_upload, IngestionError
+from backend.utils.graph_bulk import (
+    graph_bulk, node_resource, link_query, link_resource, BulkItemTooLarge, BulkRequestError, BulkWriteError,
+    iter_request_items
+)
+from backend.utils.intent_router import intent_router
+from backend.utils.context_prefetcher import context_prefetcher
+from backend.utils.llm_response_cache import llm_response_cache
+from backend.utils.context_packer import token_counter
+from backend.utils.real_time_consciousness_context_manager import real_time_consciousness_context_manager
+from backend.utils.streaming_stt import StreamingSTTSession
 import traceback
 from backend.models.shared import STTTranscript, STTSegment, StreamingSTTChunk
 import json
@@ -127,7 +126,7 @@ import re
 from backend.utils.consciousness_orchestrator_fixed import start_enhanced_consciousness_loop, consciousness_orchestrator_fixed as consciousness_orchestrator
 from backend.utils.llm_request_manager import llm_request_manager
 from backend.utils.consciousness_marketplace import consciousness_marketplace
-# Unified quantum consciousness system
+# Unified quantum consciousness system (lazily constructed on first use)
 from backend.utils.unified_quantum_consciousness_engine import unified_quantum_consciousness_engine
 from backend.models.consciousness_models import (
     ConsciousnessStateUpdate, SelfReflectionTrigger, ConsciousnessQuery
@@ -172,8 +171,6 @@ def validate_memory_system_config() -> Dict[str, Any]:
     
     return config
 
-torch.serialization.add_safe_globals([XttsConfig, XttsAudioConfig, BaseDatasetConfig, XttsArgs])
-
 # Consolidated logger configuration to prevent conflicts
 logging.basicConfig(
     level=logging.INFO,  # Changed from DEBUG to INFO to reduce noise
@@ -232,6 +229,15 @@ async def shutdown_event():
     """
     logging.info("Application shutting down...")
     
+    await lazy_component_registry.stop_background_warmup()
+    # Finish queued bookkeeping while Neo4j and Ollama are still available
+    await post_response_pipeline.stop()
+    await tiered_cache.stop()
+    await real_time_consciousness_context_manager.stop()
+    stt_service.shutdown()
+    tts_pipeline.executor.shutdown(wait=False, cancel_futures=True)
+    await ollama_client.aclose()
+    
     memory_system_enabled = os.getenv("MEMORY_SYSTEM_ENABLED", "true").lower() == "true"
     
     if memory_system_enabled:
@@ -275,6 +281,13 @@ async def startup_event():
     """
     logging.info("Application starting up...")
     
+    # Import legacy telemetry JSON files once; skips records already imported
+    try:
+        from backend.utils.privacy_first_telemetry import get_telemetry
+        await asyncio.to_thread(get_telemetry().migrate_legacy_data)
+    except Exception as e:
+        logging.error(f"❌ Failed to migrate legacy telemetry data: {e}")
+    
     # Validate and load memory system configuration
     memory_config = validate_memory_system_config()
     memory_system_enabled = memory_config["enabled"]
@@ -315,7 +328,6 @@ async def startup_event():
     
     # Initialize real-time consciousness context manager
     try:
-        from backend.utils.real_time_consciousness_context_manager import real_time_consciousness_context_manager
         success = await real_time_consciousness_context_manager.initialize()
         if success:
             logging.info("✅ Real-time consciousness context manager initialized successfully!")
@@ -327,6 +339,18 @@ async def startup_event():
     # Initialize LLM request manager
     asyncio.create_task(llm_request_manager.initialize())
     
+    # Warm up heavy models (Whisper, TTS, quantum engine) in the background
+    lazy_component_registry.start_background_warmup()
+    
+    # Load the default model's tokenizer in a background thread; counts estimate until it is ready
+    token_counter.preload(os.getenv("DEFAULT_OLLAMA_MODEL", "default"))
+    
+    # Start post-response workers and replay bookkeeping left over from the last run
+    await post_response_pipeline.start()
+    
+    # Connect the shared cache tier and subscribe to cross-worker invalidations
+    await tiered_cache.start()
+    
     # Start enhanced consciousness loop
     await start_enhanced_consciousness_loop()
     logging.info("Enhanced consciousness system has been initiated.")
@@ -416,42 +440,30 @@ if LIVEKIT_TOOLS_AVAILABLE and (not LIVEKIT_API_KEY or not LIVEKIT_API_SECRET):
     logging.warning("LiveKit API credentials not configured. LiveKit features will be disabled.")
     LIVEKIT_TOOLS_AVAILABLE = False
 
-# Load Whisper model once at startup
-whisper_model = whisper.load_model("turbo")
-
-# Load Coqui TTS model once at startup (if available)
-coqui_tts_model = None
-if TTS_AVAILABLE:
-    try:
-        coqui_tts_model = CoquiTTS(model_name="tts_models/en/ljspeech/tacotron2-DDC")
-        logging.info("TTS model loaded successfully in main.py")
-    except Exception as e:
-        logging.warning(f"Failed to load TTS model in main.py: {e}")
-        coqui_tts_model = None
-else:
-    logging.info("TTS not available in this deployment (main.py)")
-
-# XTTS model for multi-lingual/voice
-xtts_model = None
-xtts_device = "cuda" if torch.cuda.is_available() else "cpu"
-
 def get_xtts_model():
-    global xtts_model
-    if xtts_model is None:
-        if not TTS_AVAILABLE:
-            logging.warning("[TTS] TTS not available in this deployment")
-            return None
-        try:
-            logging.info("[TTS] Loading XTTS model (this may take a moment)...")
-            # Use a simpler, faster model for better performance
-            xtts_model = CoquiTTS("tts_models/en/ljspeech/tacotron2-DDC")
-            logging.info("[TTS] XTTS model loaded successfully")
-        except Exception as e:
-            logging.error(f"[TTS ERROR] Failed to load XTTS model: {e}")
-            logging.error(traceback.format_exc())
-            # Return None instead of raising to allow graceful fallback
-            return None
-    return xtts_model
+    model = get_coqui_tts_model()
+    if model is None:
+        logging.warning("[TTS] TTS model not available in this deployment")
+    return model
+
+async def _probe_neo4j():
+    await unified_database_manager.execute_query("RETURN 1 AS ok")
+    return unified_database_manager
+
+async def _probe_llm():
+    await ollama_client.list_models()
+    return ollama_client
+
+# Readiness waits for what a chat request cannot be served without: Neo4j and
+# the LLM server. Whisper only warms up; the STT endpoints answer 503 until it loads
+lazy_component_registry.register("neo4j", _probe_neo4j, critical=True)
+lazy_component_registry.register("llm", _probe_llm, critical=True)
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe with per-component import/initialization timings"""
+    report = lazy_component_registry.get_readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
 
 @app.get("/health")
 @cache_result(expiration=30)  # Cache for 30 seconds
@@ -681,6 +693,13 @@ async def get_performance_metrics():
             "timestamp": datetime.now().isoformat(),
             "redis_available": REDIS_AVAILABLE,
             "cache_stats": {},
+            "tiered_cache": tiered_cache.get_stats(),
+            "document_ingestion": document_ingestor.get_stats(),
+            "graph_bulk": graph_bulk.get_stats(),
+            "intent_router": intent_router.get_stats(),
+            "context_prefetcher": context_prefetcher.get_stats(),
+            "llm_response_cache": llm_response_cache.get_stats(),
+            "consciousness_context": real_time_consciousness_context_manager.get_stats(),
             "response_times": {},
             "system_health": {}
         }
@@ -953,6 +972,50 @@ def list_documents():
         result = session.run("MATCH (d:Document) RETURN d.document_id AS document_id, d.filename AS filename, d.metadata AS metadata")
         return [DocumentCreate(document_id=rec["document_id"], filename=rec["filename"], metadata=rec["metadata"]) for rec in result]
 
+@app.post("/documents/upload")
+async def upload_document(file: UploadFile = File(...), document_id: Optional[str] = Query(None),
+                          chunk_tokens: Optional[int] = Query(None, ge=16, le=8192)):
+    """
+    Ingest an uploaded file into Chunk nodes:
+    - Read, split on sentence boundaries, embed in batches and write in batched transactions
+    - Re-uploading with the same document_id after a failure resumes from the last checkpoint
+    - Returns per-stage throughput for the run
+    """
+    document_id = document_id or str(uuid.uuid4())
+    try:
+        job = await document_ingestor.ingest(
+            document_id,
+            iter_upload(file, document_ingestor.config.read_block_size),
+            filename=file.filename,
+            chunk_tokens=chunk_tokens
+        )
+        return job.to_dict()
+    except IngestionError as e:
+        return JSONResponse(status_code=500, content={"error": str(e), "ingestion": e.job.to_dict()})
+
+@app.post("/documents/{document_id}/stream")
+async def stream_document(document_id: str, request: Request, filename: Optional[str] = Query(None),
+                          chunk_tokens: Optional[int] = Query(None, ge=16, le=8192)):
+    """
+    Ingest a raw request body as it arrives. The body is consumed at the pipeline's
+    pace, so large corpora never sit in memory; same resume semantics as /documents/upload.
+    """
+    try:
+        job = await document_ingestor.ingest(
+            document_id, request.stream(), filename=filename, chunk_tokens=chunk_tokens
+        )
+        return job.to_dict()
+    except IngestionError as e:
+        return JSONResponse(status_code=500, content={"error": str(e), "ingestion": e.job.to_dict()})
+
+@app.get("/documents/{document_id}/ingestion")
+def get_document_ingestion(document_id: str):
+    """Progress of the latest ingestion run for a document in this process"""
+    job = document_ingestor.get_job(document_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No ingestion run for this document")
+    return job.to_dict()
+
 # --- Chunk Endpoints ---
 @app.post("/chunks")
 def create_chunk(chunk: ChunkCreate):
@@ -1122,6 +1185,91 @@ def mainzastate_needs_to_learn(link: MainzaNeedsToLearnLink):
         )
     return {"status": "linked", "state_id": link.state_id, "concept_id": link.concept_id}
 
+# --- Bulk Endpoints ---
+# Bulk variants of the endpoints above: POST /bulk/{resource} takes a JSON array
+# or NDJSON and writes in UNWIND batches; GET pages by key, /stream emits NDJSON.
+def _mentions_query(target_type: str) -> str:
+    if target_type not in ["Document", "Entity"]:
+        raise ValueError("target_type must be 'Document' or 'Entity'")
+    return link_query("Conversation", "conversation_id", "MENTIONS", target_type, "target_id")
+
+for _resource in (
+    node_resource("users", UserCreate, "User", "SET n.name = row.name", {"name": "name"}),
+    node_resource("conversations", ConversationCreate, "Conversation",
+                  "SET n.started_at = row.started_at", {"started_at": "started_at"}),
+    node_resource("memories", MemoryCreate, "Memory", "SET n.content = row.text", {"text": "content"}),
+    node_resource("documents", DocumentCreate, "Document",
+                  "SET n.filename = row.filename, n.metadata = row.metadata",
+                  {"filename": "filename", "metadata": "metadata"}),
+    node_resource("chunks", ChunkCreate, "Chunk",
+                  """SET n.text = row.text, n.embedding = row.embedding
+    WITH n, row
+    OPTIONAL MATCH (d:Document {document_id: row.document_id})
+    FOREACH (_ IN CASE WHEN d IS NULL THEN [] ELSE [1] END | MERGE (n)-[:DERIVED_FROM]->(d))""",
+                  {"text": "text", "embedding": "embedding"},
+                  # The document is linked by DERIVED_FROM, not stored on the chunk
+                  {"document_id": "head([(n)-[:DERIVED_FROM]->(d:Document) | d.document_id])"}),
+    node_resource("entities", EntityCreate, "Entity", "SET n.name = row.name", {"name": "name"}),
+    node_resource("concepts", ConceptCreate, "Concept", "SET n.name = row.name", {"name": "name"}),
+    node_resource("mainzastates", MainzaStateCreate, "MainzaState",
+                  "SET n.evolution_level = row.evolution_level, n.current_needs = row.current_needs, "
+                  "n.core_directives = row.core_directives",
+                  {"evolution_level": "evolution_level", "current_needs": "current_needs",
+                   "core_directives": "core_directives"}),
+    link_resource("discussed_in", MemoryToConversationLink,
+                  link_query("Memory", "memory_id", "DISCUSSED_IN", "Conversation", "conversation_id")),
+    link_resource("derived_from", ChunkToDocumentLink,
+                  link_query("Chunk", "chunk_id", "DERIVED_FROM", "Document", "document_id")),
+    link_resource("mentions", ConversationMentionsDocumentOrEntity, lambda link: _mentions_query(link.target_type)),
+    link_resource("relates_to", RelatesToLink,
+                  lambda link: link_query(link.source_type, "source_id", "RELATES_TO", link.target_type, "target_id")),
+    link_resource("needs_to_learn", MainzaNeedsToLearnLink,
+                  link_query("MainzaState", "state_id", "NEEDS_TO_LEARN", "Concept", "concept_id")),
+):
+    graph_bulk.register(_resource)
+
+@app.post("/bulk/{resource}")
+async def bulk_write(resource: str, request: Request):
+    """
+    Create or update many objects in one request:
+    - Body is a JSON array or NDJSON (one object per line), parsed item by item as it arrives
+    - Objects are validated like the single-object endpoint; invalid ones are reported by index and skipped
+    - Written in UNWIND batches, one transaction per batch; safe to re-send after a failure
+    - Link resources report the relationships created as written
+    """
+    try:
+        summary = await graph_bulk.write(
+            resource, iter_request_items(request.stream(), graph_bulk.config.max_item_bytes)
+        )
+    except BulkItemTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except BulkRequestError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except BulkWriteError as e:
+        return JSONResponse(status_code=500, content=e.summary.to_dict())
+    status_code = 413 if summary.limit_exceeded else 200
+    return JSONResponse(status_code=status_code, content=summary.to_dict())
+
+@app.get("/bulk/{resource}")
+async def bulk_list_page(resource: str, after: Optional[str] = Query(None),
+                         limit: Optional[int] = Query(None, ge=1)):
+    """One page of a resource in key order; pass next_cursor back as ``after`` for the next page"""
+    try:
+        return await graph_bulk.page(resource, after=after, limit=limit)
+    except BulkRequestError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+
+@app.get("/bulk/{resource}/stream")
+async def bulk_list_stream(resource: str, after: Optional[str] = Query(None),
+                           page_size: Optional[int] = Query(None, ge=1)):
+    """Every object of a resource (after ``after``) as NDJSON, read from the graph page by page"""
+    try:
+        graph_bulk.resource(resource, listable=True)
+    except BulkRequestError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    return StreamingResponse(graph_bulk.stream(resource, after=after, limit=page_size),
+                             media_type="application/jsonl")
+
 # --- Advanced Query Endpoints ---
 @app.post("/concepts/related", response_model=List[ConceptCreate])
 def find_related_concepts(req: RelatedConceptsRequest):
@@ -1243,88 +1391,128 @@ def get_documents_mentioned_in_conversation(req: DocumentsMentionedRequest):
         )
         return [DocumentResponse(document_id=rec["document_id"], filename=rec["filename"], metadata=rec["metadata"]) for rec in result]
 
+def _stt_overloaded_response(e: STTOverloadedError, media_type: Optional[str] = None):
+    content = {"error": str(e), "retry_after_seconds": e.retry_after_seconds}
+    headers = {"Retry-After": str(e.retry_after_seconds)}
+    if media_type == "application/jsonl":
+        return Response(json.dumps(content) + "\n", status_code=503, media_type=media_type, headers=headers)
+    return JSONResponse(status_code=503, content=content, headers=headers)
+
 @app.post("/stt/transcribe", response_model=STTTranscript)
-def transcribe_audio(audio: UploadFile = File(...)):
+async def transcribe_audio(audio: UploadFile = File(...)):
     """
     Context7-compliant STT endpoint:
     - Accepts audio file (wav/webm/ogg)
+    - Decodes in memory and transcribes on the bounded STT worker pool
     - Returns transcript as STTTranscript (text, segments)
-    - Robust error handling
+    - Robust error handling (503 with Retry-After while Whisper loads or when the queue is full)
     """
     try:
-        import tempfile
-        import subprocess
-        import shutil
-        import os
-        # Save uploaded file to temp
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".input") as tmp:
-            tmp.write(audio.file.read())
-            input_path = tmp.name
-        # Convert to wav using ffmpeg
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmpwav:
-            wav_path = tmpwav.name
-        try:
-            subprocess.run([
-                "ffmpeg", "-y", "-i", input_path, "-ar", "16000", "-ac", "1", wav_path
-            ], check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            os.remove(input_path)
-            if os.path.exists(wav_path): os.remove(wav_path)
-            return JSONResponse(status_code=500, content={"error": f"ffmpeg error: {e.stderr.decode()}", "traceback": traceback.format_exc()})
-        result = whisper_model.transcribe(wav_path)
-        os.remove(input_path)
-        os.remove(wav_path)
+        stt_service.ensure_model_loaded()
+        result = await stt_service.transcribe(await audio.read())
         text = result["text"]
         segments = None
         if "segments" in result and isinstance(result["segments"], list):
             segments = [STTSegment(start=s["start"], end=s["end"], text=s["text"]) for s in result["segments"]]
         return STTTranscript(text=text, segments=segments)
+    except STTOverloadedError as e:
+        return _stt_overloaded_response(e)
+    except AudioDecodeError as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e), "traceback": traceback.format_exc()})
 
 @app.post("/stt/stream")
-def stream_transcribe(audio: UploadFile = File(...)):
+async def stream_transcribe(audio: UploadFile = File(...)):
     """
     Robust STT endpoint (non-streaming):
     - Accepts audio file (wav/webm/ogg)
     - Returns transcript as a single JSON line (Response with media_type="application/jsonl")
     - No generator/callback pattern (avoids I/O errors)
     """
-    import tempfile
-    import subprocess
-    import os
-    import json
     try:
-        audio_bytes = audio.file.read()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".input") as tmp:
-            tmp.write(audio_bytes)
-            input_path = tmp.name
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmpwav:
-            wav_path = tmpwav.name
-        try:
-            subprocess.run([
-                "ffmpeg", "-y", "-i", input_path, "-ar", "16000", "-ac", "1", wav_path
-            ], check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            os.remove(input_path)
-            if os.path.exists(wav_path): os.remove(wav_path)
-            err = {"error": f"ffmpeg error: {e.stderr.decode()}"}
-            return Response(json.dumps(err) + "\n", media_type="application/jsonl")
-        result = whisper_model.transcribe(
-            wav_path,
+        stt_service.ensure_model_loaded()
+        result = await stt_service.transcribe(
+            await audio.read(),
             verbose=False,
             word_timestamps=False,
             condition_on_previous_text=True,
             task="transcribe"
         )
         chunk = StreamingSTTChunk(text=result["text"], is_final=True)
-        os.remove(input_path)
-        os.remove(wav_path)
         return Response(json.dumps(chunk.dict()) + "\n", media_type="application/jsonl")
+    except STTOverloadedError as e:
+        return _stt_overloaded_response(e, media_type="application/jsonl")
     except Exception as e:
         err = {"error": str(e)}
         return Response(json.dumps(err) + "\n", media_type="application/jsonl")
 
+@app.websocket("/stt/ws")
+async def websocket_stream_transcribe(websocket: WebSocket, sample_rate: int = 16000, user_id: Optional[str] = None):
+    """
+    Incremental streaming STT over WebSocket:
+    - Client sends binary frames of 16-bit little-endian mono PCM at `sample_rate`
+    - Server replies with StreamingSTTChunk JSON messages: partials while the user
+      is speaking and a final chunk at each end of utterance (VAD-segmented)
+    - Text messages: {"type": "end"} flushes the current utterance and replies
+      {"type": "flushed"}; {"type": "ping"} replies {"type": "pong"}
+    - With `user_id`, the user's conversation context is prefetched on connect and
+      each final transcript warms the query embedding caches for the chat turn
+    - While Whisper is still loading, sends an error with `retry_after_seconds`
+      and closes with code 1013 (try again later)
+    """
+    await websocket.accept()
+    try:
+        stt_service.ensure_model_loaded()
+    except STTModelLoadingError as e:
+        await websocket.send_json({"type": "error", "error": str(e), "retry_after_seconds": e.retry_after_seconds})
+        await websocket.close(code=1013)  # Try Again Later
+        return
+    context_prefetcher.notify_activity(user_id)
+    warm_tasks = set()
+
+    async def send_chunk(chunk: dict):
+        if "error" in chunk:
+            await websocket.send_json({"type": "error", **chunk})
+            return
+        if user_id and chunk["is_final"] and chunk["text"].strip():
+            task = asyncio.create_task(context_prefetcher.warm_query(chunk["text"]))
+            warm_tasks.add(task)
+            task.add_done_callback(warm_tasks.discard)
+        payload = StreamingSTTChunk(text=chunk["text"], is_final=chunk["is_final"]).dict()
+        payload.update({k: chunk[k] for k in ("utterance_id", "start", "end")})
+        await websocket.send_json(payload)
+
+    session = StreamingSTTSession(send_chunk, sample_rate=sample_rate)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text"):
+                control = json.loads(message["text"])
+                if control.get("type") == "end":
+                    await session.flush()
+                    await websocket.send_json({"type": "flushed"})
+                elif control.get("type") == "ping":
+                    await websocket.send_json({"type": "pong"})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logging.error(f"[STT/WS] Streaming transcription error: {e}")
+    finally:
+        await session.close()
+        # Prefetched context stays for the chat request that usually follows; the TTL drops it if unused
+        for task in warm_tasks:
+            task.cancel()
+
+@app.get("/stt/stats")
+async def get_stt_stats():
+    """STT worker pool and queue statistics"""
+    return stt_service.get_stats()
+
 @app.get("/tts/test")
 def test_tts():
     """Quick TTS test endpoint to verify model loading"""
@@ -1375,192 +1563,71 @@ def list_voices():
         )
 
 @app.post("/tts/synthesize")
-def synthesize_tts(payload: dict, background_tasks: BackgroundTasks):
+async def synthesize_tts(payload: dict):
     """
     Context7-compliant TTS endpoint:
     - Robust input validation and error handling
-    - Detailed debug logging for all steps
-    - Always returns a valid audio file or a clear JSON error
-    - Cleans up temp files after use (via BackgroundTasks)
-    - Always provides a speaker for XTTS (defaults to 'Ana Florence')
-    - Now supports long-form TTS by chunking and concatenating audio
+    - Long-form text is split into sentence chunks; chunk N+1 is synthesized
+      while chunk N is streamed, so audio starts after the first sentence
+    - Streams a WAV (16-bit PCM) from memory; pass "stream": false to receive
+      a complete WAV with exact sizes instead
+    - Repeated phrases are served from an in-memory audio cache
     """
-    import tempfile, os, logging, subprocess
     try:
         text = payload.get("text", "")
         language = payload.get("language", "en")
         speaker_wav = payload.get("speaker_wav")
-        speaker = payload.get("speaker")
-        logging.debug(f"[TTS] synthesize_tts called with text='{text[:50]}', language='{language}', speaker='{speaker}', speaker_wav='{speaker_wav}'")
+        stream = payload.get("stream", True)
+        logging.debug(f"[TTS] synthesize_tts called with text='{text[:50]}', language='{language}', speaker_wav='{speaker_wav}'")
         if not text or not isinstance(text, str) or not text.strip():
             logging.error("[TTS] No valid text provided")
             return JSONResponse(status_code=400, content={"error": "No valid text provided"})
-        model = get_xtts_model()
+        model = await aget_tts_model()
         if model is None:
             logging.error("[TTS] Model loading failed, cannot synthesize")
             return JSONResponse(status_code=503, content={
                 "error": "TTS model is not available", 
                 "message": "The text-to-speech service is temporarily unavailable. Please try again later."
             })
-        
-        # Chunking logic for long-form TTS
-        import nltk
-        nltk.download('punkt', quiet=True)
-        from nltk.tokenize import sent_tokenize
-        sentences = sent_tokenize(text)
-        chunk_size = 300
-        chunks = []
-        current = ""
-        for sent in sentences:
-            if len(current) + len(sent) + 1 > chunk_size and current:
-                chunks.append(current.strip())
-                current = sent
-            else:
-                current += (" " if current else "") + sent
-        if current:
-            chunks.append(current.strip())
-        logging.debug(f"[TTS] Split text into {len(chunks)} chunk(s)")
-        temp_wavs = []
-        for i, chunk in enumerate(chunks):
-            with tempfile.NamedTemporaryFile(suffix=f"_chunk{i}.wav", delete=False) as tmp:
-                out_path = tmp.name
-            try:
-                # Always provide a speaker for XTTS
-                if not speaker and not speaker_wav:
-                    speaker = "Ana Florence"
-                    logging.debug("[TTS] No speaker or speaker_wav provided, defaulting to 'Ana Florence'")
-                if speaker_wav:
-                    logging.debug(f"[TTS] Using speaker_wav: {speaker_wav}")
-                    model.tts_to_file(text=chunk, speaker_wav=speaker_wav, language=language, file_path=out_path)
-                else:
-                    logging.debug(f"[TTS] Using speaker: {speaker}")
-                    # Use simple TTS without speaker for faster processing
-                    model.tts_to_file(text=chunk, file_path=out_path)
-                temp_wavs.append(out_path)
-            except Exception as e:
-                logging.error(f"[TTS] tts_to_file error on chunk {i}: {e}\nText: {chunk}")
-                for f in temp_wavs:
-                    if os.path.exists(f): os.remove(f)
-                return JSONResponse(status_code=500, content={"error": f"tts_to_file error: {str(e)}", "traceback": traceback.format_exc()})
-        # Concatenate all wavs into one
-        with tempfile.NamedTemporaryFile(suffix="_concat.wav", delete=False) as concat_file:
-            concat_path = concat_file.name
-        try:
-            concat_list_path = concat_path + ".txt"
-            with open(concat_list_path, "w") as f:
-                for wav_path in temp_wavs:
-                    f.write(f"file '{wav_path}'\n")
-            ffmpeg_cmd = [
-                "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list_path, "-ar", "44100", "-ac", "1", "-sample_fmt", "s16", concat_path
-            ]
-            subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-            for f in temp_wavs:
-                if os.path.exists(f): os.remove(f)
-            os.remove(concat_list_path)
-        except Exception as e:
-            logging.error(f"[TTS] ffmpeg concat error: {e}")
-            if os.path.exists(concat_path): os.remove(concat_path)
-            for f in temp_wavs:
-                if os.path.exists(f): os.remove(f)
-            return JSONResponse(status_code=500, content={"error": f"ffmpeg concat error: {str(e)}", "traceback": traceback.format_exc()})
-        logging.debug(f"[TTS] Returning FileResponse for {concat_path}")
-        # Use BackgroundTasks for cleanup
-        def cleanup():
-            try:
-                if os.path.exists(concat_path):
-                    os.remove(concat_path)
-                logging.debug(f"[TTS] Cleaned up temp file {concat_path}")
-            except Exception as e:
-                logging.error(f"[TTS] Error cleaning up temp file {concat_path}: {e}")
-        background_tasks.add_task(cleanup)
-        return FileResponse(concat_path, media_type="audio/wav", filename="output.wav")
+        if not stream:
+            wav_bytes = await tts_pipeline.synthesize_wav(text, language=language, speaker_wav=speaker_wav)
+            return Response(wav_bytes, media_type="audio/wav", headers={"Content-Disposition": 'inline; filename="output.wav"'})
+        return StreamingResponse(
+            tts_pipeline.stream_wav(text, language=language, speaker_wav=speaker_wav),
+            media_type="audio/wav",
+            headers={"Content-Disposition": 'inline; filename="output.wav"'}
+        )
     except Exception as e:
         logging.error(f"[TTS] synthesize_tts error: {e}\n{traceback.format_exc()}")
         return JSONResponse(status_code=500, content={"error": str(e), "traceback": traceback.format_exc()})
 
+@app.get("/tts/stats")
+async def get_tts_stats():
+    """TTS pipeline audio cache statistics"""
+    return tts_pipeline.get_stats()
+
 @app.post("/tts/livekit")
 async def tts_to_livekit(payload: dict):
     """
     Context7-compliant: Synthesize TTS and publish to LiveKit room as Mainza participant via RTMP Ingress.
     - Accepts: text, language, speaker (optional), room, user
-    - Synthesizes TTS audio
     - Dynamically creates or fetches an Ingress session for the room/user
-    - Streams audio to LiveKit RTMP Ingress using ffmpeg
+    - Synthesizes TTS sentence by sentence and pipes the audio into ffmpeg as it
+      is produced, so the room hears the first sentence while the rest is synthesized
     - Returns structured JSON with success or agentic error details
     """
-    import tempfile, os, subprocess, logging, re, json, wave, contextlib
-    from fastapi.responses import JSONResponse
-    # get_or_create_rtmp_ingress already imported at module level
     logging.debug(f"[TTS/LiveKit] Incoming payload: {payload}")
     try:
         text = payload.get("text", "")
         language = payload.get("language", "en")
-        speaker = payload.get("speaker", "Ana Florence")
         room = payload.get("room", "mainza-ai")
         user = payload.get("user", "mainza-ai")
         # Validate text
         if not text or not isinstance(text, str) or not text.strip():
             return JSONResponse({"error": "No text provided.", "agentic": True}, status_code=400)
-        # Split text into sentences if long
-        import nltk
-        nltk.download('punkt', quiet=True)
-        from nltk.tokenize import sent_tokenize
-        sentences = sent_tokenize(text)
-        chunk_size = 300
-        chunks = []
-        current = ""
-        for sent in sentences:
-            if len(current) + len(sent) + 1 > chunk_size and current:
-                chunks.append(current.strip())
-                current = sent
-            else:
-                current += (" " if current else "") + sent
-        if current:
-            chunks.append(current.strip())
-        logging.debug(f"[TTS/LiveKit] Split text into {len(chunks)} chunk(s)")
-        # Synthesize each chunk and concatenate
-        temp_wavs = []
-        for i, chunk in enumerate(chunks):
-            with tempfile.NamedTemporaryFile(suffix=f"_chunk{i}.wav", delete=False) as out_file:
-                out_path = out_file.name
-            try:
-                if coqui_tts_model is None:
-                    logging.warning(f"[TTS/LiveKit] TTS not available, skipping chunk {i}")
-                    for f in temp_wavs:
-                        if os.path.exists(f): os.remove(f)
-                    return JSONResponse({"error": "TTS not available in this deployment", "agentic": True}, status_code=503)
-                
-                wav = coqui_tts_model.tts(text=chunk)
-                import soundfile as sf
-                sf.write(out_path, wav, samplerate=22050)
-                temp_wavs.append(out_path)
-            except Exception as e:
-                logging.error(f"[TTS/LiveKit] TTS model error on chunk {i}: {e}\nText: {chunk}")
-                for f in temp_wavs:
-                    if os.path.exists(f): os.remove(f)
-                return JSONResponse({"error": f"TTS model error: {str(e)}", "agentic": True}, status_code=500)
-        # Concatenate all wavs into one
-        with tempfile.NamedTemporaryFile(suffix="_concat.wav", delete=False) as concat_file:
-            concat_path = concat_file.name
-        try:
-            # Use ffmpeg to concatenate
-            concat_list_path = concat_path + ".txt"
-            with open(concat_list_path, "w") as f:
-                for wav_path in temp_wavs:
-                    f.write(f"file '{wav_path}'\n")
-            ffmpeg_cmd = [
-                "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list_path, "-ar", "22050", "-ac", "1", "-sample_fmt", "s16", concat_path
-            ]
-            subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-            for f in temp_wavs:
-                if os.path.exists(f): os.remove(f)
-            os.remove(concat_list_path)
-        except Exception as e:
-            logging.error(f"[TTS/LiveKit] ffmpeg concat error: {e}")
-            if os.path.exists(concat_path): os.remove(concat_path)
-            for f in temp_wavs:
-                if os.path.exists(f): os.remove(f)
-            return JSONResponse({"error": f"ffmpeg concat error: {str(e)}", "agentic": True}, status_code=500)
+        if await aget_tts_model() is None:
+            logging.warning("[TTS/LiveKit] TTS not available")
+            return JSONResponse({"error": "TTS not available in this deployment", "agentic": True}, status_code=503)
         # Dynamically get or create an Ingress session for this room/user
         try:
             ingress = await get_or_create_rtmp_ingress(room, user)
@@ -1572,23 +1639,27 @@ async def tts_to_livekit(payload: dict):
             logging.debug(f"[TTS/LiveKit] Using dynamic RTMP Ingress: {full_url}")
         except Exception as e:
             logging.error(f"[TTS/LiveKit] Failed to get/create ingress: {e}")
-            if os.path.exists(concat_path): os.remove(concat_path)
             return JSONResponse({"error": f"Failed to get/create ingress: {e}", "agentic": True}, status_code=500)
-        # Stream to RTMP as before
-        ffmpeg_cmd = [
-            "ffmpeg", "-re", "-i", concat_path, "-acodec", "aac", "-ar", "48000", "-ac", "2", "-b:a", "128k", "-f", "flv", full_url
-        ]
+        # Stream synthesized audio to RTMP through ffmpeg stdin
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-re", "-f", "wav", "-i", "pipe:0", "-acodec", "aac", "-ar", "48000", "-ac", "2", "-b:a", "128k", "-f", "flv", full_url,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
         try:
-            subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            logging.error(f"[TTS/LiveKit] ffmpeg error: {e.stderr.decode()}")
-            if os.path.exists(concat_path): os.remove(concat_path)
+            async for audio in tts_pipeline.stream_wav(text, language=language):
+                process.stdin.write(audio)
+                await process.stdin.drain()
+            process.stdin.close()
+        except Exception as e:
+            process.kill()
+            logging.error(f"[TTS/LiveKit] TTS streaming error: {e}")
+            return JSONResponse({"error": f"TTS model error: {str(e)}", "agentic": True}, status_code=500)
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            logging.error(f"[TTS/LiveKit] ffmpeg error: {stderr.decode(errors='ignore')}")
             return JSONResponse({"error": "Failed to stream audio to LiveKit.", "agentic": True}, status_code=500)
-        finally:
-            if os.path.exists(concat_path): os.remove(concat_path)
         return JSONResponse({"success": True, "agentic": True, "rtmp_url": rtmp_url, "stream_key": stream_key})
     except Exception as e:
-        import traceback
         logging.error(f"[TTS/LiveKit] Unexpected error: {e}\n{traceback.format_exc()}")
         return JSONResponse({"error": str(e), "agentic": True}, status_code=500)
 
@@ -2320,6 +2391,17 @@ async def unload_ollama_model(model: str = Body(..., embed=True)):
         logging.error(f"❌ Error unloading model {model}: {e}")
         return JSONResponse(status_code=500, content={"error": str(e), "traceback": traceback.format_exc()})
 
+@app.get("/ollama/stats")
+async def get_ollama_client_stats():
+    """Connection pool settings and per-model latency/throughput of the shared Ollama client"""
+    from backend.utils.prompt_assembly import prompt_session_manager
+    return {**ollama_client.get_stats(), "prompt_cache": prompt_session_manager.get_stats()}
+
+@app.get("/post-response/stats")
+async def get_post_response_stats():
+    """Queue depth, retries and failures of the post-response task pipeline"""
+    return post_response_pipeline.get_stats()
+
 @app.get("/ollama/models")
 async def get_ollama_models():
     """Fetch available Ollama models from the local Ollama server"""
@@ -2597,7 +2679,7 @@ async def get_quantum_jobs():
             content={"error": str(e), "status": "failed"}
         )
 
-@app.get("/quantum/statistics")
+@app.get("/quantum/statistics", dependencies=[Depends(lazy_component_registry.requires("unified_quantum_consciousness_engine"))])
 async def get_quantum_statistics():
     """Get quantum consciousness processing statistics"""
     try:
@@ -2610,7 +2692,7 @@ async def get_quantum_statistics():
             content={"error": str(e), "status": "failed"}
         )
 
-@app.post("/quantum/process")
+@app.post("/quantum/process", dependencies=[Depends(lazy_component_registry.requires("unified_quantum_consciousness_engine"))])
 async def process_quantum_consciousness(consciousness_data: dict):
     """Process consciousness using quantum principles"""
     try:
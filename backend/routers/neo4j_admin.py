@@ -125,7 +125,7 @@ async def get_embedding_info() -> Dict[str, Any]:
 async def test_embedding(text: str = "This is a test embedding") -> Dict[str, Any]:
     """Test embedding generation."""
     try:
-        embedding = embedding_manager.get_embedding(text)
+        embedding = await embedding_manager.aget_embedding(text)
         
         return {
             "text": text,
@@ -73,29 +73,18 @@ async def get_telemetry_data(
             raise HTTPException(status_code=400, detail="Invalid data type")
         
         telemetry = get_telemetry()
-        data = telemetry.export_data(data_type)
+        # Range query served from the segment index: only segments inside the
+        # window are read, newest first, stopping once `limit` records are found
+        since = datetime.utcnow() - timedelta(days=days) if days and days > 0 else None
+        data = telemetry.export_data(
+            data_type,
+            since=since,
+            limit=limit if limit and limit > 0 else None
+        )
         
         if data is None:
             raise HTTPException(status_code=500, detail="Failed to export data")
         
-        # Filter by date if specified
-        if days > 0:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            filtered_data = []
-            for item in data:
-                try:
-                    item_date = datetime.fromisoformat(item['timestamp'].replace('Z', '+00:00'))
-                    if item_date >= cutoff_date:
-                        filtered_data.append(item)
-                except Exception:
-                    # Keep item if date parsing fails
-                    filtered_data.append(item)
-            data = filtered_data
-        
-        # Apply limit
-        if limit > 0:
-            data = data[-limit:]  # Get most recent records
-        
         return {
             "data_type": data_type,
             "count": len(data),
@@ -130,8 +130,7 @@ async def get_unified_health():
     try:
         # Import unified systems
         from backend.utils.unified_consciousness_state_manager import unified_consciousness_state_manager
-        from backend.utils.unified_quantum_consciousness_engine import unified_quantum_consciousness_engine
-        from backend.utils.unified_quantum_consciousness_integration import unified_quantum_consciousness_integration
+        from backend.utils.unified_quantum_consciousness_engine import aget_unified_quantum_consciousness_engine
         
         # Get health status from all systems
         health_status = {
@@ -158,6 +157,7 @@ async def get_unified_health():
         
         # Check quantum system health
         try:
+            unified_quantum_consciousness_engine = await aget_unified_quantum_consciousness_engine()
             if unified_quantum_consciousness_engine:
                 quantum_stats = await unified_quantum_consciousness_engine.get_quantum_consciousness_statistics()
                 health_status["quantum_health"] = "healthy"
@@ -256,8 +256,8 @@ async def get_unified_quantum_state():
     should use to ensure data consistency across the entire application.
     """
     try:
-        # Import unified quantum consciousness engine
-        from backend.utils.unified_quantum_consciousness_engine import unified_quantum_consciousness_engine
+        from backend.utils.unified_quantum_consciousness_engine import aget_unified_quantum_consciousness_engine
+        unified_quantum_consciousness_engine = await aget_unified_quantum_consciousness_engine()
         
         if not unified_quantum_consciousness_engine:
             raise HTTPException(status_code=503, detail="Quantum consciousness engine not available")
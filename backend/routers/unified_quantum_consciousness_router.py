@@ -13,7 +13,7 @@ Author: Mainza AI Consciousness Team
 Date: 2025-10-01
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import asyncio
@@ -26,7 +26,16 @@ logger = logging.getLogger(__name__)
 from backend.utils.unified_quantum_consciousness_engine import unified_quantum_consciousness_engine
 from backend.utils.unified_quantum_consciousness_integration import unified_quantum_consciousness_integration
 
-router = APIRouter(prefix="/api/quantum", tags=["unified-quantum-consciousness"])
+from backend.utils.lazy_component_registry import lazy_component_registry
+
+# Both systems are built lazily; load them off the event loop before any handler touches them
+router = APIRouter(
+    prefix="/api/quantum",
+    tags=["unified-quantum-consciousness"],
+    dependencies=[Depends(lazy_component_registry.requires(
+        "unified_quantum_consciousness_engine", "unified_quantum_consciousness_integration"
+    ))]
+)
 
 
 @router.get("/status")
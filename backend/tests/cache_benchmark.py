@@ -0,0 +1,63 @@
+"""
+Benchmark for the core InMemoryCache
+Measures per-operation cost of hits, misses and evicting inserts for each
+eviction strategy at increasing cache sizes; cost should stay flat up to 10^5 entries.
+
+Run with: python backend/tests/cache_benchmark.py
+"""
+
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.core.performance_optimization import CacheStrategy, InMemoryCache
+
+SIZES = [1_000, 10_000, 100_000]
+OPERATIONS = 20_000
+REPEATS = 3
+
+
+def benchmark_strategy(strategy: CacheStrategy, size: int) -> Dict[str, float]:
+    """Microseconds per operation for a full cache of ``size`` entries"""
+    cache = InMemoryCache(max_size=size, default_ttl=3600, strategy=strategy)
+    for i in range(size):
+        cache.set(f"key_{i}", i)
+
+    timings: Dict[str, List[float]] = {"hit": [], "miss": [], "evicting_set": []}
+    for repeat in range(REPEATS):
+        start = time.perf_counter()
+        for i in range(OPERATIONS):
+            cache.get(f"key_{(i * 7919) % size}")
+        timings["hit"].append((time.perf_counter() - start) / OPERATIONS)
+
+        start = time.perf_counter()
+        for i in range(OPERATIONS):
+            cache.get(f"absent_{i}")
+        timings["miss"].append((time.perf_counter() - start) / OPERATIONS)
+
+        start = time.perf_counter()
+        for i in range(OPERATIONS):
+            cache.set(f"new_{repeat}_{i}", i)
+        timings["evicting_set"].append((time.perf_counter() - start) / OPERATIONS)
+
+    return {op: statistics.median(values) * 1e6 for op, values in timings.items()}
+
+
+def main():
+    print(f"InMemoryCache per-operation cost (µs, median of {REPEATS} x {OPERATIONS} ops)")
+    print(f"{'strategy':<8} {'size':>8} {'hit':>8} {'miss':>8} {'set+evict':>10}")
+    for strategy in (CacheStrategy.LRU, CacheStrategy.LFU, CacheStrategy.TTL):
+        for size in SIZES:
+            result = benchmark_strategy(strategy, size)
+            print(
+                f"{strategy.value:<8} {size:>8} {result['hit']:>8.2f} "
+                f"{result['miss']:>8.2f} {result['evicting_set']:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
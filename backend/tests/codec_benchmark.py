@@ -0,0 +1,123 @@
+"""
+Benchmark for cache value codecs
+Compares encode/decode throughput and encoded size of the cache codec against the
+previous EnhancedRedisCache format (json.dumps + gzip above 1 KB, or pickle) on
+memory, embedding and consciousness payloads shaped like the ones the agents cache.
+
+Run with: python backend/tests/codec_benchmark.py
+"""
+
+import gzip
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils.cache_codecs import (
+    CacheCodec, LZ4_AVAILABLE, MSGPACK_AVAILABLE, ORJSON_AVAILABLE, Serializer, ZSTD_AVAILABLE
+)
+
+ITERATIONS = 200
+
+
+def build_payloads() -> Dict[str, Any]:
+    rng = np.random.default_rng(42)
+    memories = [
+        {
+            "memory_id": f"mem-{i}",
+            "user_id": "mainza-user",
+            "agent_name": "simple_chat",
+            "memory_type": "interaction",
+            "content": f"User: tell me about topic {i}\nAssistant: Topic {i} relates to consciousness and learning.",
+            "importance_score": float(rng.random()),
+            "created_at": datetime(2025, 8, 1, 12, i % 60).isoformat(),
+            "metadata": {"emotional_state": "curious", "consciousness_level": 0.7, "keywords": ["topic", str(i)]},
+            "embedding": rng.random(768, dtype=np.float32).tolist(),
+        }
+        for i in range(20)
+    ]
+    consciousness = {
+        "consciousness_level": 0.74,
+        "self_awareness_score": 0.68,
+        "emotional_state": "curious",
+        "active_goals": ["learn about the user", "improve responses", "reflect on interactions"],
+        "learning_rate": 0.81,
+        "evolution_level": 3,
+        "total_interactions": 1523,
+        "last_reflection": datetime(2025, 8, 1, 12, 0).isoformat(),
+    }
+    return {
+        "memory_records (embeddings as lists)": memories,
+        "embedding_matrix (20x768 float32)": rng.random((20, 768), dtype=np.float32),
+        "consciousness_state": consciousness,
+    }
+
+
+def legacy_json(value: Any) -> bytes:
+    serialized = json.dumps(value, default=str).encode("utf-8")
+    if len(str(value)) > 1024:  # the old size estimate
+        compressed = gzip.compress(serialized)
+        if len(compressed) < len(serialized):
+            serialized = b"COMPRESSED:" + compressed
+    return serialized
+
+
+def legacy_json_decode(data: bytes) -> Any:
+    if data.startswith(b"COMPRESSED:"):
+        data = gzip.decompress(data[11:])
+    return json.loads(data.decode("utf-8"))
+
+
+def measure(encode: Callable[[Any], bytes], decode: Callable[[bytes], Any], value: Any) -> Tuple[float, float, int]:
+    """Encode µs, decode µs, encoded bytes"""
+    data = encode(value)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        encode(value)
+    encode_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        decode(data)
+    decode_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+    return encode_us, decode_us, len(data)
+
+
+def main():
+    codec = CacheCodec()
+    pickle_codec = CacheCodec(allow_pickle=True)
+    print(
+        f"msgpack={MSGPACK_AVAILABLE} orjson={ORJSON_AVAILABLE} "
+        f"zstd={ZSTD_AVAILABLE} lz4={LZ4_AVAILABLE}; {ITERATIONS} iterations each"
+    )
+    variants = {
+        "legacy json+gzip": (legacy_json, legacy_json_decode),
+        "legacy pickle": (lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+        "codec auto": (codec.encode, codec.decode),
+        "codec json": (lambda v: codec.encode(v, serializer=Serializer.JSON), codec.decode),
+        "codec pickle": (lambda v: pickle_codec.encode(v, serializer=Serializer.PICKLE), pickle_codec.decode),
+    }
+    for name, value in build_payloads().items():
+        print(f"\n{name}")
+        print(f"  {'variant':<18} {'encode µs':>10} {'decode µs':>10} {'bytes':>9}")
+        for variant, (encode, decode) in variants.items():
+            if isinstance(value, np.ndarray) and variant.startswith("legacy json"):
+                value_for_variant = value.tolist()
+            else:
+                value_for_variant = value
+            try:
+                encode_us, decode_us, size = measure(encode, decode, value_for_variant)
+            except Exception as e:
+                print(f"  {variant:<18} failed: {e}")
+                continue
+            print(f"  {variant:<18} {encode_us:>10.1f} {decode_us:>10.1f} {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
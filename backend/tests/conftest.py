@@ -0,0 +1,146 @@
+"""
+Shared test fakes for the Mainza AI backend tests
+Provides a controllable clock, in-memory Redis clients and a canned-row
+database, exposed as fixtures.
+"""
+import asyncio
+
+import pytest
+
+
+class FakeClock:
+    """Monotonic clock that only moves when a test advances it"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeRedis:
+    """Minimal synchronous Redis stand-in shared by several caches"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def incr(self, key):
+        self.calls.append(key)
+
+    def execute(self):
+        return [self.client.incr(key) for key in self.calls]
+
+
+class FakeAsyncRedis:
+    """The subset of redis.asyncio the caches use; one instance can be shared between 'workers'"""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.subscribers = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.sets.pop(key, None)
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "data": message})
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.server.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def unsubscribe(self, channel):
+        self.server.subscribers.get(channel, []).remove(self.queue)
+
+    async def close(self):
+        pass
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+
+class FakeDatabase:
+    """Records queries and answers every read with copies of canned rows"""
+
+    def __init__(self, rows=(), fail_on=None):
+        self.rows = list(rows)
+        self.fail_on = fail_on
+        self.calls = []
+
+    async def execute_query(self, query, parameters=None):
+        self.calls.append((query, parameters))
+        if query == self.fail_on:
+            raise ConnectionError("Neo4j unavailable")
+        return [dict(row) for row in self.rows]
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def fake_async_redis():
+    return FakeAsyncRedis()
+
+
+@pytest.fixture
+def fake_database():
+    return FakeDatabase()
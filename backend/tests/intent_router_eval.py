@@ -0,0 +1,111 @@
+"""
+Offline evaluation for the semantic intent router
+Measures routing accuracy, per-agent precision/recall and routing latency on a
+held-out labelled set, for the semantic router alone, the keyword rules alone and
+the production combination (semantic first, keyword rules when unsure). The set
+includes the cases the keyword rules get wrong ("this" contains "hi", "why"
+questions that need no knowledge graph).
+
+Needs the sentence-transformers embedding model; the keyword baseline needs the
+full backend importable. Run with: python backend/tests/intent_router_eval.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils.intent_router import SemanticIntentRouter, evaluate_router
+
+HELD_OUT = [
+    ("hey Mainza, good to see you", "simple_chat"),
+    ("how's your day going?", "simple_chat"),
+    ("is this a good time to talk?", "simple_chat"),
+    ("why is the sky blue?", "simple_chat"),
+    ("why do cats purr?", "simple_chat"),
+    ("can you write me a haiku about autumn", "simple_chat"),
+    ("that's funny, tell me another one", "simple_chat"),
+    ("what is the capital of France?", "simple_chat"),
+    ("I'm a bit stressed about work", "simple_chat"),
+    ("thank you so much", "simple_chat"),
+    ("what do you know about my thesis from the documents I uploaded?", "graphmaster"),
+    ("find the notes where I mentioned Kubernetes", "graphmaster"),
+    ("what did we talk about yesterday regarding the garden?", "graphmaster"),
+    ("which of my concepts are connected to creativity?", "graphmaster"),
+    ("show me everything linked to the Berlin trip", "graphmaster"),
+    ("do you remember my favourite book?", "graphmaster"),
+    ("summarise the paper on transformers I shared", "graphmaster"),
+    ("what entities appear in my meeting notes?", "graphmaster"),
+    ("remind me to water the plants at 6", "taskmaster"),
+    ("put 'renew passport' on my list", "taskmaster"),
+    ("what's on my agenda for tomorrow?", "taskmaster"),
+    ("I finished the slides, tick that off", "taskmaster"),
+    ("book a call with the landlord next Tuesday", "taskmaster"),
+    ("what do I still need to do this week?", "taskmaster"),
+]
+
+
+def load_keyword_router():
+    try:
+        from backend.agentic_router import make_consciousness_aware_routing_decision
+        from backend.utils import intent_router as intent_router_module
+    except Exception as e:
+        print(f"Keyword baseline unavailable ({e.__class__.__name__}: {e})")
+        return None
+
+    async def keyword_route(query: str) -> Optional[str]:
+        previous = intent_router_module.intent_router.config.enabled
+        intent_router_module.intent_router.config.enabled = False
+        try:
+            decision = await make_consciousness_aware_routing_decision(query, "eval", {}, {})
+        finally:
+            intent_router_module.intent_router.config.enabled = previous
+        return decision["agent_name"]
+
+    return keyword_route
+
+
+def print_report(name: str, report: dict):
+    print(f"\n=== {name} ===")
+    print(f"accuracy: {report['accuracy']:.1%} on {report['samples']} queries")
+    latency = report["latency_ms"]
+    print(f"latency ms: p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  max {latency['max']:.2f}")
+    for agent, scores in report["per_agent"].items():
+        print(f"  {agent:<12} precision {scores['precision']:.2f}  recall {scores['recall']:.2f}")
+    print("confusion (expected -> predicted):", json.dumps(report["confusion"]))
+
+
+async def main():
+    router = SemanticIntentRouter()
+    router.config.refresh_interval = float("inf")  # seed prototypes only, no database
+    router._learned_at = 0.0
+    if not await router.build():
+        print("Embedding model unavailable (install sentence-transformers); nothing to evaluate")
+        return
+
+    async def semantic_route(query: str) -> Optional[str]:
+        decision = await router.route(query)
+        return decision.agent_name if decision else None
+
+    print_report("semantic router (best prototype, ignoring thresholds)", await evaluate_router(semantic_route, HELD_OUT))
+
+    keyword_route = load_keyword_router()
+    if keyword_route is None:
+        return
+    print_report("keyword rules", await evaluate_router(keyword_route, HELD_OUT))
+
+    async def combined_route(query: str) -> Optional[str]:
+        decision = await router.route(query)
+        if decision is not None and decision.confident:
+            return decision.agent_name
+        return await keyword_route(query)
+
+    print_report("semantic with keyword fallback (production)", await evaluate_router(combined_route, HELD_OUT))
+    print("\nrouter stats:", json.dumps(router.get_stats(), default=str))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
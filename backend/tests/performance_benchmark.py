@@ -21,14 +21,7 @@ from datetime import datetime
 backend_path = os.path.join(os.path.dirname(__file__), '..')
 sys.path.insert(0, backend_path)
 
-# Change to backend directory for imports
-original_cwd = os.getcwd()
-os.chdir(backend_path)
-
-try:
-    from agentic_router import extract_response_from_result, generate_throttled_response
-finally:
-    os.chdir(original_cwd)
+from utils.response_extraction import extract_response_from_result
 
 
 class PerformanceBenchmark:
@@ -0,0 +1,211 @@
+"""
+Unit tests for LLM Admission Control
+Tests the AIMD concurrency limit, fair per-user queueing, deadlines, load shedding
+and goodput under overload.
+"""
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from backend.utils.admission_control import (
+    AdmissionConfig, AdmissionController, AdmissionRejected, AIMDLimit
+)
+from backend.utils.llm_request_manager import LLMRequestManager, RequestPriority
+
+
+@pytest.fixture
+def config():
+    return AdmissionConfig(enabled=True, initial_limit=2, min_limit=1, max_limit=4, latency_target=1.0,
+                           backoff_ratio=0.5, max_queue_size=8, max_queue_per_user=3, queue_deadline=1.0)
+
+
+@pytest.fixture
+def controller(config):
+    """Controller that admits one call at a time"""
+    return AdmissionController(replace(config, initial_limit=1, max_limit=1))
+
+
+class TestAIMDLimit:
+    """Test additive increase and multiplicative decrease"""
+
+    def test_increase_and_decrease(self, config):
+        limit = AIMDLimit(config)
+        for _ in range(4):
+            limit.on_sample(0.1, dropped=False, now=0.0)
+        assert limit.slots == 3  # roughly one step per window of fast calls
+
+        assert limit.on_sample(5.0, dropped=False, now=10.0) == -1
+        assert limit.slots == 1
+        assert limit.on_sample(0.1, dropped=True, now=10.5) == 0  # within the cooldown
+        assert limit.value >= 1.0
+
+
+class TestAdmissionController:
+    """Test slot granting, fairness and shedding"""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency_and_serves_users_round_robin(self, controller):
+        first = await controller.acquire("alice", 1)
+        order = []
+
+        async def request(user):
+            permit = await controller.acquire(user, 1)
+            order.append(user)
+            controller.release(permit)
+
+        tasks = [asyncio.create_task(request(user)) for user in ("alice", "alice", "alice", "bob")]
+        await asyncio.sleep(0)
+        assert controller.in_flight == 1 and controller.queued == 4
+
+        controller.release(first)
+        await asyncio.gather(*tasks)
+        assert order == ["alice", "bob", "alice", "alice"]
+        assert controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_served_first(self, controller):
+        first = await controller.acquire("alice", 1)
+        order = []
+
+        async def request(user, priority):
+            permit = await controller.acquire(user, priority)
+            order.append(user)
+            controller.release(permit)
+
+        background = asyncio.create_task(request(None, 4))
+        await asyncio.sleep(0)
+        user = asyncio.create_task(request("bob", 1))
+        await asyncio.sleep(0)
+        controller.release(first)
+        await asyncio.gather(background, user)
+        assert order == ["bob", None]
+
+    @pytest.mark.asyncio
+    async def test_queue_bounds_deadline_and_estimate(self, config):
+        controller = AdmissionController(replace(config, initial_limit=1, max_limit=1, max_queue_per_user=1))
+        held = await controller.acquire("alice", 1)
+
+        waiting = asyncio.create_task(controller.acquire("alice", 1, deadline=0.05))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("alice", 1)
+        assert rejected.value.reason == "user_queue_full"
+
+        with pytest.raises(AdmissionRejected) as expired:
+            await waiting
+        assert expired.value.reason == "deadline" and expired.value.retry_after_seconds >= 1
+        assert controller.queued == 0
+
+        controller.release(held)
+        controller.avg_latency = 3.0  # each call takes ~3s, so a new waiter cannot make a 1s deadline
+        held = await controller.acquire("alice", 1)
+        with pytest.raises(AdmissionRejected) as early:
+            await controller.acquire("bob", 1)
+        assert early.value.reason == "estimated_wait" and early.value.retry_after_seconds == 3
+        stats = controller.get_stats()
+        assert stats["rejected_early"] == 1 and stats["expired_in_queue"] == 1
+
+    @pytest.mark.asyncio
+    async def test_grant_racing_the_deadline_does_not_leak_a_slot(self, monkeypatch, controller):
+        held = await controller.acquire("alice", 1)
+
+        async def grant_then_time_out(future, timeout):
+            controller.release(held)  # hands the slot to the waiter...
+            assert future.done()
+            raise asyncio.TimeoutError  # ...just as its deadline passes
+
+        monkeypatch.setattr("backend.utils.admission_control.asyncio.wait_for", grant_then_time_out)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("bob", 1)
+        assert controller.in_flight == 0 and controller.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_goodput_holds_under_overload(self, config):
+        """A burst against a server that slows with concurrency: shedding keeps requests completing"""
+
+        async def run_burst(controller, requests=30, timeout=0.3):
+            active = 0
+            completed = 0
+
+            async def model_call(work=0.02, tick=0.005):
+                # Processor sharing: concurrent calls split the server, so each one slows all the others
+                nonlocal active
+                active += 1
+                try:
+                    while work > 0:
+                        await asyncio.sleep(tick)
+                        work -= tick / active
+                finally:
+                    active -= 1
+
+            async def request(i):
+                nonlocal completed
+                try:
+                    permit = await controller.acquire(f"user-{i}", 1, deadline=0.25)
+                except AdmissionRejected:
+                    return
+                dropped = False
+                try:
+                    await asyncio.wait_for(model_call(), timeout)
+                    completed += 1
+                except asyncio.TimeoutError:
+                    dropped = True
+                finally:
+                    controller.release(permit, dropped=dropped)
+
+            await asyncio.gather(*(request(i) for i in range(requests)))
+            return completed
+
+        unlimited = await run_burst(AdmissionController(replace(config, enabled=False)))
+        admitted = await run_burst(AdmissionController(replace(config, initial_limit=2, max_limit=2)))
+        assert unlimited == 0
+        assert admitted >= 5
+
+
+class TestLLMRequestManagerAdmission:
+    """Test shed and abandoned requests in the LLM request manager"""
+
+    @pytest.mark.asyncio
+    async def test_shed_request_returns_retry_hint(self, config):
+        controller = AdmissionController(replace(config, initial_limit=1, max_limit=1, max_queue_size=0))
+        manager = LLMRequestManager(admission=controller)
+
+        async def slow_model(query):
+            await asyncio.sleep(0.3)
+            return f"answer to {query}"
+
+        first = asyncio.create_task(manager.submit_request(
+            slow_model, RequestPriority.USER_CONVERSATION, user_id="alice", timeout=2.0, query="one"
+        ))
+        await asyncio.sleep(0.05)
+        shed = await manager.submit_request(
+            slow_model, RequestPriority.USER_CONVERSATION, user_id="bob", timeout=2.0, query="two"
+        )
+
+        assert shed["status"] == "throttled" and shed["retry_after_seconds"] >= 1
+        assert await first == "answer to one"
+        assert manager.get_stats()["shed_requests"] == 1
+        assert manager.get_stats()["admission"]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_timed_out_request_cancels_its_model_call(self, controller):
+        manager = LLMRequestManager(admission=controller)
+        cancelled = asyncio.Event()
+
+        async def hung_model(query):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        await manager.submit_request(
+            hung_model, RequestPriority.USER_CONVERSATION, user_id="alice", timeout=0.05, query="one"
+        )
+        await asyncio.wait_for(cancelled.wait(), timeout=1.0)
+        await asyncio.sleep(0)
+
+        assert controller.in_flight == 0  # the slot is free for the next caller
+        assert not manager.request_tasks and not manager.active_requests
+        assert manager.get_stats()["abandoned_requests"] == 1
@@ -0,0 +1,123 @@
+"""
+Unit tests for Cache Value Codecs
+Tests header bytes, round trips, zero-copy arrays, compression and legacy payload decoding.
+"""
+import gzip
+import json
+import pickle
+import pytest
+import numpy as np
+
+from backend.utils import cache_codecs
+from backend.utils.cache_codecs import (
+    CacheCodec, CodecError, Compressor, Serializer, make_header, parse_header
+)
+
+MEMORY = {
+    "memory_id": "m-1",
+    "content": "User asked about jazz history and Coltrane's modal period.",
+    "importance_score": 0.82,
+    "metadata": {"agent": "simple_chat", "tags": ["music", "history"]},
+}
+
+
+class TestHeader:
+    """Test the header byte layout"""
+
+    def test_header_round_trip(self):
+        for serializer in Serializer:
+            for compressor in Compressor:
+                header = make_header(serializer, compressor)
+                assert 0xA0 <= header <= 0xBF
+                assert parse_header(header) == (1, serializer, compressor)
+
+    def test_legacy_first_bytes_are_not_headers(self):
+        for first in (b"{", b"[", b'"', b"0", b"t", b"n", b"C", b"\x80"):
+            assert parse_header(first[0]) is None
+
+
+class TestRoundTrip:
+    """Test encoding and decoding per serializer"""
+
+    def test_structured_value(self):
+        codec = CacheCodec()
+        data = codec.encode(MEMORY)
+        assert codec.decode(data) == MEMORY
+
+    def test_json_serializer(self):
+        codec = CacheCodec()
+        data = codec.encode(MEMORY, serializer=Serializer.JSON)
+        assert CacheCodec.describe(data)["serializer"] == "json"
+        assert codec.decode(data) == MEMORY
+
+    def test_ndarray_decodes_without_copy(self):
+        codec = CacheCodec(compression_threshold=1 << 30)
+        embedding = np.random.default_rng(0).random((4, 768), dtype=np.float32)
+        data = codec.encode(embedding)
+        decoded = codec.decode(data)
+
+        assert CacheCodec.describe(data)["serializer"] == "ndarray"
+        assert decoded.dtype == np.float32 and decoded.shape == (4, 768)
+        np.testing.assert_array_equal(decoded, embedding)
+        assert not decoded.flags.owndata
+        assert len(data) == 1 + embedding.nbytes + len(embedding.dtype.str) + 2 + 8
+
+    def test_nested_array_survives(self):
+        codec = CacheCodec()
+        value = {"memory": MEMORY, "embedding": np.arange(8, dtype=np.float32)}
+        decoded = codec.decode(codec.encode(value))
+        assert list(np.asarray(decoded["embedding"], dtype=np.float32)) == list(range(8))
+
+    def test_bytes_are_stored_raw(self):
+        codec = CacheCodec()
+        data = codec.encode(b"\x00audio")
+        assert data[1:] == b"\x00audio"
+        assert codec.decode(data) == b"\x00audio"
+
+    def test_pickle_requires_opt_in(self):
+        with pytest.raises(CodecError):
+            CacheCodec().encode({"a": 1}, serializer=Serializer.PICKLE)
+        codec = CacheCodec(allow_pickle=True)
+        assert codec.decode(codec.encode({1, 2}, serializer=Serializer.PICKLE)) == {1, 2}
+
+
+class TestCompression:
+    """Test size-based compression"""
+
+    def test_large_payload_is_compressed(self):
+        codec = CacheCodec(compression_threshold=256)
+        value = [MEMORY] * 50
+        data = codec.encode(value)
+        assert CacheCodec.describe(data)["compressor"] != "none"
+        assert len(data) < len(json.dumps(value)) / 4
+        assert codec.decode(data) == value
+
+    def test_small_payload_is_not_compressed(self):
+        codec = CacheCodec(compression_threshold=1024)
+        assert CacheCodec.describe(codec.encode({"a": 1}))["compressor"] == "none"
+        assert CacheCodec.describe(codec.encode({"a": 1}, compress=False))["compressor"] == "none"
+
+    def test_zlib_fallback(self, monkeypatch):
+        monkeypatch.setattr(cache_codecs, "ZSTD_AVAILABLE", False)
+        monkeypatch.setattr(cache_codecs, "LZ4_AVAILABLE", False)
+        codec = CacheCodec(compression_threshold=16)
+        data = codec.encode("x" * 500)
+        assert CacheCodec.describe(data)["compressor"] == "zlib"
+        assert codec.decode(data) == "x" * 500
+
+
+class TestLegacyPayloads:
+    """Test values written by the previous EnhancedRedisCache format"""
+
+    def test_plain_json(self):
+        assert CacheCodec().decode(json.dumps(MEMORY).encode()) == MEMORY
+
+    def test_gzip_prefixed_json(self):
+        raw = b"COMPRESSED:" + gzip.compress(json.dumps(MEMORY).encode())
+        assert CacheCodec().decode(raw) == MEMORY
+
+    def test_legacy_pickle_needs_opt_in(self):
+        raw = pickle.dumps(MEMORY)
+        with pytest.raises(CodecError):
+            CacheCodec().decode(raw)
+        assert CacheCodec(allow_pickle=True).decode(raw) == MEMORY
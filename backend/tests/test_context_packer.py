@@ -0,0 +1,103 @@
+"""
+Unit tests for the Context Packer
+Tests cached token counting, background tokenizer loading, truncation and
+utility-maximising selection under a token budget.
+"""
+import threading
+
+import pytest
+
+from backend.utils.context_packer import ContextItem, ContextPacker, TokenCounter
+
+
+@pytest.fixture
+def counter():
+    return TokenCounter(cache_size=16)
+
+
+class TestTokenCounter:
+    """Test token counting and truncation"""
+
+    def test_counts_are_cached(self, counter):
+        first = counter.count("the quick brown fox", "llama3:8b")
+        assert counter.count("the quick brown fox", "llama3:8b") == first
+        assert counter.hits == 1
+        assert counter.misses == 1
+
+    def test_cache_is_bounded(self, counter):
+        for n in range(40):
+            counter.count(f"fragment {n}")
+        assert counter.stats()["cached_fragments"] == 16
+
+    def test_tokenizer_loads_off_the_request_path(self, counter):
+        release = threading.Event()
+
+        def slow_load(family):
+            release.wait(5)
+            return "words", lambda text: len(text.split())
+
+        counter._loadable = lambda family: True
+        counter._load_encoder = slow_load
+        # Counting does not wait for the tokenizer; the estimate is used meanwhile
+        assert counter.tokenizer_name("qwen3:8b") == "estimate"
+        assert counter.count("one two three", "qwen3:8b") == 4
+        assert counter.stats()["loading"] == ["qwen3"]
+
+        release.set()
+        assert counter.load("qwen3:8b") == "words"  # waits for the background load
+        assert counter.count("one two three", "qwen3:8b") == 3
+
+    def test_truncate_fits_budget(self, counter):
+        text = " ".join(f"word{n}" for n in range(200))
+        truncated = counter.truncate(text, 20)
+        assert counter.count(truncated) <= 20
+        assert truncated.endswith("...")
+        assert counter.truncate("short", 20) == "short"
+
+
+class TestContextPacker:
+    """Test knapsack selection of context items"""
+
+    def test_prefers_higher_total_utility(self, counter):
+        # One large item vs two small ones whose combined utility is higher
+        big = ContextItem("memories", "x" * 70, utility=1.0)
+        small_a = ContextItem("memories", "y" * 35, utility=0.7)
+        small_b = ContextItem("memories", "z" * 35, utility=0.7)
+
+        result = ContextPacker(counter).pack([big, small_a, small_b], budget=25)
+
+        assert big in result.dropped
+        assert small_a in result.selected and small_b in result.selected
+        assert result.tokens_used <= 25
+
+    def test_required_items_always_kept(self, counter):
+        base = ContextItem("base", "system prompt " * 10, utility=0.0, required=True)
+        extra = ContextItem("memories", "memory " * 10, utility=1.0)
+
+        result = ContextPacker(counter).pack([base, extra], budget=5)
+
+        assert result.selected == [base]
+        assert result.dropped == [extra]
+
+    def test_render_groups_sections_in_order(self, counter):
+        items = [
+            ContextItem("history", "turn two", utility=1.0, order=1),
+            ContextItem("memories", "likes jazz", utility=1.0),
+            ContextItem("history", "turn one", utility=1.0, order=0),
+        ]
+        result = ContextPacker(counter).pack(
+            items, budget=200,
+            sections={"memories": "MEMORIES:", "history": "HISTORY:"},
+            section_order=["memories", "history"]
+        )
+        assert result.render() == "MEMORIES:\nlikes jazz\n\nHISTORY:\nturn one\nturn two"
+
+    def test_unused_section_header_is_refunded(self, counter):
+        sections = {"memories": "RELEVANT MEMORIES FROM EARLIER:", "concepts": "RELATED CONCEPTS:"}
+        fits = ContextItem("memories", "m" * 35, utility=1.0)
+        too_big = ContextItem("concepts", "c" * 700, utility=5.0)
+
+        result = ContextPacker(counter).pack([fits, too_big], budget=25, sections=sections)
+
+        assert result.selected == [fits]
+        assert result.tokens_used <= 25
@@ -0,0 +1,145 @@
+"""
+Unit tests for the Context Prefetcher
+Tests speculative loading on user activity, single use of prefetched results,
+joining in-flight prefetches, TTL expiry, invalidation on writes, budgets and
+query embedding warm-up.
+"""
+import asyncio
+
+import pytest
+
+from backend.utils.context_prefetcher import ContextPrefetcher, PrefetchConfig
+
+
+class CountingLoader:
+    """Loader that records calls and can be slow or failing"""
+
+    def __init__(self, value="context", delay=0.0, fail=False):
+        self.value = value
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    async def __call__(self, user_id):
+        self.calls.append(user_id)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("neo4j unavailable")
+        return f"{self.value}:{user_id}"
+
+
+@pytest.fixture
+def prefetcher(fake_clock):
+    config = PrefetchConfig(enabled=True, ttl_seconds=30, timeout_seconds=1.0, max_concurrency=4, max_users=2)
+    return ContextPrefetcher(config, query_warmers=[], clock=fake_clock)
+
+
+class TestContextPrefetcher:
+    """Test speculative per-user context loading"""
+
+    @pytest.mark.asyncio
+    async def test_activity_prefetch_serves_next_turn_once(self, prefetcher):
+        history = CountingLoader("history")
+        prefetcher.register("conversation_history", history)
+
+        assert prefetcher.notify_activity("alice")
+        await asyncio.sleep(0.01)
+        assert await prefetcher.get("alice", "conversation_history") == "history:alice"
+        assert await prefetcher.get("alice", "conversation_history") == "history:alice"
+
+        assert len(history.calls) == 2  # the prefetch, then a direct load: results are used once
+        stats = prefetcher.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_turn_joins_prefetch_still_running(self, prefetcher):
+        context = CountingLoader(delay=0.05)
+        prefetcher.register("conversation_context", context)
+
+        prefetcher.notify_activity("alice")
+        assert not prefetcher.notify_activity("alice")  # already loading
+        assert await prefetcher.get("alice", "conversation_context") == "context:alice"
+        assert len(context.calls) == 1
+        assert prefetcher.get_stats()["joined_in_flight"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unused_results_expire_and_failures_fall_back(self, prefetcher, fake_clock):
+        snapshot = CountingLoader("snapshot")
+        broken = CountingLoader(fail=True)
+        prefetcher.register("consciousness_context", snapshot)
+        prefetcher.register("conversation_context", broken)
+
+        prefetcher.notify_activity("alice")
+        await asyncio.sleep(0.01)
+        fake_clock.advance(31)
+        prefetcher.notify_activity("alice")  # expired results are dropped and reloaded
+        await asyncio.sleep(0.01)
+        assert len(snapshot.calls) == 2
+        assert prefetcher.get_stats()["wasted"] == 1
+
+        broken.fail = False
+        assert await prefetcher.get("alice", "conversation_context") == "context:alice"
+        stats = prefetcher.get_stats()
+        assert stats["failed"] == 2 and stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_users_and_timeouts(self, prefetcher):
+        prefetcher.config.timeout_seconds = 0.05
+        slow = CountingLoader(delay=1.0)
+        prefetcher.register("conversation_context", slow)
+
+        for user in ("alice", "bob", "carol"):
+            prefetcher.notify_activity(user)
+        await asyncio.sleep(0.01)
+        stats = prefetcher.get_stats()
+        assert stats["tracked_users"] == 2 and stats["cancelled"] == 1  # alice evicted mid-load
+
+        await asyncio.sleep(0.1)
+        assert prefetcher.get_stats()["failed"] == 2  # bob and carol timed out
+
+    @pytest.mark.asyncio
+    async def test_cache_warming_loaders_hold_no_result(self, prefetcher):
+        warmed = CountingLoader("preferences")
+        prefetcher.register("preferences", warmed, keep_result=False)
+
+        prefetcher.notify_activity("alice")
+        await asyncio.sleep(0.01)
+        assert prefetcher.get_stats()["tracked_users"] == 0
+        assert prefetcher.notify_activity("alice")  # nothing held back, so activity warms again
+
+    @pytest.mark.asyncio
+    async def test_writes_invalidate_stale_prefetches(self, prefetcher):
+        history = CountingLoader("history")
+        consciousness = CountingLoader("consciousness", delay=0.05)
+        prefetcher.register("conversation_history", history)
+        prefetcher.register("consciousness_context", consciousness)
+
+        prefetcher.notify_activity("alice")
+        prefetcher.notify_activity("bob")
+        await asyncio.sleep(0.01)
+        # A state update drops every user's snapshot, cancelling loads that may read old state
+        assert prefetcher.invalidate(names=["consciousness_context"]) == 2
+        assert await prefetcher.get("bob", "conversation_history") == "history:bob"
+
+        # A stored turn drops everything held for that user only
+        assert prefetcher.invalidate("alice") == 1
+        assert await prefetcher.get("alice", "conversation_history") == "history:alice"
+        assert len(history.calls) == 3 and len(consciousness.calls) == 2
+        stats = prefetcher.get_stats()
+        assert stats["invalidated"] == 3 and stats["cancelled"] == 2 and stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_warm_query_embeds_stripped_text(self, prefetcher):
+        embedded = []
+
+        async def warm(text):
+            embedded.append(text)
+
+        async def broken(text):
+            raise RuntimeError("embedding model unavailable")
+
+        prefetcher.query_warmers = [warm, broken]
+        await prefetcher.warm_query("  remind me to call mum  ")
+        await prefetcher.warm_query("   ")
+        assert embedded == ["remind me to call mum"]
+        assert prefetcher.get_stats()["queries_warmed"] == 1
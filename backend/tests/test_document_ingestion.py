@@ -0,0 +1,173 @@
+"""
+Unit tests for the Document Ingestion Pipeline
+Tests incremental chunking, batched embedding and writes, checkpoints and resume.
+"""
+import pytest
+
+from backend.utils.document_ingestion import (
+    DocumentIngestor, IngestionConfig, IngestionError, SentenceChunker, iter_text
+)
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def sentences(n):
+    return " ".join(f"Sentence number {i} is here." for i in range(n))
+
+
+class MemoryChunkStore:
+    """In-memory stand-in for Neo4jChunkStore"""
+
+    def __init__(self):
+        self.documents = {}
+        self.chunks = {}
+        self.writes = []
+        self.fail_writes_after = None
+
+    async def begin(self, document_id, filename, chunking):
+        doc = self.documents.setdefault(document_id, {"checkpoint": 0})
+        if doc.get("status") == "complete" or doc.get("chunking") != chunking:
+            doc["checkpoint"] = 0
+        doc.update(status="ingesting", chunking=chunking, filename=filename)
+        return doc["checkpoint"]
+
+    async def write(self, document_id, rows, checkpoint):
+        if self.fail_writes_after is not None and len(self.writes) >= self.fail_writes_after:
+            raise ConnectionError("neo4j unavailable")
+        self.writes.append([row["chunk_index"] for row in rows])
+        for row in rows:
+            self.chunks[row["chunk_id"]] = row
+        doc = self.documents[document_id]
+        doc["checkpoint"] = max(doc["checkpoint"], checkpoint)
+
+    async def complete(self, document_id, chunk_count):
+        self.documents[document_id].update(status="complete", checkpoint=chunk_count)
+
+    async def fail(self, document_id, error):
+        self.documents[document_id]["status"] = "failed"
+
+
+class RecordingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(len(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def store():
+    return MemoryChunkStore()
+
+
+@pytest.fixture
+def embedder():
+    return RecordingEmbedder()
+
+
+@pytest.fixture
+def ingestor(store, embedder):
+    config = IngestionConfig(
+        chunk_tokens=20, overlap_tokens=0, embed_batch_size=4, embed_concurrency=2,
+        write_batch_size=5, queue_depth=2, max_attempts=2, retry_backoff=0.0,
+        tokenizer_model="estimate-only"
+    )
+    return DocumentIngestor(config=config, embed=embedder, store=store)
+
+
+class TestSentenceChunker:
+    """Test incremental sentence-boundary chunking"""
+
+    def test_chunks_respect_budget_and_boundaries(self):
+        chunker = SentenceChunker(max_tokens=12, count=word_count)
+        text = sentences(10)
+        chunks = []
+        for start in range(0, len(text), 7):  # blocks split mid-word
+            chunks.extend(chunker.feed(text[start:start + 7]))
+        chunks.extend(chunker.finish())
+
+        assert [c.index for c in chunks] == list(range(len(chunks)))
+        assert all(c.token_count <= 12 for c in chunks)
+        assert all(c.text.endswith("here.") for c in chunks)
+        assert " ".join(c.text for c in chunks) == text
+
+    def test_overlap_repeats_trailing_sentence(self):
+        chunker = SentenceChunker(max_tokens=10, overlap_tokens=5, count=word_count)
+        chunks = chunker.feed(sentences(4)) + chunker.finish()
+        assert len(chunks) == 3
+        assert chunks[1].text.startswith("Sentence number 1")
+
+    def test_long_sentence_is_split_on_words(self):
+        chunker = SentenceChunker(max_tokens=5, count=word_count)
+        chunks = chunker.feed(" ".join(["word"] * 23)) + chunker.finish()
+        assert [c.token_count for c in chunks] == [5, 5, 5, 5, 3]
+
+
+class TestDocumentIngestor:
+    """Test the streaming pipeline end to end"""
+
+    @pytest.mark.asyncio
+    async def test_ingests_in_batches(self, ingestor, store, embedder):
+        job = await ingestor.ingest("doc-1", iter_text(sentences(60), 64), filename="notes.txt")
+
+        assert job.status == "complete"
+        assert job.chunks_total == len(store.chunks) == job.chunks_written
+        assert max(embedder.calls) <= 4
+        assert all(len(batch) <= 5 for batch in store.writes)
+        assert store.documents["doc-1"] == {
+            "checkpoint": job.chunks_total, "status": "complete",
+            "chunking": store.documents["doc-1"]["chunking"], "filename": "notes.txt"
+        }
+        report = job.to_dict()
+        assert set(report["stages"]) == {"read", "split", "embed", "write"}
+        assert report["stages"]["read"]["bytes"] == len(sentences(60))
+        assert report["stages"]["write"]["chunks"] == job.chunks_written
+
+    @pytest.mark.asyncio
+    async def test_accepts_byte_streams_split_inside_characters(self, ingestor, store):
+        text = "Café déjà vu. " * 30
+        data = text.encode("utf-8")
+
+        async def byte_blocks():
+            for start in range(0, len(data), 5):
+                yield data[start:start + 5]
+
+        await ingestor.ingest("doc-utf8", byte_blocks())
+        assert all("�" not in row["text"] for row in store.chunks.values())
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_stored_chunks(self, ingestor, store, embedder):
+        store.fail_writes_after = 2
+        with pytest.raises(IngestionError) as error:
+            await ingestor.ingest("doc-2", iter_text(sentences(60), 64))
+        checkpoint = error.value.job.checkpoint
+        assert store.documents["doc-2"]["status"] == "failed"
+        assert checkpoint == store.documents["doc-2"]["checkpoint"] > 0
+
+        store.fail_writes_after = None
+        embedder.calls.clear()
+        job = await ingestor.ingest("doc-2", iter_text(sentences(60), 64))
+
+        assert job.resumed_from == checkpoint
+        assert sum(embedder.calls) == job.chunks_total - checkpoint
+        assert len(store.chunks) == job.chunks_total
+
+    @pytest.mark.asyncio
+    async def test_embedding_is_retried(self, ingestor, store):
+        attempts = []
+
+        async def flaky(texts):
+            attempts.append(len(texts))
+            if len(attempts) == 1:
+                raise TimeoutError("embedding timed out")
+            return [[0.0] for _ in texts]
+
+        ingestor.embed = flaky
+        ingestor.config.embed_concurrency = 1
+        job = await ingestor.ingest("doc-3", iter_text(sentences(10), 64))
+        assert job.status == "complete"
+        assert len(store.chunks) == job.chunks_total
+        assert len(attempts) == -(-job.chunks_total // 4) + 1  # one batch retried
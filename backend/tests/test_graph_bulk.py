@@ -0,0 +1,212 @@
+"""
+Unit tests for the Graph Bulk API
+Tests incrementally parsed JSON array and NDJSON bodies, the per-item size limit,
+UNWIND batching, query cache invalidation, per-item validation errors, link
+counts, failed batches, the per-request item limit and keyset pagination.
+"""
+from typing import Optional
+from unittest.mock import Mock
+
+import pytest
+from pydantic import BaseModel
+
+from backend.utils.graph_bulk import (
+    BulkItemTooLarge, BulkRequestError, BulkWriteError, GraphBulkConfig, GraphBulkService,
+    iter_request_items, link_query, link_resource, node_resource
+)
+
+
+class EntityCreate(BaseModel):
+    entity_id: str
+    name: str
+
+
+class RelatesToLink(BaseModel):
+    source_id: str
+    source_type: str
+    target_id: str
+    target_type: str
+
+
+class FakeDB:
+    """Records write batches and serves keyset pages from a sorted list of entities"""
+
+    def __init__(self):
+        self.entities = []
+        self.existing = set()
+        self.fail_on_batch: Optional[int] = None
+        self.writes = []
+        self.page_queries = 0
+
+    def seed(self, entities):
+        self.entities = sorted(entities, key=lambda e: e["entity_id"])
+        self.existing = {e["entity_id"] for e in self.entities}
+
+    async def execute_write_query(self, query, parameters):
+        if self.fail_on_batch == len(self.writes) + 1:
+            raise RuntimeError("Neo4j unavailable")
+        rows = parameters["rows"]
+        self.writes.append((query, rows))
+        if "MERGE (a)-" in query:  # links whose source node is missing are skipped by MATCH
+            return {"nodes_created": 0, "relationships_created": sum(row["source_id"] in self.existing for row in rows)}
+        return {"nodes_created": len(rows), "relationships_created": 0}
+
+    async def execute_query(self, query, parameters):
+        self.page_queries += 1
+        after, limit = parameters["after"], parameters["limit"]
+        return [e for e in self.entities if after is None or e["entity_id"] > after][:limit]
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+@pytest.fixture
+def db():
+    return FakeDB()
+
+
+@pytest.fixture
+def query_cache():
+    return Mock()
+
+
+@pytest.fixture
+def service(db, query_cache):
+    config = GraphBulkConfig(batch_size=2, max_items=100, page_size=2, max_page_size=3)
+    service = GraphBulkService(config, db=db, query_cache=query_cache)
+    service.register(node_resource("entities", EntityCreate, "Entity", "SET n.name = row.name", {"name": "name"}))
+    service.register(link_resource("relates_to", RelatesToLink, lambda link: link_query(
+        link.source_type, "source_id", "RELATES_TO", link.target_type, "target_id")))
+    return service
+
+
+def ndjson(count, start=0):
+    return "".join(f'{{"entity_id": "e{i:03d}", "name": "Entity {i}"}}\n' for i in range(start, start + count)).encode()
+
+
+class TestRequestBodies:
+    """Test JSON array and NDJSON parsing"""
+
+    @pytest.mark.asyncio
+    async def test_ndjson_split_across_chunks_and_json_arrays(self):
+        items = await collect(iter_request_items(body(b'{"a": 1}\n{"a"', b': 2}\n\nnot json\n{"a": 3}')))
+        assert items[:2] == [{"a": 1}, {"a": 2}] and items[3] == {"a": 3}
+        assert items[2].error.startswith("Invalid JSON")
+
+        assert await collect(iter_request_items(body(b'  [{"a": 1},', b' {"a": 2}]'))) == [{"a": 1}, {"a": 2}]
+        with pytest.raises(BulkRequestError):
+            await collect(iter_request_items(body(b'[{"a": 1},')))
+
+    @pytest.mark.asyncio
+    async def test_json_array_parsed_item_by_item(self):
+        payload = '[{"name": "caf\u00e9 ☕"}, 12, {"nested": [1, {"b": "]"}]}, "s", []]'.encode()
+        byte_by_byte = await collect(iter_request_items(body(*(payload[i:i + 1] for i in range(len(payload))))))
+        assert byte_by_byte == [{"name": "café ☕"}, 12, {"nested": [1, {"b": "]"}]}, "s", []]
+        assert await collect(iter_request_items(body(b"[", b" ]"))) == []
+
+        seen = []
+        items = iter_request_items(body(b'[{"a": 1}, {"a": 2},', b' {"a": 3}', b' oops'))
+        with pytest.raises(BulkRequestError):
+            async for item in items:
+                seen.append(item)
+        assert seen == [{"a": 1}, {"a": 2}]  # yielded before the rest of the body arrived
+
+    @pytest.mark.asyncio
+    async def test_items_over_the_byte_limit_are_refused(self):
+        big = b'{"name": "' + b"x" * 200 + b'"}'
+        assert len(await collect(iter_request_items(body(b"[" + big + b",", big + b"]"), max_item_bytes=300))) == 2
+        huge = [b'{"name": "', b"x" * 200, b"x" * 200, b'"}']
+        with pytest.raises(BulkItemTooLarge):
+            await collect(iter_request_items(body(b"[", *huge, b"]"), max_item_bytes=300))
+        with pytest.raises(BulkItemTooLarge):
+            await collect(iter_request_items(body(*huge, b"\n"), max_item_bytes=300))
+
+
+class TestBulkWrites:
+    """Test batched UNWIND writes"""
+
+    @pytest.mark.asyncio
+    async def test_items_are_written_in_bounded_batches(self, service, db, query_cache):
+        payload = ndjson(2) + b'{"entity_id": "e002"}\nnot json\n' + ndjson(3, start=3)
+        summary = await service.write("entities", iter_request_items(body(payload)))
+
+        assert [len(rows) for _, rows in db.writes] == [2, 2, 1]
+        assert "UNWIND $rows AS row" in db.writes[0][0] and "MERGE (n:Entity {entity_id: row.entity_id})" in db.writes[0][0]
+        result = summary.to_dict()
+        assert result["status"] == "complete" and result["received"] == 7 and result["written"] == 5
+        assert [error["index"] for error in result["errors"]] == [2, 3]
+        assert result["counters"] == {"nodes_created": 5}
+        # Each written batch invalidates the cached reads it can affect
+        assert [call.args[0] for call in query_cache.invalidate.call_args_list] == [query for query, _ in db.writes]
+
+    @pytest.mark.asyncio
+    async def test_links_grouped_by_labels_and_unknown_labels_rejected(self, service, db):
+        db.seed([{"entity_id": "e1", "name": "Entity 1"}, {"entity_id": "m1", "name": "Memory 1"}])
+        service.config.batch_size = 10
+        links = [
+            {"source_id": "e1", "source_type": "Entity", "target_id": "c1", "target_type": "Concept"},
+            {"source_id": "m1", "source_type": "Memory", "target_id": "c1", "target_type": "Concept"},
+            {"source_id": "e2", "source_type": "Entity", "target_id": "c2", "target_type": "Concept"},
+            {"source_id": "x", "source_type": "Secret) DETACH DELETE (n", "target_id": "c2", "target_type": "Concept"},
+        ]
+        summary = await service.write("relates_to", body(*links))
+
+        assert sorted(len(rows) for _, rows in db.writes) == [1, 2]
+        assert all("MERGE (a)-[:RELATES_TO]->(b)" in query for query, _ in db.writes)
+        # e2 does not exist, so its row is matched away and not counted as written
+        assert summary.written == 2 and summary.errors[0]["index"] == 3
+        assert summary.counters == {"relationships_created": 2}
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_reports_progress_and_limit_stops_request(self, service, db, query_cache):
+        db.fail_on_batch = 2
+        with pytest.raises(BulkWriteError) as failed:
+            await service.write("entities", iter_request_items(body(ndjson(5))))
+        assert failed.value.summary.written == 2 and failed.value.summary.to_dict()["status"] == "failed"
+        assert query_cache.invalidate.call_count == 1  # only the batch that was written
+
+        db.fail_on_batch = None
+        service.config.max_items = 3
+        summary = await service.write("entities", iter_request_items(body(ndjson(5))))
+        assert summary.limit_exceeded and summary.written == 3 and summary.received == 3
+
+        array = b"[" + b",".join(ndjson(5).splitlines()) + b", not json"
+        summary = await service.write("entities", iter_request_items(body(array)))
+        assert summary.limit_exceeded and summary.received == 3  # stopped before reading the rest
+
+        with pytest.raises(BulkRequestError):
+            await service.write("secrets", body())
+
+
+class TestKeysetPagination:
+    """Test paged and streamed lists"""
+
+    @pytest.mark.asyncio
+    async def test_pages_follow_cursor_and_stream_walks_all_pages(self, service, db):
+        db.seed([{"entity_id": f"e{i}", "name": f"Entity {i}"} for i in range(5)])
+
+        first = await service.page("entities")
+        assert [e["entity_id"] for e in first["items"]] == ["e0", "e1"] and first["next_cursor"] == "e1"
+        last = await service.page("entities", after="e3", limit=50)  # capped at max_page_size
+        assert [e["entity_id"] for e in last["items"]] == ["e4"] and last["next_cursor"] is None
+
+        lines = b"".join(await collect(service.stream("entities", limit=2))).decode().splitlines()
+        assert len(lines) == 5 and '"entity_id": "e4"' in lines[-1]
+        assert db.page_queries == 5  # 2 pages above, 3 for the stream
+
+        with pytest.raises(BulkRequestError):
+            await service.page("relates_to")
+
+    def test_projection_lists_properties_and_expressions(self):
+        resource = node_resource("chunks", EntityCreate, "Chunk", "SET n.text = row.text", {"text": "text"},
+                                 {"document_id": "head([(n)-[:DERIVED_FROM]->(d:Document) | d.document_id])"})
+        assert resource.returns == (
+            "n.chunk_id AS chunk_id, n.text AS text, "
+            "head([(n)-[:DERIVED_FROM]->(d:Document) | d.document_id]) AS document_id"
+        )
@@ -0,0 +1,143 @@
+"""
+Unit tests for the core InMemoryCache
+Tests LRU/LFU/TTL eviction order, byte bounds, thread safety and per-operation cost.
+"""
+import threading
+import time
+
+from backend.core.performance_optimization import CacheStrategy, InMemoryCache, QueryOptimizer
+
+
+class TestEviction:
+    """Test eviction order of each strategy"""
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = InMemoryCache(max_size=3, strategy=CacheStrategy.LRU)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        cache.get("a")
+        cache.set("d", "d")
+
+        assert cache.get("b") is None
+        assert [cache.get(k) for k in ("a", "c", "d")] == ["a", "c", "d"]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_lfu_evicts_least_frequently_used(self):
+        cache = InMemoryCache(max_size=3, strategy=CacheStrategy.LFU)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        for _ in range(3):
+            cache.get("a")
+        cache.get("b")
+        cache.get("c")
+        cache.get("c")
+        cache.set("d", "d")  # b has the fewest hits
+
+        assert cache.get("b") is None
+        cache.set("e", "e")  # d has none yet
+        assert cache.get("d") is None
+        assert cache.get("a") == "a"
+
+    def test_lfu_recovers_minimum_after_delete(self):
+        cache = InMemoryCache(max_size=2, strategy=CacheStrategy.LFU)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.get("b")
+        cache.get("b")
+        cache.delete("a")
+        cache.set("c", 3)
+        cache.get("c")
+        cache.set("d", 4)  # c (1 hit) goes before b (2 hits)
+
+        assert cache.get("c") is None
+        assert cache.get("b") == 2
+
+    def test_ttl_strategy_evicts_soonest_expiry(self):
+        cache = InMemoryCache(max_size=2, strategy=CacheStrategy.TTL)
+        cache.set("long", 1, ttl=100)
+        cache.set("short", 2, ttl=10)
+        cache.set("new", 3, ttl=50)
+
+        assert cache.get("short") is None
+        assert cache.get("long") == 1
+
+    def test_expired_entries_are_purged(self):
+        cache = InMemoryCache(max_size=10, default_ttl=60)
+        cache.set("gone", 1, ttl=0.05)
+        cache.set("kept", 2)
+        time.sleep(0.1)
+
+        assert cache.purge_expired() == 1
+        assert cache.get_stats()["entries"] == 1
+        assert cache.get("kept") == 2
+
+    def test_overwriting_keeps_heap_bounded(self):
+        cache = InMemoryCache(max_size=10)
+        for n in range(5000):
+            cache.set("same", n)
+        assert cache.get("same") == 4999
+        assert len(cache._expiry_heap) < 200
+
+
+class TestByteBound:
+    """Test the optional size-in-bytes limit"""
+
+    def test_evicts_until_value_fits(self):
+        value = "x" * 1000
+        cache = InMemoryCache(max_size=100, max_bytes=3500)
+        for key in ("a", "b", "c", "d"):
+            cache.set(key, value)
+
+        stats = cache.get_stats()
+        assert stats["entries"] == 3
+        assert stats["total_size_bytes"] <= 3500
+        assert cache.get("a") is None
+
+    def test_rejects_value_larger_than_bound(self):
+        cache = InMemoryCache(max_size=100, max_bytes=100)
+        assert cache.set("big", "x" * 1000) is False
+        assert cache.get_stats()["entries"] == 0
+
+    def test_query_optimizer_uses_bounded_cache(self):
+        optimizer = QueryOptimizer(cache_max_bytes=1024)
+        optimizer.cache_query_result("MATCH (n) RETURN n", {"id": 1}, [{"n": 1}])
+        assert optimizer.get_cached_result("MATCH (n) RETURN n", {"id": 1}) == [{"n": 1}]
+        assert optimizer.query_cache.max_bytes == 1024
+
+
+class TestConcurrencyAndCost:
+    """Test thread safety and constant per-operation cost"""
+
+    def test_concurrent_threads_keep_invariants(self):
+        cache = InMemoryCache(max_size=200, strategy=CacheStrategy.LFU, max_bytes=50_000)
+
+        def worker(worker_id):
+            for i in range(2000):
+                key = f"{worker_id}:{i % 300}"
+                if cache.get(key) is None:
+                    cache.set(key, i)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(cache.cache) <= 200
+        assert cache.total_bytes == sum(e.size_bytes for e in cache.cache.values())
+        assert sum(len(b) for b in cache._frequencies.values()) == len(cache.cache)
+
+    def test_per_operation_cost_does_not_grow_with_size(self):
+        def cost_per_op(size):
+            cache = InMemoryCache(max_size=size, strategy=CacheStrategy.LFU)
+            for i in range(size):
+                cache.set(f"k{i}", i)
+            start = time.perf_counter()
+            for i in range(5000):
+                cache.get(f"k{i % size}")
+                cache.set(f"n{i}", i)  # full cache: every set evicts
+            return (time.perf_counter() - start) / 5000
+
+        small, large = cost_per_op(1_000), cost_per_op(100_000)
+        assert large < small * 5
@@ -0,0 +1,113 @@
+"""
+Unit tests for the Semantic Intent Router
+Tests prototype building, confidence thresholds, activity learning and embedding reuse.
+"""
+import pytest
+
+from backend.utils.intent_router import (
+    IntentRouterConfig, SemanticIntentRouter, evaluate_router
+)
+
+VOCABULARY = ["hello", "hi", "feel", "remember", "memories", "concepts", "task", "remind", "todo"]
+
+SEEDS = {
+    "simple_chat": ["hello there", "hi friend", "how do you feel"],
+    "graphmaster": ["what do you remember", "search my memories", "related concepts"],
+    "taskmaster": ["add a task", "remind me later", "my todo list"],
+}
+
+
+class BagOfWordsEmbedder:
+    """Deterministic embedding: one dimension per vocabulary word"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(word in text.lower().split()) for word in VOCABULARY] for text in texts]
+
+
+@pytest.fixture
+def embedder():
+    return BagOfWordsEmbedder()
+
+
+@pytest.fixture
+def router(embedder, fake_database):
+    config = IntentRouterConfig(enabled=True, min_similarity=0.3, min_margin=0.05, refresh_interval=3600,
+                                embedding_cache_size=2, max_examples_per_agent=10)
+    return SemanticIntentRouter(config, embed=embedder, db=fake_database, seed_examples=SEEDS)
+
+
+class TestSemanticIntentRouter:
+    """Test nearest-centroid routing"""
+
+    @pytest.mark.asyncio
+    async def test_routes_to_nearest_prototype(self, router):
+        assert (await router.route("hello")).agent_name == "simple_chat"
+        assert (await router.route("remind me about the task")).agent_name == "taskmaster"
+        decision = await router.route("do you remember my memories")
+        assert decision.agent_name == "graphmaster" and decision.confident
+        assert 0.5 < decision.confidence <= 0.95
+
+    @pytest.mark.asyncio
+    async def test_ambiguous_query_is_not_confident(self, router):
+        decision = await router.route("hello task")
+        assert not decision.confident and decision.margin < 0.05
+        assert await router.route("quantum physics") is None  # nothing in common with any prototype
+        stats = router.get_stats()
+        assert stats["fallbacks"] == 1 and stats["unavailable"] == 1
+
+    @pytest.mark.asyncio
+    async def test_learns_from_agent_activity(self, router, embedder, fake_database):
+        fake_database.rows = [
+            {"agent_name": "GraphMaster", "query": "hello memories"},
+            {"agent_name": "GraphMaster", "query": "hello memories again"},
+            {"agent_name": "UnknownAgent", "query": "ignored"},
+        ]
+        await router.route("hi")
+        await router._refresh_task
+
+        assert fake_database.calls[0][1]["agent_names"] == ["SimpleChat", "GraphMaster", "TaskMaster"]
+        assert router.get_stats()["activity_examples"] == 2
+        assert "hello memories again" in embedder.calls[-1]
+
+    @pytest.mark.asyncio
+    async def test_query_embedding_is_cached_for_retrieval(self, router, embedder):
+        await router.route("Hello")
+        embedded = len(embedder.calls)
+        await router.route("  hello ")
+        assert len(embedder.calls) == embedded
+        assert router.cached_embedding("HELLO") == pytest.approx([1.0] + [0.0] * (len(VOCABULARY) - 1))
+
+        await router.route("hi")
+        await router.route("task")
+        assert router.cached_embedding("hello") is None  # evicted, cache holds two
+
+    @pytest.mark.asyncio
+    async def test_unavailable_without_embeddings(self, fake_database):
+        async def zeros(texts):
+            return [[0.0] * 4 for _ in texts]
+
+        router = SemanticIntentRouter(IntentRouterConfig(enabled=True), embed=zeros, db=fake_database,
+                                      seed_examples=SEEDS)
+        assert await router.route("hello") is None
+        assert not router.ready
+
+
+class TestEvaluateRouter:
+    """Test the offline evaluation report"""
+
+    @pytest.mark.asyncio
+    async def test_accuracy_and_confusion(self):
+        answers = {"a": "simple_chat", "b": "graphmaster", "c": "graphmaster"}
+
+        async def route(query):
+            return answers[query]
+
+        report = await evaluate_router(route, [("a", "simple_chat"), ("b", "graphmaster"), ("c", "simple_chat")])
+        assert report["accuracy"] == pytest.approx(0.667)
+        assert report["confusion"]["simple_chat"] == {"simple_chat": 1, "graphmaster": 1}
+        assert report["per_agent"]["graphmaster"] == {"precision": 0.5, "recall": 1.0}
+        assert set(report["latency_ms"]) == {"p50", "p95", "max"}
@@ -0,0 +1,173 @@
+"""
+Unit tests for the Lazy Component Registry
+Tests on-demand loading, background loading, failure reporting, proxies, async
+probes, critical component retries and readiness reporting.
+"""
+import pytest
+import asyncio
+import threading
+
+from backend.utils.lazy_component_registry import (
+    LazyComponentRegistry, ComponentState, ComponentUnavailableError
+)
+
+
+class Engine:
+    def __init__(self):
+        self.value = 42
+
+    def double(self):
+        return self.value * 2
+
+
+class TestLazyComponentRegistry:
+    """Test lazy registration and loading"""
+
+    def test_component_not_built_until_first_use(self):
+        """Factory runs only on first access and only once"""
+        calls = []
+        registry = LazyComponentRegistry()
+        registry.register("engine", lambda: calls.append(1) or Engine())
+
+        assert calls == []
+        assert registry.get("engine") is registry.get("engine")
+        assert calls == [1]
+        assert registry.components["engine"].status.state == ComponentState.READY
+
+    def test_module_import_and_init_are_timed(self):
+        """Import and init stages are reported separately"""
+        registry = LazyComponentRegistry()
+        registry.register("json_engine", lambda json: json.dumps({"a": 1}), module="json")
+
+        assert registry.get("json_engine") == '{"a": 1}'
+        status = registry.components["json_engine"].status
+        assert status.import_seconds is not None
+        assert status.init_seconds is not None
+
+    def test_failed_component(self):
+        """Failures are recorded and surfaced as ComponentUnavailableError"""
+        registry = LazyComponentRegistry()
+
+        def broken():
+            raise RuntimeError("no GPU")
+
+        registry.register("broken", broken, critical=True)
+
+        with pytest.raises(ComponentUnavailableError):
+            registry.get("broken")
+        assert registry.get_optional("broken") is None
+
+        readiness = registry.get_readiness()
+        assert readiness["ready"] is False
+        assert readiness["pending_critical"] == ["broken"]
+        assert readiness["components"]["broken"]["state"] == "failed"
+        assert "no GPU" in readiness["components"]["broken"]["error"]
+
+    def test_proxy_defers_construction(self):
+        """Proxies forward attribute access to the lazily built instance"""
+        registry = LazyComponentRegistry()
+        component = registry.register("engine", Engine)
+        engine = registry.proxy("engine")
+
+        assert component.status.state == ComponentState.PENDING
+        assert engine.double() == 84
+        engine.value = 1
+        assert registry.get("engine").value == 1
+
+    @pytest.mark.asyncio
+    async def test_background_warmup(self):
+        """Warm-up loads only warm-up components without blocking the loop"""
+        registry = LazyComponentRegistry()
+        registry.register("warm", Engine, warmup=True, critical=True)
+        registry.register("cold", Engine)
+
+        assert registry.get_readiness()["ready"] is False
+        task = registry.start_background_warmup()
+        await asyncio.wait_for(task, timeout=5)
+
+        assert registry.get_readiness()["ready"] is True
+        assert registry.components["warm"].is_ready
+        assert not registry.components["cold"].is_ready
+
+    @pytest.mark.asyncio
+    async def test_async_probe_and_requires_dependency(self):
+        """Async factories load through aget; requires() loads before a handler runs"""
+        registry = LazyComponentRegistry()
+
+        async def probe():
+            await asyncio.sleep(0)
+            return "connected"
+
+        registry.register("llm", probe, critical=True)
+        registry.register("engine", Engine)
+        with pytest.raises(ComponentUnavailableError, match="asynchronously"):
+            registry.get("llm")
+
+        await registry.requires("llm", "engine")()
+        assert registry.get("llm") == "connected"
+        assert registry.components["engine"].is_ready
+
+    @pytest.mark.asyncio
+    async def test_failed_critical_component_is_retried(self):
+        """Critical components warm up even with warm-up disabled, and retry until they load"""
+        registry = LazyComponentRegistry()
+        registry.warmup_enabled = False
+        registry.critical_retry_seconds = 0.01
+        attempts = []
+
+        async def neo4j_starting():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("Neo4j still starting")
+            return "neo4j"
+
+        registry.register("neo4j", neo4j_starting, critical=True)
+        registry.register("optional", Engine, warmup=True)
+
+        await asyncio.wait_for(registry.start_background_warmup(), timeout=5)
+
+        assert len(attempts) == 3
+        assert registry.get_readiness()["ready"] is True
+        assert not registry.components["optional"].is_ready
+
+    @pytest.mark.asyncio
+    async def test_critical_retries_back_off_and_give_up(self, monkeypatch):
+        """Retry delays double up to the cap, and retrying stops after the max attempts"""
+        registry = LazyComponentRegistry()
+        registry.critical_retry_seconds = 1
+        registry.critical_retry_max_seconds = 3
+        registry.critical_max_retries = 4
+        delays, attempts = [], []
+        real_sleep = asyncio.sleep
+
+        async def fake_sleep(seconds):
+            delays.append(seconds)
+            await real_sleep(0)
+
+        async def neo4j_down():
+            attempts.append(1)
+            raise ConnectionError("Neo4j down")
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        registry.register("neo4j", neo4j_down, critical=True)
+
+        await asyncio.wait_for(registry.start_background_warmup(), timeout=5)
+
+        assert delays == [1, 2, 3, 3]
+        assert len(attempts) == 5
+        assert registry.get_readiness()["pending_critical"] == ["neo4j"]
+
+    def test_load_in_background_does_not_block(self):
+        """The caller is told the component is not loaded yet while it loads on another thread"""
+        release = threading.Event()
+        calls = []
+        registry = LazyComponentRegistry()
+        registry.register("whisper", lambda: calls.append(1) or release.wait(5) and Engine())
+
+        assert registry.load_in_background("whisper") is False
+        assert registry.load_in_background("whisper") is False
+        release.set()
+        registry._background_loads["whisper"].result(timeout=5)
+
+        assert registry.load_in_background("whisper") is True
+        assert calls == [1]
@@ -0,0 +1,137 @@
+"""
+Unit tests for the LLM Response Cache
+Tests key normalisation, TTL and size eviction, the disk tier, shared in-flight
+computation and cached requests in the LLM request manager.
+"""
+import asyncio
+
+import pytest
+
+from backend.utils.admission_control import AdmissionConfig, AdmissionController
+from backend.utils.llm_request_manager import LLMRequestManager, RequestPriority
+from backend.utils.llm_response_cache import (
+    REPO_ROOT, LLMCacheConfig, LLMResponseCache, is_deterministic, make_cache_key, resolve_disk_dir
+)
+
+
+@pytest.fixture
+def cache_config():
+    return LLMCacheConfig(enabled=True, ttl_seconds=60, max_entries=3, disk_dir=None, disk_max_entries=100)
+
+
+@pytest.fixture
+def cache(cache_config, fake_clock):
+    return LLMResponseCache(cache_config, clock=fake_clock)
+
+
+@pytest.fixture
+def open_disk_cache(cache_config, fake_clock, tmp_path):
+    """Opens a new cache on the same disk directory, as a restarted process would"""
+    cache_config.disk_dir = str(tmp_path)
+    return lambda: LLMResponseCache(cache_config, clock=fake_clock)
+
+
+class TestCacheKey:
+    """Test what makes two requests the same"""
+
+    def test_key_normalises_prompt_and_ignores_runtime_options(self):
+        key = make_cache_key("llama3", "  Summarise   the day\n", {"temperature": 0, "num_thread": 8})
+        assert key == make_cache_key("llama3", "Summarise the day", {"temperature": 0})
+        assert make_cache_key("llama3", "Summarise the day", {"temperature": 0.7}) != key
+        assert make_cache_key("qwen", "Summarise the day", {"temperature": 0}) != key
+        assert is_deterministic({"temperature": 0}) and is_deterministic({"seed": 7})
+        assert not is_deterministic({"temperature": 0.7})
+
+
+class TestLLMResponseCache:
+    """Test the memory and disk tiers"""
+
+    @pytest.mark.asyncio
+    async def test_exact_hits_ttl_and_size_eviction(self, cache, fake_clock):
+        await cache.store("needs", "llama3", "generate needs", "rest")
+        assert await cache.lookup("needs", "llama3", "generate  needs") == "rest"
+
+        for i in range(3):
+            await cache.store("needs", "llama3", f"prompt {i}", f"answer {i}")
+        assert len(cache) == 3 and cache.evictions == 1
+        assert await cache.lookup("needs", "llama3", "generate needs") is None
+
+        fake_clock.advance(61)
+        assert await cache.lookup("needs", "llama3", "prompt 2") is None
+        stats = cache.get_stats()["callers"]["needs"]
+        assert stats["hits"] == 1 and stats["misses"] == 2 and stats["stores"] == 4
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, open_disk_cache, fake_clock):
+        await open_disk_cache().store("insights", "llama3", "weekly insights", {"summary": "calm week"})
+        await open_disk_cache().store("insights", "llama3", "unserialisable", object())
+
+        restarted = open_disk_cache()
+        assert await restarted.lookup("insights", "llama3", "weekly insights") == {"summary": "calm week"}
+        assert await restarted.lookup("insights", "llama3", "weekly insights") == {"summary": "calm week"}
+        assert await restarted.lookup("insights", "llama3", "unserialisable") is None
+        stats = restarted.get_stats()["callers"]["insights"]
+        assert stats["disk_hits"] == 1 and stats["hits"] == 1  # promoted to memory
+
+        fake_clock.advance(61)
+        assert await open_disk_cache().lookup("insights", "llama3", "weekly insights") is None
+
+    @pytest.mark.asyncio
+    async def test_expired_disk_files_are_deleted_and_relative_dirs_anchored(self, open_disk_cache, fake_clock,
+                                                                             tmp_path):
+        cache = open_disk_cache()
+        await cache.store("insights", "llama3", "weekly insights", "calm week")
+        await cache.store("insights", "llama3", "daily insights", "busy day", ttl=600)
+        assert len(list(tmp_path.glob("*/*.json"))) == 2
+
+        fake_clock.advance(61)
+        assert await cache.purge_disk() == 1
+        assert await open_disk_cache().lookup("insights", "llama3", "daily insights") == "busy day"
+
+        assert resolve_disk_dir("llm_cache") == REPO_ROOT / "llm_cache"
+        assert resolve_disk_dir(str(tmp_path)) == tmp_path and resolve_disk_dir("") is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_prompts_share_one_call(self, cache):
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "summary"
+
+        results = await asyncio.gather(*(
+            cache.get_or_compute("compression", "llama3", "summarise chunk", generate) for _ in range(3)
+        ))
+        assert results == ["summary"] * 3 and len(calls) == 1
+        assert await cache.get_or_compute("compression", "llama3", "summarise chunk", generate) == "summary"
+        assert len(calls) == 1
+
+
+class TestRequestManagerCache:
+    """Test cache_key requests through the LLM request manager"""
+
+    @pytest.mark.asyncio
+    async def test_cached_request_skips_the_model(self, cache):
+        cache.config.max_entries = 10
+        manager = LLMRequestManager(
+            admission=AdmissionController(AdmissionConfig(enabled=False)),
+            response_cache=cache
+        )
+        calls = []
+
+        async def summarise(query, model):
+            calls.append(query)
+            return f"summary of {query}"
+
+        for _ in range(2):
+            result = await manager.submit_request(
+                summarise, RequestPriority.SYSTEM_MAINTENANCE, cache_key="summarise memories",
+                timeout=2.0, query="memories", model="llama3"
+            )
+            assert result == "summary of memories"
+
+        assert calls == ["memories"]
+        stats = manager.get_stats()
+        assert stats["cached_responses"] == 1
+        assert [c["hits"] for c in stats["response_cache"]["callers"].values()] == [1]
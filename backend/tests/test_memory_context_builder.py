@@ -506,6 +506,17 @@ class TestMemoryContextBuilder:
         empty_strength = context_builder._calculate_context_strength([])
         assert empty_strength == 0.0
     
+    def test_history_prefetch_name_depends_on_builder_and_limit(self, context_builder):
+        """Test a prefetched history is only served to the builder and limit it was loaded for"""
+        from backend.utils.context_prefetcher import context_prefetcher
+        
+        assert memory_context_builder.history_prefetch_name in context_prefetcher.get_stats()["loaders"]
+        name = context_builder.history_prefetch_name
+        assert name != memory_context_builder.history_prefetch_name
+        
+        context_builder.conversation_context_limit += 5
+        assert context_builder.history_prefetch_name != name
+    
     def test_calculate_avg_consciousness_alignment(self, context_builder, sample_memories):
         """Test average consciousness alignment calculation"""
         consciousness_context = {"consciousness_level": 0.8, "emotional_state": "curious"}
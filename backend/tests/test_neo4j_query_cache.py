@@ -0,0 +1,119 @@
+"""
+Unit tests for the Neo4j Query Cache
+Tests the Cypher dependency parse, stable keys and write-aware invalidation.
+"""
+from backend.utils.neo4j_query_cache import (
+    Neo4jQueryCache, analyze_cypher, query_cache_key
+)
+
+READ_MEMORIES = "MATCH (u:User {user_id: $user_id})-[:HAS_MEMORY]->(m:Memory) RETURN m.content AS content"
+READ_CONCEPTS = "MATCH (c:Concept) RETURN c.name AS name ORDER BY c.created_at DESC"
+
+
+class TestAnalyzeCypher:
+    """Test the lightweight Cypher parse"""
+
+    def test_read_dependencies(self):
+        access = analyze_cypher(READ_MEMORIES)
+        assert not access.is_write
+        assert access.labels == {"User", "Memory"}
+        assert access.rel_types == {"HAS_MEMORY"}
+        assert not access.reads_any
+
+    def test_keywords_in_names_and_strings_are_not_writes(self):
+        assert not analyze_cypher(READ_CONCEPTS).is_write
+        assert not analyze_cypher("MATCH (m:Memory {kind: 'CREATE SET DELETE'}) RETURN m.offset").is_write
+
+    def test_write_names(self):
+        access = analyze_cypher(
+            "MATCH (c:Concept {concept_id: $id}) SET c:Archived, c.updated_at = timestamp()"
+        )
+        assert access.is_write
+        assert {"Concept", "Archived"} <= access.labels
+        assert not access.writes_any
+
+    def test_unresolved_queries_are_conservative(self):
+        assert analyze_cypher("MATCH (m:Memory)-[:RELATES_TO]->(x) RETURN x").reads_any
+        assert analyze_cypher("CALL db.index.vector.queryNodes('idx', 5, $e) YIELD node RETURN node").reads_any
+        assert analyze_cypher("MATCH (n) WHERE elementId(n) = $id SET n.seen = true").writes_any
+        assert analyze_cypher("MATCH (m:Memory {memory_id: $id}) DETACH DELETE m").writes_any
+        assert analyze_cypher("CALL apoc.create.node(['Memory'], {})").is_write
+
+    def test_bound_variable_is_not_unlabeled(self):
+        access = analyze_cypher("MATCH (m:Memory) WITH m MATCH (m)-[:ABOUT]->(:Concept) RETURN m")
+        assert not access.reads_any
+        assert access.names == {"Memory", "ABOUT", "Concept"}
+
+
+class TestQueryCacheKey:
+    """Test stable cache keys"""
+
+    def test_key_is_stable_and_parameter_order_independent(self):
+        key = query_cache_key(READ_MEMORIES, {"user_id": "u1", "limit": 5})
+        assert key == query_cache_key(READ_MEMORIES, {"limit": 5, "user_id": "u1"})
+        assert key != query_cache_key(READ_MEMORIES, {"user_id": "u2", "limit": 5})
+        assert key.startswith("v1:") and len(key) == 3 + 64
+
+
+class TestNeo4jQueryCache:
+    """Test write-aware invalidation"""
+
+    def test_write_invalidates_only_affected_entries(self):
+        cache = Neo4jQueryCache(shared=False)
+        cache.cache_result(READ_MEMORIES, {"user_id": "u1"}, [{"content": "a"}])
+        cache.cache_result(READ_CONCEPTS, {}, [{"name": "jazz"}])
+
+        cache.invalidate("MATCH (m:Memory {memory_id: $id}) SET m.importance_score = 0.9")
+
+        assert cache.get_cached_result(READ_MEMORIES, {"user_id": "u1"}) is None
+        assert cache.get_cached_result(READ_CONCEPTS, {}) == [{"name": "jazz"}]
+        assert cache.get_cache_stats()["stale_rejections"] == 1
+
+    def test_wildcard_read_depends_on_every_write(self):
+        cache = Neo4jQueryCache(shared=False)
+        query = "MATCH (n) RETURN count(n) AS total"
+        cache.cache_result(query, {}, [{"total": 3}])
+        cache.invalidate("CREATE (:Concept {name: $name})")
+        assert cache.get_cached_result(query, {}) is None
+
+    def test_unscoped_write_invalidates_everything(self):
+        cache = Neo4jQueryCache(shared=False)
+        cache.cache_result(READ_CONCEPTS, {}, [{"name": "jazz"}])
+        cache.invalidate("MATCH (m:Memory {memory_id: $id}) DETACH DELETE m")
+        assert cache.get_cached_result(READ_CONCEPTS, {}) is None
+
+    def test_write_during_query_leaves_entry_invalid(self):
+        cache = Neo4jQueryCache(shared=False)
+        cached, versions = cache.lookup(READ_MEMORIES, {"user_id": "u1"})
+        assert cached is None
+        cache.invalidate("CREATE (m:Memory {content: $content})")
+        cache.cache_result(READ_MEMORIES, {"user_id": "u1"}, [{"content": "old"}], versions)
+        assert cache.get_cached_result(READ_MEMORIES, {"user_id": "u1"}) is None
+
+    def test_write_queries_are_never_cached(self):
+        cache = Neo4jQueryCache(shared=False)
+        write = "MERGE (c:Concept {name: $name}) RETURN c.name AS name"
+        assert not cache.should_cache(write)
+        cache.cache_result(write, {"name": "x"}, [{"name": "x"}])
+        assert cache.get_cached_result(write, {"name": "x"}) is None
+
+    def test_shared_entries_and_invalidation_across_workers(self, fake_redis):
+        worker_a = Neo4jQueryCache(redis_client=fake_redis)
+        worker_b = Neo4jQueryCache(redis_client=fake_redis)
+
+        worker_a.cache_result(READ_MEMORIES, {"user_id": "u1"}, [{"content": "a"}])
+        assert worker_b.get_cached_result(READ_MEMORIES, {"user_id": "u1"}) == [{"content": "a"}]
+        assert worker_b.get_cache_stats()["shared_hits"] == 1
+
+        worker_a.invalidate("MATCH (m:Memory {memory_id: $id}) SET m.content = $content")
+        assert worker_b.get_cached_result(READ_MEMORIES, {"user_id": "u1"}) is None
+
+    def test_local_fallback_when_redis_fails(self, fake_redis):
+        def mget(keys):
+            raise ConnectionError("redis down")
+
+        fake_redis.mget = mget
+        cache = Neo4jQueryCache(redis_client=fake_redis)
+        cache.cache_result(READ_CONCEPTS, {}, [{"name": "jazz"}])
+        assert cache.get_cached_result(READ_CONCEPTS, {}) == [{"name": "jazz"}]
+        assert cache.get_cache_stats()["redis_errors"] == 1
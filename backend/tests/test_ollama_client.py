@@ -0,0 +1,121 @@
+"""
+Unit tests for the shared Ollama client
+Tests NDJSON streaming, per-model concurrency limits, error mapping and cancellation.
+"""
+import pytest
+import asyncio
+import json
+import httpx
+
+from backend.utils.ollama_client import (
+    OllamaClient, OllamaClientConfig, OllamaResponseError, OllamaUnavailableError,
+    parse_ndjson_line
+)
+
+
+def ndjson(*chunks) -> bytes:
+    return b"".join(json.dumps(c).encode() + b"\n" for c in chunks)
+
+
+def make_client(handler, **overrides) -> OllamaClient:
+    config = OllamaClientConfig(base_url="http://ollama.test", model_concurrency=2)
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return OllamaClient(config, transport=httpx.MockTransport(handler))
+
+
+class TestNDJSON:
+    """Test stream line parsing"""
+
+    def test_parse_line(self):
+        assert parse_ndjson_line("  ") is None
+        assert parse_ndjson_line('{"response": "hi", "done": false}') == {"response": "hi", "done": False}
+
+    def test_error_payload_raises(self):
+        with pytest.raises(OllamaResponseError):
+            parse_ndjson_line('{"error": "model not found"}')
+
+
+class TestOllamaClient:
+    """Test requests against a mocked Ollama server"""
+
+    @pytest.mark.asyncio
+    async def test_generate_joins_stream_and_records_metrics(self):
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, content=ndjson(
+                {"response": "Hello", "done": False},
+                {"response": " world", "done": False},
+                {"response": "", "done": True, "prompt_eval_count": 5, "eval_count": 2, "eval_duration": 500_000_000},
+            ))
+
+        client = make_client(handler)
+        result = await client.generate("llama3", "hi")
+
+        assert result["response"] == "Hello world"
+        stats = client.get_stats()["models"]["llama3"]
+        assert stats["requests"] == 1
+        assert stats["completion_tokens"] == 2
+        assert stats["tokens_per_second"] == 4.0
+        assert stats["in_flight"] == 0
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_chat_collects_message_content(self):
+        client = make_client(lambda request: httpx.Response(200, content=ndjson(
+            {"message": {"role": "assistant", "content": "Hi"}, "done": False},
+            {"message": {"role": "assistant", "content": "!"}, "done": True},
+        )))
+        result = await client.chat("llama3", [{"role": "user", "content": "hello"}])
+        assert result["message"]["content"] == "Hi!"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_per_model_concurrency_limit(self):
+        active = {"now": 0, "peak": 0}
+
+        async def handler(request):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+            return httpx.Response(200, content=ndjson({"response": "ok", "done": True}))
+
+        client = make_client(handler, model_concurrency=2)
+        await asyncio.gather(*(client.generate("llama3", "hi") for _ in range(6)))
+
+        assert active["peak"] == 2
+        assert client.get_stats()["models"]["llama3"]["requests"] == 6
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_mapped(self):
+        client = make_client(lambda request: httpx.Response(404, content=b'{"error":"model not found"}'))
+        with pytest.raises(OllamaResponseError) as exc_info:
+            await client.generate("missing", "hi")
+        assert exc_info.value.status_code == 404
+
+        def refuse(request):
+            raise httpx.ConnectError("refused")
+
+        client = make_client(refuse)
+        with pytest.raises(OllamaUnavailableError):
+            await client.embed("nomic-embed-text", "hi")
+        assert client.get_stats()["models"]["nomic-embed-text"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_early_stop_counts_as_cancelled(self):
+        client = make_client(lambda request: httpx.Response(200, content=ndjson(
+            {"response": "a", "done": False},
+            {"response": "b", "done": False},
+            {"response": "", "done": True},
+        )))
+        stream = client.stream_generate("llama3", "hi")
+        async for chunk in stream:
+            break
+        await stream.aclose()
+
+        stats = client.get_stats()["models"]["llama3"]
+        assert stats["cancelled"] == 1
+        assert stats["in_flight"] == 0
+        await client.aclose()
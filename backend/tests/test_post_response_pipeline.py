@@ -0,0 +1,159 @@
+"""
+Unit tests for the Post-Response Pipeline
+Tests background execution, bounded workers, retries, idempotency keys and journal replay.
+"""
+import pytest
+import asyncio
+
+from backend.utils.post_response_pipeline import PostResponseConfig, PostResponsePipeline
+
+
+def make_pipeline(tmp_path, **overrides) -> PostResponsePipeline:
+    config = PostResponseConfig(
+        enabled=True, workers=2, queue_size=100, max_attempts=3,
+        retry_backoff=0.01, journal_path=str(tmp_path / "tasks.jsonl")
+    )
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return PostResponsePipeline(config)
+
+
+class TestPostResponsePipeline:
+    """Test task execution off the response path"""
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_before_task_runs(self, tmp_path):
+        pipeline = make_pipeline(tmp_path)
+        release = asyncio.Event()
+        done = []
+
+        async def slow(payload):
+            await release.wait()
+            done.append(payload["n"])
+
+        pipeline.register("slow", slow)
+        await pipeline.submit("slow", {"n": 1})
+        assert done == []
+
+        release.set()
+        await pipeline.drain(timeout=1)
+        assert done == [1]
+        assert pipeline.get_stats()["completed"] == 1
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_workers_are_bounded(self, tmp_path):
+        pipeline = make_pipeline(tmp_path, workers=2)
+        active = {"now": 0, "peak": 0}
+
+        async def work(payload):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+
+        pipeline.register("work", work)
+        for n in range(6):
+            await pipeline.submit("work", {"n": n})
+        await pipeline.drain(timeout=1)
+
+        assert active["peak"] == 2
+        assert pipeline.get_stats()["completed"] == 6
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_task_is_retried(self, tmp_path):
+        pipeline = make_pipeline(tmp_path)
+        calls = []
+
+        async def flaky(payload):
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError("neo4j unavailable")
+
+        pipeline.register("flaky", flaky)
+        await pipeline.submit("flaky", {})
+        await pipeline.drain(timeout=1)
+
+        stats = pipeline.get_stats()
+        assert len(calls) == 3
+        assert stats["retried"] == 2
+        assert stats["completed"] == 1
+        assert stats["failed"] == 0
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_single_attempt_handler_fails_without_retry(self, tmp_path):
+        pipeline = make_pipeline(tmp_path)
+        calls = []
+
+        async def broken(payload):
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        pipeline.register("broken", broken, max_attempts=1)
+        await pipeline.submit("broken", {})
+        await pipeline.drain(timeout=1)
+
+        stats = pipeline.get_stats()
+        assert len(calls) == 1
+        assert stats["failed"] == 1
+        assert stats["recent_failures"][0]["error"] == "boom"
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_idempotency_key_runs_once(self, tmp_path):
+        pipeline = make_pipeline(tmp_path)
+        calls = []
+
+        async def record(payload):
+            calls.append(payload)
+
+        pipeline.register("record", record)
+        first = await pipeline.submit("record", {"n": 1}, idempotency_key="turn-1")
+        second = await pipeline.submit("record", {"n": 1}, idempotency_key="turn-1")
+        await pipeline.drain(timeout=1)
+
+        assert first == second
+        assert len(calls) == 1
+        assert pipeline.get_stats()["duplicates"] == 1
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_pending_tasks_are_replayed_after_restart(self, tmp_path):
+        never = asyncio.Event()
+
+        async def stuck(payload):
+            await never.wait()
+
+        first = make_pipeline(tmp_path)
+        first.register("store", stuck)
+        await first.submit("store", {"turn": "t1"}, idempotency_key="t1")
+        await first.stop(timeout=0.05)
+
+        replayed = []
+
+        async def store(payload):
+            replayed.append(payload["turn"])
+
+        second = make_pipeline(tmp_path)
+        second.register("store", store)
+        await second.start()
+        await second.drain(timeout=1)
+
+        assert replayed == ["t1"]
+        assert second.get_stats()["replayed"] == 1
+        assert second.journal.pending() == []
+        await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_inline_mode_runs_before_returning(self, tmp_path):
+        pipeline = make_pipeline(tmp_path, enabled=False)
+        calls = []
+
+        async def record(payload):
+            calls.append(payload)
+
+        pipeline.register("record", record)
+        await pipeline.submit("record", {"n": 1})
+        assert calls == [{"n": 1}]
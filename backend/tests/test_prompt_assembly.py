@@ -0,0 +1,95 @@
+"""
+Unit tests for Prompt Assembly
+Tests stability ordering, quantization and prefix-hit tracking across conversation turns.
+"""
+from backend.config.llm_optimization import LLMContextOptimizer
+from backend.utils.prompt_assembly import (
+    PromptSegment, PromptSessionManager, SegmentStability, assemble_prompt, quantize
+)
+
+
+def turn(query: str, history: str = "User: hi\nAssistant: hello") -> list:
+    return [
+        PromptSegment("base", query, SegmentStability.QUERY),
+        PromptSegment("memories", f"memories for {query}", SegmentStability.TURN),
+        PromptSegment("system", "You are Mainza.", SegmentStability.STATIC),
+        PromptSegment("history", history, SegmentStability.SESSION),
+    ]
+
+
+class TestAssembly:
+    """Test segment ordering and quantization"""
+
+    def test_segments_ordered_most_stable_first(self):
+        assembled = assemble_prompt(turn("what is jazz?"))
+        assert [s.name for s in assembled.segments] == ["system", "history", "memories", "base"]
+        assert assembled.prompt.startswith("You are Mainza.\n\nUser: hi")
+        assert assembled.prompt.endswith("what is jazz?")
+
+    def test_shared_prefix_has_equal_fingerprints(self):
+        first = assemble_prompt(turn("what is jazz?"))
+        second = assemble_prompt(turn("who was Coltrane?"))
+        assert first.fingerprints[:2] == second.fingerprints[:2]
+        assert first.fingerprints[2] != second.fingerprints[2]
+
+    def test_quantize(self):
+        assert quantize(0.734) == 0.75
+        assert quantize(0.721) == 0.7
+        assert quantize(0.734, step=0) == 0.734
+
+
+class TestPromptSessionManager:
+    """Test keep-alive handles and prefix-hit metrics"""
+
+    def test_second_turn_reuses_prefix(self):
+        manager = PromptSessionManager(keep_alive="10m")
+        assert manager.request_fields("s1", "llama3") == {"keep_alive": "10m"}
+
+        first = manager.record("s1", "llama3", assemble_prompt(turn("what is jazz?")), {"prompt_eval_duration": 400_000_000})
+        second = manager.record("s1", "llama3", assemble_prompt(turn("who was Coltrane?")), {"prompt_eval_duration": 100_000_000})
+
+        assert first["prefix_hit"] is False
+        assert second["prefix_hit"] is True
+        assert second["shared_segments"] == 2
+        assert second["first_changed_segment"] == "memories"
+        stats = manager.get_stats()
+        assert stats["prefix_hits"] == 1
+        assert stats["avg_prefill_ms_on_hit"] == 100.0
+        assert stats["avg_prefill_ms_on_miss"] == 400.0
+
+    def test_model_switch_resets_session(self):
+        manager = PromptSessionManager()
+        manager.record("s1", "llama3", assemble_prompt(turn("a")))
+        result = manager.record("s1", "qwen3", assemble_prompt(turn("b")))
+        assert result["prefix_hit"] is False
+
+    def test_sessions_are_bounded(self):
+        manager = PromptSessionManager(max_sessions=2)
+        for n in range(4):
+            manager.request_fields(f"s{n}", "llama3")
+        stats = manager.get_stats()
+        assert stats["active_sessions"] == 2
+        assert stats["sessions_evicted"] == 2
+
+
+class TestOptimizedPromptOrder:
+    """Test that optimized prompts keep volatile content after the stable prefix"""
+
+    def test_small_level_change_keeps_prefix(self):
+        optimizer = LLMContextOptimizer()
+        history = [{"user": "hi", "assistant": "hello"}]
+
+        def build(query, level):
+            return optimizer.get_optimized_request_params(
+                base_prompt=query,
+                consciousness_context={"consciousness_level": level, "emotional_state": "curious"},
+                conversation_history=history,
+                system_prompt="You are Mainza."
+            )["prompt_assembly"]
+
+        first = build("what is jazz?", 0.734)
+        second = build("who was Coltrane?", 0.741)
+
+        assert [s.name for s in first.segments] == ["system", "history", "consciousness", "base"]
+        assert first.fingerprints[:3] == second.fingerprints[:3]
+        assert "Level: 0.75 (75%)" in second.prompt
@@ -0,0 +1,94 @@
+"""
+Unit tests for RAG Retrieval
+Tests MMR re-ranking, context window expansion and the single-query retrieval path.
+"""
+import pytest
+
+from backend.utils.rag_retrieval import (
+    RAGRetriever, RetrievalConfig, TEXT_RETRIEVAL_QUERY, VECTOR_RETRIEVAL_QUERY, mmr_select
+)
+
+
+def fixed_embedding(vector):
+    async def embed(query):
+        return vector
+    return embed
+
+
+def row(chunk_id, score, embedding=None, chunk_index=None, neighbours=None):
+    return {
+        "chunk_id": chunk_id, "text": f"text of {chunk_id}", "score": score,
+        "chunk_index": chunk_index, "document_id": "doc-1", "filename": "notes.txt",
+        "neighbours": neighbours or [], "embedding": embedding,
+    }
+
+
+class TestMMRSelect:
+    """Test Maximal Marginal Relevance selection"""
+
+    def test_pure_relevance_keeps_similarity_order(self):
+        candidates = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]]
+        assert mmr_select([1.0, 0.0], candidates, 3, lambda_=1.0) == [0, 1, 2]
+
+    def test_diversity_skips_near_duplicates(self):
+        candidates = [[1.0, 0.0], [0.99, 0.01], [0.6, 0.8]]
+        assert mmr_select([1.0, 0.0], candidates, 2, lambda_=0.3) == [0, 2]
+
+    def test_edge_cases(self):
+        assert mmr_select([1.0], [], 3) == []
+        assert mmr_select([1.0, 0.0], [[1.0, 0.0]], 5) == [0]
+        assert mmr_select([1.0, 0.0], [[0.0, 0.0], [1.0, 0.0]], 1) == [1]
+
+
+class TestRAGRetriever:
+    """Test retrieval in a single round trip"""
+
+    @pytest.mark.asyncio
+    async def test_one_query_with_parent_and_window(self, fake_database):
+        neighbours = [
+            {"chunk_id": "c1", "chunk_index": 1, "text": "before"},
+            {"chunk_id": "c3", "chunk_index": 3, "text": "after"},
+        ]
+        fake_database.rows = [row("c2", 0.9, chunk_index=2, neighbours=neighbours)]
+        retriever = RAGRetriever(RetrievalConfig(window=1, mmr_enabled=False), db=fake_database,
+                                 embed=fixed_embedding([0.1, 0.2]))
+
+        chunks = await retriever.retrieve("question", top_k=3)
+
+        assert len(fake_database.calls) == 1
+        query, params = fake_database.calls[0]
+        assert query == VECTOR_RETRIEVAL_QUERY
+        assert params == {"candidates": 3, "embedding": [0.1, 0.2], "window": 1, "with_embeddings": False}
+        assert chunks[0]["document_id"] == "doc-1"
+        assert chunks[0]["context"] == "before\ntext of c2\nafter"
+        assert "embedding" not in chunks[0]
+
+    @pytest.mark.asyncio
+    async def test_mmr_over_wider_candidate_set(self, fake_database):
+        fake_database.rows = [
+            row("a", 0.99, embedding=[1.0, 0.0]),
+            row("a-copy", 0.98, embedding=[0.99, 0.01]),
+            row("b", 0.6, embedding=[0.6, 0.8]),
+        ]
+        retriever = RAGRetriever(RetrievalConfig(window=0, mmr_lambda=0.3, mmr_candidates=3), db=fake_database,
+                                 embed=fixed_embedding([1.0, 0.0]))
+
+        chunks = await retriever.retrieve("question", top_k=2, mmr=True)
+
+        assert fake_database.calls[0][1]["candidates"] == 6
+        assert fake_database.calls[0][1]["with_embeddings"] is True
+        assert [c["chunk_id"] for c in chunks] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_text_search(self, fake_database):
+        fake_database.rows = [row("c9", 0.5)]
+        retriever = RAGRetriever(RetrievalConfig(window=0), db=fake_database, embed=fixed_embedding([0.0, 0.0]))
+        chunks = await retriever.retrieve("question")
+        assert [call[0] for call in fake_database.calls] == [TEXT_RETRIEVAL_QUERY]
+        assert chunks[0]["context"] == "text of c9"
+
+        fake_database.calls.clear()
+        fake_database.fail_on = VECTOR_RETRIEVAL_QUERY
+        retriever = RAGRetriever(RetrievalConfig(window=0), db=fake_database, embed=fixed_embedding([1.0]))
+        await retriever.retrieve("question")
+        assert [call[0] for call in fake_database.calls] == [VECTOR_RETRIEVAL_QUERY, TEXT_RETRIEVAL_QUERY]
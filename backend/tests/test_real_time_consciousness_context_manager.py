@@ -0,0 +1,119 @@
+"""
+Unit tests for the Real-Time Consciousness Context Manager
+Tests non-blocking snapshot reads, versioning on change only, write-through from
+the orchestrator, per-version validation and the single background refresher.
+"""
+import asyncio
+import dataclasses
+from types import SimpleNamespace
+
+import pytest
+
+from backend.utils.real_time_consciousness_context_manager import RealTimeConsciousnessContextManager
+
+
+def make_state(level=0.7, emotion="curious"):
+    return SimpleNamespace(consciousness_level=level, emotional_state=emotion, active_goals=["learn"],
+                           learning_rate=0.8, evolution_level=2, self_awareness_score=0.6,
+                           total_interactions=10)
+
+
+class FakeOrchestrator:
+    """Orchestrator whose state reads can be slowed down"""
+
+    def __init__(self):
+        self.state = make_state()
+        self.delay = 0.0
+        self.calls = 0
+
+    async def get_consciousness_state(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.state
+
+
+@pytest.fixture
+def orchestrator():
+    return FakeOrchestrator()
+
+
+@pytest.fixture
+def manager(orchestrator):
+    manager = RealTimeConsciousnessContextManager()
+    manager.consciousness_orchestrator = orchestrator
+    return manager
+
+
+class TestConsciousnessContextSnapshot:
+    """Test versioned, immutable snapshots"""
+
+    @pytest.mark.asyncio
+    async def test_versions_only_change_with_state(self, manager, orchestrator):
+        await manager.force_context_refresh()
+        await manager.force_context_refresh()
+        assert manager.version == 1
+
+        orchestrator.state.consciousness_level = 0.75
+        await manager.force_context_refresh()
+        context = await manager.get_current_consciousness_context()
+        assert context["context_version"] == 2 and context["consciousness_level"] == 0.75
+
+        context["active_goals"].append("mutated by a reader")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            manager.current_context.consciousness_level = 0.1
+        assert manager.current_context.active_goals == ("learn",)
+
+    @pytest.mark.asyncio
+    async def test_write_through_is_visible_immediately(self, manager):
+        assert manager.publish_state(make_state(level=0.9, emotion="focused"))
+        assert not manager.publish_state(make_state(level=0.9, emotion="focused"))
+
+        context = await manager.get_current_consciousness_context()
+        assert context["consciousness_level"] == 0.9 and context["emotional_state"] == "focused"
+        assert manager.get_stats()["write_throughs"] == 2 and manager.version == 1
+
+    @pytest.mark.asyncio
+    async def test_validation_runs_once_per_version(self, manager):
+        manager.publish_state(make_state(emotion="bewildered"))
+        for _ in range(3):
+            result = await manager.validate_context_consistency()
+            assert not result["is_consistent"] and "bewildered" in result["issues"][0]
+        assert manager.stats["validations_run"] == 1
+
+        manager.publish_state(make_state())
+        assert (await manager.validate_context_consistency())["is_consistent"]
+        assert manager.stats["validations_run"] == 2
+
+
+class TestNonBlockingReads:
+    """Test that readers never wait on a refresh"""
+
+    @pytest.mark.asyncio
+    async def test_stale_read_returns_current_snapshot_and_refreshes_in_background(self, manager, orchestrator):
+        orchestrator.delay = 0.2
+        manager.publish_state(make_state(level=0.7))
+        manager.last_refresh = 0  # stale
+        orchestrator.state = make_state(level=0.8)
+
+        reads = await asyncio.wait_for(
+            asyncio.gather(*(manager.get_current_consciousness_context() for _ in range(20))), timeout=0.05
+        )
+        assert {context["consciousness_level"] for context in reads} == {0.7}
+        assert orchestrator.calls == 1  # one refresh for all stale readers
+
+        await asyncio.sleep(0.25)
+        assert (await manager.get_current_consciousness_context())["consciousness_level"] == 0.8
+
+    @pytest.mark.asyncio
+    async def test_background_refresher_picks_up_in_place_changes(self, manager, orchestrator):
+        manager.refresh_interval = 0.01
+        manager.start()
+        try:
+            await asyncio.sleep(0.03)
+            orchestrator.state.emotional_state = "calm"
+            await asyncio.sleep(0.03)
+            assert manager.current_context.emotional_state == "calm"
+            assert manager.get_stats()["refresher_running"]
+        finally:
+            await manager.stop()
+        assert not manager.get_stats()["refresher_running"]
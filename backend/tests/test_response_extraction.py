@@ -0,0 +1,208 @@
+"""
+Unit tests for Response Extraction
+Tests type-dispatched extraction over a corpus of real agent outputs, the plain
+string fast path, and median extraction latency.
+
+The latency gate is relative: medians are compared with a fixed reference
+workload timed in the same process, so a slower machine or a busy CI runner
+moves both sides and only a real regression (for example losing the fast path)
+trips it. Absolute p50/p99 numbers come from the pytest-benchmark cases, which
+run when the plugin is installed; save a baseline and compare against it with:
+
+    pytest backend/tests/test_response_extraction.py --benchmark-only --benchmark-autosave
+    pytest backend/tests/test_response_extraction.py --benchmark-only \
+        --benchmark-compare --benchmark-compare-fail=median:25%
+"""
+import importlib.util
+import json
+import random
+import statistics
+import time
+
+import pytest
+
+from backend.utils.response_extraction import (
+    _convert_tables_to_text, _is_raw_object_string, extract_response_from_result
+)
+
+HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+
+CONTEXT = {"user_id": "bench-user", "consciousness_level": 0.72, "emotional_state": "curious"}
+
+
+class AgentRunResult:
+    """Shape of a pydantic-ai run result"""
+
+    def __init__(self, output):
+        self.output = output
+
+    def __repr__(self):
+        return f"AgentRunResult(output={self.output!r})"
+
+
+class GraphQueryOutput:
+    """Shape of the GraphMaster output model"""
+
+    def __init__(self, result, cypher=""):
+        self.result = result
+        self.cypher = cypher
+
+
+class CreateMemoryOutput:
+    """Shape of the memory creation output model"""
+
+    def __init__(self, text):
+        self.memory_id = "memory-1"
+        self.text = text
+
+
+SIMPLE_CHAT_REPLY = (
+    "Hello! I'm doing well, thank you for asking. I've been reflecting on our last conversation "
+    "about creativity and I'm curious how your project is going. How can I help you today?"
+)
+GRAPH_TABLE_REPLY = (
+    "Here is what I found in your knowledge graph:\n\n"
+    "| Concept | Level | Notes |\n|---|---|---|\n"
+    "| Consciousness | 3 | linked to memory |\n| Creativity | 2 | mentioned twice |"
+)
+
+# (label, result) pairs modelled on what the agents and LLM request manager return
+CORPUS = [
+    ("simple_chat", SIMPLE_CHAT_REPLY),
+    ("padded_string", "\n  Sure - I've added that to your task list.  \n"),
+    ("long_answer", "The RAG agent found three relevant passages. " * 60),
+    ("graph_table", GRAPH_TABLE_REPLY),
+    ("json_string", '{"response": "I remember you mentioned the Berlin trip last week."}'),
+    ("throttled", {"status": "throttled", "response": "I'm currently processing other requests.",
+                   "retry_after": 5}),
+    ("rate_limited", {"rate_limit": True, "detail": "queue full"}),
+    ("structured_answer", {"answer": "You have two open tasks due this week.", "confidence": 0.9}),
+    ("graph_rows", {"cypher": "MATCH (c:Concept) RETURN c.name AS name, c.level AS level",
+                    "result": [{"name": "Consciousness", "level": 3}, {"name": "Memory", "level": 2}]}),
+    ("nested", {"data": {"payload": {"text": "Your next meeting is at 3pm."}}}),
+    ("agent_run_result", AgentRunResult("I've reflected on that and I think it's a great idea.")),
+    ("graph_query_output", GraphQueryOutput({"response": "Creativity is linked to 4 of your memories."})),
+    ("memory_output", CreateMemoryOutput("Saved: call the landlord on Tuesday.")),
+    ("raw_object_string", "<pydantic_ai.agent.AgentRunResult object at 0x7f3a2c1d0>"),
+    ("null_string", "None"),
+    ("empty_string", "   "),
+    ("none", None),
+    ("list", ["unexpected", "list"]),
+]
+
+
+def extract(result, query="hello there"):
+    random.seed(0)
+    return extract_response_from_result(result, query, CONTEXT)
+
+
+class TestExtractResponseFromResult:
+    """Test extraction across result types"""
+
+    def test_plain_string_fast_path_returns_same_object(self):
+        assert extract(SIMPLE_CHAT_REPLY) is SIMPLE_CHAT_REPLY
+        assert extract("\n  Sure - done.  \n") == "Sure - done."
+
+    @pytest.mark.parametrize("label,result", CORPUS, ids=[label for label, _ in CORPUS])
+    def test_corpus_yields_user_facing_text(self, label, result):
+        response = extract(result)
+        assert isinstance(response, str) and response.strip()
+        assert not _is_raw_object_string(response)
+        assert "object at 0x" not in response and "AgentRunResult(" not in response
+
+    def test_dispatches_on_result_type(self):
+        assert extract('{"response": "From JSON"}') == "From JSON"
+        assert extract({"answer": "Forty-two", "confidence": 0.9}) == "Forty-two"
+        assert extract(AgentRunResult("Agent says hi")) == "Agent says hi"
+        assert extract(GraphQueryOutput("graph string")) == "graph string"
+        assert extract(CreateMemoryOutput("memory text")) == "memory text"
+        assert extract(12345) == "12345"
+
+    def test_throttled_and_invalid_results_fall_back(self):
+        throttled = extract({"status": "throttled", "response": "busy"}, query="hello")
+        assert "processing several conversations" in throttled
+        for result in (None, "", "null", "[]", "<Foo object at 0x1>", ["a"]):
+            assert "Mainza" in extract(result)
+
+    def test_hostile_objects_do_not_raise(self):
+        class Broken:
+            def __getattribute__(self, name):
+                raise RuntimeError(name)
+
+        class RaisingProperty:
+            def __init__(self):
+                self.note = "note text"
+
+            @property
+            def output(self):
+                raise RuntimeError("boom")
+
+        assert "Mainza" in extract(Broken())
+        assert extract(RaisingProperty()) == "note text"
+
+    def test_tables_converted_with_precompiled_patterns(self):
+        assert _convert_tables_to_text("| AI | 3 | grows |") == "AI: 3 - grows"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(result, iterations=300):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        extract_response_from_result(result, "hello there", CONTEXT)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), percentile(samples, 0.99)
+
+
+def reference_median(iterations=2000):
+    """Median time of serialising the context, the unit the latency gates are expressed in"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        json.dumps(CONTEXT, sort_keys=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+class TestExtractionLatency:
+    """Test median and p99 extraction latency relative to a reference workload"""
+
+    def test_plain_string_latency(self):
+        reference = reference_median()
+        p50, p99 = measure(SIMPLE_CHAT_REPLY, iterations=2000)
+        # The fast path is a type check; about a fifth of the reference
+        assert p50 < reference, f"p50 {p50:.4f}ms, p99 {p99:.4f}ms, reference {reference:.4f}ms"
+        # p99 sits close to p50; the headroom absorbs scheduler and GC pauses
+        assert p99 < 5 * reference, f"p50 {p50:.4f}ms, p99 {p99:.4f}ms, reference {reference:.4f}ms"
+
+    def test_corpus_latency(self):
+        reference = reference_median()
+        samples = {label: measure(result) for label, result in CORPUS}
+        # The slowest case is about 12x the reference; the old implementation was far slower
+        worst = max(samples, key=lambda label: samples[label][0])
+        assert samples[worst][0] < 60 * reference, (worst, samples[worst], reference)
+        # The slowest p99 is about 20-30x the reference
+        worst_tail = max(samples, key=lambda label: samples[label][1])
+        assert samples[worst_tail][1] < 150 * reference, (worst_tail, samples[worst_tail], reference)
+
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark not installed")
+class TestExtractionBenchmark:
+    """pytest-benchmark cases for comparing extraction latency between runs"""
+
+    @pytest.mark.parametrize("label,result", CORPUS, ids=[label for label, _ in CORPUS])
+    def test_extract(self, benchmark, label, result):
+        benchmark.group = "extract_response_from_result"
+        response = benchmark(extract_response_from_result, result, "hello there", CONTEXT)
+        assert isinstance(response, str)
+
+    def test_extract_corpus(self, benchmark):
+        def run_corpus():
+            return [extract_response_from_result(result, "hello there", CONTEXT) for _, result in CORPUS]
+
+        benchmark.group = "corpus"
+        assert len(benchmark(run_corpus)) == len(CORPUS)
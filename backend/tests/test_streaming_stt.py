@@ -0,0 +1,114 @@
+"""
+Unit tests for Streaming STT
+Tests VAD segmentation, partial/final chunk emission and the sliding context window.
+"""
+import pytest
+import numpy as np
+from unittest.mock import patch
+
+from backend.utils.streaming_stt import (
+    StreamingSTTSession, StreamingSTTConfig, VoiceActivityDetector, resample
+)
+from backend.utils.stt_service import SAMPLE_RATE
+
+
+def tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+class FakeService:
+    def __init__(self):
+        self.calls = []
+
+    async def transcribe_array(self, audio, **options):
+        self.calls.append(options)
+        return {"text": f"heard {len(audio) // SAMPLE_RATE}s"}
+
+
+@pytest.fixture(autouse=True)
+def energy_vad():
+    with patch("backend.utils.streaming_stt.WEBRTCVAD_AVAILABLE", False):
+        yield
+
+
+class TestVoiceActivityDetector:
+    """Test the energy-based VAD fallback"""
+
+    def test_energy_vad(self):
+        vad = VoiceActivityDetector(StreamingSTTConfig())
+        assert vad.is_speech(tone(0.03)) is True
+        assert vad.is_speech(silence(0.03)) is False
+
+    def test_resample_length(self):
+        audio = tone(1.0)
+        assert len(resample(audio, SAMPLE_RATE, 8000)) == 8000
+        assert resample(audio, SAMPLE_RATE) is audio
+
+
+class TestStreamingSTTSession:
+    """Test incremental transcription sessions"""
+
+    @pytest.mark.asyncio
+    async def test_partials_then_final_per_utterance(self):
+        chunks = []
+
+        async def on_chunk(chunk):
+            chunks.append(chunk)
+
+        service = FakeService()
+        config = StreamingSTTConfig(partial_interval_ms=300, end_silence_ms=300)
+        session = StreamingSTTSession(on_chunk, config=config, service=service)
+
+        await session.feed_array(silence(0.5))
+        await session.feed_array(tone(2.0))
+        await session.feed_array(silence(0.6))
+        await session.flush()
+
+        finals = [c for c in chunks if c["is_final"]]
+        partials = [c for c in chunks if not c["is_final"]]
+        assert len(finals) == 1
+        assert partials, "expected partial transcripts while speaking"
+        assert finals[0]["utterance_id"] == 0
+        assert finals[0]["start"] < 0.5 < finals[0]["end"]
+
+    @pytest.mark.asyncio
+    async def test_final_text_feeds_context_window(self):
+        chunks = []
+
+        async def on_chunk(chunk):
+            chunks.append(chunk)
+
+        service = FakeService()
+        config = StreamingSTTConfig(partial_interval_ms=10_000, end_silence_ms=300)
+        session = StreamingSTTSession(on_chunk, config=config, service=service)
+
+        for _ in range(2):
+            await session.feed_array(tone(1.0))
+            await session.feed_array(silence(0.5))
+            await session.flush()
+
+        assert [c["utterance_id"] for c in chunks] == [0, 1]
+        assert "initial_prompt" not in service.calls[0]
+        assert service.calls[1]["initial_prompt"] == chunks[0]["text"]
+
+    @pytest.mark.asyncio
+    async def test_pcm_input_is_resampled(self):
+        chunks = []
+
+        async def on_chunk(chunk):
+            chunks.append(chunk)
+
+        session = StreamingSTTSession(
+            on_chunk, sample_rate=48000,
+            config=StreamingSTTConfig(partial_interval_ms=10_000), service=FakeService()
+        )
+        pcm = (resample(tone(1.0), SAMPLE_RATE, 48000) * 32767).astype(np.int16).tobytes()
+        await session.feed(pcm)
+        await session.flush()
+
+        assert len(chunks) == 1 and chunks[0]["is_final"]
@@ -0,0 +1,132 @@
+"""
+Unit tests for the STT Service
+Tests worker pool transcription, serialised model calls, admission control,
+the model-loading 503 and short-clip batching.
+"""
+import pytest
+import asyncio
+import threading
+import numpy as np
+from unittest.mock import Mock, patch
+
+from backend.utils.stt_service import (
+    STTService, STTServiceConfig, STTOverloadedError, STTModelLoadingError, AudioDecodeError,
+    decode_audio_bytes, pcm16_to_float32, SAMPLE_RATE
+)
+
+
+def make_service(**overrides) -> STTService:
+    config = STTServiceConfig(max_workers=2, max_queue_size=4, batching_enabled=False)
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return STTService(config)
+
+
+class TestAudioHelpers:
+    """Test in-memory audio helpers"""
+
+    def test_pcm16_to_float32(self):
+        pcm = np.array([0, 16384, -32768], dtype=np.int16).tobytes()
+        audio = pcm16_to_float32(pcm)
+        assert audio.dtype == np.float32
+        assert audio.tolist() == [0.0, 0.5, -1.0]
+
+    def test_decode_rejects_empty_payload(self):
+        with pytest.raises(AudioDecodeError):
+            decode_audio_bytes(b"")
+
+
+class TestSTTService:
+    """Test transcription on the worker pool"""
+
+    @pytest.mark.asyncio
+    async def test_transcribe_runs_on_worker_thread(self):
+        threads = []
+        model = Mock()
+        model.transcribe.side_effect = lambda audio, **kw: threads.append(threading.current_thread().name) or {"text": "hello"}
+        service = make_service()
+
+        with patch("backend.utils.stt_service.get_whisper_model", return_value=model):
+            result = await service.transcribe_array(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+        assert result == {"text": "hello"}
+        assert threads[0].startswith("stt-worker")
+        assert service.get_stats()["completed"] == 1
+        assert service.pending == 0
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_model_calls_never_overlap(self):
+        active, overlaps = [], []
+
+        def transcribe(audio, **kw):
+            active.append(1)
+            overlaps.append(len(active) > 1)
+            threading.Event().wait(0.02)
+            active.pop()
+            return {"text": "ok"}
+
+        model = Mock()
+        model.transcribe.side_effect = transcribe
+        service = make_service(max_workers=4, max_queue_size=8)
+        audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+        with patch("backend.utils.stt_service.get_whisper_model", return_value=model):
+            await asyncio.gather(*(service.transcribe_array(audio) for _ in range(4)))
+
+        assert len(overlaps) == 4 and not any(overlaps)
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_admission_control_rejects_when_queue_full(self):
+        release = threading.Event()
+        model = Mock()
+        model.transcribe.side_effect = lambda audio, **kw: release.wait(5) and {"text": "ok"}
+        service = make_service(max_queue_size=2)
+        audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+        with patch("backend.utils.stt_service.get_whisper_model", return_value=model):
+            running = [asyncio.create_task(service.transcribe_array(audio)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(STTOverloadedError) as exc_info:
+                await service.transcribe_array(audio)
+            assert exc_info.value.retry_after_seconds >= 1
+
+            release.set()
+            await asyncio.gather(*running)
+
+        stats = service.get_stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        service.shutdown()
+
+    def test_model_loading_is_reported_with_retry_after(self):
+        service = make_service(model_loading_retry_after=7)
+
+        with patch("backend.utils.stt_service.whisper_model_loaded", return_value=False):
+            with pytest.raises(STTModelLoadingError) as exc_info:
+                service.ensure_model_loaded()
+        assert isinstance(exc_info.value, STTOverloadedError)  # endpoints answer 503 + Retry-After
+        assert exc_info.value.retry_after_seconds == 7
+
+        with patch("backend.utils.stt_service.whisper_model_loaded", return_value=True):
+            service.ensure_model_loaded()
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_short_clips_are_batched(self):
+        service = make_service(batching_enabled=True, batch_max_size=3, batch_window_ms=20)
+        batches = []
+
+        def run_batch(clips):
+            batches.append(len(clips))
+            return [{"text": f"clip-{len(clip)}"} for clip in clips]
+
+        service._run_batch = run_batch
+        clips = [np.zeros(SAMPLE_RATE * (i + 1), dtype=np.float32) for i in range(3)]
+        results = await asyncio.gather(*(service.transcribe_array(clip) for clip in clips))
+
+        assert batches == [3]
+        assert [r["text"] for r in results] == [f"clip-{len(c)}" for c in clips]
+        service.shutdown()
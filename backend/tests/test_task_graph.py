@@ -0,0 +1,167 @@
+"""
+Unit tests for Task Graph Execution
+Tests plan validation, concurrent step execution, timeouts, failure propagation and memoisation.
+"""
+import asyncio
+
+import pytest
+
+from backend.utils.task_graph import (
+    ExecutionPlan, PlanStep, PlanValidationError, TaskGraphConfig, TaskGraphExecutor
+)
+
+
+class SleepyTools:
+    """Tools that sleep for a fixed time and record their calls"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+
+    def tool(self, name, delay=None, fail=False):
+        async def run(query, user_id):
+            self.calls.append((name, query))
+            await asyncio.sleep(self.delay if delay is None else delay)
+            if fail:
+                raise RuntimeError(f"{name} unavailable")
+            return f"{name}:{query}"
+        return run
+
+
+def plan(*steps):
+    return ExecutionPlan(steps=[PlanStep(**step) for step in steps])
+
+
+@pytest.fixture
+def tools():
+    return SleepyTools()
+
+
+@pytest.fixture
+def executor(tools):
+    config = TaskGraphConfig(step_timeout=1.0, max_concurrency=4, max_steps=12, memo_ttl=60,
+                             memo_size=16, max_reference_chars=100)
+    step_tools = {name: tools.tool(name) for name in ("graphmaster", "taskmaster", "rag")}
+    return TaskGraphExecutor(step_tools, config, read_only={"rag"})
+
+
+class TestPlanValidation:
+    """Test rejection of malformed plans"""
+
+    def test_rejects_bad_plans(self, executor):
+        with pytest.raises(PlanValidationError, match="unknown tool"):
+            executor.validate(plan({"id": "a", "tool": "codeweaver", "input": "x"}))
+        with pytest.raises(PlanValidationError, match="unknown steps"):
+            executor.validate(plan({"id": "a", "tool": "rag", "input": "x", "depends_on": ["b"]}))
+        with pytest.raises(PlanValidationError, match="without depending"):
+            executor.validate(plan({"id": "a", "tool": "rag", "input": "x"},
+                                   {"id": "b", "tool": "rag", "input": "use {{a}}"}))
+        with pytest.raises(PlanValidationError, match="cycle"):
+            executor.validate(plan({"id": "a", "tool": "rag", "input": "x", "depends_on": ["b"]},
+                                   {"id": "b", "tool": "rag", "input": "y", "depends_on": ["a"]}))
+
+    def test_returns_dependency_order(self, executor):
+        order = executor.validate(plan({"id": "c", "tool": "rag", "input": "x", "depends_on": ["a", "b"]},
+                                       {"id": "b", "tool": "rag", "input": "y", "depends_on": ["a"]},
+                                       {"id": "a", "tool": "rag", "input": "z"}))
+        assert order == ["a", "b", "c"]
+
+
+class TestTaskGraphExecutor:
+    """Test concurrent execution of step graphs"""
+
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently(self, executor, tools):
+        tools.delay = 0.1
+        result = await executor.execute(plan(
+            {"id": "memories", "tool": "graphmaster", "input": "trip notes"},
+            {"id": "docs", "tool": "rag", "input": "itinerary"},
+            {"id": "summary", "tool": "rag", "input": "combine {{memories}} and {{docs}}",
+             "depends_on": ["memories", "docs"]},
+        ))
+
+        assert result.succeeded
+        assert result.outcomes["summary"].input == "combine graphmaster:trip notes and rag:itinerary"
+        assert result.serial_seconds >= 0.3
+        assert result.wall_seconds < 0.28  # two levels, not three steps
+        assert result.critical_path_seconds == pytest.approx(0.2, abs=0.05)
+
+    @pytest.mark.asyncio
+    async def test_failure_and_timeout_skip_only_dependents(self, executor, tools):
+        tools.delay = 0.01
+        executor.tools.update(broken=tools.tool("broken", fail=True), slow=tools.tool("slow", delay=1.0))
+        result = await executor.execute(plan(
+            {"id": "a", "tool": "broken", "input": "x"},
+            {"id": "b", "tool": "rag", "input": "{{a}}", "depends_on": ["a"]},
+            {"id": "c", "tool": "rag", "input": "{{b}}", "depends_on": ["b"]},
+            {"id": "d", "tool": "slow", "input": "y", "timeout_seconds": 0.05},
+            {"id": "e", "tool": "rag", "input": "independent"},
+        ))
+
+        statuses = {step_id: outcome.status for step_id, outcome in result.outcomes.items()}
+        assert statuses == {"a": "failed", "b": "skipped", "c": "skipped", "d": "timeout", "e": "completed"}
+        assert result.outcomes["a"].error == "broken unavailable"
+        assert not result.succeeded
+        stats = executor.get_stats()
+        assert stats["skipped_steps"] == 2 and stats["timed_out_steps"] == 1
+
+    @pytest.mark.asyncio
+    async def test_identical_steps_are_memoised(self, executor, tools):
+        same_query = plan({"id": "a", "tool": "rag", "input": "q"}, {"id": "b", "tool": "rag", "input": "q"})
+
+        first = await executor.execute(same_query)
+        second = await executor.execute(same_query)
+
+        assert len(tools.calls) == 1  # shared in flight, then served from the memo
+        assert first.outcomes["b"].memoized and second.outcomes["a"].memoized
+        assert executor.get_stats()["shared_in_flight"] == 1
+        assert executor.get_stats()["memo_hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_side_effecting_steps_always_run(self, executor, tools):
+        tools.delay = 0.01
+        add_milk = plan({"id": "a", "tool": "taskmaster", "input": "add buy milk"})
+
+        first = await executor.execute(add_milk)
+        second = await executor.execute(add_milk)
+
+        assert len(tools.calls) == 2
+        assert not first.outcomes["a"].memoized and not second.outcomes["a"].memoized
+        assert executor.get_stats()["memo_entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_writes_invalidate_the_users_memo(self, executor, tools):
+        tools.delay = 0.01
+        read = plan({"id": "a", "tool": "rag", "input": "q"})
+
+        await executor.execute(read)
+        await executor.execute(read, user_id="other")
+        await executor.execute(plan({"id": "w", "tool": "graphmaster", "input": "create memory"}))
+        after_write = await executor.execute(read)
+
+        assert not after_write.outcomes["a"].memoized
+        assert tools.calls.count(("rag", "q")) == 3  # re-read for this user only
+        assert (await executor.execute(read, user_id="other")).outcomes["a"].memoized
+
+    @pytest.mark.asyncio
+    async def test_read_overlapping_a_write_is_not_memoised(self, executor, tools):
+        executor.tools["graphmaster"] = tools.tool("graphmaster", delay=0.01)
+        await executor.execute(plan({"id": "r", "tool": "rag", "input": "q"}, {"id": "w", "tool": "graphmaster", "input": "x"}))
+        assert executor.get_stats()["memo_entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, executor):
+        active, peak = 0, 0
+
+        async def tracked(query, user_id):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return query
+
+        executor.tools["rag"] = tracked
+        executor.config.max_concurrency = 2
+        await executor.execute(plan(*({"id": f"s{i}", "tool": "rag", "input": str(i)} for i in range(6))))
+        assert peak == 2
@@ -0,0 +1,104 @@
+"""
+Unit tests for the Segmented Telemetry Store
+Tests append-only segments, range queries, segment-level retention and legacy migration.
+"""
+import json
+from datetime import datetime, timedelta
+
+from backend.utils.telemetry_store import SegmentedTelemetryLog
+from backend.utils.privacy_first_telemetry import PrivacyFirstTelemetry
+
+
+def record(ts: datetime, value: int) -> dict:
+    return {"timestamp": ts.isoformat() + "Z", "value": value}
+
+
+class TestSegmentedTelemetryLog:
+    """Test the append-only segmented log"""
+
+    def test_records_are_partitioned_by_day(self, tmp_path):
+        log = SegmentedTelemetryLog(tmp_path)
+        day = datetime(2025, 10, 1, 12)
+        log.append(record(day, 1))
+        log.append(record(day + timedelta(hours=1), 2))
+        log.append(record(day + timedelta(days=1), 3))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["2025-10-01.jsonl", "2025-10-02.jsonl"]
+        assert log.count() == 3
+        assert (tmp_path / "2025-10-01.jsonl").read_text().count("\n") == 2
+
+    def test_index_is_rebuilt_from_disk(self, tmp_path):
+        log = SegmentedTelemetryLog(tmp_path)
+        for i in range(5):
+            log.append(record(datetime(2025, 10, 1 + i), i))
+
+        reopened = SegmentedTelemetryLog(tmp_path)
+        assert reopened.count() == 5
+        assert len(reopened.segments) == 5
+
+    def test_range_query_with_limit_returns_most_recent(self, tmp_path):
+        log = SegmentedTelemetryLog(tmp_path)
+        start = datetime(2025, 10, 1)
+        for i in range(10):
+            log.append(record(start + timedelta(hours=12 * i), i))
+
+        values = [r["value"] for r in log.read_range(since=start + timedelta(days=2))]
+        assert values == [4, 5, 6, 7, 8, 9]
+        assert [r["value"] for r in log.read_range(limit=3)] == [7, 8, 9]
+        assert [r["value"] for r in log.read_range(until=start + timedelta(days=1))] == [0, 1]
+
+    def test_retention_drops_whole_segments(self, tmp_path):
+        log = SegmentedTelemetryLog(tmp_path)
+        log.append(record(datetime(2025, 10, 1, 23), 1))
+        log.append(record(datetime(2025, 10, 2, 1), 2))
+
+        assert log.drop_before(datetime(2025, 10, 2, 12)) == 1
+        assert [r["value"] for r in log.read_range()] == [2]
+        assert not (tmp_path / "2025-10-01.jsonl").exists()
+
+    def test_corrupt_line_is_skipped(self, tmp_path):
+        log = SegmentedTelemetryLog(tmp_path)
+        log.append(record(datetime(2025, 10, 1), 1))
+        with open(tmp_path / "2025-10-01.jsonl", "a") as f:
+            f.write('{"timestamp": "2025-10-01T0')
+
+        assert [r["value"] for r in log.read_range()] == [1]
+
+
+class TestPrivacyFirstTelemetryStorage:
+    """Test the telemetry system on top of the segmented store"""
+
+    def test_log_error_and_summary(self, tmp_path):
+        telemetry = PrivacyFirstTelemetry(data_dir=str(tmp_path))
+        telemetry.log_error("test_error", "boom", component="tests")
+
+        assert telemetry.get_telemetry_summary()["errors_count"] == 1
+        exported = telemetry.export_data("errors", since=datetime.utcnow() - timedelta(days=1))
+        assert exported[0]["error_type"] == "test_error"
+
+    def test_legacy_json_is_migrated_explicitly_and_once(self, tmp_path):
+        now = datetime.utcnow()
+        legacy = [record(now - timedelta(days=1), 1), record(now - timedelta(hours=1), 2),
+                  record(now - timedelta(days=60), 3)]
+        (tmp_path / "system_health.json").write_text(json.dumps(legacy))
+
+        telemetry = PrivacyFirstTelemetry(data_dir=str(tmp_path))
+        assert (tmp_path / "system_health.json").exists()  # nothing happens on construction
+
+        # A previous run imported the first record and then stopped
+        telemetry.stores["system_health"].append(legacy[0])
+        results = telemetry.migrate_legacy_data()
+
+        # The 60 day old record is outside the 30 day retention window
+        assert results == {"system_health": {"imported": 1, "expired": 1, "already_imported": 1}}
+        assert [r["value"] for r in telemetry.export_data("system_health")] == [1, 2]
+        assert not (tmp_path / "system_health.json").exists()
+        assert (tmp_path / "system_health.json.migrated").exists()
+        assert telemetry.migrate_legacy_data() == {}
+
+    def test_delete_all_data(self, tmp_path):
+        telemetry = PrivacyFirstTelemetry(data_dir=str(tmp_path))
+        telemetry.log_error("test_error", "boom")
+        telemetry.delete_all_data()
+
+        assert telemetry.get_telemetry_summary()["errors_count"] == 0
@@ -0,0 +1,154 @@
+"""
+Unit tests for the Tiered Cache
+Tests L1/L2 lookups, single-flight coalescing, stale-while-revalidate, tag invalidation and cross-worker invalidation.
+"""
+import asyncio
+import pytest
+
+from backend.utils.tiered_cache import TieredCache, TieredCacheConfig
+
+
+@pytest.fixture
+def cache():
+    return TieredCache(TieredCacheConfig(l2_enabled=False, l1_ttl=30, default_ttl=60, stale_ttl=0))
+
+
+@pytest.fixture
+def open_worker(fake_async_redis):
+    """Opens a cache on the Redis shared by every worker"""
+    return lambda: TieredCache(
+        TieredCacheConfig(l2_enabled=True, l1_ttl=30, default_ttl=60, stale_ttl=0), redis_client=fake_async_redis
+    )
+
+
+class TestTieredCache:
+    """Test lookups across tiers"""
+
+    @pytest.mark.asyncio
+    async def test_l1_only_get_or_set(self, cache):
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            return {"status": "ok"}
+
+        assert await cache.get_or_set("health", factory) == {"status": "ok"}
+        assert await cache.get_or_set("health", factory) == {"status": "ok"}
+        assert len(calls) == 1
+        assert cache.get_stats()["l1_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_l2_hit_is_promoted_to_l1(self, open_worker):
+        writer, reader = open_worker(), open_worker()
+        await writer.set("k", [1, 2, 3])
+
+        assert await reader.get("k") == [1, 2, 3]
+        assert await reader.get("k") == [1, 2, 3]
+        stats = reader.get_stats()
+        assert stats["l2_hits"] == 1
+        assert stats["l1_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_factory_call(self, open_worker):
+        cache = open_worker()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "value"
+
+        results = await asyncio.gather(*(cache.get_or_set("k", slow) for _ in range(10)))
+        assert results == ["value"] * 10
+        assert len(calls) == 1
+        assert cache.get_stats()["coalesced"] == 9
+
+    @pytest.mark.asyncio
+    async def test_factory_error_reaches_every_waiter_and_is_not_cached(self, cache):
+
+        async def broken():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("neo4j down")
+
+        results = await asyncio.gather(*(cache.get_or_set("k", broken) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await cache.get_or_set("k", lambda: "recovered") == "recovered"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_fail_coalesced_callers(self, cache):
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "value"
+
+        leader = asyncio.create_task(cache.get_or_set("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_set("k", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await follower == "value"
+        assert leader.cancelled() and len(calls) == 1
+        assert await cache.get("k") == "value"
+
+    @pytest.mark.asyncio
+    async def test_callers_get_their_own_copy_of_mutable_values(self, cache):
+        first = await cache.get_or_set("k", lambda: {"items": [1]})
+        first["items"].append(2)
+        assert await cache.get_or_set("k", lambda: None) == {"items": [1]}
+        (await cache.get("k"))["items"].clear()
+        assert await cache.get("k") == {"items": [1]}
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_revalidating(self, cache):
+        await cache.set("k", "old", ttl=1, stale_ttl=30)
+        cache.l1.get("k")["fresh_until"] -= 5  # entry went stale
+
+        async def refresh():
+            await asyncio.sleep(0.01)
+            return "new"
+
+        assert await cache.get_or_set("k", refresh, ttl=60) == "old"
+        await asyncio.sleep(0.05)
+        assert await cache.get("k") == "new"
+        stats = cache.get_stats()
+        assert stats["stale_served"] == 1
+        assert stats["background_refreshes"] == 1
+
+
+class TestInvalidation:
+    """Test key, tag and cross-worker invalidation"""
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation_removes_from_both_tiers(self, open_worker, fake_async_redis):
+        cache = open_worker()
+        await cache.set("user:1:profile", "p1", tags=["user:1"])
+        await cache.set("user:1:memories", "m1", tags=["user:1"])
+        await cache.set("user:2:profile", "p2", tags=["user:2"])
+
+        await cache.invalidate_tags("user:1")
+
+        assert await cache.get("user:1:profile") is None
+        assert await cache.get("user:1:memories") is None
+        assert await cache.get("user:2:profile") == "p2"
+        assert "mainza:cache:user:1:profile" not in fake_async_redis.data
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers_l1(self, open_worker):
+        first, second = open_worker(), open_worker()
+        await first.start()
+        await second.start()
+
+        await first.set("k", "v1", tags=["t"])
+        assert await second.get("k") == "v1"  # now in second's L1
+
+        await first.invalidate_tags("t")
+        await asyncio.sleep(0.01)
+
+        assert second.l1.get("k") is None
+        assert await second.get("k") is None
+        assert second.get_stats()["remote_invalidations"] == 1
+        await first.stop()
+        await second.stop()
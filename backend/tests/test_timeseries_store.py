@@ -0,0 +1,166 @@
+"""
+Unit tests for the Time-Series Metrics Store
+Tests ring buffering, rollups on disk, range queries, percentile summaries and monitoring snapshots.
+"""
+import threading
+import time
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+
+from backend.utils.timeseries_store import QuantileSketch, TimeSeriesStore
+from backend.utils.performance_monitoring_system import MetricType, PerformanceMonitoringSystem
+
+T0 = (time.time() // 3600 - 2) * 3600  # two hours ago, aligned to the hour
+
+
+class TestQuantileSketch:
+    """Test sketch accuracy and merging"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        values = np.random.default_rng(7).lognormal(mean=0, sigma=1, size=5000)
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for v in values:
+            sketch.add(v)
+        for q in (0.5, 0.9, 0.99):
+            exact = np.quantile(values, q)
+            assert abs(sketch.quantile(q) - exact) / exact < 0.03
+
+    def test_merge_matches_single_sketch(self):
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for v in range(-50, 200):
+            whole.add(v)
+            (left if v % 2 else right).add(v)
+        left.merge(right)
+        assert left.count == whole.count
+        assert left.quantile(0.5) == whole.quantile(0.5)
+        assert QuantileSketch.from_dict(left.to_dict()).quantile(0.9) == whole.quantile(0.9)
+
+
+class TestTimeSeriesStore:
+    """Test raw buffers, rollups and queries"""
+
+    def test_raw_range_and_exact_summary(self, tmp_path):
+        store = TimeSeriesStore(data_dir=str(tmp_path), raw_capacity=100)
+        for i in range(10):
+            store.record("cpu", float(i), T0 + i)
+
+        result = store.range("cpu", since=T0 + 2, until=T0 + 5)
+        assert result["resolution"] == "raw"
+        assert [p["value"] for p in result["points"]] == [2.0, 3.0, 4.0]
+
+        summary = store.summary("cpu", since=T0, until=T0 + 10)
+        assert summary["count"] == 10
+        assert summary["mean"] == 4.5
+        assert summary["p50"] == 4.5
+        assert store.latest("cpu") == (T0 + 9, 9.0)
+        assert store.tail("cpu", 3) == [7.0, 8.0, 9.0]
+
+    def test_closed_buckets_are_written_to_disk(self, tmp_path):
+        store = TimeSeriesStore(data_dir=str(tmp_path), raw_capacity=10)
+        for i in range(180):
+            store.record("latency", float(i % 60), T0 + i)
+        store.flush(now=T0 + 1000)
+
+        reopened = TimeSeriesStore(data_dir=str(tmp_path), raw_capacity=10)
+        minutes = reopened.range("latency", since=T0, until=T0 + 180, resolution="1m")
+        assert [p["count"] for p in minutes["points"]] == [60, 60, 60]
+        assert minutes["points"][0] == {"timestamp": T0, "count": 60, "mean": 29.5, "min": 0.0, "max": 59.0}
+        assert len(reopened.range("latency", since=T0, until=T0 + 180, resolution="1s")["points"]) == 180
+
+    def test_recording_does_not_write_until_flush(self, tmp_path):
+        store = TimeSeriesStore(data_dir=str(tmp_path), raw_capacity=10)
+        for i in range(180):
+            store.record("latency", float(i), T0 + i)
+
+        assert list(tmp_path.rglob("*.jsonl")) == []
+        assert store.stats()["unflushed_buckets"] > 0
+        minutes = store.range("latency", since=T0, until=T0 + 180, resolution="1m")
+        assert [p["count"] for p in minutes["points"]] == [60, 60, 60]
+
+        store.flush(now=T0 + 1000)
+        assert store.stats()["unflushed_buckets"] == 0
+        assert list(tmp_path.rglob("*.jsonl"))
+        assert [p["count"] for p in store.range("latency", since=T0, until=T0 + 180, resolution="1m")["points"]] == [60, 60, 60]
+
+    def test_rollup_summary_when_raw_buffer_has_wrapped(self, tmp_path):
+        store = TimeSeriesStore(data_dir=str(tmp_path), raw_capacity=5)
+        values = [float(v) for v in range(1, 101)]
+        for i, v in enumerate(values):
+            store.record("latency", v, T0 + i)
+
+        summary = store.summary("latency", since=T0, until=T0 + 100)
+        assert summary["resolution"] == "1s"
+        assert summary["count"] == 100
+        assert summary["min"] == 1.0 and summary["max"] == 100.0
+        assert abs(summary["p90"] - np.percentile(values, 90)) / np.percentile(values, 90) < 0.03
+
+    def test_retention_drops_old_segments(self, tmp_path):
+        from datetime import datetime, timedelta
+        store = TimeSeriesStore(data_dir=str(tmp_path), retention_days={"1s": 1, "1m": 1, "1h": 1})
+        store.record("cpu", 1.0, T0)
+        store.flush(force=True)
+        assert store.apply_retention(now=datetime.utcfromtimestamp(T0) + timedelta(days=3)) == 3
+        assert store.range("cpu", since=T0, until=T0 + 10, resolution="1m")["points"] == []
+
+
+class TestMonitoringSnapshots:
+    """Test that monitoring keeps samples local and writes aggregated snapshots"""
+
+    @pytest.mark.asyncio
+    async def test_samples_do_not_touch_neo4j(self, tmp_path):
+        driver = MagicMock()
+        monitor = PerformanceMonitoringSystem(driver, config={"metric_store": TimeSeriesStore(data_dir=str(tmp_path))})
+        for value in (50.0, 90.0, 95.0, 40.0):
+            await monitor._record_metric("cpu_usage", value, MetricType.SYSTEM, "%")
+
+        driver.session.assert_not_called()
+        assert monitor.get_active_alerts() == []
+        assert monitor.get_metric_summary("cpu_usage")["count"] == 4
+        assert monitor.get_performance_summary()["current_metrics"]["cpu_usage"]["value"] == 40.0
+
+    @pytest.mark.asyncio
+    async def test_one_alert_per_metric(self, tmp_path):
+        monitor = PerformanceMonitoringSystem(MagicMock(), config={"metric_store": TimeSeriesStore(data_dir=str(tmp_path))})
+        await monitor._record_metric("cpu_usage", 85.0, MetricType.SYSTEM, "%")
+        await monitor._record_metric("cpu_usage", 99.0, MetricType.SYSTEM, "%")
+
+        alerts = monitor.get_active_alerts()
+        assert len(alerts) == 1
+        assert alerts[0].current_value == 99.0
+        assert alerts[0].alert_level.value == "critical"
+
+    @pytest.mark.asyncio
+    async def test_rollups_are_flushed_off_the_event_loop(self, tmp_path):
+        store = TimeSeriesStore(data_dir=str(tmp_path))
+        monitor = PerformanceMonitoringSystem(MagicMock(), config={"metric_store": store})
+        await monitor._record_metric("cpu_usage", 10.0, MetricType.SYSTEM, "%")
+
+        loop_thread = threading.get_ident()
+        flush_threads = []
+        original_flush = store.flush
+
+        def flush(*args, **kwargs):
+            flush_threads.append(threading.get_ident())
+            return original_flush(*args, **kwargs)
+
+        store.flush = flush
+        await monitor.stop_monitoring()
+
+        assert flush_threads and loop_thread not in flush_threads
+        assert list(tmp_path.rglob("*.jsonl"))
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_single_merge(self, tmp_path):
+        driver = MagicMock()
+        session = driver.session.return_value.__enter__.return_value
+        monitor = PerformanceMonitoringSystem(driver, config={"metric_store": TimeSeriesStore(data_dir=str(tmp_path))})
+        for value in range(20):
+            await monitor._record_metric("response_time", float(value), MetricType.APPLICATION, "seconds")
+
+        await monitor._store_metrics_snapshot()
+
+        session.run.assert_called_once()
+        query, params = session.run.call_args[0]
+        assert "MERGE (s:PerformanceSnapshot" in query
+        assert '"response_time"' in params["metrics"]
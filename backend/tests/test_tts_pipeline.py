@@ -0,0 +1,93 @@
+"""
+Unit tests for the TTS Pipeline
+Tests sentence chunking, WAV framing, the audio LRU cache and pipelined synthesis.
+"""
+import pytest
+import io
+import wave
+import threading
+from unittest.mock import Mock, patch
+
+from backend.utils.tts_pipeline import (
+    TTSPipeline, TTSPipelineConfig, AudioLRUCache, chunk_text, wav_header, float_to_pcm16
+)
+
+
+def make_model(calls):
+    model = Mock()
+    model.synthesizer.output_sample_rate = 16000
+
+    def tts(text, **kwargs):
+        calls.append((text, threading.current_thread().name))
+        return [0.5] * 10
+
+    model.tts.side_effect = tts
+    return model
+
+
+class TestTextAndAudioHelpers:
+    """Test chunking and WAV helpers"""
+
+    def test_chunk_text_groups_sentences(self):
+        text = "First sentence. Second one! Third?"
+        assert chunk_text(text, chunk_size=300) == [text]
+        assert chunk_text(text, chunk_size=12) == ["First sentence.", "Second one!", "Third?"]
+
+    def test_wav_header_with_known_size(self):
+        pcm = float_to_pcm16([0.0, 0.5, -0.5, 1.0])
+        with wave.open(io.BytesIO(wav_header(22050, len(pcm)) + pcm)) as wav:
+            assert wav.getframerate() == 22050
+            assert wav.getsampwidth() == 2
+            assert wav.getnframes() == 4
+
+    def test_streaming_wav_header_uses_max_size(self):
+        assert wav_header(22050)[40:44] == b"\xdb\xff\xff\xff"
+
+
+class TestAudioLRUCache:
+    """Test LRU eviction by count and size"""
+
+    def test_evicts_least_recently_used(self):
+        cache = AudioLRUCache(max_entries=2, max_bytes=1024)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        assert cache.get("a") == b"1"
+        cache.put("c", b"3")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1"
+
+    def test_evicts_by_total_bytes(self):
+        cache = AudioLRUCache(max_entries=10, max_bytes=8)
+        cache.put("a", b"1234")
+        cache.put("b", b"5678")
+        cache.put("c", b"90")
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 6
+
+
+class TestTTSPipeline:
+    """Test pipelined synthesis"""
+
+    @pytest.mark.asyncio
+    async def test_stream_wav_synthesizes_every_chunk_in_order(self):
+        calls = []
+        pipeline = TTSPipeline(TTSPipelineConfig(chunk_size=5))
+        with patch("backend.utils.tts_pipeline.get_tts_model", return_value=make_model(calls)):
+            parts = [part async for part in pipeline.stream_wav("One. Two. Three.")]
+
+        assert [text for text, _ in calls] == ["One.", "Two.", "Three."]
+        assert all(name.startswith("tts-worker") for _, name in calls)
+        assert len(parts) == 4  # header + one PCM block per chunk
+        assert len(parts[1]) == 20
+
+    @pytest.mark.asyncio
+    async def test_repeated_phrases_hit_cache(self):
+        calls = []
+        pipeline = TTSPipeline()
+        with patch("backend.utils.tts_pipeline.get_tts_model", return_value=make_model(calls)):
+            first = await pipeline.synthesize_wav("I am thinking.")
+            second = await pipeline.synthesize_wav("I am thinking.")
+
+        assert first == second
+        assert len(calls) == 1
+        assert pipeline.get_stats()["cache"]["hits"] == 1
@@ -0,0 +1,108 @@
+"""
+Unit tests for the Turn Context Engine
+Tests that memory and knowledge context are retrieved once per turn and merged.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from types import SimpleNamespace
+
+from backend.utils.turn_context_engine import (
+    TurnContextEngine, attach_memory_context, memory_context_to_agent_view
+)
+
+
+def make_memory_context():
+    memory = SimpleNamespace(
+        memory_id="m1", content="User likes jazz", memory_type="interaction",
+        agent_name="simple_chat", relevance_score=0.9, consciousness_level=0.7,
+        emotional_state="curious", created_at="2025-01-01T00:00:00"
+    )
+    return SimpleNamespace(
+        relevant_memories=[memory],
+        conversation_history=[{"content": "hi"}],
+        related_concepts=["music"],
+        context_strength=0.8,
+        consciousness_alignment=0.7,
+        temporal_relevance=0.6,
+        formatted_context="Relevant memories: jazz",
+        metadata={}
+    )
+
+
+@pytest.fixture
+def builder():
+    builder = Mock()
+    builder.build_comprehensive_context = AsyncMock(return_value=make_memory_context())
+    return builder
+
+
+@pytest.fixture
+def knowledge_manager():
+    manager = Mock()
+    manager.get_consciousness_aware_context = AsyncMock(return_value={
+        "related_concepts": [{"name": "music"}],
+        "retrieval_metadata": {"memory_enhanced": False}
+    })
+    return manager
+
+
+class TestTurnContextEngine:
+    """Test single-pass turn context retrieval"""
+
+    @pytest.mark.asyncio
+    async def test_memory_retrieved_once_and_shared(self, builder, knowledge_manager):
+        embedding = [0.1, 0.2, 0.3]
+        with patch("backend.utils.embedding_enhanced.aget_embedding", AsyncMock(return_value=embedding)) as embed:
+            context = await TurnContextEngine().build(
+                "what music do I like?", "user", {"consciousness_level": 0.7},
+                memory_context_builder=builder, knowledge_manager=knowledge_manager
+            )
+
+        embed.assert_awaited_once()
+        builder.build_comprehensive_context.assert_awaited_once()
+        assert builder.build_comprehensive_context.call_args.kwargs["query_embedding"] == embedding
+        # Knowledge retrieval must not rebuild the memory context itself
+        assert knowledge_manager.get_consciousness_aware_context.call_args.kwargs["include_memory_context"] is False
+
+        assert context.memory_context["relevant_memories"][0]["content"] == "User likes jazz"
+        assert context.knowledge_context["formatted_memory_context"] == "Relevant memories: jazz"
+        assert context.knowledge_context["retrieval_metadata"]["memory_enhanced"] is True
+        assert {"embedding", "memory", "knowledge"} <= set(context.timings)
+
+    @pytest.mark.asyncio
+    async def test_memory_disabled_skips_builder(self, builder, knowledge_manager):
+        context = await TurnContextEngine().build(
+            "hello", "user", {}, include_memory=False,
+            memory_context_builder=builder, knowledge_manager=knowledge_manager
+        )
+        builder.build_comprehensive_context.assert_not_called()
+        assert context.memory_context == {}
+        assert "memory_context" not in context.knowledge_context
+
+    @pytest.mark.asyncio
+    async def test_failures_degrade_to_empty_views(self, builder, knowledge_manager):
+        builder.build_comprehensive_context.side_effect = RuntimeError("neo4j down")
+        knowledge_manager.get_consciousness_aware_context.side_effect = RuntimeError("neo4j down")
+        with patch("backend.utils.embedding_enhanced.aget_embedding", AsyncMock(return_value=[0.0, 0.0])):
+            context = await TurnContextEngine().build(
+                "hello", "user", {},
+                memory_context_builder=builder, knowledge_manager=knowledge_manager
+            )
+        assert context.memory_context == {}
+        assert context.knowledge_context == {}
+        assert context.query_embedding is None
+
+
+class TestContextViews:
+    """Test conversions between memory and knowledge views"""
+
+    def test_attach_does_not_mutate_cached_context(self):
+        cached = {"retrieval_metadata": {"memory_enhanced": False}}
+        merged = attach_memory_context(cached, {"formatted_context": "x", "context_strength": 0.5})
+        assert merged["memory_context_strength"] == 0.5
+        assert cached == {"retrieval_metadata": {"memory_enhanced": False}}
+
+    def test_agent_view_respects_limit(self):
+        view = memory_context_to_agent_view(make_memory_context(), limit=0)
+        assert view["relevant_memories"] == []
+        assert view["memory_count"] == 1
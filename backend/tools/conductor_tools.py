@@ -41,16 +41,34 @@ async def route_to_rag(ctx: RunContext, query: str) -> StepResult:
         output=result,
     )
 
+async def graphmaster_step(query: str, user_id: str):
+    # Graphmaster doesn't have a structured run method yet, so we pass user_id this way
+    # This can be improved in the future.
+    return await graphmaster_agent.run(f"User ({user_id}): {query}")
+
+async def taskmaster_step(command: str, user_id: str):
+    return await taskmaster_agent.run(command, user_id=user_id)
+
+async def rag_step(query: str, user_id: str):
+    return await rag_agent.run(query)
+
+# Tools available to planned (task graph) execution, by plan step tool name
+PLAN_STEP_TOOLS = {
+    "graphmaster": graphmaster_step,
+    "taskmaster": taskmaster_step,
+    "rag": rag_step,
+}
+
+# Plan step tools that only read, so their results can be memoised and shared.
+# GraphMaster is not one: it also creates memories and concepts and runs Cypher
+READ_ONLY_STEP_TOOLS = {"rag"}
+
 async def run_graphmaster_query(ctx: RunContext[ConductorState], query: str) -> StepResult:
     """
     Executes a query using the GraphMaster agent. Use this for questions about
     memories, knowledge, concepts, or the user's history.
     """
-    user_id = ctx.deps.user_id
-    # Graphmaster doesn't have a structured run method yet, so we pass user_id this way
-    # This can be improved in the future.
-    full_query = f"User ({user_id}): {query}"
-    result = await graphmaster_agent.run(full_query)
+    result = await graphmaster_step(query, ctx.deps.user_id)
     return StepResult(
         step_name="Querying Knowledge Graph",
         tool_used="run_graphmaster_query",
@@ -63,8 +81,7 @@ async def run_taskmaster_command(ctx: RunContext[ConductorState], command: str)
     Executes a command using the TaskMaster agent. Use this to create, list,
     or update tasks and reminders.
     """
-    user_id = ctx.deps.user_id
-    result = await taskmaster_agent.run(command, user_id=user_id)
+    result = await taskmaster_step(command, ctx.deps.user_id)
     return StepResult(
         step_name="Managing Task",
         tool_used="run_taskmaster_command",
@@ -77,7 +94,7 @@ async def run_rag_query(ctx: RunContext[ConductorState], query: str) -> StepResu
     Executes a query using the RAG agent. Use this for questions about specific
     documents that have been uploaded.
     """
-    result = await rag_agent.run(query)
+    result = await rag_step(query, ctx.deps.user_id)
     return StepResult(
         step_name="Retrieving from Documents",
         tool_used="run_rag_query",
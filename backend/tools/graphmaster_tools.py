@@ -1,5 +1,6 @@
 from backend.utils.unified_database_manager import unified_database_manager
-from backend.utils.embedding import get_embedding
+from backend.utils.context_packer import FALLBACK_CHARS_PER_TOKEN
+from backend.utils.document_ingestion import document_ingestor, iter_text, IngestionError
 from backend.models.graphmaster_models import *
 from pydantic_ai import RunContext
 import logging
@@ -86,34 +87,22 @@ async def get_open_tasks_for_user(ctx: RunContext, user_id: str) -> GraphQueryOu
         return GraphQueryOutput(result={"error": str(e)})
 
 async def chunk_document(ctx: RunContext, document_id: str, chunk_size: int = 500) -> GraphQueryOutput:
-    cypher_get = "MATCH (d:Document {document_id: $document_id}) RETURN d.text AS text"
+    """Chunk a Document's stored text through the streaming ingestion pipeline (chunk_size in characters)"""
+    cypher_get = "MATCH (d:Document {document_id: $document_id}) RETURN d.text AS text, d.filename AS filename"
     try:
         doc_result = await unified_database_manager.execute_query(cypher_get, {"document_id": document_id})
         if not doc_result or not doc_result[0].get("text"):
             return GraphQueryOutput(result={"error": "Document not found or has no text property"})
         
-        text = doc_result[0]["text"]
-        chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-        created_chunks = []
-        
-        for idx, chunk_text in enumerate(chunks):
-            chunk_id = f"{document_id}_chunk_{idx}"
-            embedding = get_embedding(chunk_text)
-            cypher_create = (
-                "MATCH (d:Document {document_id: $document_id}) "
-                "CREATE (ch:Chunk {chunk_id: $chunk_id, text: $chunk_text, embedding: $embedding})-[:DERIVED_FROM]->(d) "
-                "RETURN ch"
-            )
-            result = await unified_database_manager.execute_query(cypher_create, {
-                "document_id": document_id, 
-                "chunk_id": chunk_id, 
-                "chunk_text": chunk_text, 
-                "embedding": embedding
-            })
-            if result:
-                created_chunks.append(result[0]["ch"])
-        
-        return GraphQueryOutput(result={"chunks_created": len(created_chunks), "chunks": created_chunks})
+        job = await document_ingestor.ingest(
+            document_id,
+            iter_text(doc_result[0]["text"], document_ingestor.config.read_block_size),
+            filename=doc_result[0].get("filename"),
+            chunk_tokens=max(16, int(chunk_size / FALLBACK_CHARS_PER_TOKEN))
+        )
+        return GraphQueryOutput(result={"chunks_created": job.chunks_written, "ingestion": job.to_dict()})
+    except IngestionError as e:
+        return GraphQueryOutput(result={"error": str(e), "ingestion": e.job.to_dict()})
     except Exception as e:
         return GraphQueryOutput(result={"error": str(e)})
 
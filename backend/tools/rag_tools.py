@@ -1,72 +1,67 @@
+import logging
+from typing import Optional
 from pydantic_ai import RunContext
-from backend.utils.embedding import get_embedding, vector_search_chunks
-from backend.utils.neo4j import driver
+from backend.utils.rag_retrieval import rag_retriever
+from backend.utils.unified_database_manager import unified_database_manager
 from backend.models.rag_models import RAGOutput
 
+logger = logging.getLogger(__name__)
 
-def retrieve_relevant_chunks(ctx: RunContext, query: str, top_k: int = 5) -> RAGOutput:
-    chunks = vector_search_chunks(query, top_k)
-    context = [c["text"] for c in chunks]
+# Parent document comes back with each chunk, so no per-chunk follow-up query
+CHUNK_RETURN = (
+    "OPTIONAL MATCH (ch)-[:DERIVED_FROM]->(d:Document) "
+    "RETURN ch.chunk_id AS chunk_id, ch.text AS text, "
+    "d.document_id AS document_id, d.filename AS filename LIMIT $top_k"
+)
+
+
+async def retrieve_relevant_chunks(
+    ctx: RunContext,
+    query: str,
+    top_k: int = 5,
+    window: Optional[int] = None,
+    diverse: Optional[bool] = None
+) -> RAGOutput:
+    """Semantic search; ``window`` adds neighbouring chunks, ``diverse`` re-ranks with MMR."""
+    chunks = await rag_retriever.retrieve(query, top_k, window=window, mmr=diverse)
+    context = [c["context"] for c in chunks]
     output = RAGOutput(context=context, chunks=chunks, answer=None)
-    print("[DEBUG] retrieve_relevant_chunks output:", output)
+    logger.debug(f"retrieve_relevant_chunks returned {len(chunks)} chunks")
     return output
 
 
-def retrieve_chunks_by_entity(ctx: RunContext, entity_id: str, top_k: int = 5) -> RAGOutput:
-    cypher = (
-        "MATCH (ch:Chunk)-[:MENTIONS]->(e:Entity {entity_id: $entity_id}) "
-        "RETURN ch.chunk_id AS chunk_id, ch.text AS text LIMIT $top_k"
+async def _retrieve_chunks(match: str, params: dict) -> RAGOutput:
+    try:
+        chunks = await unified_database_manager.execute_query(f"{match} {CHUNK_RETURN}", params)
+        context = [c["text"] for c in chunks]
+        return RAGOutput(context=context, chunks=chunks, answer=None)
+    except Exception as e:
+        return RAGOutput(context=[], chunks=[], answer=f"Error: {e}")
+
+
+async def retrieve_chunks_by_entity(ctx: RunContext, entity_id: str, top_k: int = 5) -> RAGOutput:
+    return await _retrieve_chunks(
+        "MATCH (ch:Chunk)-[:MENTIONS]->(e:Entity {entity_id: $entity_id})",
+        {"entity_id": entity_id, "top_k": top_k}
     )
-    with driver.session() as session:
-        try:
-            result = session.run(cypher, {"entity_id": entity_id, "top_k": top_k})
-            chunks = [dict(record) for record in result]
-            context = [c["text"] for c in chunks]
-            return RAGOutput(context=context, chunks=chunks, answer=None)
-        except Exception as e:
-            return RAGOutput(context=[], chunks=[], answer=f"Error: {e}")
 
 
-def retrieve_chunks_by_concept(ctx: RunContext, concept_id: str, top_k: int = 5) -> RAGOutput:
-    cypher = (
-        "MATCH (ch:Chunk)-[:RELATES_TO]->(co:Concept {concept_id: $concept_id}) "
-        "RETURN ch.chunk_id AS chunk_id, ch.text AS text LIMIT $top_k"
+async def retrieve_chunks_by_concept(ctx: RunContext, concept_id: str, top_k: int = 5) -> RAGOutput:
+    return await _retrieve_chunks(
+        "MATCH (ch:Chunk)-[:RELATES_TO]->(co:Concept {concept_id: $concept_id})",
+        {"concept_id": concept_id, "top_k": top_k}
     )
-    with driver.session() as session:
-        try:
-            result = session.run(cypher, {"concept_id": concept_id, "top_k": top_k})
-            chunks = [dict(record) for record in result]
-            context = [c["text"] for c in chunks]
-            return RAGOutput(context=context, chunks=chunks, answer=None)
-        except Exception as e:
-            return RAGOutput(context=[], chunks=[], answer=f"Error: {e}")
 
 
-def retrieve_chunks_by_tag(ctx: RunContext, tag: str, top_k: int = 5) -> RAGOutput:
-    cypher = (
-        "MATCH (ch:Chunk)-[:TAGGED]->(:Tag {name: $tag}) "
-        "RETURN ch.chunk_id AS chunk_id, ch.text AS text LIMIT $top_k"
+async def retrieve_chunks_by_tag(ctx: RunContext, tag: str, top_k: int = 5) -> RAGOutput:
+    return await _retrieve_chunks(
+        "MATCH (ch:Chunk)-[:TAGGED]->(:Tag {name: $tag})",
+        {"tag": tag, "top_k": top_k}
     )
-    with driver.session() as session:
-        try:
-            result = session.run(cypher, {"tag": tag, "top_k": top_k})
-            chunks = [dict(record) for record in result]
-            context = [c["text"] for c in chunks]
-            return RAGOutput(context=context, chunks=chunks, answer=None)
-        except Exception as e:
-            return RAGOutput(context=[], chunks=[], answer=f"Error: {e}")
 
 
-def retrieve_chunks_by_date(ctx: RunContext, date: str, top_k: int = 5) -> RAGOutput:
-    cypher = (
-        "MATCH (ch:Chunk) WHERE date(ch.created_at) = date($date) "
-        "RETURN ch.chunk_id AS chunk_id, ch.text AS text LIMIT $top_k"
+async def retrieve_chunks_by_date(ctx: RunContext, date: str, top_k: int = 5) -> RAGOutput:
+    return await _retrieve_chunks(
+        "MATCH (ch:Chunk) WHERE date(ch.created_at) = date($date)",
+        {"date": date, "top_k": top_k}
     )
-    with driver.session() as session:
-        try:
-            result = session.run(cypher, {"date": date, "top_k": top_k})
-            chunks = [dict(record) for record in result]
-            context = [c["text"] for c in chunks]
-            return RAGOutput(context=context, chunks=chunks, answer=None)
-        except Exception as e:
-            return RAGOutput(context=[], chunks=[], answer=f"Error: {e}") 
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""
+Admission Control for Mainza AI
+
+Sits in front of the local model server and decides how many LLM calls run at
+once. The concurrency limit adapts with AIMD: every call that finishes within
+the latency target raises the limit by about one per window of calls, and a
+slow or timed out call cuts it by a fixed ratio. Ollama serves a handful of
+requests well and many requests badly, so this keeps the server near its
+throughput peak instead of letting a burst slow every request down until all
+of them time out.
+
+Requests that cannot start immediately wait in a bounded queue. Higher
+priorities are served first, and within a priority users are served round
+robin so one chatty client cannot starve the others. Each waiter has a
+deadline; a request whose estimated wait already exceeds it is rejected up
+front, and one still queued when it expires is dropped, both with a retry
+hint. Under overload the server keeps completing requests at its best rate
+and the excess is shed quickly rather than timing out slowly.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_QUEUE_KEY = "__system__"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, message: str, reason: str, retry_after_seconds: int = 1):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+@dataclass
+class AdmissionConfig:
+    """Configuration for LLM admission control"""
+    enabled: bool = os.getenv("LLM_ADMISSION_ENABLED", "true").lower() == "true"
+    initial_limit: int = int(os.getenv("LLM_ADMISSION_INITIAL_LIMIT", "2"))
+    min_limit: int = int(os.getenv("LLM_ADMISSION_MIN_LIMIT", "1"))
+    max_limit: int = int(os.getenv("LLM_ADMISSION_MAX_LIMIT", "8"))
+    latency_target: float = float(os.getenv("LLM_ADMISSION_LATENCY_TARGET", "20"))
+    backoff_ratio: float = float(os.getenv("LLM_ADMISSION_BACKOFF_RATIO", "0.7"))
+    max_queue_size: int = int(os.getenv("LLM_ADMISSION_MAX_QUEUE", "32"))
+    max_queue_per_user: int = int(os.getenv("LLM_ADMISSION_MAX_QUEUE_PER_USER", "4"))
+    queue_deadline: float = float(os.getenv("LLM_ADMISSION_QUEUE_DEADLINE", "15"))
+
+
+@dataclass
+class AdmissionStats:
+    """Runtime counters for admission control"""
+    admitted: int = 0
+    queued: int = 0
+    completed: int = 0
+    completed_within_target: int = 0
+    dropped: int = 0
+    rejected_queue_full: int = 0
+    rejected_early: int = 0
+    expired_in_queue: int = 0
+    limit_increases: int = 0
+    limit_decreases: int = 0
+    total_queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+
+
+@dataclass
+class AdmissionPermit:
+    """A granted slot; hand it back with ``AdmissionController.release``"""
+    user_key: str
+    priority: int
+    admitted_at: float
+    queue_wait: float = 0.0
+    released: bool = False
+
+
+@dataclass
+class _Waiter:
+    user_key: str
+    priority: int
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class AIMDLimit:
+    """Additive-increase / multiplicative-decrease concurrency limit"""
+
+    def __init__(self, config: AdmissionConfig):
+        self.config = config
+        self.value = float(max(config.min_limit, min(config.max_limit, config.initial_limit)))
+        self._last_decrease = 0.0
+
+    @property
+    def slots(self) -> int:
+        return max(self.config.min_limit, int(self.value))
+
+    def on_sample(self, latency: float, dropped: bool, now: float) -> int:
+        """Update the limit from one finished call; returns +1, -1 or 0"""
+        if dropped or latency > self.config.latency_target:
+            # Calls already running when we backed off finish slow as well;
+            # count one decrease per latency target so they don't compound it
+            if now - self._last_decrease < self.config.latency_target:
+                return 0
+            self._last_decrease = now
+            self.value = max(float(self.config.min_limit), self.value * self.config.backoff_ratio)
+            return -1
+        if self.value >= self.config.max_limit:
+            return 0
+        self.value = min(float(self.config.max_limit), self.value + 1.0 / self.value)
+        return 1
+
+
+class AdmissionController:
+    """
+    Adaptive concurrency limit with a bounded, per-user fair queue.
+
+    ``acquire`` returns a permit once a slot is free, or raises
+    ``AdmissionRejected`` with a retry hint; ``release`` reports how the call
+    went so the limit can adapt.
+    """
+
+    def __init__(self, config: Optional[AdmissionConfig] = None, clock=time.monotonic):
+        self.config = config or AdmissionConfig()
+        self.clock = clock
+        self.limit = AIMDLimit(self.config)
+        self.stats = AdmissionStats()
+        self.in_flight = 0
+        self.avg_latency: Optional[float] = None
+        # priority -> user -> waiters; the user order is the round robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        self._queued = 0
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    async def acquire(self, user_id: Optional[str], priority: int,
+                      deadline: Optional[float] = None) -> AdmissionPermit:
+        """Wait for a slot, at most ``deadline`` seconds (default: the configured queue deadline)"""
+        user_key = user_id or SYSTEM_QUEUE_KEY
+        now = self.clock()
+        if not self.config.enabled or (self.in_flight < self.limit.slots and not self._queued):
+            return self._grant(user_key, priority, now, now)
+
+        deadline = self.config.queue_deadline if deadline is None else deadline
+        self._check_capacity(user_key, priority, deadline)
+
+        waiter = _Waiter(user_key, priority, now, asyncio.get_running_loop().create_future())
+        self._enqueue(waiter)
+        self.stats.queued += 1
+        try:
+            return await asyncio.wait_for(waiter.future, timeout=deadline)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted as the deadline passed; hand the slot on
+                self.release(waiter.future.result())
+            self.stats.expired_in_queue += 1
+            retry_after = self._retry_after()
+            logger.warning(f"🚦 LLM request for {user_key} expired after {deadline:.1f}s in queue")
+            raise AdmissionRejected(
+                f"Request waited {deadline:.1f}s without a free model slot",
+                reason="deadline", retry_after_seconds=retry_after
+            )
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before the caller went away; hand the slot on
+                self.release(waiter.future.result())
+            raise
+
+    def release(self, permit: AdmissionPermit, dropped: bool = False):
+        """Return a slot; ``dropped`` marks a call that timed out or overloaded the server"""
+        if permit.released:
+            return
+        permit.released = True
+        self.in_flight -= 1
+
+        now = self.clock()
+        latency = now - permit.admitted_at
+        self.stats.completed += 1
+        if dropped:
+            self.stats.dropped += 1
+        else:
+            self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+            if latency <= self.config.latency_target:
+                self.stats.completed_within_target += 1
+
+        change = self.limit.on_sample(latency, dropped, now)
+        if change > 0:
+            self.stats.limit_increases += 1
+        elif change < 0:
+            self.stats.limit_decreases += 1
+            logger.info(f"📉 LLM concurrency limit reduced to {self.limit.slots} "
+                        f"(latency {latency:.1f}s, dropped={dropped})")
+        self._dispatch()
+
+    def _grant(self, user_key: str, priority: int, enqueued_at: float, now: float) -> AdmissionPermit:
+        self.in_flight += 1
+        self.stats.admitted += 1
+        wait = now - enqueued_at
+        self.stats.total_queue_wait += wait
+        self.stats.max_queue_wait = max(self.stats.max_queue_wait, wait)
+        return AdmissionPermit(user_key, priority, now, queue_wait=wait)
+
+    def _check_capacity(self, user_key: str, priority: int, deadline: float):
+        if self._queued >= self.config.max_queue_size:
+            self.stats.rejected_queue_full += 1
+            raise AdmissionRejected(f"LLM queue is full ({self._queued} waiting)", reason="queue_full",
+                                    retry_after_seconds=self._retry_after())
+
+        user_waiting = len(self._queues.get(priority, {}).get(user_key, ()))
+        if user_waiting >= self.config.max_queue_per_user:
+            self.stats.rejected_queue_full += 1
+            raise AdmissionRejected(f"Too many queued requests for {user_key} ({user_waiting})",
+                                    reason="user_queue_full", retry_after_seconds=self._retry_after())
+
+        estimate = self._estimated_wait(priority)
+        if estimate is not None and estimate > deadline:
+            self.stats.rejected_early += 1
+            raise AdmissionRejected(
+                f"Estimated queue wait {estimate:.1f}s exceeds the {deadline:.1f}s deadline",
+                reason="estimated_wait", retry_after_seconds=max(1, math.ceil(estimate))
+            )
+
+    def _estimated_wait(self, priority: int) -> Optional[float]:
+        """Expected wait for a new request: the queue ahead of it drained at the current limit"""
+        if self.avg_latency is None:
+            return None
+        ahead = sum(
+            len(waiters)
+            for queue_priority, users in self._queues.items() if queue_priority <= priority
+            for waiters in users.values()
+        )
+        return (ahead + 1) * self.avg_latency / self.limit.slots
+
+    def _retry_after(self) -> int:
+        latency = self.avg_latency if self.avg_latency is not None else 1.0
+        return max(1, math.ceil((self._queued + 1) * latency / self.limit.slots))
+
+    def _enqueue(self, waiter: _Waiter):
+        users = self._queues.setdefault(waiter.priority, OrderedDict())
+        users.setdefault(waiter.user_key, deque()).append(waiter)
+        self._queued += 1
+
+    def _remove(self, waiter: _Waiter):
+        waiters = self._queues.get(waiter.priority, {}).get(waiter.user_key)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del self._queues[waiter.priority][waiter.user_key]
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            while users:
+                user_key, waiters = next(iter(users.items()))
+                waiter = waiters.popleft()
+                self._queued -= 1
+                if waiters:
+                    users.move_to_end(user_key)
+                else:
+                    del users[user_key]
+                if not waiter.future.done():
+                    return waiter
+        return None
+
+    def _dispatch(self):
+        while self.in_flight < self.limit.slots:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            waiter.future.set_result(self._grant(waiter.user_key, waiter.priority, waiter.enqueued_at,
+                                                 self.clock()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            "enabled": self.config.enabled,
+            "limit": self.limit.slots,
+            "in_flight": self.in_flight,
+            "queued": self._queued,
+            "avg_latency_seconds": round(self.avg_latency, 3) if self.avg_latency is not None else None,
+            "admitted": stats.admitted,
+            "queued_total": stats.queued,
+            "completed": stats.completed,
+            "goodput": stats.completed_within_target,
+            "dropped": stats.dropped,
+            "rejected_queue_full": stats.rejected_queue_full,
+            "rejected_early": stats.rejected_early,
+            "expired_in_queue": stats.expired_in_queue,
+            "limit_increases": stats.limit_increases,
+            "limit_decreases": stats.limit_decreases,
+            "avg_queue_wait_seconds": round(stats.total_queue_wait / stats.admitted, 3) if stats.admitted else 0.0,
+            "max_queue_wait_seconds": round(stats.max_queue_wait, 3),
+        }
@@ -90,7 +90,7 @@ class AdvancedMemoryArchitecture:
             )
             
             # Generate embedding
-            embedding = self.embedding_manager.get_embedding(content)
+            embedding = await self.embedding_manager.aget_embedding(content)
             
             memory = AdvancedMemory(
                 memory_id=memory_id,
@@ -133,7 +133,7 @@ class AdvancedMemoryArchitecture:
             )
             
             # Generate embedding
-            embedding = self.embedding_manager.get_embedding(content)
+            embedding = await self.embedding_manager.aget_embedding(content)
             
             memory = AdvancedMemory(
                 memory_id=memory_id,
@@ -173,7 +173,7 @@ class AdvancedMemoryArchitecture:
             importance_score = consciousness_context.get("consciousness_level", 0.7)
             
             # Generate embedding
-            embedding = self.embedding_manager.get_embedding(content)
+            embedding = await self.embedding_manager.aget_embedding(content)
             
             memory = AdvancedMemory(
                 memory_id=memory_id,
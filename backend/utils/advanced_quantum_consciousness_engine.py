@@ -2064,9 +2064,12 @@ class AdvancedQuantumConsciousnessEngine:
                 "average_quantum_fidelity": 0.0
             }
 
-# Initialize the advanced quantum consciousness engine lazily to avoid import-time crashes
-advanced_quantum_consciousness_engine = None
-try:
-    advanced_quantum_consciousness_engine = AdvancedQuantumConsciousnessEngine()
-except Exception as e:
-    logger.warning(f"AdvancedQuantumConsciousnessEngine initialization deferred: {e}")
+# Global instance - built on first use so importing this module stays cheap
+from backend.utils.lazy_component_registry import lazy_component_registry
+
+lazy_component_registry.register(
+    "advanced_quantum_consciousness_engine",
+    AdvancedQuantumConsciousnessEngine,
+    warmup=False
+)
+advanced_quantum_consciousness_engine = lazy_component_registry.proxy("advanced_quantum_consciousness_engine")
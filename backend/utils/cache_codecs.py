@@ -0,0 +1,379 @@
+"""
+Cache Value Codecs for Mainza AI
+
+Binary encoding for cached values. Every encoded value starts with one header
+byte ``0b1VVSSSCC``: format version (VV), serializer (SSS) and compressor (CC).
+Header bytes fall in 0xA0-0xBF, which neither JSON text, pickle (0x80) nor
+the legacy ``COMPRESSED:`` gzip prefix can start with, so values written
+before the codec existed still decode.
+
+Serializers:
+- NDARRAY: a NumPy array as dtype/shape plus its raw buffer; decoding wraps the
+  buffer with ``np.frombuffer`` without copying (embeddings, memory vectors)
+- MSGPACK: structured data, with arrays nested inside carried as the same
+  raw-buffer extension
+- JSON: orjson when installed, the standard library otherwise
+- RAW: bytes stored as they are
+- PICKLE: only when explicitly allowed
+
+Payloads above ``compression_threshold`` are compressed with zstd, lz4 or zlib
+(the first available) and kept only when smaller; NumPy arrays are left
+uncompressed unless compression is requested. With a zstd dictionary
+trained on sample payloads, small repetitive values above
+``dictionary_threshold`` are compressed too.
+"""
+
+import json
+import logging
+import os
+import pickle
+import struct
+import threading
+import zlib
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame as lz4_frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    lz4_frame = None
+    LZ4_AVAILABLE = False
+
+CODEC_FORMAT_VERSION = 1
+_HEADER_MARK = 0x80
+_NDARRAY_EXT = 1
+_LEGACY_GZIP_PREFIX = b"COMPRESSED:"
+
+
+class Serializer(IntEnum):
+    RAW = 0
+    JSON = 1
+    MSGPACK = 2
+    NDARRAY = 3
+    PICKLE = 4
+
+
+class Compressor(IntEnum):
+    NONE = 0
+    ZLIB = 1
+    ZSTD = 2
+    LZ4 = 3
+
+
+class CodecError(ValueError):
+    """Raised when a value cannot be encoded or a payload cannot be decoded"""
+
+
+def make_header(serializer: Serializer, compressor: Compressor, version: int = CODEC_FORMAT_VERSION) -> int:
+    return _HEADER_MARK | (version << 5) | (serializer << 2) | compressor
+
+
+def parse_header(byte: int) -> Optional[Tuple[int, Serializer, Compressor]]:
+    """``(version, serializer, compressor)`` of a header byte, or None for legacy payloads"""
+    if byte & 0xE0 != make_header(Serializer.RAW, Compressor.NONE) & 0xE0:
+        return None
+    return (byte >> 5) & 0x3, Serializer((byte >> 2) & 0x7), Compressor(byte & 0x3)
+
+
+def encode_ndarray(array: np.ndarray) -> bytes:
+    """dtype, shape and the raw C-contiguous buffer"""
+    if array.dtype.hasobject:
+        raise CodecError("object arrays have no raw buffer")
+    array = np.ascontiguousarray(array)
+    dtype = array.dtype.str.encode("ascii")
+    header = struct.pack(f"<B{len(dtype)}sB{array.ndim}I", len(dtype), dtype, array.ndim, *array.shape)
+    return b"".join((header, memoryview(array).cast("B")))
+
+
+def decode_ndarray(data) -> np.ndarray:
+    """Read-only array viewing ``data`` (no copy)"""
+    view = memoryview(data)
+    dtype_len = view[0]
+    dtype = np.dtype(bytes(view[1:1 + dtype_len]).decode("ascii"))
+    offset = 1 + dtype_len
+    ndim = view[offset]
+    offset += 1
+    shape = struct.unpack_from(f"<{ndim}I", view, offset)
+    offset += 4 * ndim
+    return np.frombuffer(view[offset:], dtype=dtype).reshape(shape)
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        return msgpack.ExtType(_NDARRAY_EXT, encode_ndarray(obj))
+    return _json_default(obj)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _NDARRAY_EXT:
+        return decode_ndarray(data)
+    return msgpack.ExtType(code, data)
+
+
+@dataclass
+class CodecStats:
+    encoded: int = 0
+    decoded: int = 0
+    legacy_decoded: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    compressed: int = 0
+    dictionary_compressed: int = 0
+
+
+class CacheCodec:
+    """Header-tagged serialization plus optional compression for cache payloads"""
+
+    def __init__(
+        self,
+        compression_threshold: int = int(os.getenv("CACHE_COMPRESSION_THRESHOLD", "1024")),
+        dictionary_threshold: int = int(os.getenv("CACHE_DICTIONARY_THRESHOLD", "64")),
+        compression_level: int = int(os.getenv("CACHE_COMPRESSION_LEVEL", "3")),
+        allow_pickle: bool = False,
+        dictionary_path: Optional[str] = os.getenv("CACHE_ZSTD_DICTIONARY") or None
+    ):
+        self.compression_threshold = compression_threshold
+        self.dictionary_threshold = dictionary_threshold
+        self.compression_level = compression_level
+        self.allow_pickle = allow_pickle
+        self.stats = CodecStats()
+        self._dictionaries: Dict[int, Any] = {}
+        self._dictionary = None
+        self._local = threading.local()  # zstd contexts are not thread-safe
+        if dictionary_path and os.path.exists(dictionary_path):
+            self.load_dictionary(dictionary_path)
+
+    # -- serialization -------------------------------------------------------
+
+    def _choose_serializer(self, value: Any) -> Serializer:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return Serializer.RAW
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            return Serializer.NDARRAY
+        return Serializer.MSGPACK if MSGPACK_AVAILABLE else Serializer.JSON
+
+    def _serialize(self, value: Any, serializer: Serializer) -> bytes:
+        if serializer == Serializer.RAW:
+            return bytes(value)
+        if serializer == Serializer.NDARRAY:
+            return encode_ndarray(value)
+        if serializer == Serializer.MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise CodecError("msgpack is not installed")
+            return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+        if serializer == Serializer.JSON:
+            if ORJSON_AVAILABLE:
+                try:
+                    return orjson.dumps(
+                        value,
+                        default=_json_default,
+                        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                    )
+                except TypeError:
+                    pass  # e.g. integers beyond 64 bits; the stdlib handles them
+            return json.dumps(value, default=_json_default, separators=(",", ":")).encode("utf-8")
+        if serializer == Serializer.PICKLE:
+            if not self.allow_pickle:
+                raise CodecError("pickle serialization is disabled")
+            return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        raise CodecError(f"unknown serializer {serializer}")
+
+    def _deserialize(self, payload, serializer: Serializer) -> Any:
+        if serializer == Serializer.RAW:
+            return bytes(payload)
+        if serializer == Serializer.NDARRAY:
+            return decode_ndarray(payload)
+        if serializer == Serializer.MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise CodecError("msgpack is not installed")
+            return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+        if serializer == Serializer.JSON:
+            return orjson.loads(payload) if ORJSON_AVAILABLE else json.loads(bytes(payload))
+        if serializer == Serializer.PICKLE:
+            if not self.allow_pickle:
+                raise CodecError("pickle deserialization is disabled")
+            return pickle.loads(payload)
+        raise CodecError(f"unknown serializer {serializer}")
+
+    # -- compression ---------------------------------------------------------
+
+    def _zstd_compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None or self._local.dictionary is not self._dictionary:
+            compressor = zstandard.ZstdCompressor(level=self.compression_level, dict_data=self._dictionary)
+            self._local.compressor = compressor
+            self._local.dictionary = self._dictionary
+        return compressor
+
+    def _compress(self, payload: bytes, force: bool) -> Tuple[Compressor, bytes]:
+        size = len(payload)
+        use_dictionary = self._dictionary is not None and size >= self.dictionary_threshold
+        if not force and size < self.compression_threshold and not use_dictionary:
+            return Compressor.NONE, payload
+        if ZSTD_AVAILABLE:
+            method, compressed = Compressor.ZSTD, self._zstd_compressor().compress(payload)
+        elif LZ4_AVAILABLE:
+            method, compressed = Compressor.LZ4, lz4_frame.compress(payload)
+        else:
+            # Level 1: zlib is only the fallback, so favour speed over ratio
+            method, compressed = Compressor.ZLIB, zlib.compress(payload, 1)
+        if len(compressed) >= size:
+            return Compressor.NONE, payload
+        self.stats.compressed += 1
+        if method == Compressor.ZSTD and self._dictionary is not None:
+            self.stats.dictionary_compressed += 1
+        return method, compressed
+
+    def _decompress(self, payload, method: Compressor) -> bytes:
+        if method == Compressor.NONE:
+            return payload
+        if method == Compressor.ZLIB:
+            return zlib.decompress(payload)
+        if method == Compressor.ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise CodecError("zstandard is not installed")
+            dict_id = zstandard.get_frame_parameters(payload).dict_id
+            dictionary = self._dictionaries.get(dict_id) if dict_id else None
+            if dict_id and dictionary is None:
+                raise CodecError(f"zstd dictionary {dict_id} is not loaded")
+            return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(payload)
+        if method == Compressor.LZ4:
+            if not LZ4_AVAILABLE:
+                raise CodecError("lz4 is not installed")
+            return lz4_frame.decompress(payload)
+        raise CodecError(f"unknown compressor {method}")
+
+    # -- public API ----------------------------------------------------------
+
+    def encode(self, value: Any, serializer: Optional[Serializer] = None, compress: Optional[bool] = None) -> bytes:
+        """
+        Encode ``value``. ``compress=None`` compresses by size, ``True`` always
+        tries and ``False`` never compresses.
+        """
+        serializer = self._choose_serializer(value) if serializer is None else serializer
+        payload = self._serialize(value, serializer)
+        method = Compressor.NONE
+        # Raw numeric buffers barely compress and would lose zero-copy decoding
+        if compress or (compress is None and serializer != Serializer.NDARRAY):
+            method, payload = self._compress(payload, force=bool(compress))
+        self.stats.encoded += 1
+        self.stats.bytes_out += len(payload) + 1
+        return bytes((make_header(serializer, method),)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """Decode a payload written by ``encode`` or by the legacy JSON/pickle/gzip format"""
+        if not data:
+            raise CodecError("empty payload")
+        self.stats.decoded += 1
+        self.stats.bytes_in += len(data)
+        header = parse_header(data[0])
+        if header is None:
+            return self._decode_legacy(data)
+        version, serializer, method = header
+        if version > CODEC_FORMAT_VERSION:
+            raise CodecError(f"codec format version {version} is newer than {CODEC_FORMAT_VERSION}")
+        payload = self._decompress(memoryview(data)[1:], method)
+        return self._deserialize(payload, serializer)
+
+    def _decode_legacy(self, data: bytes) -> Any:
+        self.stats.legacy_decoded += 1
+        if data.startswith(_LEGACY_GZIP_PREFIX):
+            data = zlib.decompress(data[len(_LEGACY_GZIP_PREFIX):], 16 + zlib.MAX_WBITS)
+        if data[:1] == b"\x80":
+            return self._deserialize(data, Serializer.PICKLE)
+        return json.loads(data.decode("utf-8") if isinstance(data, bytes) else data)
+
+    @staticmethod
+    def describe(data: bytes) -> Dict[str, Any]:
+        """Header fields of an encoded payload"""
+        header = parse_header(data[0]) if data else None
+        if header is None:
+            return {"format": "legacy"}
+        version, serializer, method = header
+        return {"version": version, "serializer": serializer.name.lower(), "compressor": method.name.lower()}
+
+    # -- zstd dictionaries ---------------------------------------------------
+
+    def train_dictionary(self, samples: Iterable[Any], size: int = 16384) -> bool:
+        """Train a zstd dictionary from sample values and use it for new payloads"""
+        if not ZSTD_AVAILABLE:
+            logger.warning("⚠️ zstandard not installed; cannot train a cache dictionary")
+            return False
+        encoded = [self._serialize(s, self._choose_serializer(s)) for s in samples]
+        try:
+            dictionary = zstandard.train_dictionary(size, encoded)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not train cache dictionary from {len(encoded)} samples: {e}")
+            return False
+        self._use_dictionary(dictionary)
+        return True
+
+    def _use_dictionary(self, dictionary):
+        self._dictionaries[dictionary.dict_id()] = dictionary
+        self._dictionary = dictionary
+
+    def save_dictionary(self, path: str):
+        if self._dictionary is None:
+            raise CodecError("no dictionary to save")
+        with open(path, "wb") as f:
+            f.write(self._dictionary.as_bytes())
+
+    def load_dictionary(self, path: str) -> bool:
+        """Load a trained dictionary; payloads written with it need it to decode"""
+        if not ZSTD_AVAILABLE:
+            logger.warning(f"⚠️ zstandard not installed; ignoring cache dictionary {path}")
+            return False
+        with open(path, "rb") as f:
+            self._use_dictionary(zstandard.ZstdCompressionDict(f.read()))
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "msgpack": MSGPACK_AVAILABLE,
+            "orjson": ORJSON_AVAILABLE,
+            "zstd": ZSTD_AVAILABLE,
+            "lz4": LZ4_AVAILABLE,
+            "dictionary_id": self._dictionary.dict_id() if self._dictionary is not None else None
+        }
+
+
+# Global cache codec instance
+cache_codec = CacheCodec()
@@ -22,6 +22,7 @@ from backend.utils.consciousness_driven_updates import consciousness_driven_upda
 from backend.utils.knowledge_graph_maintenance import knowledge_graph_maintenance
 from backend.utils.memory_storage_engine import memory_storage_engine
 from backend.utils.memory_retrieval_engine import memory_retrieval_engine
+from backend.utils.context_prefetcher import context_prefetcher
 from backend.models.consciousness_models import (
     ConsciousnessState, ConsciousnessCycleResult, EmotionalState,
     ConsciousnessMetrics, ConsciousnessEvent
@@ -69,6 +70,9 @@ class ConsciousnessOrchestrator:
         self.last_user_activity = datetime.now()
         self.consciousness_paused_for_user = True
         logger.info(f"🗣️ USER ACTIVITY DETECTED - Pausing consciousness processing for {self.user_activity_pause_duration}s")
+        
+        # Warm the context the user's next turn will read
+        context_prefetcher.notify_activity(user_id)
     
     def should_pause_for_user_activity(self) -> bool:
         """Check if consciousness should be paused due to recent user activity"""
@@ -99,6 +103,7 @@ class ConsciousnessOrchestrator:
             
             # Load current consciousness state
             self.consciousness_state = await self.load_consciousness_state()
+            self.publish_consciousness_state()
             
             # Initialize emotional state if needed
             await self.initialize_emotional_state()
@@ -640,6 +645,7 @@ class ConsciousnessOrchestrator:
                 old_level = self.consciousness_state.consciousness_level
                 new_level = max(0.0, min(1.0, old_level + consciousness_delta))
                 self.consciousness_state.consciousness_level = new_level
+                self.publish_consciousness_state()
 
                 logger.debug(f"Consciousness updated: {old_level:.3f} -> {new_level:.3f} (delta: {consciousness_delta:.3f})")
 
@@ -730,10 +736,17 @@ class ConsciousnessOrchestrator:
             if "last_reflection" in state_data:
                 self.consciousness_state.last_reflection = state_data["last_reflection"]
             
+            self.publish_consciousness_state()
             logger.debug(f"Updated consciousness state: level={self.consciousness_state.consciousness_level:.3f}")
             
         except Exception as e:
             logger.error(f"Failed to update consciousness state: {e}")
+    
+    def publish_consciousness_state(self):
+        """Write the current state through to the real-time context snapshot read by agents"""
+        from backend.utils.real_time_consciousness_context_manager import real_time_consciousness_context_manager
+        real_time_consciousness_context_manager.publish_state(self.consciousness_state)
+        context_prefetcher.invalidate(names=["consciousness_context"])
 
 # Global consciousness orchestrator instance - FIXED VERSION
 consciousness_orchestrator_fixed = ConsciousnessOrchestrator()
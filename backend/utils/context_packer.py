@@ -0,0 +1,366 @@
+"""
+Context Packer for Mainza AI
+
+Token-budgeted prompt assembly. Token counts come from the target model's
+tokenizer (Hugging Face ``tokenizers`` or ``tiktoken`` when installed, loaded
+once per model) with a conservative character-based estimate as fallback.
+Tokenizers are loaded off the request path: at startup, or in a background
+thread the first time a model is seen, with the estimate used until they are
+ready. Hugging Face tokenizers are read from the local cache first and only
+downloaded when TOKENIZER_ALLOW_DOWNLOAD is on.
+Counts for prompt fragments are cached, since the same memories, concepts and
+history turns are re-packed on every turn.
+
+Context blocks (memories, concepts, history turns, consciousness state) are
+``ContextItem``s with a utility score. ``ContextPacker.pack`` selects the
+subset with the highest total utility that fits the budget (0/1 knapsack on
+token counts) and renders it grouped by section in a stable order.
+"""
+
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from tokenizers import Tokenizer as HFTokenizer
+    HF_TOKENIZERS_AVAILABLE = True
+except ImportError:
+    HF_TOKENIZERS_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+
+# Model family -> tokenizer source. "tiktoken:<encoding>" or a Hugging Face repo id.
+DEFAULT_TOKENIZER_SOURCES: Dict[str, str] = {
+    "gpt-oss": "tiktoken:o200k_base",
+    "qwen3": "Qwen/Qwen3-32B",
+    "granite3.3": "ibm-granite/granite-3.3-8b-instruct",
+    "devstral": "mistralai/Devstral-Small-2505",
+    "llama3": "tiktoken:cl100k_base",
+}
+
+# Characters per token used when no tokenizer is available; slightly low so
+# estimates err on the side of overcounting
+FALLBACK_CHARS_PER_TOKEN = 3.5
+
+_ESTIMATE: Tuple[str, Optional[Callable[[str], int]]] = ("estimate", None)
+
+
+def _model_family(model: str) -> str:
+    return (model or "default").split(":")[0].lower()
+
+
+class TokenCounter:
+    """Per-model token counting with cached tokenizers and fragment counts"""
+
+    def __init__(self, cache_size: int = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "8192"))):
+        self.cache_size = cache_size
+        self.sources = dict(DEFAULT_TOKENIZER_SOURCES)
+        for item in os.getenv("TOKENIZER_SOURCES", "").split(","):
+            if "=" in item:
+                family, source = item.split("=", 1)
+                self.sources[family.strip().lower()] = source.strip()
+        self.allow_download = os.getenv("TOKENIZER_ALLOW_DOWNLOAD", "true").lower() == "true"
+        self.download_timeout = float(os.getenv("TOKENIZER_DOWNLOAD_TIMEOUT_SECONDS", "10"))
+        self._encoders: Dict[str, Tuple[str, Optional[Callable[[str], int]]]] = {}
+        self._loading: Dict[str, threading.Thread] = {}
+        self._counts: "OrderedDict[Tuple[str, int, int], int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _loadable(self, family: str) -> bool:
+        source = self.sources.get(family)
+        if not source:
+            return False
+        return TIKTOKEN_AVAILABLE if source.startswith("tiktoken:") else HF_TOKENIZERS_AVAILABLE
+
+    def _load_encoder(self, family: str) -> Tuple[str, Optional[Callable[[str], int]]]:
+        source = self.sources.get(family)
+        if source and source.startswith("tiktoken:") and TIKTOKEN_AVAILABLE:
+            try:
+                encoding = tiktoken.get_encoding(source.split(":", 1)[1])
+                return source, lambda text: len(encoding.encode(text, disallowed_special=()))
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load tiktoken encoding {source}: {e}")
+        elif source and not source.startswith("tiktoken:") and HF_TOKENIZERS_AVAILABLE:
+            try:
+                tokenizer = self._load_hf_tokenizer(source)
+                return source, lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load tokenizer {source}: {e}")
+        return _ESTIMATE
+
+    def _load_hf_tokenizer(self, source: str) -> "HFTokenizer":
+        try:
+            from huggingface_hub import hf_hub_download
+        except ImportError:
+            if not self.allow_download:
+                raise RuntimeError("huggingface_hub is not installed and downloads are disabled")
+            return HFTokenizer.from_pretrained(source)
+        try:
+            path = hf_hub_download(source, "tokenizer.json", local_files_only=True)
+        except Exception:
+            if not self.allow_download:
+                raise
+            path = hf_hub_download(source, "tokenizer.json", etag_timeout=self.download_timeout)
+        return HFTokenizer.from_file(path)
+
+    def load(self, model: str) -> str:
+        """Load the tokenizer for ``model`` now and return its name; blocks, so call at startup or from a thread"""
+        family = _model_family(model)
+        with self._load_lock:
+            encoder = self._encoders.get(family)
+            if encoder is None:
+                encoder = self._load_encoder(family) if self._loadable(family) else _ESTIMATE
+                self._encoders[family] = encoder
+                logger.info(f"🔢 Token counting for {family}: {encoder[0]}")
+        return encoder[0]
+
+    def preload(self, model: str):
+        """Start loading the tokenizer for ``model`` in a background thread"""
+        family = _model_family(model)
+        with self._lock:
+            if family in self._encoders or family in self._loading:
+                return
+            thread = threading.Thread(target=self._background_load, args=(model, family),
+                                      name=f"tokenizer-{family}", daemon=True)
+            self._loading[family] = thread
+        thread.start()
+
+    def _background_load(self, model: str, family: str):
+        try:
+            self.load(model)
+        finally:
+            with self._lock:
+                self._loading.pop(family, None)
+
+    def _encoder(self, model: str) -> Tuple[str, Optional[Callable[[str], int]]]:
+        family = _model_family(model)
+        encoder = self._encoders.get(family)
+        if encoder is not None:
+            return encoder
+        if not self._loadable(family):
+            self._encoders[family] = _ESTIMATE
+            return _ESTIMATE
+        # Never load on the request path; estimate until the background load finishes
+        self.preload(model)
+        return _ESTIMATE
+
+    def tokenizer_name(self, model: str) -> str:
+        return self._encoder(model)[0]
+
+    def count(self, text: str, model: str = "default", cache: bool = True) -> int:
+        """Number of tokens in ``text`` for ``model``
+
+        Pass ``cache=False`` for one-off text (e.g. bulk document ingestion) so
+        it does not evict the prompt fragments that repeat.
+        """
+        if not text:
+            return 0
+        name, encode = self._encoder(model)
+        if not cache:
+            return encode(text) if encode is not None else math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+        key = (name, hash(text), len(text))
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return cached
+        if encode is not None:
+            tokens = encode(text)
+        else:
+            tokens = math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+        with self._lock:
+            self.misses += 1
+            self._counts[key] = tokens
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int, model: str = "default", suffix: str = "...") -> str:
+        """Cut ``text`` at a word boundary so it fits in ``max_tokens``"""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text, model) <= max_tokens:
+            return text
+        words = text.split(" ")
+        low, high = 0, len(words)
+        # Binary search on word count; fragments are cached so repeats are cheap
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(" ".join(words[:mid]) + suffix, model) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return (" ".join(words[:low]) + suffix) if low else ""
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "tokenizers": {family: encoder[0] for family, encoder in self._encoders.items()},
+            "loading": sorted(self._loading),
+            "cached_fragments": len(self._counts),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+@dataclass
+class ContextItem:
+    """One packable block of prompt context"""
+    section: str
+    text: str
+    utility: float
+    required: bool = False
+    order: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class PackResult:
+    """Outcome of packing items into a token budget"""
+    selected: List[ContextItem]
+    dropped: List[ContextItem]
+    tokens_used: int
+    budget: int
+    sections: Dict[str, str] = field(default_factory=dict)
+    section_order: List[str] = field(default_factory=list)
+
+    @property
+    def utilization(self) -> float:
+        return min(1.0, self.tokens_used / self.budget) if self.budget else 0.0
+
+    def blocks(self) -> List[Tuple[str, str]]:
+        """``(section, text)`` for every non-empty section, in ``section_order``"""
+        blocks = []
+        for section in self.section_order:
+            items = sorted((i for i in self.selected if i.section == section), key=lambda i: i.order)
+            if not items:
+                continue
+            header = self.sections.get(section, "")
+            body = "\n".join(i.text for i in items)
+            blocks.append((section, f"{header}\n{body}" if header else body))
+        return blocks
+
+    def render(self, separator: str = "\n\n") -> str:
+        """Selected items grouped by section (in ``section_order``), each under its header"""
+        return separator.join(text for _, text in self.blocks())
+
+
+class ContextPacker:
+    """Selects context items with maximum utility under a token budget"""
+
+    def __init__(self, counter: Optional[TokenCounter] = None, max_buckets: int = 2048):
+        self.counter = counter or token_counter
+        self.max_buckets = max_buckets
+
+    def pack(
+        self,
+        items: Sequence[ContextItem],
+        budget: int,
+        model: str = "default",
+        sections: Optional[Dict[str, str]] = None,
+        section_order: Optional[List[str]] = None,
+    ) -> PackResult:
+        """
+        Choose items to include within ``budget`` tokens.
+
+        Required items are always kept. Section headers are charged once for
+        every section that ends up non-empty.
+        """
+        sections = sections or {}
+        if section_order is None:
+            section_order = list(dict.fromkeys(i.section for i in items))
+        for item in items:
+            # +1 for the newline joining items
+            item.tokens = self.counter.count(item.text, model) + 1
+        header_tokens = {s: self.counter.count(h, model) + 2 for s, h in sections.items() if h}
+
+        required = [i for i in items if i.required]
+        optional = [i for i in items if not i.required and i.utility > 0 and i.text]
+        used = sum(i.tokens for i in required)
+        used += sum(header_tokens.get(s, 0) for s in {i.section for i in required})
+
+        # Reserve headers for every section that has candidates, refund unused ones afterwards
+        candidate_sections = {i.section for i in optional} - {i.section for i in required}
+        reserved = sum(header_tokens.get(s, 0) for s in candidate_sections)
+        remaining = budget - used - reserved
+
+        chosen = self._knapsack(optional, remaining) if remaining > 0 else []
+        chosen_ids = {id(i) for i in chosen}
+
+        refund = sum(
+            header_tokens.get(s, 0) for s in candidate_sections
+            if not any(i.section == s for i in chosen)
+        )
+        spare = remaining - sum(i.tokens for i in chosen) + refund
+        used_sections = {i.section for i in required} | {i.section for i in chosen}
+        # Greedy fill with space left by bucket rounding and refunded headers
+        for item in sorted(optional, key=lambda i: i.utility / i.tokens, reverse=True):
+            if id(item) in chosen_ids:
+                continue
+            cost = item.tokens + (0 if item.section in used_sections else header_tokens.get(item.section, 0))
+            if cost <= spare:
+                chosen.append(item)
+                chosen_ids.add(id(item))
+                used_sections.add(item.section)
+                spare -= cost
+
+        selected = required + chosen
+        tokens_used = sum(i.tokens for i in selected) + sum(header_tokens.get(s, 0) for s in used_sections)
+        dropped = [i for i in optional if id(i) not in chosen_ids]
+        return PackResult(
+            selected=selected,
+            dropped=dropped,
+            tokens_used=tokens_used,
+            budget=budget,
+            sections=sections,
+            section_order=section_order,
+        )
+
+    def _knapsack(self, items: List[ContextItem], capacity: int) -> List[ContextItem]:
+        """0/1 knapsack over token counts, bucketed so the table stays small"""
+        if not items:
+            return []
+        if sum(i.tokens for i in items) <= capacity:
+            return list(items)
+
+        bucket = max(1, math.ceil(capacity / self.max_buckets))
+        slots = capacity // bucket
+        weights = [math.ceil(i.tokens / bucket) for i in items]
+        best = np.zeros(slots + 1)
+        taken = np.zeros((len(items), slots + 1), dtype=bool)
+        for n, (item, weight) in enumerate(zip(items, weights)):
+            if weight > slots:
+                continue
+            candidate = best[:slots + 1 - weight] + item.utility
+            improves = candidate > best[weight:]
+            taken[n, weight:] = improves
+            best[weight:] = np.where(improves, candidate, best[weight:])
+
+        chosen = []
+        slot = slots
+        for n in range(len(items) - 1, -1, -1):
+            if taken[n, slot]:
+                chosen.append(items[n])
+                slot -= weights[n]
+        return chosen[::-1]
+
+
+# Global token counter and packer instances
+token_counter = TokenCounter()
+context_packer = ContextPacker(token_counter)
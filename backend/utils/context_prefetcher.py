@@ -0,0 +1,261 @@
+"""
+Context Prefetcher for Mainza AI
+
+Speculatively loads the context the next chat turn will need as soon as a user
+shows activity (a chat request arriving, a voice WebSocket connecting). Modules
+register a loader per kind of context: conversation context and the
+consciousness snapshot from the router, recent conversation memories from the
+memory context builder, preferences from the preferences service. On activity
+all loaders start in the background; the turn then takes each result with
+``get``, joining a prefetch that is still running instead of issuing the same
+query again, or loading it itself when nothing was prefetched.
+
+Speculation is bounded: loads share a small concurrency budget and a per-load
+timeout, only a limited number of users are tracked, and results are used at
+most once and dropped (cancelled if still loading) when the turn does not
+arrive within the TTL or the user is evicted. Writers invalidate what they
+make stale: storing a turn drops everything prefetched for that user, and a
+consciousness state update drops every prefetched consciousness snapshot, so
+a turn that starts right after the previous reply never sees older data.
+Streamed input (final voice transcripts) also warms the query embedding caches
+used by intent routing and retrieval.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[str], Awaitable[Any]]
+
+# Result of a prefetch that failed or timed out; the turn loads directly instead
+_FAILED = object()
+
+
+@dataclass
+class PrefetchConfig:
+    """Configuration for speculative context prefetching"""
+    enabled: bool = os.getenv("CONTEXT_PREFETCH_ENABLED", "true").lower() == "true"
+    ttl_seconds: float = float(os.getenv("CONTEXT_PREFETCH_TTL_SECONDS", "30"))
+    timeout_seconds: float = float(os.getenv("CONTEXT_PREFETCH_TIMEOUT_SECONDS", "5"))
+    max_concurrency: int = int(os.getenv("CONTEXT_PREFETCH_MAX_CONCURRENCY", "4"))
+    max_users: int = int(os.getenv("CONTEXT_PREFETCH_MAX_USERS", "64"))
+
+
+@dataclass
+class PrefetchStats:
+    """Runtime counters for the context prefetcher"""
+    scheduled: int = 0
+    skipped: int = 0
+    hits: int = 0
+    joined_in_flight: int = 0
+    misses: int = 0
+    wasted: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    invalidated: int = 0
+    queries_warmed: int = 0
+
+
+@dataclass
+class _Prefetch:
+    task: asyncio.Task
+    started_at: float
+
+
+async def _warm_router_embedding(text: str):
+    from backend.utils.intent_router import intent_router
+    await intent_router.embed_query(text)
+
+
+async def _warm_retrieval_embedding(text: str):
+    from backend.utils.embedding_enhanced import aget_embedding
+    await aget_embedding(text)
+
+
+class ContextPrefetcher:
+    """Per-user speculative loading of turn context"""
+
+    def __init__(self, config: Optional[PrefetchConfig] = None,
+                 query_warmers: Optional[List[Callable[[str], Awaitable[Any]]]] = None,
+                 clock=time.monotonic):
+        self.config = config or PrefetchConfig()
+        self.query_warmers = query_warmers if query_warmers is not None else [
+            _warm_router_embedding, _warm_retrieval_embedding
+        ]
+        self.clock = clock
+        self.stats = PrefetchStats()
+        self._loaders: Dict[str, Loader] = {}
+        self._keep_result: Dict[str, bool] = {}
+        # user -> name -> prefetch, least recently active user first
+        self._users: "OrderedDict[str, Dict[str, _Prefetch]]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def register(self, name: str, loader: Loader, keep_result: bool = True):
+        """
+        Register a loader run on user activity.
+
+        ``keep_result=False`` is for loaders that warm a cache of their own (the
+        result is not held for ``get``).
+        """
+        self._loaders[name] = loader
+        self._keep_result[name] = keep_result
+
+    def notify_activity(self, user_id: Optional[str]) -> bool:
+        """Start prefetching for ``user_id`` in the background; returns False if nothing was started"""
+        if not self.config.enabled or not user_id or not self._loaders:
+            return False
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        self._expire()
+        prefetches = self._users.get(user_id)
+        if prefetches is not None:
+            self._users.move_to_end(user_id)
+            if any(not p.task.done() or self._keep_result[name] for name, p in prefetches.items()):
+                # Still loading, or holding results the next turn has not used yet
+                self.stats.skipped += 1
+                return False
+
+        while len(self._users) >= self.config.max_users and user_id not in self._users:
+            evicted, _ = next(iter(self._users.items()))
+            self.cancel(evicted)
+
+        now = self.clock()
+        self._users[user_id] = {
+            name: _Prefetch(asyncio.create_task(self._load(name, loader, user_id)), now)
+            for name, loader in self._loaders.items()
+        }
+        self.stats.scheduled += 1
+        logger.debug(f"🔮 Prefetching {list(self._loaders)} for {user_id}")
+        return True
+
+    async def get(self, user_id: Optional[str], name: str, loader: Optional[Loader] = None) -> Any:
+        """
+        The ``name`` context for ``user_id``: the prefetched result if there is a
+        fresh one (each result is used once), otherwise a direct load.
+        """
+        prefetch = self._users.get(user_id, {}).pop(name, None) if user_id else None
+        self._forget_if_empty(user_id)
+        if prefetch is not None:
+            if self.clock() - prefetch.started_at > self.config.ttl_seconds:
+                self._discard(prefetch)
+            elif not prefetch.task.done():
+                self.stats.joined_in_flight += 1
+                try:
+                    # Shielded so a cancelled turn does not cancel the prefetch it joined
+                    result = await asyncio.shield(prefetch.task)
+                except asyncio.CancelledError:
+                    if not prefetch.task.cancelled():
+                        raise
+                    result = _FAILED
+                if result is not _FAILED:
+                    return result
+            elif not prefetch.task.cancelled() and prefetch.task.result() is not _FAILED:
+                self.stats.hits += 1
+                return prefetch.task.result()
+
+        self.stats.misses += 1
+        loader = loader or self._loaders[name]
+        return await loader(user_id)
+
+    async def warm_query(self, text: str):
+        """Warm the query embedding caches for text the user is about to send"""
+        text = (text or "").strip()
+        if not self.config.enabled or not text:
+            return
+        self.stats.queries_warmed += 1
+        results = await asyncio.gather(*(
+            asyncio.wait_for(warm(text), self.config.timeout_seconds) for warm in self.query_warmers
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.debug(f"Query embedding warm-up failed: {result}")
+
+    def cancel(self, user_id: str):
+        """Drop everything prefetched for ``user_id``, cancelling loads still running"""
+        for prefetch in self._users.pop(user_id, {}).values():
+            self._discard(prefetch)
+
+    def invalidate(self, user_id: Optional[str] = None, names: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop prefetched ``names`` (all when None) for ``user_id`` (every user
+        when None) because the data behind them was just written. Loads still
+        running are cancelled, since they may have read the old data. Returns
+        how many prefetches were dropped.
+        """
+        names = set(names) if names is not None else None
+        dropped = 0
+        for user in [user_id] if user_id is not None else list(self._users):
+            prefetches = self._users.get(user, {})
+            for name in [n for n in prefetches if names is None or n in names]:
+                self._discard(prefetches.pop(name))
+                dropped += 1
+            self._forget_if_empty(user)
+        self.stats.invalidated += dropped
+        return dropped
+
+    async def _load(self, name: str, loader: Loader, user_id: str) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        try:
+            async with self._semaphore:
+                result = await asyncio.wait_for(loader(user_id), self.config.timeout_seconds)
+        except Exception as e:
+            self.stats.failed += 1
+            logger.debug(f"Prefetch of {name} for {user_id} failed: {e!r}")
+            result = _FAILED
+        if not self._keep_result[name]:
+            self._users.get(user_id, {}).pop(name, None)
+            self._forget_if_empty(user_id)
+        return result
+
+    def _discard(self, prefetch: _Prefetch):
+        if not prefetch.task.done():
+            prefetch.task.cancel()
+            self.stats.cancelled += 1
+        elif not prefetch.task.cancelled() and prefetch.task.result() is not _FAILED:
+            self.stats.wasted += 1
+
+    def _forget_if_empty(self, user_id: Optional[str]):
+        if user_id in self._users and not self._users[user_id]:
+            del self._users[user_id]
+
+    def _expire(self):
+        cutoff = self.clock() - self.config.ttl_seconds
+        for user_id in list(self._users):
+            prefetches = self._users[user_id]
+            for name in [name for name, p in prefetches.items() if p.started_at < cutoff]:
+                self._discard(prefetches.pop(name))
+            self._forget_if_empty(user_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        served = stats.hits + stats.joined_in_flight
+        return {
+            "enabled": self.config.enabled,
+            "loaders": list(self._loaders),
+            "tracked_users": len(self._users),
+            "scheduled": stats.scheduled,
+            "skipped": stats.skipped,
+            "hits": stats.hits,
+            "joined_in_flight": stats.joined_in_flight,
+            "misses": stats.misses,
+            "hit_rate": round(served / (served + stats.misses), 3) if served + stats.misses else 0.0,
+            "wasted": stats.wasted,
+            "failed": stats.failed,
+            "cancelled": stats.cancelled,
+            "invalidated": stats.invalidated,
+            "queries_warmed": stats.queries_warmed,
+        }
+
+
+# Global context prefetcher instance
+context_prefetcher = ContextPrefetcher()
@@ -0,0 +1,528 @@
+"""
+Document Ingestion Pipeline for Mainza AI
+
+Streams a document into Chunk nodes without holding it in memory:
+
+    read -> split -> embed -> write
+
+- read: bytes or text blocks from an upload or request stream, decoded
+  incrementally
+- split: ``SentenceChunker`` cuts the text on sentence boundaries into chunks of
+  at most ``chunk_tokens`` tokens, with a small sentence overlap
+- embed: a fixed number of workers embed batches of chunks, one model call
+  per batch
+- write: chunks are MERGEd in fixed-size batches, one transaction per batch
+
+Stages are connected by bounded queues, so reading only runs as fast as the
+embedding model can keep up. Every write transaction also advances the
+Document's ``ingest_checkpoint`` (the number of leading chunks already stored);
+re-ingesting the same document after a failure skips those chunks. Each run
+reports per-stage throughput and utilization so the bottleneck is visible.
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from backend.utils.context_packer import FALLBACK_CHARS_PER_TOKEN, token_counter
+
+logger = logging.getLogger(__name__)
+
+EmbedBatch = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+@dataclass
+class IngestionConfig:
+    """Chunking, batching and concurrency settings"""
+    chunk_tokens: int = int(os.getenv("DOCUMENT_CHUNK_TOKENS", "256"))
+    overlap_tokens: int = int(os.getenv("DOCUMENT_CHUNK_OVERLAP_TOKENS", "32"))
+    read_block_size: int = int(os.getenv("DOCUMENT_READ_BLOCK_SIZE", str(1024 * 1024)))
+    embed_batch_size: int = int(os.getenv("DOCUMENT_EMBED_BATCH_SIZE", "32"))
+    embed_concurrency: int = int(os.getenv("DOCUMENT_EMBED_CONCURRENCY", "4"))
+    write_batch_size: int = int(os.getenv("DOCUMENT_WRITE_BATCH_SIZE", "256"))
+    queue_depth: int = int(os.getenv("DOCUMENT_INGEST_QUEUE_DEPTH", "8"))
+    max_attempts: int = int(os.getenv("DOCUMENT_INGEST_MAX_ATTEMPTS", "3"))
+    retry_backoff: float = float(os.getenv("DOCUMENT_INGEST_RETRY_BACKOFF", "0.5"))
+    tokenizer_model: str = os.getenv("DOCUMENT_TOKENIZER_MODEL", "all-MiniLM-L6-v2")
+    max_jobs_tracked: int = 100
+
+
+@dataclass
+class DocumentChunk:
+    index: int
+    text: str
+    token_count: int
+    embedding: Optional[List[float]] = None
+
+
+class SentenceChunker:
+    """Incremental splitter: text in, chunks of at most ``max_tokens`` tokens out"""
+
+    _BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+
+    def __init__(self, max_tokens: int, overlap_tokens: int = 0, count: Optional[Callable[[str], int]] = None):
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = min(overlap_tokens, self.max_tokens // 2)
+        self.count = count or (lambda text: token_counter.count(text, cache=False))
+        self._buffer = ""
+        self._sentences: List[Tuple[str, int]] = []
+        self._tokens = 0
+        self._fresh = False  # current sentences hold text not yet emitted
+        self._next_index = 0
+        # Text without any sentence boundary is force-split past this size
+        self._max_buffer_chars = int(self.max_tokens * FALLBACK_CHARS_PER_TOKEN * 8)
+
+    def feed(self, text: str) -> List[DocumentChunk]:
+        """Add text; return the chunks it completed"""
+        self._buffer += text
+        chunks: List[DocumentChunk] = []
+        start = 0
+        for match in self._BOUNDARY.finditer(self._buffer):
+            chunks.extend(self._add(self._buffer[start:match.end()]))
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        while len(self._buffer) > self._max_buffer_chars:
+            cut = self._buffer.rfind(" ", 0, self._max_buffer_chars)
+            cut = cut if cut > 0 else self._max_buffer_chars
+            chunks.extend(self._add(self._buffer[:cut]))
+            self._buffer = self._buffer[cut:]
+        return chunks
+
+    def finish(self) -> List[DocumentChunk]:
+        """Flush the remaining text"""
+        chunks = self._add(self._buffer)
+        self._buffer = ""
+        if self._fresh:
+            chunks.append(self._emit())
+        return chunks
+
+    def _add(self, sentence: str) -> List[DocumentChunk]:
+        sentence = sentence.strip()
+        if not sentence:
+            return []
+        chunks = []
+        for piece, tokens in self._pieces(sentence):
+            if self._fresh and self._tokens + tokens > self.max_tokens:
+                chunks.append(self._emit())
+            while self._sentences and self._tokens + tokens > self.max_tokens:
+                _, dropped = self._sentences.pop(0)  # overlap that no longer fits
+                self._tokens -= dropped
+            self._sentences.append((piece, tokens))
+            self._tokens += tokens
+            self._fresh = True
+        return chunks
+
+    def _pieces(self, sentence: str) -> List[Tuple[str, int]]:
+        """The sentence, or word-boundary pieces of it when it exceeds ``max_tokens``"""
+        tokens = self.count(sentence)
+        if tokens <= self.max_tokens:
+            return [(sentence, tokens)]
+        pieces, words, piece_tokens = [], [], 0
+        for word in sentence.split():
+            word_tokens = self.count(word)
+            if words and piece_tokens + word_tokens > self.max_tokens:
+                pieces.append((" ".join(words), piece_tokens))
+                words, piece_tokens = [], 0
+            words.append(word)
+            piece_tokens += word_tokens
+        if words:
+            pieces.append((" ".join(words), piece_tokens))
+        return pieces
+
+    def _emit(self) -> DocumentChunk:
+        chunk = DocumentChunk(
+            index=self._next_index,
+            text=" ".join(text for text, _ in self._sentences),
+            token_count=self._tokens
+        )
+        self._next_index += 1
+        # Carry the trailing sentences that fit in the overlap into the next chunk
+        overlap, overlap_tokens = [], 0
+        for text, tokens in reversed(self._sentences):
+            if overlap_tokens + tokens > self.overlap_tokens:
+                break
+            overlap.insert(0, (text, tokens))
+            overlap_tokens += tokens
+        self._sentences, self._tokens, self._fresh = overlap, overlap_tokens, False
+        return chunk
+
+
+@dataclass
+class StageStats:
+    """Work done by one stage; ``busy_seconds`` sums time spent across its workers"""
+    items: int = 0
+    units: int = 0
+    unit: str = "items"
+    busy_seconds: float = 0.0
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        busy = self.busy_seconds
+        return {
+            "items": self.items,
+            self.unit: self.units,
+            "busy_seconds": round(busy, 3),
+            "items_per_second": round(self.items / busy, 2) if busy else 0.0,
+            f"{self.unit}_per_second": round(self.units / busy, 2) if busy else 0.0,
+            # >1 for concurrent stages; the highest value is the bottleneck
+            "utilization": round(self.busy_seconds / wall_seconds, 3) if wall_seconds else 0.0,
+        }
+
+
+@dataclass
+class IngestionJob:
+    """Progress and outcome of one ingestion run"""
+    document_id: str
+    filename: Optional[str] = None
+    status: str = "running"
+    resumed_from: int = 0
+    checkpoint: int = 0
+    chunks_total: int = 0
+    chunks_written: int = 0
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    stages: Dict[str, StageStats] = field(default_factory=lambda: {
+        "read": StageStats(unit="bytes"),
+        "split": StageStats(unit="tokens"),
+        "embed": StageStats(unit="tokens"),
+        "write": StageStats(unit="chunks"),
+    })
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall = (self.finished_at or time.time()) - self.started_at
+        return {
+            "document_id": self.document_id,
+            "filename": self.filename,
+            "status": self.status,
+            "resumed_from": self.resumed_from,
+            "checkpoint": self.checkpoint,
+            "chunks_total": self.chunks_total,
+            "chunks_written": self.chunks_written,
+            "error": self.error,
+            "elapsed_seconds": round(wall, 3),
+            "chunks_per_second": round(self.chunks_written / wall, 2) if wall > 0 else 0.0,
+            "stages": {name: stage.to_dict(wall) for name, stage in self.stages.items()},
+        }
+
+
+class IngestionError(Exception):
+    """Raised when an ingestion run fails; ``job`` holds the checkpoint to resume from"""
+
+    def __init__(self, message: str, job: IngestionJob):
+        super().__init__(message)
+        self.job = job
+
+
+class Neo4jChunkStore:
+    """Document/Chunk persistence through the unified database manager"""
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        if self._db is None:
+            from backend.utils.unified_database_manager import unified_database_manager
+            self._db = unified_database_manager
+        return self._db
+
+    async def begin(self, document_id: str, filename: Optional[str], chunking: str) -> int:
+        """Mark the document as ingesting; return how many chunks are already stored.
+
+        Stored chunks only count when the previous run was unfinished and used
+        the same ``chunking`` settings, since chunk boundaries depend on them.
+        """
+        query = """
+        MERGE (d:Document {document_id: $document_id})
+        ON CREATE SET d.created_at = timestamp()
+        WITH d, d.ingest_status <> 'complete' AND d.ingest_chunking = $chunking AS resumable
+        SET d.filename = coalesce($filename, d.filename),
+            d.ingest_status = 'ingesting',
+            d.ingest_started_at = timestamp(),
+            d.ingest_chunking = $chunking,
+            d.ingest_checkpoint = CASE WHEN coalesce(resumable, false)
+                                       THEN coalesce(d.ingest_checkpoint, 0) ELSE 0 END
+        RETURN d.ingest_checkpoint AS checkpoint
+        """
+        records = await self.db.execute_query(
+            query, {"document_id": document_id, "filename": filename, "chunking": chunking}
+        )
+        return int(records[0]["checkpoint"]) if records else 0
+
+    async def write(self, document_id: str, rows: List[Dict[str, Any]], checkpoint: int):
+        """Store a batch of chunks and advance the checkpoint in one transaction"""
+        query = """
+        MATCH (d:Document {document_id: $document_id})
+        UNWIND $rows AS row
+        MERGE (ch:Chunk {chunk_id: row.chunk_id})
+        SET ch.text = row.text,
+            ch.embedding = row.embedding,
+            ch.document_id = $document_id,
+            ch.chunk_index = row.chunk_index,
+            ch.token_count = row.token_count
+        MERGE (ch)-[:DERIVED_FROM]->(d)
+        WITH d, count(ch) AS written
+        SET d.ingest_checkpoint = CASE WHEN coalesce(d.ingest_checkpoint, 0) < $checkpoint
+                                       THEN $checkpoint ELSE d.ingest_checkpoint END
+        """
+        await self.db.execute_write_query(
+            query, {"document_id": document_id, "rows": rows, "checkpoint": checkpoint}
+        )
+
+    async def complete(self, document_id: str, chunk_count: int):
+        """Mark the document complete and drop chunks left over from a longer previous version"""
+        query = """
+        MATCH (d:Document {document_id: $document_id})
+        SET d.ingest_status = 'complete',
+            d.ingest_checkpoint = $chunk_count,
+            d.chunk_count = $chunk_count,
+            d.ingested_at = timestamp()
+        WITH d
+        OPTIONAL MATCH (ch:Chunk {document_id: $document_id})
+        WHERE ch.chunk_index >= $chunk_count
+        DETACH DELETE ch
+        """
+        await self.db.execute_write_query(query, {"document_id": document_id, "chunk_count": chunk_count})
+
+    async def fail(self, document_id: str, error: str):
+        query = """
+        MATCH (d:Document {document_id: $document_id})
+        SET d.ingest_status = 'failed', d.ingest_error = $error
+        """
+        await self.db.execute_write_query(query, {"document_id": document_id, "error": error[:500]})
+
+
+async def _default_embed(texts: List[str]) -> List[List[float]]:
+    # Same model as the RAG query path, so chunks match ChunkEmbeddingIndex
+    from backend.utils.embedding import get_embeddings
+    return await asyncio.to_thread(get_embeddings, texts)
+
+
+async def iter_upload(upload, block_size: int) -> AsyncIterable[bytes]:
+    """Blocks of an ``UploadFile``"""
+    while True:
+        block = await upload.read(block_size)
+        if not block:
+            return
+        yield block
+
+
+async def iter_text(text: str, block_size: int) -> AsyncIterable[str]:
+    """Blocks of an in-memory string"""
+    for start in range(0, len(text), block_size):
+        yield text[start:start + block_size]
+
+
+class DocumentIngestor:
+    """Runs streaming ingestion jobs and keeps their recent progress"""
+
+    def __init__(self, config: Optional[IngestionConfig] = None, embed: Optional[EmbedBatch] = None, store=None):
+        self.config = config or IngestionConfig()
+        self.embed = embed or _default_embed
+        self.store = store or Neo4jChunkStore()
+        self.jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+
+    def get_job(self, document_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(document_id)
+
+    def _track(self, job: IngestionJob):
+        self.jobs[job.document_id] = job
+        self.jobs.move_to_end(job.document_id)
+        while len(self.jobs) > self.config.max_jobs_tracked:
+            self.jobs.popitem(last=False)
+
+    async def _with_retries(self, what: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(1, self.config.max_attempts + 1):
+            try:
+                return await fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt >= self.config.max_attempts:
+                    raise
+                delay = self.config.retry_backoff * (2 ** (attempt - 1))
+                logger.warning(f"⚠️ {what} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def ingest(
+        self,
+        document_id: str,
+        source: AsyncIterable[Union[bytes, str]],
+        filename: Optional[str] = None,
+        chunk_tokens: Optional[int] = None
+    ) -> IngestionJob:
+        """Stream ``source`` into Chunk nodes of ``document_id``, resuming after earlier failures"""
+        config = self.config
+        job = IngestionJob(document_id=document_id, filename=filename)
+        self._track(job)
+        stages = job.stages
+        chunk_tokens = chunk_tokens or config.chunk_tokens
+        chunker = SentenceChunker(
+            chunk_tokens,
+            config.overlap_tokens,
+            count=lambda text: token_counter.count(text, config.tokenizer_model, cache=False)
+        )
+        checkpoint = 0
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=config.queue_depth)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=config.queue_depth)
+
+        async def produce():
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            batch: List[DocumentChunk] = []
+
+            async def emit(chunks: List[DocumentChunk]):
+                nonlocal batch
+                for chunk in chunks:
+                    job.chunks_total = chunk.index + 1
+                    stages["split"].items += 1
+                    stages["split"].units += chunk.token_count
+                    if chunk.index < checkpoint:
+                        continue  # stored by an earlier run
+                    batch.append(chunk)
+                    if len(batch) >= config.embed_batch_size:
+                        await embed_queue.put(batch)
+                        batch = []
+
+            started = time.perf_counter()
+            async for block in source:
+                stages["read"].busy_seconds += time.perf_counter() - started
+                stages["read"].items += 1
+                stages["read"].units += len(block)
+                text = decoder.decode(block) if isinstance(block, (bytes, bytearray)) else block
+                started = time.perf_counter()
+                chunks = await asyncio.to_thread(chunker.feed, text)
+                stages["split"].busy_seconds += time.perf_counter() - started
+                await emit(chunks)
+                started = time.perf_counter()
+
+            started = time.perf_counter()
+            chunks = chunker.feed(decoder.decode(b"", final=True)) + chunker.finish()
+            stages["split"].busy_seconds += time.perf_counter() - started
+            await emit(chunks)
+            if batch:
+                await embed_queue.put(batch)
+            for _ in range(config.embed_concurrency):
+                await embed_queue.put(None)
+
+        async def embed_worker():
+            while True:
+                batch = await embed_queue.get()
+                if batch is None:
+                    await write_queue.put(None)
+                    return
+                started = time.perf_counter()
+                embeddings = await self._with_retries(
+                    f"Embedding chunks {batch[0].index}-{batch[-1].index} of {document_id}",
+                    lambda: self.embed([chunk.text for chunk in batch])
+                )
+                stages["embed"].busy_seconds += time.perf_counter() - started
+                for chunk, embedding in zip(batch, embeddings):
+                    chunk.embedding = embedding
+                stages["embed"].items += len(batch)
+                stages["embed"].units += sum(chunk.token_count for chunk in batch)
+                await write_queue.put(batch)
+
+        async def write():
+            pending: List[DocumentChunk] = []
+            written = set()  # indexes stored beyond the contiguous checkpoint
+            workers_left = config.embed_concurrency
+
+            async def flush():
+                nonlocal checkpoint, pending
+                batch, pending = pending[:config.write_batch_size], pending[config.write_batch_size:]
+                # Checkpoint only moves past chunks stored without gaps before them
+                stored = written | {chunk.index for chunk in batch}
+                new_checkpoint = checkpoint
+                while new_checkpoint in stored:
+                    new_checkpoint += 1
+                rows = [
+                    {
+                        "chunk_id": f"{document_id}_chunk_{chunk.index}",
+                        "chunk_index": chunk.index,
+                        "text": chunk.text,
+                        "embedding": chunk.embedding,
+                        "token_count": chunk.token_count,
+                    }
+                    for chunk in batch
+                ]
+                started = time.perf_counter()
+                await self._with_retries(
+                    f"Writing {len(rows)} chunks of {document_id}",
+                    lambda: self.store.write(document_id, rows, new_checkpoint)
+                )
+                stages["write"].busy_seconds += time.perf_counter() - started
+                stages["write"].items += 1
+                stages["write"].units += len(rows)
+                written.update(chunk.index for chunk in batch)
+                while checkpoint in written:
+                    written.discard(checkpoint)
+                    checkpoint += 1
+                job.checkpoint = checkpoint
+                job.chunks_written += len(rows)
+
+            while workers_left:
+                batch = await write_queue.get()
+                if batch is None:
+                    workers_left -= 1
+                    continue
+                pending.extend(batch)
+                while len(pending) >= config.write_batch_size:
+                    await flush()
+            while pending:
+                await flush()
+
+        tasks: List[asyncio.Task] = []
+        try:
+            # The checkpoint records the tokenizer, so wait for it instead of starting on the estimate
+            await asyncio.to_thread(token_counter.load, config.tokenizer_model)
+            checkpoint = await self.store.begin(
+                document_id, filename,
+                f"{chunk_tokens}/{chunker.overlap_tokens}/{token_counter.tokenizer_name(config.tokenizer_model)}"
+            )
+            job.resumed_from = job.checkpoint = checkpoint
+            if checkpoint:
+                logger.info(f"📄 Resuming ingestion of {document_id} after {checkpoint} stored chunks")
+
+            tasks = [
+                asyncio.create_task(produce()),
+                *(asyncio.create_task(embed_worker()) for _ in range(config.embed_concurrency)),
+                asyncio.create_task(write()),
+            ]
+            await asyncio.gather(*tasks)
+            await self.store.complete(document_id, job.chunks_total)
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            job.status, job.error, job.finished_at = "failed", str(e) or type(e).__name__, time.time()
+            try:
+                await self.store.fail(document_id, job.error)
+            except Exception as store_error:
+                logger.error(f"❌ Could not record failed ingestion of {document_id}: {store_error}")
+            logger.error(f"❌ Ingestion of {document_id} failed at checkpoint {job.checkpoint}: {job.error}")
+            if isinstance(e, Exception):
+                raise IngestionError(f"Ingestion of {document_id} failed: {job.error}", job) from e
+            raise
+
+        job.status, job.checkpoint, job.finished_at = "complete", job.chunks_total, time.time()
+        logger.info(
+            f"✅ Ingested {document_id}: {job.chunks_written} chunks written "
+            f"({job.chunks_total} total) in {job.finished_at - job.started_at:.1f}s"
+        )
+        return job
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active": [job.document_id for job in self.jobs.values() if job.status == "running"],
+            "recent": [job.to_dict() for job in list(self.jobs.values())[-10:]],
+        }
+
+
+# Global document ingestor instance
+document_ingestor = DocumentIngestor()
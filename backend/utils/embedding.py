@@ -15,30 +15,29 @@ def get_embedding(text: str) -> List[float]:
     # Fallback: return dummy embedding
     return [0.0] * 384 
 
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embeddings for several texts in one model call (same space as get_embedding)."""
+    if embedding_model:
+        return embedding_model.encode(texts).tolist()
+    return [[0.0] * 384 for _ in texts]
+
 def vector_search_chunks(query: str, top_k: int = 5) -> list:
     from backend.utils.neo4j import driver
     query_embedding = get_embedding(query)
     try:
-        cypher = (
-            "CALL db.index.vector.queryNodes('ChunkEmbeddingIndex', $top_k, $embedding) "
-            "YIELD node, score RETURN node.chunk_id AS chunk_id, node.text AS text, score, id(node) AS chunk_node_id LIMIT $top_k"
-        )
+        # Vector hits and their parent documents in one round trip
+        from backend.utils.rag_retrieval import VECTOR_RETRIEVAL_QUERY
         with driver.session() as session:
-            result = session.run(cypher, {"top_k": top_k, "embedding": query_embedding})
-            chunks = []
-            for record in result:
-                chunk = dict(record)
-                # Fetch parent document_id for this chunk
-                cypher_doc = (
-                    "MATCH (ch:Chunk) WHERE id(ch) = $chunk_node_id "
-                    "OPTIONAL MATCH (ch)-[:DERIVED_FROM]->(d:Document) RETURN d.document_id AS document_id LIMIT 1"
-                )
-                doc_result = session.run(cypher_doc, {"chunk_node_id": chunk["chunk_node_id"]})
-                doc_row = doc_result.single()
-                if doc_row and doc_row["document_id"]:
-                    chunk["document_id"] = doc_row["document_id"]
-                chunks.append(chunk)
-            return chunks
+            result = session.run(VECTOR_RETRIEVAL_QUERY, {
+                "candidates": top_k,
+                "embedding": query_embedding,
+                "window": 0,
+                "with_embeddings": False,
+            })
+            return [
+                {key: value for key, value in record.items() if key not in ("embedding", "neighbours")}
+                for record in result
+            ]
     except Exception:
         # Fallback: dummy search
         cypher = "MATCH (ch:Chunk) RETURN ch.chunk_id AS chunk_id, ch.text AS text LIMIT $top_k"
@@ -2,13 +2,17 @@
 Enhanced embedding utilities with Ollama integration and better error handling.
 """
 import os
+import asyncio
 import logging
 import requests
 import json
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 import numpy as np
 from functools import lru_cache
 
+from backend.utils.ollama_client import ollama_client, OllamaError
+
 logger = logging.getLogger(__name__)
 
 class EmbeddingManager:
@@ -17,6 +21,7 @@ class EmbeddingManager:
         self.default_model = os.getenv("DEFAULT_EMBEDING_MODEL", "nomic-embed-text:latest")
         self.fallback_model = "all-MiniLM-L6-v2"
         self.dimensions = 768  # Updated for larger embedding models
+        self._async_cache: "OrderedDict[tuple, List[float]]" = OrderedDict()
         
         # Try to initialize SentenceTransformers as fallback
         self.sentence_transformer = None
@@ -30,35 +35,23 @@ class EmbeddingManager:
             logger.warning(f"Failed to initialize SentenceTransformer: {e}")
     
     def _get_ollama_embedding(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
-        """Get embedding from Ollama API."""
-        model = model or self.default_model
-        
+        """Get embedding from Ollama API on the shared pooled client (blocking)."""
         try:
-            response = requests.post(
-                f"{self.ollama_base_url}/api/embeddings",
-                json={"model": model, "prompt": text},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    embedding = data.get("embedding")
-                    if embedding and isinstance(embedding, list):
-                        return embedding
-                    else:
-                        logger.error(f"Invalid embedding response from Ollama: {data}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse Ollama embedding JSON response: {e}")
-                    logger.error(f"Raw embedding response: {response.text[:500]}...")
-            else:
-                logger.error(f"Ollama embedding request failed: {response.status_code} - {response.text}")
-        
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ollama request failed: {e}")
+            return ollama_client.embed_sync(model or self.default_model, text)
+        except OllamaError as e:
+            logger.error(f"Ollama embedding request failed: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error getting Ollama embedding: {e}")
+        return None
+    
+    async def _aget_ollama_embedding(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
+        """Get embedding from Ollama API without blocking the event loop."""
+        try:
+            return await ollama_client.embed(model or self.default_model, text)
+        except OllamaError as e:
+            logger.error(f"Ollama embedding request failed: {e}")
         except Exception as e:
             logger.error(f"Unexpected error getting Ollama embedding: {e}")
-        
         return None
     
     def _get_sentence_transformer_embedding(self, text: str) -> Optional[List[float]]:
@@ -106,6 +99,39 @@ class EmbeddingManager:
         logger.warning(f"All embedding methods failed for text: {text[:100]}...")
         return [0.0] * self.dimensions
     
+    async def aget_embedding(self, text: str, model: Optional[str] = None) -> List[float]:
+        """
+        Async version of ``get_embedding`` for use inside request handlers.
+        Shares the same fallback strategy and caches results per (text, model).
+        """
+        if not text or not text.strip():
+            logger.warning("Empty text provided for embedding")
+            return [0.0] * self.dimensions
+        
+        text = text[:8000]
+        key = (text, model)
+        cached = self._async_cache.get(key)
+        if cached is not None:
+            self._async_cache.move_to_end(key)
+            return cached
+        
+        embedding = await self._aget_ollama_embedding(text, model)
+        if embedding:
+            if len(embedding) != self.dimensions:
+                self.dimensions = len(embedding)
+                logger.info(f"Updated embedding dimensions to {self.dimensions}")
+        else:
+            embedding = await asyncio.to_thread(self._get_sentence_transformer_embedding, text)
+        
+        if not embedding:
+            logger.warning(f"All embedding methods failed for text: {text[:100]}...")
+            return [0.0] * self.dimensions
+        
+        self._async_cache[key] = embedding
+        if len(self._async_cache) > 1000:
+            self._async_cache.popitem(last=False)
+        return embedding
+    
     def get_embeddings_batch(self, texts: List[str], model: Optional[str] = None, 
                            batch_size: int = 32) -> List[List[float]]:
         """Get embeddings for multiple texts efficiently."""
@@ -183,6 +209,10 @@ def get_embedding(text: str) -> List[float]:
     """Backward compatible embedding function."""
     return embedding_manager.get_embedding(text)
 
+async def aget_embedding(text: str) -> List[float]:
+    """Non-blocking embedding function for async code."""
+    return await embedding_manager.aget_embedding(text)
+
 def get_embedding_batch(texts: List[str], batch_size: int = 32) -> List[List[float]]:
     """Batch embedding function for improved performance."""
     return embedding_manager.get_embeddings_batch(texts, batch_size=batch_size)
@@ -200,38 +230,21 @@ def vector_search_chunks(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         return _fallback_text_search(query, top_k)
     
     try:
-        # Try vector search first
-        cypher = """
-        CALL db.index.vector.queryNodes('ChunkEmbeddingIndex', $top_k, $embedding) 
-        YIELD node, score 
-        RETURN node.chunk_id AS chunk_id, node.text AS text, score, 
-               id(node) AS chunk_node_id 
-        LIMIT $top_k
-        """
-        
+        # Vector hits and their parent documents in one round trip
+        from backend.utils.rag_retrieval import VECTOR_RETRIEVAL_QUERY
+
         with driver.session() as session:
-            result = session.run(cypher, {"top_k": top_k, "embedding": query_embedding})
-            chunks = []
-            for record in result:
-                chunk = dict(record)
-                
-                # Get parent document using the same session
-                doc_query = """
-                MATCH (ch:Chunk) WHERE id(ch) = $chunk_node_id 
-                OPTIONAL MATCH (ch)-[:DERIVED_FROM]->(d:Document) 
-                RETURN d.document_id AS document_id, d.filename AS filename
-                """
-                
-                doc_result = session.run(doc_query, {"chunk_node_id": chunk["chunk_node_id"]})
-                doc_row = doc_result.single()
-                if doc_row and doc_row["document_id"]:
-                    chunk["document_id"] = doc_row["document_id"]
-                    chunk["filename"] = doc_row["filename"]
-                
-                chunks.append(chunk)
-            
-            return chunks
-        
+            result = session.run(VECTOR_RETRIEVAL_QUERY, {
+                "candidates": top_k,
+                "embedding": query_embedding,
+                "window": 0,
+                "with_embeddings": False,
+            })
+            return [
+                {key: value for key, value in record.items() if key not in ("embedding", "neighbours")}
+                for record in result
+            ]
+
     except Exception as e:
         logger.error(f"Vector search failed: {e}")
         return _fallback_text_search(query, top_k)
@@ -6,11 +6,14 @@ import logging
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 import asyncio
-import json
-import requests
 from backend.config.llm_optimization import llm_context_optimizer
 from backend.core.performance_optimization import PerformanceOptimizer
 from backend.core.enhanced_error_handling import ErrorHandler, ErrorSeverity, handle_errors
+from backend.utils.ollama_client import (
+    ollama_client, OllamaError, OllamaTimeoutError, OllamaUnavailableError, OllamaResponseError
+)
+from backend.utils.prompt_assembly import prompt_session_manager
+from backend.utils.llm_response_cache import llm_response_cache, is_deterministic
 import os
 
 logger = logging.getLogger(__name__)
@@ -40,18 +43,22 @@ class EnhancedLLMExecutor:
         knowledge_context: Dict[str, Any] = None,
         conversation_history: List[Dict[str, str]] = None,
         agent_name: str = "unknown",
-        user_id: str = "default"
+        user_id: str = "default",
+        system_prompt: str = None,
+        session_id: str = None
     ) -> str:
         """
         Execute LLM with full context optimization and consciousness awareness
         
         Args:
-            base_prompt: The base prompt for the LLM
+            base_prompt: The turn-specific prompt (context and user message)
             consciousness_context: Current consciousness state
             knowledge_context: Retrieved knowledge context
             conversation_history: Previous conversation turns
             agent_name: Name of the calling agent
             user_id: User identifier
+            system_prompt: Static agent instructions, kept first as a reusable prefix
+            session_id: Conversation session; defaults to one per user and agent
             
         Returns:
             LLM response optimized for context utilization
@@ -66,7 +73,9 @@ class EnhancedLLMExecutor:
                 base_prompt=base_prompt,
                 consciousness_context=consciousness_context,
                 knowledge_context=knowledge_context,
-                conversation_history=conversation_history
+                conversation_history=conversation_history,
+                system_prompt=system_prompt,
+                session_id=session_id or f"{user_id}:{agent_name}"
             )
             
             # Log context utilization
@@ -94,100 +103,50 @@ class EnhancedLLMExecutor:
             
         except Exception as e:
             logger.error(f"❌ Enhanced LLM execution failed: {e}")
-            return await self._fallback_execution(base_prompt, agent_name)
+            fallback_prompt = f"{system_prompt}\n\n{base_prompt}" if system_prompt else base_prompt
+            return await self._fallback_execution(fallback_prompt, agent_name)
     
     async def _execute_ollama_request(self, request_params: Dict[str, Any]) -> str:
-        """Execute optimized request to Ollama"""
+        """Execute optimized request to Ollama, from the response cache when decoding is deterministic"""
+        options = request_params.get("options", {})
+        if not is_deterministic(options):
+            return await self._generate(request_params)
+        # Greedy or seeded decoding: an identical prompt gets an identical response.
+        # A hit never reaches Ollama, so prompt_session_manager.record (in _generate)
+        # is skipped and the prefix-hit metrics only count requests the model ran
+        return await llm_response_cache.get_or_compute(
+            "enhanced_llm_execution", request_params["model"], request_params["prompt"],
+            lambda: self._generate(request_params), params=options
+        )
+    
+    async def _generate(self, request_params: Dict[str, Any]) -> str:
+        """Run the request on the shared non-blocking Ollama client"""
         try:
-            # Prepare request for Ollama API
-            ollama_request = {
-                "model": request_params["model"],
-                "prompt": request_params["prompt"],
-                "stream": False,  # Disable streaming to avoid JSON parsing issues
-                "options": request_params.get("options", {})
-            }
-            
-            # Execute request
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=ollama_request,
-                timeout=120  # 2 minute timeout for large context
+            session_id = request_params.get("session_id")
+            extra = {"keep_alive": request_params["keep_alive"]} if "keep_alive" in request_params else {}
+            result = await ollama_client.generate(
+                model=request_params["model"],
+                prompt=request_params["prompt"],
+                options=request_params.get("options", {}),
+                **extra
             )
-            
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    return result.get("response", "")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse Ollama JSON response: {e}")
-                    logger.error(f"Raw response: {response.text[:500]}...")
-
-                    # Handle streaming response that was concatenated - Ollama returns multiple JSON objects
-                    response_text = response.text.strip()
-                    if response_text:
-                        try:
-                            # Split by JSON object boundaries and parse each
-                            import re
-                            json_objects = re.findall(r'\{[^{}]*\}', response_text)  # Simple JSON pattern matching
-
-                            full_response = ""
-                            for json_str in json_objects:
-                                try:
-                                    json_obj = json.loads(json_str)
-                                    if 'response' in json_obj and json_obj['response']:
-                                        full_response += json_obj['response']
-                                    if json_obj.get('done', False):
-                                        break  # Stop at done signal
-                                except json.JSONDecodeError:
-                                    continue
-
-                            if full_response:
-                                logger.info(f"✅ Reconstructed streaming response: {len(full_response)} chars")
-                                return full_response
-
-                            # Alternative: Split by newlines and parse each line
-                            full_response = ""
-                            for line in response_text.split('\n'):
-                                line = line.strip()
-                                if line:
-                                    try:
-                                        json_obj = json.loads(line)
-                                        if 'response' in json_obj and json_obj['response']:
-                                            full_response += json_obj['response']
-                                        if json_obj.get('done', False):
-                                            break
-                                    except json.JSONDecodeError:
-                                        continue
-
-                            if full_response:
-                                logger.info(f"✅ Fixed streaming response: {len(full_response)} chars")
-                                return full_response
-
-                        except Exception as parse_error:
-                            logger.error(f"Failed to parse streaming response: {parse_error}")
-
-                        # Last resort: return cleaned raw text
-                        clean_text = re.sub(r'[^\w\s.,!?-]', '', response_text)
-                        if len(clean_text.strip()) > 10:
-                            logger.warning("Using cleaned raw text as fallback")
-                            return clean_text.strip()[:2000]
-
-                        # Ultimate fallback: any printable text
-                        printable = ''.join(c for c in response_text if c.isprintable() and c not in ['{','}','#'])
-                        if printable.strip():
-                            return printable.strip()[:1000]
-
-                    raise Exception(f"Invalid JSON response from Ollama: {e}")
-            else:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                raise Exception(f"Ollama API returned {response.status_code}")
-                
-        except requests.exceptions.Timeout:
+            assembled = request_params.get("prompt_assembly")
+            if session_id and assembled is not None:
+                prefix = prompt_session_manager.record(session_id, request_params["model"], assembled, result)
+                logger.debug(
+                    f"   ♻️ Prefix {'hit' if prefix['prefix_hit'] else 'miss'}: "
+                    f"{prefix['reused_prefix_tokens']} tokens reused, first change in {prefix['first_changed_segment']}"
+                )
+            return result.get("response", "")
+        except OllamaTimeoutError:
             logger.error("Ollama request timed out")
             raise Exception("Request timed out - context may be too large")
-        except requests.exceptions.ConnectionError:
+        except OllamaUnavailableError:
             logger.error("Failed to connect to Ollama")
             raise Exception("Cannot connect to Ollama server")
+        except OllamaResponseError as e:
+            logger.error(f"Ollama API error: {e}")
+            raise Exception(f"Ollama API returned {e.status_code or 'an error'}")
         except Exception as e:
             logger.error(f"Ollama execution error: {e}")
             raise
@@ -197,59 +156,20 @@ class EnhancedLLMExecutor:
         try:
             logger.warning(f"🔄 Using fallback execution for {agent_name}")
             
-            fallback_request = {
-                "model": os.getenv("DEFAULT_OLLAMA_MODEL", "gpt-oss:20b"),
-                "prompt": base_prompt[:8000],  # Truncate to safe length
-                "stream": False,
-                "options": {
+            result = await ollama_client.generate(
+                model=os.getenv("DEFAULT_OLLAMA_MODEL", "gpt-oss:20b"),
+                prompt=base_prompt[:8000],  # Truncate to safe length
+                options={
                     "temperature": 0.7,
                     "num_ctx": 16384,  # Safe context size
                     "num_predict": 1024
                 }
-            }
-            
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=fallback_request,
-                timeout=60
             )
+            return result.get("response") or "I apologize, but I'm having trouble generating a response."
             
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    return result.get("response", "I apologize, but I'm having trouble generating a response.")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse fallback Ollama JSON response: {e}")
-                    logger.error(f"Raw fallback response: {response.text[:500]}...")
-                    
-                    # Handle streaming response in fallback too
-                    response_text = response.text.strip()
-                    if response_text:
-                        try:
-                            # Parse multiple JSON objects (streaming response)
-                            full_response = ""
-                            for line in response_text.split('\n'):
-                                line = line.strip()
-                                if line:
-                                    try:
-                                        json_obj = json.loads(line)
-                                        if 'response' in json_obj:
-                                            full_response += json_obj['response']
-                                    except json.JSONDecodeError:
-                                        continue
-                            
-                            if full_response:
-                                return full_response
-                                
-                        except Exception:
-                            pass
-                        
-                        # Return raw text as last resort
-                        return response_text[:1000]  # Limit length
-                    return "I apologize, but I'm having trouble generating a response."
-            else:
-                return "I apologize, but I'm experiencing technical difficulties."
-                
+        except OllamaError as e:
+            logger.error(f"Fallback execution also failed: {e}")
+            return "I apologize, but I'm experiencing technical difficulties."
         except Exception as e:
             logger.error(f"Fallback execution also failed: {e}")
             return "I apologize, but I'm currently unable to process your request."
@@ -316,7 +236,9 @@ class EnhancedLLMExecutor:
             "context_strategy": context_stats.get("context_strategy", "unknown"),
             "memory_optimization": context_stats.get("memory_optimization", False),
             "streaming_enabled": context_stats.get("streaming_enabled", False),
-            "ollama_endpoint": self.ollama_base_url
+            "ollama_endpoint": self.ollama_base_url,
+            "ollama_client": ollama_client.get_stats(),
+            "prompt_cache": prompt_session_manager.get_stats()
         }
     
     async def test_context_optimization(self) -> Dict[str, Any]:
@@ -357,7 +279,7 @@ class EnhancedLLMExecutor:
                 "optimization_level": params.get("context_optimization", {}).get("level", "unknown"),
                 "strategy": params.get("context_optimization", {}).get("strategy", "unknown"),
                 "prompt_length": len(params.get("prompt", "")),
-                "estimated_tokens": int(len(params.get("prompt", "").split()) * 1.3)
+                "estimated_tokens": params.get("context_optimization", {}).get("actual_context_tokens", 0)
             }
             
         except Exception as e:
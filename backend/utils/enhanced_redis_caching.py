@@ -4,10 +4,7 @@ Implements advanced caching strategies with compression and optimization
 """
 
 import asyncio
-import json
 import logging
-import pickle
-import gzip
 import hashlib
 from typing import Any, Dict, List, Optional, Union, Callable
 from datetime import datetime, timedelta
@@ -16,6 +13,9 @@ import redis.asyncio as redis
 from redis.asyncio import ConnectionPool
 import numpy as np
 
+from backend.utils.cache_codecs import CacheCodec, Serializer
+from backend.utils.tiered_cache import SingleFlight, tiered_cache
+
 logger = logging.getLogger(__name__)
 
 class EnhancedRedisCache:
@@ -38,8 +38,11 @@ class EnhancedRedisCache:
             "sets": 0,
             "deletes": 0,
             "compressions": 0,
+            "coalesced": 0,
             "total_size": 0
         }
+        self._flights = SingleFlight()
+        self.codec = CacheCodec(allow_pickle=self.serialization_method == "pickle")
         
     async def initialize(self):
         """Initialize Redis connection with optimized settings"""
@@ -128,11 +131,9 @@ class EnhancedRedisCache:
         try:
             start_time = datetime.now()
             
-            # Determine compression
-            if compress is None:
-                compress = self._should_compress(value)
-            
-            # Serialize and compress
+            # Serialize and compress (by serialized size unless forced)
+            if not self.compression_enabled and compress is None:
+                compress = False
             serialized_value = await self._serialize_value(value, compress)
             
             # Set TTL
@@ -145,13 +146,13 @@ class EnhancedRedisCache:
             # Update statistics
             self.cache_stats["sets"] += 1
             self.cache_stats["total_size"] += len(serialized_value)
-            if compress:
+            if self.codec.describe(serialized_value).get("compressor", "none") != "none":
                 self.cache_stats["compressions"] += 1
             
             # Update cache metadata
             await self._update_cache_metadata(key, {
                 "size": len(serialized_value),
-                "compressed": compress,
+                "compressed": self.codec.describe(serialized_value).get("compressor", "none"),
                 "created_at": datetime.now().isoformat(),
                 "ttl": ttl
             })
@@ -183,14 +184,15 @@ class EnhancedRedisCache:
     
     async def get_or_set(self, key: str, factory: Callable, ttl: Optional[int] = None) -> Any:
         """
-        Get value from cache or set it using factory function
+        Get value from cache or set it using factory function.
+        Concurrent misses for the same key share a single factory call.
         """
-        try:
-            # Try to get from cache
-            value = await self.get(key)
-            if value is not None:
-                return value
-            
+        # Try to get from cache
+        value = await self.get(key)
+        if value is not None:
+            return value
+        
+        async def compute():
             # Generate value using factory
             if asyncio.iscoroutinefunction(factory):
                 value = await factory()
@@ -200,14 +202,10 @@ class EnhancedRedisCache:
             # Set in cache
             await self.set(key, value, ttl)
             return value
-            
-        except Exception as e:
-            logger.error(f"Error in get_or_set for key '{key}': {e}")
-            # Fallback to factory result
-            if asyncio.iscoroutinefunction(factory):
-                return await factory()
-            else:
-                return factory()
+        
+        if self._flights.in_flight(key):
+            self.cache_stats["coalesced"] += 1
+        return await self._flights.do(key, compute)
     
     async def batch_get(self, keys: List[str]) -> Dict[str, Any]:
         """Get multiple values in batch"""
@@ -267,62 +265,24 @@ class EnhancedRedisCache:
             return False
     
     async def _serialize_value(self, value: Any, compress: bool = None) -> bytes:
-        """Serialize value with optional compression"""
+        """Encode value with the cache codec (header byte, serializer, optional compression)"""
         try:
-            # Choose serialization method
-            if self.serialization_method == "pickle":
-                serialized = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
-            else:  # JSON
-                serialized = json.dumps(value, default=str).encode('utf-8')
-            
-            # Apply compression if beneficial
-            if compress or (compress is None and self._should_compress(value)):
-                compressed = gzip.compress(serialized)
-                if len(compressed) < len(serialized):
-                    serialized = compressed
-                    # Add compression marker
-                    serialized = b"COMPRESSED:" + serialized
-            
-            return serialized
+            serializer = Serializer.PICKLE if self.serialization_method == "pickle" else None
+            return self.codec.encode(value, serializer=serializer, compress=compress)
             
         except Exception as e:
             logger.error(f"Error serializing value: {e}")
             raise
     
     async def _deserialize_value(self, raw_value: bytes) -> Any:
-        """Deserialize value with decompression"""
+        """Decode value; entries written before the codec (JSON/pickle/gzip) still decode"""
         try:
-            # Check for compression marker
-            if raw_value.startswith(b"COMPRESSED:"):
-                raw_value = gzip.decompress(raw_value[11:])  # Remove "COMPRESSED:" prefix
-            
-            # Choose deserialization method
-            if self.serialization_method == "pickle":
-                return pickle.loads(raw_value)
-            else:  # JSON
-                return json.loads(raw_value.decode('utf-8'))
+            return self.codec.decode(raw_value)
                 
         except Exception as e:
             logger.error(f"Error deserializing value: {e}")
             raise
     
-    def _should_compress(self, value: Any) -> bool:
-        """Determine if value should be compressed"""
-        try:
-            # Estimate size
-            if isinstance(value, (str, bytes)):
-                size = len(value)
-            elif isinstance(value, (list, dict)):
-                size = len(str(value))
-            else:
-                size = len(str(value))
-            
-            # Compress if larger than threshold
-            return size > 1024  # 1KB threshold
-            
-        except Exception:
-            return False
-    
     def _calculate_hit_rate(self) -> float:
         """Calculate cache hit rate"""
         total = self.cache_stats["hits"] + self.cache_stats["misses"]
@@ -366,7 +326,8 @@ class EnhancedRedisCache:
                     "keyspace_misses": redis_info.get("keyspace_misses")
                 },
                 "compression_enabled": self.compression_enabled,
-                "serialization_method": self.serialization_method
+                "serialization_method": self.serialization_method,
+                "codec": self.codec.get_stats()
             }
             
         except Exception as e:
@@ -419,9 +380,9 @@ class EnhancedRedisCache:
             logger.error(f"Error closing Redis cache: {e}")
 
 
-def cache_result(ttl: int = 3600, key_prefix: str = "", compress: bool = None):
+def cache_result(ttl: int = 3600, key_prefix: str = "", compress: bool = None, tags: List[str] = ()):
     """
-    Decorator for caching function results
+    Decorator for caching function results in the shared tiered cache
     """
     def decorator(func):
         @wraps(func)
@@ -429,24 +390,12 @@ def cache_result(ttl: int = 3600, key_prefix: str = "", compress: bool = None):
             # Generate cache key
             cache_key = f"{key_prefix}:{func.__name__}:{hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()}"
             
-            # Get cache instance (you'd inject this in your app)
-            from backend.main import get_redis_cache
-            cache = await get_redis_cache()
-            
-            # Try to get from cache
-            result = await cache.get(cache_key)
-            if result is not None:
-                return result
-            
-            # Execute function
-            if asyncio.iscoroutinefunction(func):
-                result = await func(*args, **kwargs)
-            else:
-                result = func(*args, **kwargs)
+            async def compute():
+                if asyncio.iscoroutinefunction(func):
+                    return await func(*args, **kwargs)
+                return func(*args, **kwargs)
             
-            # Store in cache
-            await cache.set(cache_key, result, ttl, compress)
-            return result
+            return await tiered_cache.get_or_set(cache_key, compute, ttl=ttl, tags=[func.__name__, *tags])
         
         return wrapper
     return decorator
@@ -0,0 +1,425 @@
+"""
+Graph Bulk API for Mainza AI
+
+Bulk writes and keyset-paginated reads for the core graph resources (users,
+conversations, memories, documents, chunks, entities, concepts and the links
+between them). A bulk request body is either a JSON array or NDJSON (one
+object per line). Both are parsed item by item as they arrive, so an upload of
+tens of thousands of objects never sits in memory; a single item larger than
+GRAPH_BULK_MAX_ITEM_BYTES is refused. Items are validated against the
+resource's model and written in batches with a single ``UNWIND`` query per
+batch, each batch its own transaction, and each written batch invalidates the
+Neo4j query cache entries it can affect. Invalid items are reported by position
+and skipped; writes are ``MERGE``-based, so re-sending a load that stopped
+part-way is safe. Link writes only count the relationships they created, since
+rows whose end nodes do not exist are skipped.
+
+Lists page by key instead of offset (``WHERE key > $after ORDER BY key``), so
+every page costs the same however deep it is. The stream variant walks all
+pages and emits NDJSON.
+"""
+
+import codecs
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Node labels the bulk API may address, and the property that identifies each
+NODE_KEYS = {
+    "User": "user_id",
+    "Conversation": "conversation_id",
+    "Memory": "memory_id",
+    "Document": "document_id",
+    "Chunk": "chunk_id",
+    "Entity": "entity_id",
+    "Concept": "concept_id",
+    "MainzaState": "state_id",
+}
+
+MAX_REPORTED_ERRORS = 20
+
+
+class BulkRequestError(Exception):
+    """The request body or resource could not be used (client error)"""
+
+
+class BulkItemTooLarge(BulkRequestError):
+    """One item (or NDJSON line) of the body exceeds the per-item byte limit"""
+
+
+@dataclass
+class GraphBulkConfig:
+    """Configuration for bulk graph writes and paged reads"""
+    batch_size: int = int(os.getenv("GRAPH_BULK_BATCH_SIZE", "1000"))
+    max_items: int = int(os.getenv("GRAPH_BULK_MAX_ITEMS", "100000"))
+    max_item_bytes: int = int(os.getenv("GRAPH_BULK_MAX_ITEM_BYTES", str(1024 * 1024)))
+    page_size: int = int(os.getenv("GRAPH_PAGE_SIZE", "500"))
+    max_page_size: int = int(os.getenv("GRAPH_PAGE_MAX_SIZE", "5000"))
+
+
+@dataclass
+class BulkResource:
+    """
+    A bulk-writable resource. ``query`` is the UNWIND write for one batch
+    (``$rows``), or a function of the validated item for resources whose labels
+    vary per item; items are grouped per query. Node resources also set
+    ``label``, ``key`` and ``returns`` to be listable. When ``written_counter``
+    is set, a batch counts that write counter as written instead of its rows.
+    """
+    name: str
+    model: Type[BaseModel]
+    query: Any
+    label: Optional[str] = None
+    key: Optional[str] = None
+    returns: Optional[str] = None
+    written_counter: Optional[str] = None
+
+    def query_for(self, item: BaseModel) -> str:
+        return self.query(item) if callable(self.query) else self.query
+
+
+@dataclass
+class BulkWriteSummary:
+    """Outcome of one bulk request"""
+    resource: str
+    received: int = 0
+    written: int = 0
+    invalid: int = 0
+    batches: int = 0
+    counters: Dict[str, int] = field(default_factory=dict)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    failed: Optional[str] = None
+    limit_exceeded: bool = False
+
+    def add_error(self, index: int, error: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"index": index, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "resource": self.resource,
+            "status": "failed" if self.failed else "complete",
+            "received": self.received,
+            "written": self.written,
+            "invalid": self.invalid,
+            "batches": self.batches,
+            "counters": self.counters,
+            "errors": self.errors,
+            **({"error": self.failed} if self.failed else {}),
+        }
+
+
+class BulkWriteError(Exception):
+    """A batch failed to write; ``summary`` says how far the request got"""
+
+    def __init__(self, message: str, summary: BulkWriteSummary):
+        super().__init__(message)
+        self.summary = summary
+
+
+class _ParseError:
+    """An NDJSON line that is not a JSON object"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+async def iter_request_items(chunks: AsyncIterable[bytes],
+                             max_item_bytes: Optional[int] = None) -> AsyncIterator[Any]:
+    """
+    Objects from a bulk request body, parsed as it arrives: a JSON array item
+    by item, or NDJSON line by line. Malformed NDJSON lines are yielded as
+    parse errors so they are reported with their position. Only the item being
+    parsed is buffered; one over ``max_item_bytes`` raises BulkItemTooLarge.
+    """
+    max_item_bytes = max_item_bytes or GraphBulkConfig.max_item_bytes
+    pending = bytearray()
+    array: Optional[_ArrayParser] = None
+    mode = None
+    async for chunk in chunks:
+        if mode is None:
+            pending += chunk
+            stripped = pending.lstrip()
+            if not stripped:
+                pending.clear()
+                continue
+            mode = "array" if stripped[:1] == b"[" else "ndjson"
+            if mode == "array":
+                array = _ArrayParser(max_item_bytes)
+                chunk, pending = bytes(stripped), bytearray()
+            else:
+                chunk, pending = bytes(pending), bytearray()
+        if mode == "array":
+            for item in array.feed(chunk):
+                yield item
+            continue
+        pending += chunk
+        end = pending.rfind(b"\n")
+        if end >= 0:
+            lines = pending[:end].split(b"\n")
+            del pending[:end + 1]
+            for line in lines:
+                item = _parse_line(line)
+                if item is not None:
+                    yield item
+        if len(pending) > max_item_bytes:
+            raise BulkItemTooLarge(f"NDJSON line exceeds {max_item_bytes} bytes")
+
+    if mode == "array":
+        for item in array.feed(b"", final=True):
+            yield item
+    elif mode == "ndjson":
+        item = _parse_line(pending)
+        if item is not None:
+            yield item
+
+
+class _ArrayParser:
+    """Incremental parser for the items of one top-level JSON array"""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, max_item_bytes: int):
+        self.max_item_bytes = max_item_bytes
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._text = ""
+        self._state = "open"  # open -> first -> (value -> separator)* -> closed
+
+    def feed(self, data: bytes, final: bool = False) -> List[Any]:
+        """Items completed by ``data``; with ``final`` the body must end the array"""
+        try:
+            text = self._text + self._utf8.decode(data, final=final)
+        except UnicodeDecodeError as e:
+            raise BulkRequestError(f"Invalid JSON array: {e}")
+        items = []
+        pos = 0
+        while True:
+            while pos < len(text) and text[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(text):
+                break
+            char = text[pos]
+            if self._state == "closed":
+                raise BulkRequestError("Invalid JSON array: data after the closing bracket")
+            if self._state == "open":
+                self._state, pos = "first", pos + 1
+            elif self._state == "separator":
+                if char not in ",]":
+                    raise BulkRequestError("Invalid JSON array: expected ',' or ']' between items")
+                self._state, pos = ("value" if char == "," else "closed"), pos + 1
+            elif char == "]" and self._state == "first":
+                self._state, pos = "closed", pos + 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(text, pos)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise BulkRequestError(f"Invalid JSON array: {e}")
+                    break  # incomplete; wait for the next chunk
+                if end == len(text) and not final:
+                    break  # a number may continue in the next chunk
+                items.append(item)
+                self._state, pos = "separator", end
+        self._text = text[pos:]
+        if len(self._text) > self.max_item_bytes:
+            raise BulkItemTooLarge(f"JSON array item exceeds {self.max_item_bytes} bytes or is not valid JSON")
+        if final and self._state != "closed":
+            raise BulkRequestError("Invalid JSON array: the body ended before the closing bracket")
+        return items
+
+
+def _parse_line(line: bytes) -> Any:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return _ParseError(f"Invalid JSON: {e}")
+
+
+class GraphBulkService:
+    """Batched UNWIND writes and keyset pages over registered resources"""
+
+    def __init__(self, config: Optional[GraphBulkConfig] = None, db=None, query_cache=None):
+        self.config = config or GraphBulkConfig()
+        self._db = db
+        self._query_cache = query_cache
+        self.resources: Dict[str, BulkResource] = {}
+        self.stats = {"requests": 0, "items_written": 0, "items_invalid": 0, "batches": 0,
+                      "failed_batches": 0, "pages_served": 0}
+
+    @property
+    def db(self):
+        if self._db is None:
+            from backend.utils.unified_database_manager import unified_database_manager
+            self._db = unified_database_manager
+        return self._db
+
+    @property
+    def query_cache(self):
+        # Bulk writes bypass neo4j_unified, so its read cache is invalidated here
+        if self._query_cache is None:
+            from backend.utils.neo4j_unified import neo4j_unified
+            self._query_cache = neo4j_unified.query_cache
+        return self._query_cache
+
+    def register(self, resource: BulkResource):
+        self.resources[resource.name] = resource
+
+    def resource(self, name: str, listable: bool = False) -> BulkResource:
+        resource = self.resources.get(name)
+        if resource is None or (listable and resource.label is None):
+            kind = "listable resource" if listable else "resource"
+            raise BulkRequestError(f"Unknown {kind} '{name}'. Available: "
+                                   f"{sorted(n for n, r in self.resources.items() if r.label or not listable)}")
+        return resource
+
+    async def write(self, name: str, items: AsyncIterable[Any]) -> BulkWriteSummary:
+        """Validate and write ``items`` in bounded UNWIND batches"""
+        resource = self.resource(name)
+        summary = BulkWriteSummary(resource=name)
+        self.stats["requests"] += 1
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+
+        async for raw in items:
+            if summary.received >= self.config.max_items:
+                summary.limit_exceeded = True
+                summary.failed = f"Stopped at the limit of {self.config.max_items} items per request"
+                break
+            index = summary.received
+            summary.received += 1
+            if isinstance(raw, _ParseError):
+                summary.add_error(index, raw.error)
+                continue
+            try:
+                item = resource.model.model_validate(raw)
+                query = resource.query_for(item)
+            except (ValidationError, ValueError) as e:
+                summary.add_error(index, str(e).splitlines()[0] if isinstance(e, ValidationError) else str(e))
+                continue
+            rows = pending.setdefault(query, [])
+            rows.append(item.model_dump())
+            if len(rows) >= self.config.batch_size:
+                await self._flush(resource, query, pending.pop(query), summary)
+
+        for query, rows in pending.items():
+            await self._flush(resource, query, rows, summary)
+
+        self.stats["items_written"] += summary.written
+        self.stats["items_invalid"] += summary.invalid
+        logger.info(f"📦 Bulk {name}: {summary.written} written in {summary.batches} batches, "
+                    f"{summary.invalid} invalid")
+        return summary
+
+    async def _flush(self, resource: BulkResource, query: str, rows: List[Dict[str, Any]],
+                     summary: BulkWriteSummary):
+        try:
+            counters = await self.db.execute_write_query(query, {"rows": rows})
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            summary.failed = f"Batch {summary.batches + 1} failed after {summary.written} items were written: {e}"
+            logger.error(f"❌ Bulk {summary.resource}: {summary.failed}")
+            raise BulkWriteError(summary.failed, summary) from e
+        self.query_cache.invalidate(query)
+        counters = counters or {}
+        summary.batches += 1
+        summary.written += counters.get(resource.written_counter, 0) if resource.written_counter else len(rows)
+        self.stats["batches"] += 1
+        for counter, value in counters.items():
+            if value:
+                summary.counters[counter] = summary.counters.get(counter, 0) + value
+
+    def _page_query(self, resource: BulkResource) -> str:
+        return f"""
+        MATCH (n:{resource.label})
+        WHERE n.{resource.key} IS NOT NULL AND ($after IS NULL OR n.{resource.key} > $after)
+        RETURN {resource.returns}
+        ORDER BY n.{resource.key}
+        LIMIT $limit
+        """
+
+    def page_limit(self, limit: Optional[int]) -> int:
+        return max(1, min(limit or self.config.page_size, self.config.max_page_size))
+
+    async def page(self, name: str, after: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """One page in key order; pass ``next_cursor`` as ``after`` for the next one"""
+        resource = self.resource(name, listable=True)
+        items, next_cursor = await self._fetch_page(resource, after, self.page_limit(limit))
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def stream(self, name: str, after: Optional[str] = None,
+                     limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Every item after ``after`` as NDJSON, fetched page by page"""
+        resource = self.resource(name, listable=True)
+        page_size = self.page_limit(limit)
+        while True:
+            items, after = await self._fetch_page(resource, after, page_size)
+            if items:
+                yield "".join(json.dumps(item, default=str) + "\n" for item in items).encode("utf-8")
+            if after is None:
+                return
+
+    async def _fetch_page(self, resource: BulkResource, after: Optional[str],
+                          limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        items = await self.db.execute_query(self._page_query(resource), {"after": after, "limit": limit})
+        self.stats["pages_served"] += 1
+        next_cursor = items[-1][resource.key] if len(items) == limit else None
+        return items, next_cursor
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "batch_size": self.config.batch_size,
+            "resources": sorted(self.resources),
+        }
+
+
+def node_resource(name: str, model: Type[BaseModel], label: str, set_clause: str,
+                  fields: Dict[str, str], expressions: Optional[Dict[str, str]] = None) -> BulkResource:
+    """
+    A node resource: MERGE on the label's key, then ``set_clause`` (aliases
+    ``n`` and ``row``). ``fields`` maps listed field names to node properties;
+    ``expressions`` maps further listed fields to Cypher expressions over ``n``
+    (e.g. a pattern comprehension for a related node's key).
+    """
+    key = NODE_KEYS[label]
+    query = f"""
+    UNWIND $rows AS row
+    MERGE (n:{label} {{{key}: row.{key}}})
+    {set_clause}
+    """
+    projection = ", ".join(
+        [f"n.{prop} AS {name_}" for name_, prop in {key: key, **fields}.items()]
+        + [f"{expression} AS {name_}" for name_, expression in (expressions or {}).items()]
+    )
+    return BulkResource(name=name, model=model, query=query, label=label, key=key, returns=projection)
+
+
+def link_resource(name: str, model: Type[BaseModel], query: Any) -> BulkResource:
+    """A link resource: ``query`` is a ``link_query`` or a function returning one; written counts created relationships"""
+    return BulkResource(name=name, model=model, query=query, written_counter="relationships_created")
+
+
+def link_query(source_label: str, source_field: str, relationship: str,
+               target_label: str, target_field: str) -> str:
+    """UNWIND write of ``relationship`` between existing nodes; rows whose ends are missing are skipped"""
+    if source_label not in NODE_KEYS or target_label not in NODE_KEYS:
+        raise ValueError(f"Unsupported node type: {source_label if source_label not in NODE_KEYS else target_label}")
+    return f"""
+    UNWIND $rows AS row
+    MATCH (a:{source_label} {{{NODE_KEYS[source_label]}: row.{source_field}}})
+    MATCH (b:{target_label} {{{NODE_KEYS[target_label]}: row.{target_field}}})
+    MERGE (a)-[:{relationship}]->(b)
+    """
+
+
+# Global graph bulk service instance
+graph_bulk = GraphBulkService()
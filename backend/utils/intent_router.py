@@ -0,0 +1,339 @@
+"""
+Semantic Intent Router for Mainza AI
+
+Routes a query to an agent by nearest-centroid classification over sentence
+embeddings instead of substring checks. Each agent has a prototype: the
+normalised mean embedding of labelled seed examples plus queries from
+successful, well-rated AgentActivity records, refreshed periodically. A
+decision is only accepted when the best prototype is similar enough and
+clearly ahead of the runner-up; otherwise the caller falls back to its rules.
+
+Query embeddings computed for routing are kept in a small LRU so retrieval
+for the same turn (rag_retrieval) reuses them instead of encoding twice.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EmbedBatch = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# Labelled examples the prototypes start from (routing agent name -> queries)
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "simple_chat": [
+        "hello", "hi there", "hey, how are you?", "good morning", "good evening Mainza",
+        "how do you feel today?", "what's up?", "thanks, that was helpful", "tell me a joke",
+        "who are you?", "what is your name?", "nice to meet you", "I'm feeling tired today",
+        "can you help me write a short poem?", "what do you think about music?",
+        "this is great", "ok cool", "bye for now",
+    ],
+    "graphmaster": [
+        "what do you remember about my project?", "search my memories for the trip to Lisbon",
+        "which concepts are related to consciousness in the knowledge graph?",
+        "show the relationships between my notes on physics and philosophy",
+        "what did I tell you last week about my sister?", "find documents about neural networks",
+        "summarise everything you know about quantum computing from my documents",
+        "how are the concepts of memory and learning connected?",
+        "list the entities mentioned in the paper I uploaded",
+        "explain how my research notes on climate policy link together",
+        "what have we discussed about meditation before?", "recall our conversation about the budget",
+    ],
+    "taskmaster": [
+        "remind me to call the dentist tomorrow", "add buy milk to my todo list",
+        "schedule a meeting with Anna on Friday at 3pm", "what tasks do I have today?",
+        "mark the report task as done", "create a task to review the pull request",
+        "show my pending tasks", "plan my week", "delete the gym reminder",
+        "set a deadline for the presentation next Monday",
+    ],
+}
+
+# AgentActivity.agent_name -> routing agent name
+ACTIVITY_AGENT_NAMES = {
+    "SimpleChat": "simple_chat",
+    "GraphMaster": "graphmaster",
+    "TaskMaster": "taskmaster",
+}
+
+ACTIVITY_EXAMPLES_QUERY = """
+MATCH (aa:AgentActivity)
+WHERE aa.agent_name IN $agent_names AND aa.success = true AND aa.query IS NOT NULL
+  AND coalesce(aa.result_quality, 0.0) >= $min_quality
+RETURN aa.agent_name AS agent_name, aa.query AS query
+ORDER BY aa.timestamp DESC
+LIMIT $limit
+"""
+
+
+@dataclass
+class IntentRouterConfig:
+    """Thresholds, learning and cache settings"""
+    enabled: bool = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+    min_similarity: float = float(os.getenv("INTENT_ROUTER_MIN_SIMILARITY", "0.35"))
+    min_margin: float = float(os.getenv("INTENT_ROUTER_MIN_MARGIN", "0.05"))
+    activity_limit: int = int(os.getenv("INTENT_ROUTER_ACTIVITY_LIMIT", "500"))
+    activity_min_quality: float = float(os.getenv("INTENT_ROUTER_ACTIVITY_MIN_QUALITY", "0.5"))
+    max_examples_per_agent: int = int(os.getenv("INTENT_ROUTER_MAX_EXAMPLES_PER_AGENT", "200"))
+    refresh_interval: float = float(os.getenv("INTENT_ROUTER_REFRESH_SECONDS", "3600"))
+    embedding_cache_size: int = int(os.getenv("INTENT_ROUTER_EMBEDDING_CACHE_SIZE", "1024"))
+
+
+@dataclass
+class RouteDecision:
+    """Outcome of one semantic routing attempt"""
+    agent_name: str
+    similarity: float
+    margin: float
+    confident: bool
+    scores: Dict[str, float]
+    latency_ms: float
+
+    @property
+    def confidence(self) -> float:
+        # Similarity and separation from the runner-up both matter
+        return round(min(0.95, max(0.0, 0.5 + self.similarity / 2 + self.margin)), 3)
+
+
+@dataclass
+class IntentRouterStats:
+    """Routing counters"""
+    routed: int = 0
+    fallbacks: int = 0
+    unavailable: int = 0
+    embedding_cache_hits: int = 0
+    embedding_cache_misses: int = 0
+    total_latency_ms: float = 0.0
+    activity_examples: int = 0
+    last_refresh: Optional[float] = None
+    decisions: Dict[str, int] = field(default_factory=dict)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _cache_key(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+async def _default_embed(texts: List[str]) -> List[List[float]]:
+    # Same model as the chunk index, so routing embeddings can serve retrieval
+    from backend.utils.embedding import get_embeddings
+    return await asyncio.to_thread(get_embeddings, texts)
+
+
+class SemanticIntentRouter:
+    """Nearest-centroid intent classification over agent prototypes"""
+
+    def __init__(self, config: Optional[IntentRouterConfig] = None, embed: Optional[EmbedBatch] = None,
+                 db=None, seed_examples: Optional[Dict[str, List[str]]] = None):
+        self.config = config or IntentRouterConfig()
+        self.embed = embed or _default_embed
+        self._db = db
+        self.seed_examples = seed_examples or SEED_EXAMPLES
+        self.stats = IntentRouterStats()
+        self._agents: List[str] = []
+        self._prototypes: Optional[np.ndarray] = None
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._build_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._learned_at: Optional[float] = None
+        self._build_failed_at: Optional[float] = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            from backend.utils.unified_database_manager import unified_database_manager
+            self._db = unified_database_manager
+        return self._db
+
+    @property
+    def ready(self) -> bool:
+        return self._prototypes is not None
+
+    async def build(self, extra_examples: Iterable[Tuple[str, str]] = ()) -> bool:
+        """(Re)compute prototypes from seed examples plus ``(agent, query)`` pairs"""
+        examples: Dict[str, List[str]] = {agent: list(queries) for agent, queries in self.seed_examples.items()}
+        for agent, query in extra_examples:
+            bucket = examples.get(agent)
+            if bucket is not None and len(bucket) < self.config.max_examples_per_agent and query not in bucket:
+                bucket.append(query)
+
+        agents = sorted(agent for agent, queries in examples.items() if queries)
+        texts = [query for agent in agents for query in examples[agent]]
+        vectors = _normalize(np.asarray(await self.embed(texts), dtype=np.float32))
+        if not np.any(vectors):
+            logger.warning("⚠️ Intent router has no usable embeddings; keyword routing stays in effect")
+            return False
+
+        prototypes, offset = [], 0
+        for agent in agents:
+            count = len(examples[agent])
+            prototypes.append(vectors[offset:offset + count].mean(axis=0))
+            offset += count
+        self._agents, self._prototypes = agents, _normalize(np.stack(prototypes))
+        self.stats.last_refresh = time.time()
+        logger.info(f"✅ Intent router prototypes built from {len(texts)} examples for {len(agents)} agents")
+        return True
+
+    async def learn_from_activities(self) -> int:
+        """Rebuild prototypes including successful past AgentActivity queries"""
+        rows = await self.db.execute_query(ACTIVITY_EXAMPLES_QUERY, {
+            "agent_names": list(ACTIVITY_AGENT_NAMES),
+            "min_quality": self.config.activity_min_quality,
+            "limit": self.config.activity_limit,
+        })
+        pairs = [
+            (ACTIVITY_AGENT_NAMES[row["agent_name"]], row["query"])
+            for row in rows or [] if row.get("agent_name") in ACTIVITY_AGENT_NAMES and row.get("query")
+        ]
+        async with self._build_lock:
+            if await self.build(pairs):
+                self.stats.activity_examples = len(pairs)
+        return len(pairs)
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Normalised query embedding, served from the LRU when seen recently"""
+        key = _cache_key(query)
+        cached = self._embeddings.get(key)
+        if cached is not None:
+            self._embeddings.move_to_end(key)
+            self.stats.embedding_cache_hits += 1
+            return cached
+        self.stats.embedding_cache_misses += 1
+        vector = _normalize(np.asarray((await self.embed([query]))[0], dtype=np.float32))
+        self._embeddings[key] = vector
+        if len(self._embeddings) > self.config.embedding_cache_size:
+            self._embeddings.popitem(last=False)
+        return vector
+
+    def cached_embedding(self, query: str) -> Optional[List[float]]:
+        """Embedding computed for ``query`` during routing, if still cached"""
+        vector = self._embeddings.get(_cache_key(query))
+        return vector.tolist() if vector is not None else None
+
+    async def route(self, query: str) -> Optional[RouteDecision]:
+        """Best agent for ``query``, or None when the router cannot decide at all"""
+        if not self.config.enabled:
+            return None
+        if not self.ready:
+            async with self._build_lock:
+                retry_due = (self._build_failed_at is None
+                             or time.time() - self._build_failed_at >= self.config.refresh_interval)
+                if not self.ready and (not retry_due or not await self.build()):
+                    if retry_due:
+                        self._build_failed_at = time.time()
+                    self.stats.unavailable += 1
+                    return None
+        self._schedule_refresh()
+
+        started = time.perf_counter()
+        vector = await self.embed_query(query)
+        if not np.any(vector):
+            self.stats.unavailable += 1
+            return None
+        similarities = self._prototypes @ vector
+        order = np.argsort(similarities)[::-1]
+        best = float(similarities[order[0]])
+        margin = best - float(similarities[order[1]]) if len(order) > 1 else best
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        decision = RouteDecision(
+            agent_name=self._agents[order[0]],
+            similarity=best,
+            margin=margin,
+            confident=best >= self.config.min_similarity and margin >= self.config.min_margin,
+            scores={agent: round(float(score), 4) for agent, score in zip(self._agents, similarities)},
+            latency_ms=latency_ms
+        )
+        self.stats.total_latency_ms += latency_ms
+        if decision.confident:
+            self.stats.routed += 1
+            self.stats.decisions[decision.agent_name] = self.stats.decisions.get(decision.agent_name, 0) + 1
+        else:
+            self.stats.fallbacks += 1
+        return decision
+
+    def _schedule_refresh(self):
+        """Relearn from agent activity in the background once per refresh interval"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if self._learned_at is None or time.time() - self._learned_at >= self.config.refresh_interval:
+            self._learned_at = time.time()
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self):
+        try:
+            learned = await self.learn_from_activities()
+            logger.debug(f"Intent router refreshed with {learned} activity examples")
+        except Exception as e:
+            logger.warning(f"⚠️ Intent router could not learn from agent activity: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        attempts = self.stats.routed + self.stats.fallbacks
+        return {
+            "ready": self.ready,
+            "agents": list(self._agents),
+            "routed": self.stats.routed,
+            "fallbacks": self.stats.fallbacks,
+            "unavailable": self.stats.unavailable,
+            "decisions": dict(self.stats.decisions),
+            "avg_latency_ms": round(self.stats.total_latency_ms / attempts, 3) if attempts else 0.0,
+            "embedding_cache_size": len(self._embeddings),
+            "embedding_cache_hits": self.stats.embedding_cache_hits,
+            "embedding_cache_misses": self.stats.embedding_cache_misses,
+            "activity_examples": self.stats.activity_examples,
+            "last_refresh": self.stats.last_refresh,
+        }
+
+
+async def evaluate_router(
+    route: Callable[[str], Awaitable[Optional[str]]],
+    labelled: Sequence[Tuple[str, str]]
+) -> Dict[str, Any]:
+    """Accuracy, per-agent precision/recall, confusion and latency of ``route`` on ``(query, agent)`` pairs"""
+    confusion: Dict[str, Dict[str, int]] = {}
+    latencies: List[float] = []
+    correct = 0
+    for query, expected in labelled:
+        started = time.perf_counter()
+        predicted = await route(query) or "none"
+        latencies.append((time.perf_counter() - started) * 1000)
+        confusion.setdefault(expected, {}).setdefault(predicted, 0)
+        confusion[expected][predicted] += 1
+        correct += predicted == expected
+
+    agents = sorted({agent for _, agent in labelled})
+    per_agent = {}
+    for agent in agents:
+        true_positive = confusion.get(agent, {}).get(agent, 0)
+        predicted_total = sum(row.get(agent, 0) for row in confusion.values())
+        expected_total = sum(confusion.get(agent, {}).values())
+        per_agent[agent] = {
+            "precision": round(true_positive / predicted_total, 3) if predicted_total else 0.0,
+            "recall": round(true_positive / expected_total, 3) if expected_total else 0.0,
+        }
+    ordered = sorted(latencies)
+    return {
+        "samples": len(labelled),
+        "accuracy": round(correct / len(labelled), 3) if labelled else 0.0,
+        "per_agent": per_agent,
+        "confusion": confusion,
+        "latency_ms": {
+            "p50": round(ordered[len(ordered) // 2], 3) if ordered else 0.0,
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3) if ordered else 0.0,
+            "max": round(ordered[-1], 3) if ordered else 0.0,
+        },
+    }
+
+
+# Global intent router instance
+intent_router = SemanticIntentRouter()
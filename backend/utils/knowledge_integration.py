@@ -8,9 +8,9 @@ import logging
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from backend.utils.unified_database_manager import unified_database_manager
-from backend.utils.embedding_enhanced import get_embedding
 from backend.core.performance_optimization import PerformanceOptimizer
 from backend.core.enhanced_error_handling import ErrorHandler, ErrorSeverity, handle_errors
+from backend.utils.turn_context_engine import memory_context_to_knowledge_view, attach_memory_context
 import asyncio
 
 logger = logging.getLogger(__name__)
@@ -145,11 +145,7 @@ class KnowledgeIntegrationManager:
             
             # Add enhanced memory context if available
             if enhanced_memory_context:
-                knowledge_context.update({
-                    "memory_context": enhanced_memory_context,
-                    "formatted_memory_context": enhanced_memory_context.get("formatted_context", ""),
-                    "memory_context_strength": enhanced_memory_context.get("context_strength", 0.0)
-                })
+                knowledge_context = attach_memory_context(knowledge_context, enhanced_memory_context)
             
             logger.debug(f"✅ Retrieved knowledge context with {len(filtered_context['concepts'])} concepts, "
                         f"{len(filtered_context['memories'])} memories, {len(filtered_context['conversations'])} conversations")
@@ -223,9 +219,6 @@ class KnowledgeIntegrationManager:
     async def _get_query_related_concepts(self, query: str, depth: int = 2) -> List[Dict[str, Any]]:
         """Get concepts related to the current query"""
         try:
-            # Get query embedding for semantic similarity
-            query_embedding = get_embedding(query)
-            
             # Extract key terms from query for concept matching
             query_terms = self._extract_key_terms(query)
             
@@ -272,8 +265,6 @@ class KnowledgeIntegrationManager:
     async def _get_relevant_memories(self, user_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get memories relevant to the current query and user"""
         try:
-            # Get query embedding for similarity search
-            query_embedding = get_embedding(query)
             query_terms = self._extract_key_terms(query)
             
             # Simplified query to avoid complex UNION and scoping issues
@@ -531,34 +522,11 @@ class KnowledgeIntegrationManager:
                 context_type="hybrid"
             )
             
-            if not memory_context or not memory_context.relevant_memories:
+            context_dict = memory_context_to_knowledge_view(memory_context)
+            if context_dict is None:
                 logger.debug("No relevant memory context found")
                 return None
             
-            # Convert to dict format for integration
-            context_dict = {
-                "relevant_memories": [
-                    {
-                        "memory_id": m.memory_id,
-                        "content": m.content,
-                        "memory_type": m.memory_type,
-                        "agent_name": m.agent_name,
-                        "relevance_score": m.relevance_score,
-                        "consciousness_level": m.consciousness_level,
-                        "emotional_state": m.emotional_state,
-                        "created_at": m.created_at
-                    }
-                    for m in memory_context.relevant_memories
-                ],
-                "conversation_history": memory_context.conversation_history,
-                "related_concepts": memory_context.related_concepts,
-                "context_strength": memory_context.context_strength,
-                "consciousness_alignment": memory_context.consciousness_alignment,
-                "temporal_relevance": memory_context.temporal_relevance,
-                "formatted_context": memory_context.formatted_context,
-                "metadata": memory_context.metadata
-            }
-            
             logger.debug(f"✅ Enhanced memory context: {len(memory_context.relevant_memories)} memories, "
                         f"strength={memory_context.context_strength:.2f}")
             
@@ -0,0 +1,397 @@
+"""
+Lazy Component Registry for Mainza AI
+
+Registers heavy components (Whisper, TTS, quantum engines, ...) as lazily
+initialized singletons so the API process can start serving requests within
+seconds. Components are loaded on first use or by a background warm-up task,
+and per-component import/initialization timings are recorded for the
+readiness endpoints. Critical components (the ones a request cannot be served
+without) gate readiness; they are always warmed up, and retried with exponential
+backoff while they fail, up to STARTUP_CRITICAL_MAX_RETRIES attempts.
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentState(Enum):
+    """Lifecycle state of a lazily initialized component"""
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ComponentUnavailableError(RuntimeError):
+    """Raised when a component failed to load or is not registered"""
+    pass
+
+
+@dataclass
+class ComponentStatus:
+    """Load status and timings for a registered component"""
+    name: str
+    state: ComponentState = ComponentState.PENDING
+    critical: bool = False
+    warmup: bool = False
+    import_seconds: Optional[float] = None
+    init_seconds: Optional[float] = None
+    loaded_at: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["state"] = self.state.value
+        return data
+
+
+class LazyComponent:
+    """
+    A singleton that is built on first access.
+
+    Loading is split into an optional import stage (``module``) and an
+    initialization stage (``factory``) so both costs can be reported
+    separately. Access is thread-safe; concurrent callers block on the same
+    load instead of building the component twice. ``get`` blocks while the
+    component loads, so code on the event loop uses ``aget``. An async
+    ``factory`` (for example a connectivity check) can only be loaded by ``aget``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[..., Any],
+        module: Optional[str] = None,
+        critical: bool = False,
+        warmup: bool = False,
+    ):
+        self.name = name
+        self.factory = factory
+        self.module = module
+        self.status = ComponentStatus(name=name, critical=critical, warmup=warmup)
+        self._instance: Any = None
+        self._lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+        self.is_async = inspect.iscoroutinefunction(factory)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status.state == ComponentState.READY
+
+    def get(self) -> Any:
+        """Return the component instance, loading it if necessary"""
+        if self.status.state == ComponentState.READY:
+            return self._instance
+
+        with self._lock:
+            if self.status.state == ComponentState.READY:
+                return self._instance
+            self._raise_if_failed()
+            if self.is_async:
+                raise ComponentUnavailableError(f"Component '{self.name}' loads asynchronously; use aget()")
+            self._load()
+            return self._instance
+
+    async def aget(self) -> Any:
+        """Return the component instance without blocking the event loop"""
+        if self.status.state == ComponentState.READY:
+            return self._instance
+        if not self.is_async:
+            return await asyncio.to_thread(self.get)
+        async with self._async_lock:
+            if self.status.state == ComponentState.READY:
+                return self._instance
+            self._raise_if_failed()
+            await self._aload()
+            return self._instance
+
+    def _raise_if_failed(self):
+        if self.status.state == ComponentState.FAILED:
+            raise ComponentUnavailableError(f"Component '{self.name}' failed to load: {self.status.error}")
+
+    def get_optional(self) -> Any:
+        """Return the component instance, or None if it cannot be loaded"""
+        try:
+            return self.get()
+        except ComponentUnavailableError:
+            return None
+
+    def reset(self):
+        """Forget a failed or loaded instance so the next access retries"""
+        with self._lock:
+            self._instance = None
+            self.status = ComponentStatus(
+                name=self.name, critical=self.status.critical, warmup=self.status.warmup
+            )
+
+    def _load(self):
+        self.status.state = ComponentState.LOADING
+        try:
+            imported = self._import()
+            start = time.perf_counter()
+            instance = self.factory(imported) if self.module else self.factory()
+            self._loaded(instance, start)
+        except Exception as e:
+            self._failed(e)
+
+    async def _aload(self):
+        self.status.state = ComponentState.LOADING
+        try:
+            imported = self._import()
+            start = time.perf_counter()
+            instance = await (self.factory(imported) if self.module else self.factory())
+            self._loaded(instance, start)
+        except Exception as e:
+            self._failed(e)
+
+    def _import(self) -> Any:
+        start = time.perf_counter()
+        imported = importlib.import_module(self.module) if self.module else None
+        self.status.import_seconds = round(time.perf_counter() - start, 4)
+        return imported
+
+    def _loaded(self, instance: Any, init_started: float):
+        self.status.init_seconds = round(time.perf_counter() - init_started, 4)
+        if instance is None:
+            raise ComponentUnavailableError(f"Component '{self.name}' factory returned None")
+
+        self._instance = instance
+        self.status.state = ComponentState.READY
+        self.status.loaded_at = datetime.now(timezone.utc).isoformat()
+        logger.info(
+            f"✅ Component '{self.name}' ready "
+            f"(import {self.status.import_seconds}s, init {self.status.init_seconds}s)"
+        )
+
+    def _failed(self, error: Exception):
+        self.status.state = ComponentState.FAILED
+        self.status.error = str(error)
+        logger.warning(f"⚠️ Component '{self.name}' failed to load: {error}")
+        raise ComponentUnavailableError(f"Component '{self.name}' failed to load: {error}") from error
+
+
+class LazyComponentProxy:
+    """
+    Attribute proxy for a lazily initialized module-level singleton.
+
+    Lets modules keep exporting a global instance (``from x import engine``)
+    while deferring construction until the first attribute access. That
+    first access blocks, so async handlers load the component beforehand
+    with ``LazyComponentRegistry.requires`` or ``aget``.
+    """
+
+    def __init__(self, component: LazyComponent):
+        object.__setattr__(self, "_component", component)
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._component.get(), item)
+
+    def __setattr__(self, key: str, value: Any):
+        setattr(self._component.get(), key, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyComponentProxy {self._component.name} ({self._component.status.state.value})>"
+
+
+class LazyComponentRegistry:
+    """Registry of lazily initialized heavy components"""
+
+    def __init__(self):
+        self.components: Dict[str, LazyComponent] = {}
+        self.process_started_at = time.perf_counter()
+        self.warmup_enabled = os.getenv("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+        self.critical_retry_seconds = float(os.getenv("STARTUP_CRITICAL_RETRY_SECONDS", "10"))
+        self.critical_retry_max_seconds = float(os.getenv("STARTUP_CRITICAL_RETRY_MAX_SECONDS", "300"))
+        self.critical_max_retries = int(os.getenv("STARTUP_CRITICAL_MAX_RETRIES", "10"))
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._background_loads: Dict[str, Any] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[..., Any],
+        module: Optional[str] = None,
+        critical: bool = False,
+        warmup: bool = False,
+    ) -> LazyComponent:
+        """
+        Register a component factory.
+
+        Args:
+            name: Unique component name
+            factory: Builds the instance (sync or async); receives the imported module if ``module`` is set
+            module: Optional module imported (and timed) before calling the factory
+            critical: Whether readiness requires this component to be loaded
+            warmup: Whether the component is loaded by the background warm-up task
+        """
+        if name in self.components:
+            return self.components[name]
+        component = LazyComponent(name, factory, module=module, critical=critical, warmup=warmup)
+        self.components[name] = component
+        return component
+
+    def proxy(self, name: str) -> LazyComponentProxy:
+        """Return an attribute proxy for a registered component"""
+        return LazyComponentProxy(self._component(name))
+
+    def get(self, name: str) -> Any:
+        return self._component(name).get()
+
+    async def aget(self, name: str) -> Any:
+        return await self._component(name).aget()
+
+    def get_optional(self, name: str) -> Any:
+        if name not in self.components:
+            return None
+        return self.components[name].get_optional()
+
+    def load_in_background(self, name: str) -> bool:
+        """
+        Return whether ``name`` is loaded. If it is not, start loading it
+        (unless a load is already running) without waiting, so request handlers
+        can answer "try again later" instead of blocking on a slow load. A sync
+        component loads on a daemon thread; an async one needs a running loop.
+        Raises ComponentUnavailableError if the component failed to load.
+        """
+        component = self._component(name)
+        if component.is_ready:
+            return True
+        component._raise_if_failed()
+        running = self._background_loads.get(name)
+        if component.status.state == ComponentState.PENDING and not (running and not running.done()):
+            if component.is_async:
+                self._background_loads[name] = asyncio.ensure_future(self._load_quietly(component))
+            else:
+                future: Future = Future()
+                threading.Thread(
+                    target=lambda: future.set_result(component.get_optional()),
+                    name=f"load-{name}", daemon=True,
+                ).start()
+                self._background_loads[name] = future
+        return False
+
+    @staticmethod
+    async def _load_quietly(component: LazyComponent):
+        try:
+            await component.aget()
+        except ComponentUnavailableError:
+            pass
+
+    def requires(self, *names: str) -> Callable[[], Awaitable[None]]:
+        """
+        FastAPI dependency that loads ``names`` off the event loop before the
+        handler runs, so the handler can use their proxies without blocking.
+        Responds 503 if a component cannot be loaded.
+        """
+        async def load_components():
+            for name in names:
+                try:
+                    await self.aget(name)
+                except ComponentUnavailableError as e:
+                    from fastapi import HTTPException
+                    raise HTTPException(status_code=503, detail=str(e))
+        return load_components
+
+    def _component(self, name: str) -> LazyComponent:
+        component = self.components.get(name)
+        if component is None:
+            raise ComponentUnavailableError(f"Component '{name}' is not registered")
+        return component
+
+    def _warmup_targets(self, include_optional: bool = True) -> List[str]:
+        critical = [name for name, c in self.components.items() if c.status.critical]
+        optional = [name for name, c in self.components.items() if c.status.warmup and not c.status.critical]
+        return critical + (optional if include_optional else [])
+
+    async def warm_up(self, names: Optional[List[str]] = None):
+        """Load components one at a time (critical ones first) without blocking the loop"""
+        targets = names or self._warmup_targets()
+        for name in targets:
+            component = self.components.get(name)
+            if component is None or component.status.state in (ComponentState.READY, ComponentState.FAILED):
+                continue
+            try:
+                await component.aget()
+            except ComponentUnavailableError:
+                pass
+
+    async def retry_failed_critical(self):
+        """
+        Retry failed critical components (e.g. Neo4j still starting) with
+        exponential backoff, giving up after ``critical_max_retries`` attempts
+        """
+        for attempt in range(self.critical_max_retries + 1):
+            failed = [
+                c for c in self.components.values()
+                if c.status.critical and c.status.state == ComponentState.FAILED
+            ]
+            if not failed:
+                return
+            if attempt == self.critical_max_retries:
+                logger.error(
+                    f"❌ Giving up on critical components after {attempt} retries: "
+                    f"{', '.join(c.name for c in failed)}; readiness stays false until restart"
+                )
+                return
+            await asyncio.sleep(min(self.critical_retry_seconds * 2 ** attempt, self.critical_retry_max_seconds))
+            for component in failed:
+                component.reset()
+                try:
+                    await component.aget()
+                except ComponentUnavailableError:
+                    pass
+
+    async def _warm_up_and_retry(self, names: List[str]):
+        await self.warm_up(names)
+        await self.retry_failed_critical()
+
+    def start_background_warmup(self) -> Optional[asyncio.Task]:
+        """
+        Schedule warm-up without awaiting it. Critical components are always
+        loaded (readiness depends on them); the rest only if warm-up is enabled.
+        """
+        if not self.warmup_enabled:
+            logger.info("Background component warm-up disabled via STARTUP_WARMUP_ENABLED; loading critical components only")
+        if self._warmup_task is None or self._warmup_task.done():
+            targets = self._warmup_targets(include_optional=self.warmup_enabled)
+            self._warmup_task = asyncio.create_task(self._warm_up_and_retry(targets))
+        return self._warmup_task
+
+    async def stop_background_warmup(self):
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except asyncio.CancelledError:
+                pass
+
+    def get_readiness(self) -> Dict[str, Any]:
+        """Readiness report: ready once every critical component is loaded"""
+        components = {name: c.status.to_dict() for name, c in self.components.items()}
+        pending_critical = [
+            name for name, c in self.components.items()
+            if c.status.critical and c.status.state != ComponentState.READY
+        ]
+        return {
+            "ready": not pending_critical,
+            "pending_critical": pending_critical,
+            "uptime_seconds": round(time.perf_counter() - self.process_started_at, 3),
+            "warmup_running": bool(self._warmup_task and not self._warmup_task.done()),
+            "components": components,
+        }
+
+
+# Global lazy component registry
+lazy_component_registry = LazyComponentRegistry()
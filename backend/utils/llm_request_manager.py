@@ -3,6 +3,15 @@ LLM Request Manager - FIXED VERSION
 Context7 MCP-compliant system for managing LLM requests with user priority
 
 CRITICAL FIX: Ensures user conversations are NEVER throttled
+
+Every model call still passes through adaptive admission control (see
+backend/utils/admission_control.py): user conversations are never paused for
+background work, but under overload they queue fairly and are shed with a
+retry hint instead of piling onto the model server.
+
+Requests submitted with a ``cache_key`` are answered from the shared LLM
+response cache (backend/utils/llm_response_cache.py) when the same key was
+seen for the same model within the TTL.
 """
 
 import asyncio
@@ -12,8 +21,12 @@ from typing import Dict, Any, Optional, List, Callable
 from enum import Enum
 from dataclasses import dataclass, field
 import json
+import uuid
 from collections import defaultdict
 
+from backend.utils.admission_control import AdmissionController, AdmissionRejected
+from backend.utils.llm_response_cache import LLMResponseCache, llm_response_cache
+
 logger = logging.getLogger(__name__)
 
 class RequestPriority(Enum):
@@ -44,9 +57,12 @@ class LLMRequestManager:
     CRITICAL: User conversations are NEVER throttled
     """
     
-    def __init__(self):
+    def __init__(self, admission: Optional[AdmissionController] = None,
+                 response_cache: Optional[LLMResponseCache] = None):
         self.request_queue = asyncio.PriorityQueue()
         self.active_requests: Dict[str, LLMRequest] = {}
+        # Running execution per request, so an abandoned request's model call is cancelled
+        self.request_tasks: Dict[str, asyncio.Task] = {}
         self.user_activity: Dict[str, datetime] = {}
         self.background_paused = False
         self.processing_lock = asyncio.Lock()
@@ -62,9 +78,11 @@ class LLMRequestManager:
         self.user_conversation_protection = True
         self.never_throttle_priorities = {RequestPriority.USER_CONVERSATION, RequestPriority.USER_INTERACTION}
         
-        # Caching
-        self.response_cache: Dict[str, Dict[str, Any]] = {}
-        self.cache_timestamps: Dict[str, datetime] = {}
+        # Adaptive concurrency limit and fair queue in front of the model server
+        self.admission = admission or AdmissionController()
+        
+        # Caching: exact matches, plus near-identical prompts for background priorities
+        self.response_cache = response_cache if response_cache is not None else llm_response_cache
         
         # Statistics
         self.stats = {
@@ -74,6 +92,8 @@ class LLMRequestManager:
             'cached_responses': 0,
             'paused_requests': 0,
             'throttled_requests': 0,
+            'shed_requests': 0,
+            'abandoned_requests': 0,
             'user_conversations_processed': 0  # NEW: Track user conversations
         }
         
@@ -117,10 +137,14 @@ class LLMRequestManager:
             self.stats['user_conversations_processed'] += 1
         
         # Check cache first
-        if cache_key and self._get_cached_response(cache_key, priority):
-            self.stats['cached_responses'] += 1
-            logger.debug(f"Cache hit for request: {cache_key}")
-            return self._get_cached_response(cache_key, priority)
+        cache_caller = getattr(request_func, "__qualname__", priority.name)
+        cache_model = str(kwargs.get("model") or "default")
+        if cache_key:
+            cached = await self.response_cache.lookup(cache_caller, cache_model, cache_key)
+            if cached is not None:
+                self.stats['cached_responses'] += 1
+                logger.debug(f"Cache hit for request: {cache_key[:80]}")
+                return cached
         
         # Update user activity for user requests
         if user_id and priority in self.never_throttle_priorities:
@@ -140,7 +164,7 @@ class LLMRequestManager:
                     return self._get_fallback_response(priority)
         
         # Create request
-        request_id = f"{priority.name}_{datetime.now().timestamp()}"
+        request_id = f"{priority.name}_{datetime.now().timestamp()}_{uuid.uuid4().hex[:8]}"
         request = LLMRequest(
             id=request_id,
             priority=priority,
@@ -151,6 +175,9 @@ class LLMRequestManager:
             timeout=timeout
         )
         
+        # Register before queueing; the processing loop skips requests that are gone
+        self.active_requests[request_id] = request
+        
         # Add to queue with priority
         await self.request_queue.put((priority.value, request))
         self.stats['total_requests'] += 1
@@ -163,8 +190,6 @@ class LLMRequestManager:
             logger.debug(f"Background request queued: {request_id}")
         
         # Wait for result
-        self.active_requests[request_id] = request
-        
         try:
             # Wait for processing with timeout
             result = await asyncio.wait_for(
@@ -172,18 +197,24 @@ class LLMRequestManager:
                 timeout=timeout
             )
             
-            # Cache result if cache_key provided
-            if cache_key and result:
-                self._cache_response(cache_key, result)
+            # Cache result if cache_key provided (never a shed request's retry hint)
+            if cache_key and result and not (isinstance(result, dict) and "retry_after_seconds" in result):
+                await self.response_cache.store(
+                    cache_caller, cache_model, cache_key, result, ttl=self._cache_ttl(priority)
+                )
             
             logger.debug(f"Request completed successfully: {request_id}")
             return result
             
         except asyncio.TimeoutError:
             logger.warning(f"LLM request {request_id} timed out after {timeout}s")
-            self.active_requests.pop(request_id, None)
+            self._abandon_request(request_id)
             return self._get_fallback_response(priority)
         
+        except asyncio.CancelledError:
+            self._abandon_request(request_id)
+            raise
+        
         except Exception as e:
             logger.error(f"LLM request {request_id} failed: {e}")
             self.active_requests.pop(request_id, None)
@@ -198,10 +229,14 @@ class LLMRequestManager:
                 # Get next request from queue
                 priority_value, request = await self.request_queue.get()
                 
+                # The caller timed out or went away while it was queued
+                if request.id not in self.active_requests:
+                    continue
+                
                 # CRITICAL FIX: Always process user conversations immediately
                 if request.priority in self.never_throttle_priorities:
                     logger.debug(f"🚀 IMMEDIATE PROCESSING for user conversation: {request.id}")
-                    asyncio.create_task(self._execute_request(request))
+                    self._start_request(request)
                     continue
                 
                 # Check if we should process this request (for background only)
@@ -215,12 +250,27 @@ class LLMRequestManager:
                 
                 # Process request
                 logger.debug(f"Processing request: {request.id} (priority: {request.priority.name})")
-                asyncio.create_task(self._execute_request(request))
+                self._start_request(request)
                 
             except Exception as e:
                 logger.error(f"Request processing error: {e}")
                 await asyncio.sleep(1)
     
+    def _start_request(self, request: LLMRequest):
+        """Execute a request in its own task, tracked so it can be cancelled"""
+        task = asyncio.create_task(self._execute_request(request))
+        self.request_tasks[request.id] = task
+        task.add_done_callback(lambda _: self.request_tasks.pop(request.id, None))
+    
+    def _abandon_request(self, request_id: str):
+        """Forget a request whose caller stopped waiting and cancel its model call"""
+        self.active_requests.pop(request_id, None)
+        task = self.request_tasks.pop(request_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+            self.stats['abandoned_requests'] += 1
+            logger.debug(f"Cancelled abandoned LLM request: {request_id}")
+    
     async def _execute_request(self, request: LLMRequest):
         """FIXED: Execute a single LLM request with proper error handling"""
         try:
@@ -228,40 +278,60 @@ class LLMRequestManager:
             if request.priority in self.never_throttle_priorities:
                 logger.debug(f"🔓 LOCK-FREE execution for user conversation: {request.id}")
                 
-                # Execute the request function immediately
-                if asyncio.iscoroutinefunction(request.request_func):
-                    result = await request.request_func(*request.args, **request.kwargs)
-                else:
-                    result = request.request_func(*request.args, **request.kwargs)
-                
-                # Store result
-                if request.id in self.active_requests:
-                    self.active_requests[request.id].result = result
-                
-                logger.info(f"✅ USER CONVERSATION completed: {request.id}")
+                if await self._run_admitted(request):
+                    logger.info(f"✅ USER CONVERSATION completed: {request.id}")
                 return
             
             # Use lock for background requests only
             async with self.processing_lock:
                 logger.debug(f"🔒 LOCKED execution for background request: {request.id}")
                 
-                # Execute the request function
-                if asyncio.iscoroutinefunction(request.request_func):
-                    result = await request.request_func(*request.args, **request.kwargs)
-                else:
-                    result = request.request_func(*request.args, **request.kwargs)
-                
-                # Store result
-                if request.id in self.active_requests:
-                    self.active_requests[request.id].result = result
-                
-                logger.debug(f"Background request completed: {request.id}")
+                if await self._run_admitted(request):
+                    logger.debug(f"Background request completed: {request.id}")
                 
         except Exception as e:
             logger.error(f"LLM request execution failed: {request.id} - {e}")
             if request.id in self.active_requests:
                 self.active_requests[request.id].error = str(e)
     
+    async def _run_admitted(self, request: LLMRequest) -> bool:
+        """Run the request function once admission control grants a model slot.
+        
+        Returns False if the request was shed; its result is then the overload response.
+        """
+        deadline = request.timeout
+        if request.priority in self.never_throttle_priorities:
+            deadline = min(self.admission.config.queue_deadline, request.timeout)
+        try:
+            permit = await self.admission.acquire(request.user_id, request.priority.value, deadline=deadline)
+        except AdmissionRejected as e:
+            self.stats['shed_requests'] += 1
+            self.stats['throttled_requests'] += 1
+            logger.warning(f"🚦 LLM request shed ({e.reason}): {request.id} - retry after {e.retry_after_seconds}s")
+            if request.id in self.active_requests:
+                self.active_requests[request.id].result = self._get_overload_response(
+                    request.priority, e.retry_after_seconds
+                )
+            return False
+        
+        dropped = False
+        try:
+            # Execute the request function
+            if asyncio.iscoroutinefunction(request.request_func):
+                result = await request.request_func(*request.args, **request.kwargs)
+            else:
+                result = request.request_func(*request.args, **request.kwargs)
+        except asyncio.TimeoutError:
+            dropped = True
+            raise
+        finally:
+            self.admission.release(permit, dropped=dropped)
+        
+        # Store result
+        if request.id in self.active_requests:
+            self.active_requests[request.id].result = result
+        return True
+    
     async def _wait_for_result(self, request_id: str) -> Any:
         """Wait for request result"""
         max_wait_time = 60  # Maximum wait time in seconds
@@ -331,32 +401,11 @@ class LLMRequestManager:
         
         return False
     
-    def _get_cached_response(self, cache_key: str, priority: RequestPriority = None) -> Optional[Any]:
-        """Get cached response if still valid"""
-        if cache_key not in self.response_cache:
-            return None
-        
-        cache_time = self.cache_timestamps.get(cache_key)
-        if not cache_time:
-            return None
-        
-        # Use different TTL based on request priority
-        ttl = self.cache_ttl
-        if priority and priority in [RequestPriority.BACKGROUND_PROCESSING, RequestPriority.CONSCIOUSNESS_CYCLE]:
-            ttl = self.background_cache_ttl
-        
-        # Check if cache is still valid
-        if (datetime.now() - cache_time).seconds > ttl:
-            self.response_cache.pop(cache_key, None)
-            self.cache_timestamps.pop(cache_key, None)
-            return None
-        
-        return self.response_cache[cache_key]
-    
-    def _cache_response(self, cache_key: str, response: Any):
-        """Cache a response"""
-        self.response_cache[cache_key] = response
-        self.cache_timestamps[cache_key] = datetime.now()
+    def _cache_ttl(self, priority: RequestPriority) -> int:
+        """Use different TTL based on request priority"""
+        if priority in [RequestPriority.BACKGROUND_PROCESSING, RequestPriority.CONSCIOUSNESS_CYCLE]:
+            return self.background_cache_ttl
+        return self.cache_ttl
     
     def _get_fallback_response(self, priority: RequestPriority) -> Any:
         """FIXED: Get fallback response when request cannot be processed"""
@@ -386,6 +435,16 @@ class LLMRequestManager:
         
         return fallback_responses.get(priority, {"status": "unavailable"})
     
+    def _get_overload_response(self, priority: RequestPriority, retry_after_seconds: int) -> Any:
+        """Response for a request shed by admission control"""
+        if priority in self.never_throttle_priorities:
+            return {
+                "status": "throttled",
+                "response": "I'm currently processing other requests.",
+                "retry_after_seconds": retry_after_seconds
+            }
+        return {**self._get_fallback_response(priority), "retry_after_seconds": retry_after_seconds}
+    
     async def _cleanup_loop(self):
         """Cleanup old cache entries and user activity"""
         while True:
@@ -393,14 +452,8 @@ class LLMRequestManager:
                 now = datetime.now()
                 
                 # Clean old cache entries
-                expired_cache_keys = [
-                    key for key, timestamp in self.cache_timestamps.items()
-                    if (now - timestamp).seconds > self.cache_ttl
-                ]
-                
-                for key in expired_cache_keys:
-                    self.response_cache.pop(key, None)
-                    self.cache_timestamps.pop(key, None)
+                self.response_cache.purge_expired()
+                await self.response_cache.purge_disk()
                 
                 # Clean old user activity (but keep recent activity longer)
                 expired_users = [
@@ -427,8 +480,10 @@ class LLMRequestManager:
             'background_paused': self._should_pause_background(),
             'active_users': len(self.user_activity),
             'cache_size': len(self.response_cache),
+            'response_cache': self.response_cache.get_stats(),
             'user_conversation_protection': self.user_conversation_protection,
-            'never_throttle_priorities': [p.name for p in self.never_throttle_priorities]
+            'never_throttle_priorities': [p.name for p in self.never_throttle_priorities],
+            'admission': self.admission.get_stats()
         }
     
     def pause_background_processing(self, duration: int = 30):  # Reduced from 60
@@ -0,0 +1,330 @@
+"""
+LLM Response Cache for Mainza AI
+
+Caches model responses keyed by (model, normalised prompt hash, sampling
+parameters), so identical prompts issued again within the TTL are answered
+without another call to Ollama. Entries live in an in-memory LRU bounded by
+size and TTL, backed by an optional disk tier (one JSON file per entry) that
+survives restarts. Only JSON-serialisable responses are written to disk, and
+expired files are deleted by TTL. A relative LLM_CACHE_DIR is resolved against
+the repository root, not the working directory. Hits and misses are counted
+per caller.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Options that change how Ollama runs a model but not what it generates
+NON_SAMPLING_OPTIONS = frozenset({"keep_alive", "num_thread", "num_gpu", "main_gpu", "use_mmap", "use_mlock", "low_vram"})
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class LLMCacheConfig:
+    """Configuration for the LLM response cache"""
+    enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    ttl_seconds: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "600"))
+    max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    disk_dir: Optional[str] = os.getenv("LLM_CACHE_DIR", "llm_cache")
+    disk_max_entries: int = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "4096"))
+
+
+@dataclass
+class CallerCacheStats:
+    """Cache counters for one caller"""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        served = self.hits + self.disk_hits
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(served / (served + self.misses), 3) if served + self.misses else 0.0,
+        }
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+    ttl: float
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompts differing only in surrounding or repeated whitespace share an entry"""
+    return " ".join((prompt or "").split())
+
+
+def sampling_params(params: Optional[Dict[str, Any]]) -> str:
+    """Canonical form of the parameters that affect the generated text"""
+    relevant = {k: v for k, v in (params or {}).items() if k not in NON_SAMPLING_OPTIONS}
+    return json.dumps(relevant, sort_keys=True, default=str)
+
+
+def is_deterministic(params: Optional[Dict[str, Any]]) -> bool:
+    """Greedy decoding or a fixed seed: the same prompt yields the same response"""
+    params = params or {}
+    return params.get("temperature") == 0 or params.get("seed") is not None
+
+
+def make_cache_key(model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Entry key for a prompt under one model and set of sampling parameters"""
+    bucket = hashlib.sha256(f"{model}\0{sampling_params(params)}".encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{bucket}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+def resolve_disk_dir(disk_dir: Optional[str]) -> Optional[Path]:
+    """Absolute disk tier directory; relative paths are anchored at the repository root"""
+    if not disk_dir:
+        return None
+    path = Path(disk_dir).expanduser()
+    return path if path.is_absolute() else REPO_ROOT / path
+
+
+class LLMResponseCache:
+    """Memory and disk tiers for model responses"""
+
+    def __init__(self, config: Optional[LLMCacheConfig] = None, clock=time.time):
+        self.config = config or LLMCacheConfig()
+        self.clock = clock
+        self.disk_dir = resolve_disk_dir(self.config.disk_dir)
+        self.caller_stats: Dict[str, CallerCacheStats] = {}
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._disk_writes = 0
+        self.disk_errors = 0
+        self.evictions = 0
+
+    async def lookup(self, caller: str, model: str, prompt: str,
+                     params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Cached response for the prompt, or None"""
+        if not self.config.enabled:
+            return None
+        key = make_cache_key(model, prompt, params)
+        stats = self._caller(caller)
+
+        entry = self._get_memory(key)
+        if entry is not None:
+            stats.hits += 1
+            return entry.value
+
+        entry = await self._read_disk(key)
+        if entry is not None:
+            stats.disk_hits += 1
+            self._put_memory(key, entry)
+            return entry.value
+
+        stats.misses += 1
+        return None
+
+    async def store(self, caller: str, model: str, prompt: str, value: Any,
+                    params: Optional[Dict[str, Any]] = None, ttl: Optional[float] = None):
+        """Cache a response; empty responses are not cached"""
+        if not self.config.enabled or not value:
+            return
+        key = make_cache_key(model, prompt, params)
+        entry = _Entry(value, self.clock(), ttl if ttl is not None else self.config.ttl_seconds)
+        self._put_memory(key, entry)
+        self._caller(caller).stores += 1
+        await self._write_disk(key, entry)
+
+    async def get_or_compute(self, caller: str, model: str, prompt: str, compute: Callable[[], Awaitable[Any]],
+                             params: Optional[Dict[str, Any]] = None, ttl: Optional[float] = None) -> Any:
+        """
+        Cached response, or the result of ``compute()`` (then cached). Concurrent
+        calls for the same prompt share one computation; if it fails, each
+        waiter computes on its own.
+        """
+        cached = await self.lookup(caller, model, prompt, params)
+        if cached is not None:
+            return cached
+        if not self.config.enabled:
+            return await compute()
+
+        key = make_cache_key(model, prompt, params)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The shared call failed; compute our own below
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+        future.set_result(value)
+        await self.store(caller, model, prompt, value, params, ttl)
+        return value
+
+    def purge_expired(self) -> int:
+        """Drop expired in-memory entries; returns how many were dropped"""
+        now = self.clock()
+        expired = [key for key, entry in self._entries.items() if now - entry.stored_at > entry.ttl]
+        for key in expired:
+            self._drop(key)
+        return len(expired)
+
+    async def purge_disk(self) -> int:
+        """Delete expired disk entries; returns how many were deleted"""
+        if self.disk_dir is None:
+            return 0
+        try:
+            return await asyncio.to_thread(self._prune_disk)
+        except Exception as e:
+            self.disk_errors += 1
+            logger.debug(f"LLM cache disk purge failed: {e}")
+            return 0
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _caller(self, caller: str) -> CallerCacheStats:
+        if caller not in self.caller_stats:
+            self.caller_stats[caller] = CallerCacheStats()
+        return self.caller_stats[caller]
+
+    def _get_memory(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.clock() - entry.stored_at > entry.ttl:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key: str, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    async def _read_disk(self, key: str) -> Optional[_Entry]:
+        if self.disk_dir is None:
+            return None
+        try:
+            record = await asyncio.to_thread(self._read_record, self._disk_path(key))
+        except Exception as e:
+            self.disk_errors += 1
+            logger.debug(f"LLM cache disk read failed: {e}")
+            return None
+        if record is None:
+            return None
+        entry = _Entry(record["value"], record["stored_at"], record["ttl"])
+        if self.clock() - entry.stored_at > entry.ttl:
+            return None
+        return entry
+
+    async def _write_disk(self, key: str, entry: _Entry):
+        if self.disk_dir is None:
+            return
+        try:
+            record = json.dumps({"value": entry.value, "stored_at": entry.stored_at, "ttl": entry.ttl})
+        except (TypeError, ValueError):
+            return  # memory only: not JSON-serialisable
+        self._disk_writes += 1
+        prune = self._disk_writes % 64 == 0
+        try:
+            await asyncio.to_thread(self._write_record, self._disk_path(key), record, prune)
+        except Exception as e:
+            self.disk_errors += 1
+            logger.debug(f"LLM cache disk write failed: {e}")
+
+    @staticmethod
+    def _read_record(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_record(self, path: Path, record: str, prune: bool):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(record)
+        os.replace(tmp, path)
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self) -> int:
+        """Delete expired or unreadable files, then keep the newest ``disk_max_entries``"""
+        now = self.clock()
+        removed = 0
+        files: List[Tuple[float, Path]] = []
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                record = self._read_record(path)
+                if record is None:
+                    continue
+                expired = now - record["stored_at"] > record["ttl"]
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, KeyError, TypeError):
+                expired = True
+            if expired:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                files.append((mtime, path))
+        excess = len(files) - self.config.disk_max_entries
+        for _, path in sorted(files)[:max(excess, 0)]:
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        totals = CallerCacheStats()
+        for stats in self.caller_stats.values():
+            totals.hits += stats.hits
+            totals.disk_hits += stats.disk_hits
+            totals.misses += stats.misses
+            totals.stores += stats.stores
+        return {
+            "enabled": self.config.enabled,
+            "entries": len(self._entries),
+            "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+            "evictions": self.evictions,
+            "disk_errors": self.disk_errors,
+            **totals.to_dict(),
+            "callers": {caller: stats.to_dict() for caller, stats in self.caller_stats.items()},
+        }
+
+
+# Global LLM response cache instance
+llm_response_cache = LLMResponseCache()
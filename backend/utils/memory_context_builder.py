@@ -3,14 +3,19 @@ Memory Context Builder for Mainza AI
 Provides rich context creation from retrieved memories with consciousness-aware formatting
 and integration with the knowledge graph system.
 """
+import asyncio
+import functools
 import logging
 import json
+import os
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, field
 
 from backend.utils.memory_retrieval_engine import MemoryRetrievalEngine, MemorySearchResult
 from backend.utils.neo4j_enhanced import neo4j_manager
+from backend.utils.context_packer import ContextItem, context_packer, token_counter
+from backend.utils.context_prefetcher import context_prefetcher
 from backend.core.enhanced_error_handling import ErrorHandler, handle_errors
 from backend.utils.memory_error_handling import (
     MemoryContextError, handle_memory_errors, memory_error_handler
@@ -41,7 +46,8 @@ class MemoryContextBuilder:
         self.memory_retrieval = MemoryRetrievalEngine()
         
         # Configuration
-        self.max_context_length = 2000  # Maximum context length in characters
+        self.max_context_tokens = int(os.getenv("MEMORY_CONTEXT_MAX_TOKENS", "600"))
+        self.tokenizer_model = os.getenv("DEFAULT_OLLAMA_MODEL", "default")
         self.min_relevance_threshold = 0.3
         self.conversation_context_limit = 5
         self.concept_extraction_limit = 10
@@ -54,6 +60,18 @@ class MemoryContextBuilder:
             "hybrid": self._get_hybrid_template()
         }
     
+    @property
+    def history_prefetch_name(self) -> str:
+        """Prefetch entry for this builder's history at its current limit"""
+        return f"conversation_history:{id(self)}:{self.conversation_context_limit}"
+
+    async def load_conversation_history(self, user_id: str, limit: Optional[int] = None) -> List[MemorySearchResult]:
+        """Recent conversation memories for a user; also prefetched on user activity"""
+        return await self.memory_retrieval.get_conversation_history(
+            user_id=user_id,
+            limit=limit or self.conversation_context_limit
+        )
+    
     @handle_errors(
         component="memory_context_builder",
         fallback_result="",
@@ -95,11 +113,20 @@ class MemoryContextBuilder:
             relevant_memories.sort(key=lambda x: x.relevance_score, reverse=True)
             relevant_memories = relevant_memories[:self.conversation_context_limit]
             
-            # Extract conversation history
-            conversation_history = self._extract_conversation_history(relevant_memories)
-            
             # Build context using template
             template = self.context_templates.get(context_type, self.context_templates["conversation"])
+            relevant_memories = self._fit_memories_to_budget(
+                {"memories": relevant_memories}, template,
+                consciousness_level=consciousness_context.get("consciousness_level", 0.7),
+                emotional_state=consciousness_context.get("emotional_state", "neutral")
+            )["memories"]
+            
+            if not relevant_memories:
+                logger.debug("No memories fit the context token budget")
+                return ""
+            
+            # Extract conversation history
+            conversation_history = self._extract_conversation_history(relevant_memories)
             
             context_data = {
                 "memories": relevant_memories,
@@ -110,11 +137,9 @@ class MemoryContextBuilder:
                 "avg_relevance": sum(m.relevance_score for m in relevant_memories) / len(relevant_memories)
             }
             
-            formatted_context = template.format(**self._prepare_template_data(context_data))
-            
-            # Truncate if too long
-            if len(formatted_context) > self.max_context_length:
-                formatted_context = formatted_context[:self.max_context_length] + "..."
+            formatted_context = self._enforce_token_budget(
+                template.format(**self._prepare_template_data(context_data))
+            )
             
             logger.debug(f"✅ Built conversation context: {len(formatted_context)} chars from {len(relevant_memories)} memories")
             return formatted_context
@@ -162,21 +187,24 @@ class MemoryContextBuilder:
             
             # Build knowledge context
             template = self.context_templates["knowledge"]
+            concepts = all_concepts[:self.concept_extraction_limit]
+            knowledge_memories = self._fit_memories_to_budget(
+                {"memories": relevant_memories[:5]}, template,  # Limit for knowledge context
+                concepts=", ".join(c.get("name", "") for c in concepts if c.get("name"))
+            )["memories"]
             
             context_data = {
-                "memories": relevant_memories[:5],  # Limit for knowledge context
-                "concepts": all_concepts[:self.concept_extraction_limit],
+                "memories": knowledge_memories,
+                "concepts": concepts,
                 "consciousness_level": consciousness_context.get("consciousness_level", 0.7),
                 "emotional_state": consciousness_context.get("emotional_state", "neutral"),
                 "concept_count": len(all_concepts),
                 "memory_count": len(relevant_memories)
             }
             
-            formatted_context = template.format(**self._prepare_template_data(context_data))
-            
-            # Truncate if too long
-            if len(formatted_context) > self.max_context_length:
-                formatted_context = formatted_context[:self.max_context_length] + "..."
+            formatted_context = self._enforce_token_budget(
+                template.format(**self._prepare_template_data(context_data))
+            )
             
             logger.debug(f"✅ Built knowledge context: {len(formatted_context)} chars, {len(all_concepts)} concepts")
             return formatted_context
@@ -306,7 +334,8 @@ class MemoryContextBuilder:
         user_id: str,
         consciousness_context: Dict[str, Any],
         include_concepts: bool = True,
-        context_type: str = "hybrid"
+        context_type: str = "hybrid",
+        query_embedding: Optional[List[float]] = None
     ) -> MemoryContext:
         """
         Build comprehensive memory context including memories, concepts, and conversation history
@@ -317,18 +346,23 @@ class MemoryContextBuilder:
             consciousness_context: Current consciousness state
             include_concepts: Whether to include related concepts
             context_type: Type of context to build
+            query_embedding: Pre-computed query embedding shared with other retrievers
             
         Returns:
             MemoryContext object with comprehensive context data
         """
         try:
-            # Retrieve relevant memories
-            memories = await self.memory_retrieval.get_relevant_memories(
-                query=query,
-                user_id=user_id,
-                consciousness_context=consciousness_context,
-                limit=10,
-                search_type="hybrid"
+            # Retrieve relevant memories and conversation history concurrently
+            memories, conversation_history = await asyncio.gather(
+                self.memory_retrieval.get_relevant_memories(
+                    query=query,
+                    user_id=user_id,
+                    consciousness_context=consciousness_context,
+                    limit=10,
+                    search_type="hybrid",
+                    query_embedding=query_embedding
+                ),
+                context_prefetcher.get(user_id, self.history_prefetch_name, self.load_conversation_history)
             )
             
             # Calculate enhanced relevance
@@ -336,12 +370,6 @@ class MemoryContextBuilder:
                 memories, query, consciousness_context
             )
             
-            # Get conversation history
-            conversation_history = await self.memory_retrieval.get_conversation_history(
-                user_id=user_id,
-                limit=self.conversation_context_limit
-            )
-            
             # Extract related concepts if requested
             related_concepts = []
             if include_concepts and enhanced_memories:
@@ -605,15 +633,28 @@ class MemoryContextBuilder:
             interaction_memories = [m for m in memories if m.memory_type == "interaction"]
             reflection_memories = [m for m in memories if m.memory_type in ["consciousness_reflection", "insight"]]
             
+            fitted = self._fit_memories_to_budget(
+                {
+                    "interaction_memories": interaction_memories[:3],
+                    "reflection_memories": reflection_memories[:2]
+                },
+                template,
+                concepts=", ".join(c.get("name", "") for c in concepts[:5] if c.get("name")),
+                consciousness_level=consciousness_context.get("consciousness_level", 0.7),
+                emotional_state=consciousness_context.get("emotional_state", "neutral")
+            )
+            
             context_data = {
-                "interaction_memories": interaction_memories[:3],
-                "reflection_memories": reflection_memories[:2],
+                "interaction_memories": fitted["interaction_memories"],
+                "reflection_memories": fitted["reflection_memories"],
                 "concepts": concepts[:5],
                 "consciousness_level": consciousness_context.get("consciousness_level", 0.7),
                 "emotional_state": consciousness_context.get("emotional_state", "neutral")
             }
             
-            formatted_context = template.format(**self._prepare_template_data(context_data))
+            formatted_context = self._enforce_token_budget(
+                template.format(**self._prepare_template_data(context_data))
+            )
             
             return formatted_context
             
@@ -621,6 +662,43 @@ class MemoryContextBuilder:
             logger.error(f"Failed to build hybrid context: {e}")
             return ""
     
+    def _fit_memories_to_budget(
+        self,
+        memory_groups: Dict[str, List[MemorySearchResult]],
+        template: str,
+        **fields
+    ) -> Dict[str, List[MemorySearchResult]]:
+        """
+        Keep the most relevant memories of each template slot that fit in
+        ``max_context_tokens`` once the rest of the template is filled in.
+        """
+        empty = {name: "" for name in memory_groups}
+        try:
+            overhead = token_counter.count(template.format(**{**empty, **{k: str(v) for k, v in fields.items()}}), self.tokenizer_model)
+        except KeyError:
+            overhead = token_counter.count(template, self.tokenizer_model)
+        
+        items = [
+            ContextItem(
+                section=group,
+                text=self.format_memory_for_context(memory),
+                utility=max(memory.relevance_score, 0.01),
+                order=position
+            )
+            for group, memories in memory_groups.items()
+            for position, memory in enumerate(memories)
+        ]
+        
+        result = context_packer.pack(items, self.max_context_tokens - overhead, self.tokenizer_model)
+        fitted = {group: [] for group in memory_groups}
+        for item in sorted(result.selected, key=lambda i: i.order):
+            fitted[item.section].append(memory_groups[item.section][item.order])
+        return fitted
+    
+    def _enforce_token_budget(self, formatted_context: str) -> str:
+        """Final guard so formatted context never exceeds its token budget"""
+        return token_counter.truncate(formatted_context, self.max_context_tokens, self.tokenizer_model)
+    
     def _calculate_context_strength(self, memories: List[MemorySearchResult]) -> float:
         """Calculate overall context strength based on memory quality and quantity"""
         if not memories:
@@ -736,4 +814,11 @@ Current state: Consciousness level {consciousness_level}, feeling {emotional_sta
 Use this comprehensive context to provide thoughtful, informed responses."""
 
 # Global instance
-memory_context_builder = MemoryContextBuilder()
\ No newline at end of file
+memory_context_builder = MemoryContextBuilder()
+
+# The global builder's history is warmed speculatively when a user becomes active
+context_prefetcher.register(
+    memory_context_builder.history_prefetch_name,
+    functools.partial(memory_context_builder.load_conversation_history,
+                      limit=memory_context_builder.conversation_context_limit)
+)
\ No newline at end of file
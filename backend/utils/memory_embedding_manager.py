@@ -60,7 +60,8 @@ class MemoryEmbeddingManager:
         user_id: str,
         memory_types: Optional[List[str]] = None,
         limit: int = 5,
-        min_similarity: float = 0.6
+        min_similarity: float = 0.6,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Find memories similar to the given query text using vector search
@@ -71,13 +72,15 @@ class MemoryEmbeddingManager:
             memory_types: Optional list of memory types to filter by
             limit: Maximum number of results to return
             min_similarity: Minimum similarity threshold
+            query_embedding: Pre-computed embedding for query_text, if available
             
         Returns:
             List of similar memory records with similarity scores
         """
         try:
-            # Generate embedding for query
-            query_embedding = self.embedding.get_embedding(query_text)
+            # Generate embedding for query unless the caller already has one
+            if query_embedding is None:
+                query_embedding = await self.embedding.aget_embedding(query_text)
             
             if not query_embedding or all(x == 0.0 for x in query_embedding):
                 logger.warning("Invalid query embedding, falling back to text search")
@@ -269,7 +272,7 @@ class MemoryEmbeddingManager:
         """
         try:
             # Generate new embedding
-            new_embedding = self.embedding.get_embedding(content)
+            new_embedding = await self.embedding.aget_embedding(content)
             
             if not new_embedding or all(x == 0.0 for x in new_embedding):
                 logger.warning(f"Failed to generate embedding for memory {memory_id}")
@@ -37,6 +37,7 @@ class MemorySearchParams:
     importance_weight: float = 0.3
     memory_types: Optional[List[str]] = None
     time_range_hours: Optional[int] = None
+    query_embedding: Optional[List[float]] = None
 
 @dataclass
 class MemorySearchResult:
@@ -119,7 +120,8 @@ class MemoryRetrievalEngine:
         limit: int = 5,
         similarity_threshold: float = 0.3,
         search_type: str = "hybrid",
-        memory_types: Optional[List[str]] = None
+        memory_types: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[MemorySearchResult]:
         """
         Get relevant memories using multi-strategy search approach
@@ -132,6 +134,7 @@ class MemoryRetrievalEngine:
             similarity_threshold: Minimum similarity threshold for results
             search_type: Search strategy ("semantic", "keyword", "temporal", "hybrid")
             memory_types: Optional list of memory types to filter by
+            query_embedding: Pre-computed query embedding shared with other retrievers
             
         Returns:
             List of MemorySearchResult objects ranked by relevance
@@ -155,7 +158,8 @@ class MemoryRetrievalEngine:
                 search_type=search_type,
                 limit=limit * 2,  # Get more results for better ranking
                 similarity_threshold=similarity_threshold,
-                memory_types=memory_types
+                memory_types=memory_types,
+                query_embedding=query_embedding
             )
             
             logger.debug(f"🔍 Searching memories: query='{query[:50]}...', user={user_id}, type={search_type}")
@@ -243,7 +247,8 @@ class MemoryRetrievalEngine:
                 user_id=user_id,
                 memory_types=None,
                 limit=limit,
-                min_similarity=min_similarity
+                min_similarity=min_similarity,
+                query_embedding=query_embedding
             )
             
             if not similar_memories:
@@ -376,8 +381,10 @@ class MemoryRetrievalEngine:
     async def _semantic_search(self, params: MemorySearchParams) -> List[Dict[str, Any]]:
         """Perform semantic similarity search"""
         try:
-            # Generate embedding for query
-            query_embedding = self.embedding.get_embedding(params.query)
+            # Generate embedding for query unless one was shared by the caller
+            query_embedding = params.query_embedding or await asyncio.to_thread(
+                self.embedding.get_embedding, params.query
+            )
             
             if not query_embedding:
                 logger.warning("Failed to generate query embedding, falling back to keyword search")
@@ -389,7 +396,8 @@ class MemoryRetrievalEngine:
                 user_id=params.user_id,
                 memory_types=params.memory_types,
                 limit=params.limit,
-                min_similarity=params.similarity_threshold
+                min_similarity=params.similarity_threshold,
+                query_embedding=query_embedding
             )
             
             return memories
@@ -1288,7 +1296,7 @@ class MemoryRetrievalEngine:
             
             # Generate query embedding for semantic similarity if needed
             try:
-                query_embedding = self.embedding.get_embedding(query)
+                query_embedding = await asyncio.to_thread(self.embedding.get_embedding, query)
             except Exception as e:
                 logger.warning(f"Failed to generate query embedding: {e}")
             
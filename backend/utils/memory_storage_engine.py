@@ -3,6 +3,7 @@ Enhanced Memory Storage Engine for Mainza AI
 Provides comprehensive memory storage functionality with Neo4j integration,
 embedding generation, and consciousness-aware memory management.
 """
+import asyncio
 import logging
 import uuid
 from datetime import datetime
@@ -12,6 +13,7 @@ from dataclasses import dataclass, field, asdict
 
 from backend.utils.unified_database_manager import unified_database_manager
 from backend.utils.embedding_enhanced import embedding_manager
+from backend.utils.context_prefetcher import context_prefetcher
 from backend.core.enhanced_error_handling import ErrorHandler, handle_errors
 from backend.utils.memory_error_handling import (
     MemoryStorageError, MemoryConnectionError, MemoryValidationError,
@@ -126,7 +128,7 @@ class MemoryStorageEngine:
                 consciousness_level=consciousness_context.get("consciousness_level", 0.7),
                 emotional_state=consciousness_context.get("emotional_state", "neutral"),
                 importance_score=importance_score,
-                embedding=self.embedding.get_embedding(content),
+                embedding=await asyncio.to_thread(self.embedding.get_embedding, content),
                 created_at=datetime.now(),
                 metadata={
                     "user_query": user_query[:500],  # Store truncated versions
@@ -141,6 +143,8 @@ class MemoryStorageEngine:
             success = await self.create_memory_node(memory_record)
             if not success:
                 raise MemoryStorageError("Failed to create memory node in Neo4j")
+            # The user's prefetched conversation history no longer includes the latest turn
+            context_prefetcher.invalidate(user_id)
             
             # Extract and link concepts
             await self._extract_and_link_concepts(memory_record)
@@ -202,7 +206,7 @@ class MemoryStorageEngine:
                 consciousness_level=consciousness_context.get("consciousness_level", 0.7),
                 emotional_state=consciousness_context.get("emotional_state", "reflective"),
                 importance_score=importance_score,
-                embedding=self.embedding.get_embedding(content),
+                embedding=await asyncio.to_thread(self.embedding.get_embedding, content),
                 created_at=datetime.now(),
                 significance_score=0.8,  # Higher significance for consciousness memories
                 metadata={
@@ -0,0 +1,387 @@
+"""
+Neo4j Query Cache for Mainza AI
+
+Dependency-tracked caching of read query results. Each query gets a
+lightweight Cypher parse (``analyze_cypher``) that records the node labels and
+relationship types it touches and whether it writes. Cached reads remember the
+version of every label/type they depend on; a write bumps the versions of the
+labels/types it names, so only the affected entries stop validating.
+
+Queries the parse cannot pin down are handled conservatively:
+- reads with an unlabeled node variable or a procedure call depend on every
+  write
+- writes with an unlabeled node variable, DETACH DELETE, procedure calls or
+  schema commands invalidate everything
+
+Keys are SHA-256 digests of the query text and its parameters, so every worker
+computes the same key. With Redis available, results and dependency versions
+live there and a write in one worker invalidates the entries of all others;
+without it the cache runs in-process.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from backend.utils.cache_codecs import CacheCodec, cache_codec
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+KEY_VERSION = "v1"
+ALL_DEPENDENCY = "__all__"        # bumped by writes the parse cannot scope
+ANY_WRITE_DEPENDENCY = "__writes__"  # bumped by every write
+
+_NAME = r"(?:`[^`]+`|[A-Za-z_]\w*)"
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"", re.S)
+_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+_NODE_RE = re.compile(
+    rf"(?<![\w.`])\(\s*({_NAME})?\s*((?::\s*!?{_NAME}\s*(?:[:|&]\s*!?{_NAME}\s*)*)?)(?=[{{)]|\s*WHERE\b)",
+    re.I
+)
+_REL_RE = re.compile(rf"-\s*\[\s*({_NAME})?\s*(?::\s*!?({_NAME}(?:\s*\|\s*:?\s*!?{_NAME})*))?")
+_NAME_IN_RE = re.compile(_NAME)
+_COLON_NAME_RE = re.compile(rf":\s*({_NAME})")
+_WRITE_RE = re.compile(r"(?<![\w.$`])(CREATE|MERGE|SET|DELETE|REMOVE|FOREACH|DROP|LOAD)(?![\w`])", re.I)
+_DETACH_RE = re.compile(r"(?<![\w.$`])DETACH\s+DELETE(?![\w`])", re.I)
+_SCHEMA_RE = re.compile(r"(?<![\w.$`])(INDEX|CONSTRAINT|DATABASE)(?![\w`])", re.I)
+_PROCEDURE_RE = re.compile(r"(?<![\w.$`])CALL\s+([A-Za-z_][\w.]*)", re.I)
+_WRITE_PROCEDURE_RE = re.compile(r"create|merge|delete|set|remove|refactor|write|periodic|drop|import", re.I)
+
+
+@dataclass(frozen=True)
+class CypherAccess:
+    """What a query reads or writes, as far as a lexical parse can tell"""
+    is_write: bool
+    labels: FrozenSet[str]
+    rel_types: FrozenSet[str]
+    reads_any: bool = False   # result may depend on any part of the graph
+    writes_any: bool = False  # may change any part of the graph
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        return self.labels | self.rel_types
+
+
+def _names(text: str) -> List[str]:
+    return [name.strip("`") for name in _NAME_IN_RE.findall(text or "")]
+
+
+@lru_cache(maxsize=2048)
+def analyze_cypher(query: str) -> CypherAccess:
+    """Labels, relationship types and write behaviour of a Cypher query"""
+    text = _COMMENT_RE.sub(" ", _STRING_RE.sub("''", query))
+
+    labels, rel_types = set(), set()
+    labeled_vars, unlabeled_vars = set(), set()
+    for variable, label_expr in _NODE_RE.findall(text):
+        node_labels = _names(label_expr)
+        labels.update(node_labels)
+        if variable:
+            (labeled_vars if node_labels else unlabeled_vars).add(variable.strip("`"))
+    for _variable, type_expr in _REL_RE.findall(text):
+        rel_types.update(_names(type_expr))
+    unresolved = bool(unlabeled_vars - labeled_vars)
+
+    procedures = _PROCEDURE_RE.findall(text)
+    is_write = bool(_WRITE_RE.search(text)) or any(_WRITE_PROCEDURE_RE.search(p) for p in procedures)
+
+    if not is_write:
+        return CypherAccess(
+            is_write=False,
+            labels=frozenset(labels),
+            rel_types=frozenset(rel_types),
+            reads_any=unresolved or bool(procedures)
+        )
+
+    # Over-collecting is harmless for writes: ``SET n:Label`` and friends
+    names = set(_names(" ".join(_COLON_NAME_RE.findall(text))))
+    return CypherAccess(
+        is_write=True,
+        labels=frozenset(labels | names),
+        rel_types=frozenset(rel_types),
+        writes_any=(
+            unresolved or bool(procedures)
+            or bool(_DETACH_RE.search(text)) or bool(_SCHEMA_RE.search(text))
+        )
+    )
+
+
+def query_cache_key(query: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+    """Stable digest of a query and its parameters (identical across processes)"""
+    digest = hashlib.sha256()
+    digest.update(query.strip().encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(json.dumps(parameters or {}, sort_keys=True, default=str).encode("utf-8"))
+    return f"{KEY_VERSION}:{digest.hexdigest()}"
+
+
+def _is_plain(value: Any) -> bool:
+    """True when ``value`` survives a JSON/msgpack round trip unchanged"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return True
+    if isinstance(value, list):
+        return all(_is_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_plain(v) for k, v in value.items())
+    return False
+
+
+@dataclass(frozen=True)
+class VersionSnapshot:
+    """Dependency versions read before a query ran, and where they came from"""
+    versions: Dict[str, int]
+    shared: bool
+
+
+@dataclass
+class QueryCacheEntry:
+    records: List[Dict[str, Any]]
+    versions: Dict[str, int]
+    expires_at: float
+    shared: bool
+
+
+@dataclass
+class QueryCacheStats:
+    cache_hits: int = 0
+    cache_misses: int = 0
+    shared_hits: int = 0
+    stale_rejections: int = 0
+    invalidations: int = 0
+    full_invalidations: int = 0
+    redis_errors: int = 0
+
+
+class Neo4jQueryCache:
+    """Read query cache invalidated by the writes that affect it"""
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        ttl: int = 300,
+        redis_client=None,
+        shared: bool = os.getenv("NEO4J_CACHE_SHARED", "true").lower() == "true",
+        namespace: str = os.getenv("NEO4J_CACHE_NAMESPACE", "mainza:neo4j"),
+        redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379"),
+        codec: Optional[CacheCodec] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.namespace = namespace
+        self.codec = codec or cache_codec
+        self.cache: "OrderedDict[str, QueryCacheEntry]" = OrderedDict()
+        self.query_stats = defaultdict(int)
+        self.stats = QueryCacheStats()
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._redis_retry_at = 0.0
+        if self._redis is None and shared and REDIS_AVAILABLE:
+            self._redis = redis.Redis.from_url(
+                redis_url, socket_connect_timeout=0.5, socket_timeout=0.5
+            )
+
+    @property
+    def cache_hits(self) -> int:
+        return self.stats.cache_hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self.stats.cache_misses
+
+    # -- dependency versions -------------------------------------------------
+
+    def _dependencies(self, access: CypherAccess) -> List[str]:
+        deps = [ALL_DEPENDENCY]
+        if access.reads_any:
+            deps.append(ANY_WRITE_DEPENDENCY)
+        deps.extend(sorted(access.names))
+        return deps
+
+    def _shared_client(self):
+        if self._redis is None or time.monotonic() < self._redis_retry_at:
+            return None
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        self.stats.redis_errors += 1
+        self._redis_retry_at = time.monotonic() + 30
+        logger.warning(f"⚠️ Neo4j query cache falling back to local mode for 30s: {error}")
+
+    def _dep_key(self, name: str) -> str:
+        return f"{self.namespace}:dep:{name}"
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.namespace}:q:{key}"
+
+    def _current_versions(self, deps: List[str]) -> VersionSnapshot:
+        client = self._shared_client()
+        if client is not None:
+            try:
+                values = client.mget([self._dep_key(dep) for dep in deps])
+                return VersionSnapshot({dep: int(value or 0) for dep, value in zip(deps, values)}, True)
+            except Exception as e:
+                self._redis_failed(e)
+        with self._lock:
+            return VersionSnapshot({dep: self._versions[dep] for dep in deps}, False)
+
+    # -- reads ---------------------------------------------------------------
+
+    def lookup(self, query: str, params: Optional[Dict] = None) -> Tuple[Optional[List], VersionSnapshot]:
+        """Cached records (or None) plus the current versions of the query's dependencies.
+
+        Pass the snapshot to ``cache_result`` after running the query, so a
+        write that lands in between leaves the new entry already invalid.
+        """
+        key = query_cache_key(query, params)
+        snapshot = self._current_versions(self._dependencies(analyze_cypher(query)))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                if (entry.expires_at > now and entry.shared == snapshot.shared
+                        and entry.versions == snapshot.versions):
+                    self.cache.move_to_end(key)
+                    self.stats.cache_hits += 1
+                    self.query_stats[key] += 1
+                    return entry.records, snapshot
+                del self.cache[key]
+                if entry.expires_at > now:
+                    self.stats.stale_rejections += 1
+
+        if snapshot.shared:
+            records = self._lookup_shared(key, snapshot.versions, now)
+            if records is not None:
+                return records, snapshot
+
+        self.stats.cache_misses += 1
+        return None, snapshot
+
+    def _lookup_shared(self, key: str, versions: Dict[str, int], now: float) -> Optional[List]:
+        client = self._shared_client()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._entry_key(key))
+            if raw is None:
+                return None
+            payload = self.codec.decode(raw)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if payload.get("versions") != versions:
+            self.stats.stale_rejections += 1
+            return None
+        records = payload["records"]
+        self._store_local(key, QueryCacheEntry(records, versions, now + self.ttl, True))
+        self.stats.cache_hits += 1
+        self.stats.shared_hits += 1
+        self.query_stats[key] += 1
+        return records
+
+    def get_cached_result(self, query: str, params: Optional[Dict] = None) -> Optional[List]:
+        """Get cached query result if available and still valid"""
+        return self.lookup(query, params)[0]
+
+    def _store_local(self, key: str, entry: QueryCacheEntry):
+        with self._lock:
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+    def cache_result(self, query: str, params: Optional[Dict], result: List,
+                     snapshot: Optional[VersionSnapshot] = None):
+        """Cache a read result against the dependency versions seen before it ran"""
+        access = analyze_cypher(query)
+        if access.is_write:
+            return
+        if snapshot is None:
+            snapshot = self._current_versions(self._dependencies(access))
+        key = query_cache_key(query, params)
+        self._store_local(
+            key, QueryCacheEntry(result, snapshot.versions, time.monotonic() + self.ttl, snapshot.shared)
+        )
+
+        client = self._shared_client() if snapshot.shared else None
+        if client is not None and _is_plain(result):
+            try:
+                client.set(
+                    self._entry_key(key),
+                    self.codec.encode({"records": result, "versions": snapshot.versions}),
+                    ex=self.ttl
+                )
+            except Exception as e:
+                self._redis_failed(e)
+
+    def should_cache(self, query: str) -> bool:
+        """Only read queries are cached"""
+        return not analyze_cypher(query).is_write
+
+    # -- writes --------------------------------------------------------------
+
+    def invalidate(self, query: str):
+        """Invalidate the entries a write query can affect"""
+        access = analyze_cypher(query)
+        if access.writes_any:
+            self.invalidate_all()
+            return
+        self._bump([ANY_WRITE_DEPENDENCY, *sorted(access.names)])
+        self.stats.invalidations += 1
+
+    def invalidate_all(self):
+        """Invalidate every entry (e.g. after an unscoped write or a raw transaction)"""
+        self._bump([ALL_DEPENDENCY])
+        self.stats.full_invalidations += 1
+
+    def _bump(self, deps: Iterable[str]):
+        deps = list(deps)
+        with self._lock:
+            for dep in deps:
+                self._versions[dep] += 1
+        client = self._shared_client()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for dep in deps:
+                pipe.incr(self._dep_key(dep))
+            pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+            # Other workers miss this write; at least stop serving it here
+            self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.cache.clear()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache performance statistics"""
+        total_requests = self.stats.cache_hits + self.stats.cache_misses
+        hit_rate = (self.stats.cache_hits / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            **asdict(self.stats),
+            'hit_rate_percent': round(hit_rate, 2),
+            'cache_size': len(self.cache),
+            'max_size': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'shared': self._shared_client() is not None
+        }
@@ -3,7 +3,7 @@ Unified Neo4j Manager for Mainza AI
 Consolidates all Neo4j operations with production-ready features:
 - Single connection pool management
 - Circuit breaker pattern
-- Query caching
+- Query caching with write-aware invalidation
 - Performance monitoring
 - Error handling and resilience
 
@@ -21,11 +21,11 @@ from enum import Enum
 from datetime import datetime, timedelta
 import json
 import threading
-from collections import defaultdict
 
 from neo4j import GraphDatabase, basic_auth, Session, Transaction
 from neo4j.exceptions import ServiceUnavailable, TransientError, ClientError
-from cachetools import TTLCache
+
+from backend.utils.neo4j_query_cache import Neo4jQueryCache, analyze_cypher
 
 logger = logging.getLogger(__name__)
 
@@ -153,62 +153,6 @@ class QueryValidator:
         
         return True, "Valid"
 
-class Neo4jQueryCache:
-    """Intelligent query caching with TTL and invalidation"""
-    
-    def __init__(self, maxsize: int = 1000, ttl: int = 300):
-        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
-        self.query_stats = defaultdict(int)
-        self.cache_hits = 0
-        self.cache_misses = 0
-    
-    def get_cached_result(self, query_hash: str, params: Dict) -> Optional[List]:
-        """Get cached query result if available and valid"""
-        cache_key = f"{query_hash}:{hash(str(sorted(params.items())))}"
-        result = self.cache.get(cache_key)
-        
-        if result is not None:
-            self.cache_hits += 1
-            self.query_stats[query_hash] += 1
-            logger.debug(f"Cache HIT for query: {query_hash[:50]}...")
-            return result
-        
-        self.cache_misses += 1
-        logger.debug(f"Cache MISS for query: {query_hash[:50]}...")
-        return None
-    
-    def cache_result(self, query_hash: str, params: Dict, result: List):
-        """Cache query result with TTL"""
-        cache_key = f"{query_hash}:{hash(str(sorted(params.items())))}"
-        self.cache[cache_key] = result
-        logger.debug(f"Cached result for query: {query_hash[:50]}...")
-    
-    def should_cache(self, query: str) -> bool:
-        """Determine if query should be cached based on patterns"""
-        read_only_patterns = ['MATCH', 'RETURN', 'WITH', 'CALL']
-        write_patterns = ['CREATE', 'MERGE', 'SET', 'DELETE', 'DETACH', 'REMOVE']
-        
-        query_upper = query.upper()
-        has_read = any(pattern in query_upper for pattern in read_only_patterns)
-        has_write = any(pattern in query_upper for pattern in write_patterns)
-        
-        # Cache read-only queries, don't cache write queries
-        return has_read and not has_write
-    
-    def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache performance statistics"""
-        total_requests = self.cache_hits + self.cache_misses
-        hit_rate = (self.cache_hits / total_requests * 100) if total_requests > 0 else 0
-        
-        return {
-            'cache_hits': self.cache_hits,
-            'cache_misses': self.cache_misses,
-            'hit_rate_percent': round(hit_rate, 2),
-            'cache_size': len(self.cache),
-            'max_size': self.cache.maxsize,
-            'ttl_seconds': self.cache.ttl
-        }
-
 class Neo4jPerformanceMonitor:
     """Performance monitoring and metrics collection"""
     
@@ -387,6 +331,8 @@ class UnifiedNeo4jManager:
             try:
                 yield tx
                 tx.commit()
+                # Queries run on a raw transaction are not seen by the cache
+                self.query_cache.invalidate_all()
                 logger.debug("Transaction committed successfully")
             except Exception as e:
                 tx.rollback()
@@ -403,11 +349,12 @@ class UnifiedNeo4jManager:
         """Execute query with comprehensive error handling and monitoring"""
         parameters = parameters or {}
         
+        access = analyze_cypher(query)
+        
         # Auto-detect access mode if not specified
         if access_mode == "AUTO":
-            query_upper = query.upper().strip()
-            write_keywords = ['CREATE', 'MERGE', 'SET', 'DELETE', 'DETACH', 'REMOVE', 'FOREACH']
-            access_mode = "WRITE" if any(keyword in query_upper for keyword in write_keywords) else "READ"
+            access_mode = "WRITE" if access.is_write else "READ"
+        cacheable = use_cache and access_mode == "READ" and not access.is_write
         
         # Validate query
         is_valid, validation_msg = QueryValidator.validate_query(query, parameters)
@@ -418,9 +365,9 @@ class UnifiedNeo4jManager:
             raise ValueError(error_msg)
         
         # Check cache for read queries
-        if use_cache and access_mode == "READ" and self.query_cache.should_cache(query):
-            query_hash = str(hash(query))
-            cached_result = self.query_cache.get_cached_result(query_hash, parameters)
+        versions = None
+        if cacheable:
+            cached_result, versions = self.query_cache.lookup(query, parameters)
             if cached_result is not None:
                 return cached_result
         
@@ -438,10 +385,11 @@ class UnifiedNeo4jManager:
                         query, execution_time, len(records), True
                     )
                     
-                    # Cache successful read queries
-                    if use_cache and access_mode == "READ" and self.query_cache.should_cache(query):
-                        query_hash = str(hash(query))
-                        self.query_cache.cache_result(query_hash, parameters, records)
+                    # Cache successful reads; writes invalidate the entries they affect
+                    if cacheable:
+                        self.query_cache.cache_result(query, parameters, records, versions)
+                    elif access_mode == "WRITE" or access.is_write:
+                        self.query_cache.invalidate(query)
                     
                     # Log slow queries
                     if execution_time > self.slow_query_threshold:
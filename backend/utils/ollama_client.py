@@ -0,0 +1,383 @@
+"""
+Shared Ollama Client for Mainza AI
+
+One pooled HTTP client for every generation and embedding call to Ollama.
+Async callers use a keep-alive ``httpx.AsyncClient`` so a slow generation
+never blocks the event loop; the few synchronous callers share a pooled
+``httpx.Client``. Each model has its own concurrency limit, responses are
+always read as native NDJSON streams (so cancelling the caller closes the
+connection and Ollama stops generating), and latency / throughput metrics
+are kept per model.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaError(Exception):
+    """Base error for Ollama requests"""
+
+
+class OllamaUnavailableError(OllamaError):
+    """Ollama could not be reached"""
+
+
+class OllamaTimeoutError(OllamaError):
+    """Ollama did not respond in time"""
+
+
+class OllamaResponseError(OllamaError):
+    """Ollama returned an error status or payload"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _parse_concurrency_overrides(value: str) -> Dict[str, int]:
+    """Parse ``model=limit,model=limit`` into a dict"""
+    overrides = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        model, limit = item.rsplit("=", 1)
+        try:
+            overrides[model.strip()] = max(1, int(limit))
+        except ValueError:
+            logger.warning(f"Ignoring invalid Ollama concurrency override: {item}")
+    return overrides
+
+
+@dataclass
+class OllamaClientConfig:
+    """Configuration for the shared Ollama client"""
+    base_url: str = os.getenv("OLLAMA_BASE_URL", "http://host.docker.internal:11434")
+    max_connections: int = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+    max_keepalive_connections: int = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "10"))
+    keepalive_expiry: float = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+    connect_timeout: float = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    read_timeout: float = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+    model_concurrency: int = int(os.getenv("OLLAMA_MODEL_CONCURRENCY", "4"))
+    model_concurrency_overrides: Dict[str, int] = field(
+        default_factory=lambda: _parse_concurrency_overrides(os.getenv("OLLAMA_MODEL_CONCURRENCY_OVERRIDES", ""))
+    )
+
+    def limit_for(self, model: str) -> int:
+        return self.model_concurrency_overrides.get(model, self.model_concurrency)
+
+
+@dataclass
+class ModelMetrics:
+    """Latency and throughput counters for one model"""
+    requests: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    in_flight: int = 0
+    waiting: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    eval_seconds: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    first_token_latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        ttft = list(self.first_token_latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "avg_latency_ms": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p95_latency_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else 0.0,
+            "avg_first_token_ms": round(1000 * sum(ttft) / len(ttft), 1) if ttft else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": round(self.completion_tokens / self.eval_seconds, 2) if self.eval_seconds else 0.0,
+        }
+
+
+def parse_ndjson_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse one NDJSON line from an Ollama stream; blank lines yield None"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        chunk = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise OllamaResponseError(f"Malformed NDJSON from Ollama: {line[:200]}") from e
+    if isinstance(chunk, dict) and chunk.get("error"):
+        raise OllamaResponseError(str(chunk["error"]))
+    return chunk
+
+
+def _chunk_text(chunk: Dict[str, Any]) -> str:
+    """Text carried by a generate (``response``) or chat (``message``) chunk"""
+    if "response" in chunk:
+        return chunk.get("response") or ""
+    return (chunk.get("message") or {}).get("content") or ""
+
+
+class OllamaClient:
+    """Pooled, non-blocking Ollama client shared across the process"""
+
+    def __init__(self, config: Optional[OllamaClientConfig] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.config = config or OllamaClientConfig()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._sync_client: Optional[httpx.Client] = None
+        self._sync_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, ModelMetrics] = {}
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry,
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Async connections belong to one event loop; rebuild the pool if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.config.base_url,
+                limits=self._limits(),
+                timeout=self._timeout(),
+                transport=self._transport,
+            )
+            self._client_loop = loop
+            self._semaphores = {}
+        return self._client
+
+    def _get_sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = httpx.Client(
+                    base_url=self.config.base_url,
+                    limits=self._limits(),
+                    timeout=self._timeout(),
+                )
+            return self._sync_client
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        if model not in self._semaphores:
+            self._semaphores[model] = asyncio.Semaphore(self.config.limit_for(model))
+        return self._semaphores[model]
+
+    def _sync_semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if model not in self._sync_semaphores:
+                self._sync_semaphores[model] = threading.BoundedSemaphore(self.config.limit_for(model))
+            return self._sync_semaphores[model]
+
+    def _metrics(self, model: str) -> ModelMetrics:
+        if model not in self.metrics:
+            self.metrics[model] = ModelMetrics()
+        return self.metrics[model]
+
+    async def _stream(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        POST a streaming request and yield parsed NDJSON chunks.
+
+        If the consumer stops early or is cancelled (e.g. the HTTP client
+        disconnected) the response is closed, which aborts generation in Ollama.
+        """
+        model = payload["model"]
+        metrics = self._metrics(model)
+        client = self._get_client()
+        payload = {**payload, "stream": True}
+
+        metrics.waiting += 1
+        semaphore = self._semaphore(model)
+        try:
+            await semaphore.acquire()
+        finally:
+            metrics.waiting -= 1
+
+        metrics.requests += 1
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        first_token = False
+        completed = False
+        try:
+            async with client.stream("POST", path, json=payload) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", "replace")
+                    raise OllamaResponseError(
+                        f"Ollama returned {response.status_code}: {body[:300]}", response.status_code
+                    )
+                async for line in response.aiter_lines():
+                    chunk = parse_ndjson_line(line)
+                    if chunk is None:
+                        continue
+                    if not first_token and _chunk_text(chunk):
+                        first_token = True
+                        metrics.first_token_latencies.append(time.perf_counter() - started)
+                    if chunk.get("done"):
+                        metrics.prompt_tokens += chunk.get("prompt_eval_count", 0) or 0
+                        metrics.completion_tokens += chunk.get("eval_count", 0) or 0
+                        metrics.eval_seconds += (chunk.get("eval_duration", 0) or 0) / 1e9
+                        completed = True
+                    yield chunk
+                    if completed:
+                        break
+            metrics.latencies.append(time.perf_counter() - started)
+        except (asyncio.CancelledError, GeneratorExit):
+            if not completed:
+                metrics.cancelled += 1
+            raise
+        except httpx.TimeoutException as e:
+            metrics.errors += 1
+            raise OllamaTimeoutError(f"Ollama request to {path} timed out") from e
+        except httpx.TransportError as e:
+            metrics.errors += 1
+            raise OllamaUnavailableError(f"Cannot connect to Ollama at {self.config.base_url}: {e}") from e
+        except OllamaError:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            semaphore.release()
+
+    async def _collect(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a streaming request to completion and merge it into one result"""
+        parts: List[str] = []
+        final: Dict[str, Any] = {}
+        async for chunk in self._stream(path, payload):
+            parts.append(_chunk_text(chunk))
+            final = chunk
+        text = "".join(parts)
+        result = dict(final)
+        if path == "/api/chat":
+            result["message"] = {**(final.get("message") or {"role": "assistant"}), "content": text}
+        else:
+            result["response"] = text
+        return result
+
+    def stream_generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None, **fields) -> AsyncIterator[Dict[str, Any]]:
+        """Stream ``/api/generate`` chunks as they arrive"""
+        return self._stream("/api/generate", {"model": model, "prompt": prompt, "options": options or {}, **fields})
+
+    async def generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None, **fields) -> Dict[str, Any]:
+        """Complete ``/api/generate`` call; ``result["response"]`` holds the full text"""
+        return await self._collect("/api/generate", {"model": model, "prompt": prompt, "options": options or {}, **fields})
+
+    def stream_chat(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None, **fields) -> AsyncIterator[Dict[str, Any]]:
+        """Stream ``/api/chat`` chunks as they arrive"""
+        return self._stream("/api/chat", {"model": model, "messages": messages, "options": options or {}, **fields})
+
+    async def chat(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None, **fields) -> Dict[str, Any]:
+        """Complete ``/api/chat`` call; ``result["message"]["content"]`` holds the full text"""
+        return await self._collect("/api/chat", {"model": model, "messages": messages, "options": options or {}, **fields})
+
+    async def embed(self, model: str, text: str) -> List[float]:
+        """Embedding for one text via ``/api/embeddings``"""
+        metrics = self._metrics(model)
+        client = self._get_client()
+        async with self._semaphore(model):
+            metrics.requests += 1
+            metrics.in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/embeddings", json={"model": model, "prompt": text})
+                return self._embedding_from_response(response, metrics, started)
+            except httpx.TimeoutException as e:
+                metrics.errors += 1
+                raise OllamaTimeoutError("Ollama embedding request timed out") from e
+            except httpx.TransportError as e:
+                metrics.errors += 1
+                raise OllamaUnavailableError(f"Cannot connect to Ollama at {self.config.base_url}: {e}") from e
+            except asyncio.CancelledError:
+                metrics.cancelled += 1
+                raise
+            finally:
+                metrics.in_flight -= 1
+
+    def embed_sync(self, model: str, text: str) -> List[float]:
+        """Blocking embedding call for synchronous code paths, on the shared pool"""
+        metrics = self._metrics(model)
+        client = self._get_sync_client()
+        with self._sync_semaphore(model):
+            metrics.requests += 1
+            metrics.in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = client.post("/api/embeddings", json={"model": model, "prompt": text})
+                return self._embedding_from_response(response, metrics, started)
+            except httpx.TimeoutException as e:
+                metrics.errors += 1
+                raise OllamaTimeoutError("Ollama embedding request timed out") from e
+            except httpx.TransportError as e:
+                metrics.errors += 1
+                raise OllamaUnavailableError(f"Cannot connect to Ollama at {self.config.base_url}: {e}") from e
+            finally:
+                metrics.in_flight -= 1
+
+    def _embedding_from_response(self, response: httpx.Response, metrics: ModelMetrics, started: float) -> List[float]:
+        if response.status_code != 200:
+            metrics.errors += 1
+            raise OllamaResponseError(
+                f"Ollama embedding request failed: {response.status_code} - {response.text[:300]}",
+                response.status_code
+            )
+        try:
+            embedding = response.json().get("embedding")
+        except json.JSONDecodeError as e:
+            metrics.errors += 1
+            raise OllamaResponseError(f"Invalid embedding JSON from Ollama: {response.text[:300]}") from e
+        if not embedding or not isinstance(embedding, list):
+            metrics.errors += 1
+            raise OllamaResponseError("Ollama returned no embedding")
+        metrics.latencies.append(time.perf_counter() - started)
+        return embedding
+
+    async def list_models(self) -> List[str]:
+        """Names of the models installed in Ollama"""
+        try:
+            response = await self._get_client().get("/api/tags", timeout=self.config.connect_timeout)
+        except httpx.TransportError as e:
+            raise OllamaUnavailableError(f"Cannot connect to Ollama at {self.config.base_url}: {e}") from e
+        if response.status_code != 200:
+            raise OllamaResponseError(f"Ollama returned {response.status_code}", response.status_code)
+        return [m.get("name") for m in response.json().get("models", [])]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.config.base_url,
+            "max_connections": self.config.max_connections,
+            "model_concurrency": self.config.model_concurrency,
+            "models": {model: m.to_dict() for model, m in self.metrics.items()},
+        }
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        with self._lock:
+            if self._sync_client is not None:
+                self._sync_client.close()
+                self._sync_client = None
+
+
+# Global Ollama client instance
+ollama_client = OllamaClient()
@@ -4,7 +4,9 @@ Ensures all systems work in Ollama-native environment without external dependenc
 """
 import logging
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from backend.utils.ollama_client import ollama_client, OllamaError
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +90,14 @@ class OllamaNativeCompatibility:
         
         return recommendations
     
+    async def check_ollama(self) -> Dict[str, Any]:
+        """Check Ollama reachability on the shared client without blocking the event loop"""
+        try:
+            models = await ollama_client.list_models()
+            return {"available": True, "models": models, "client": ollama_client.get_stats()}
+        except OllamaError as e:
+            return {"available": False, "error": str(e), "client": ollama_client.get_stats()}
+    
     def ensure_ollama_native_mode(self):
         """Ensure system runs in pure Ollama-native mode"""
         logger.info("🎯 Ensuring pure Ollama-native mode...")
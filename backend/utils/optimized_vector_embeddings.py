@@ -15,9 +15,10 @@ from neo4j_graphrag.retrievers import VectorRetriever
 from neo4j_graphrag.types import EntityType
 import json
 import hashlib
-import ollama
 import os
 
+from backend.utils.ollama_client import ollama_client
+
 logger = logging.getLogger(__name__)
 
 class OllamaEmbeddings:
@@ -26,30 +27,33 @@ class OllamaEmbeddings:
     def __init__(self, model: str, base_url: str = None):
         self.model = model
         self.base_url = base_url or os.getenv('OLLAMA_BASE_URL', 'http://host.docker.internal:11434')
-        self.client = ollama.Client(host=self.base_url)
+        # All instances share the process-wide pooled client
+        self.client = ollama_client
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of documents"""
-        embeddings = []
-        for text in texts:
-            try:
-                response = self.client.embeddings(model=self.model, prompt=text)
-                embeddings.append(response['embedding'])
-            except Exception as e:
-                logger.error(f"Error generating embedding for text: {e}")
-                # Return zero vector as fallback
-                embeddings.append([0.0] * 768)  # Default dimension for nomic-embed-text
-        return embeddings
+        return [self.embed_query(text) for text in texts]
     
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query"""
         try:
-            response = self.client.embeddings(model=self.model, prompt=text)
-            return response['embedding']
+            return self.client.embed_sync(self.model, text)
         except Exception as e:
             logger.error(f"Error generating embedding for query: {e}")
             # Return zero vector as fallback
             return [0.0] * 768  # Default dimension for nomic-embed-text
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents concurrently without blocking the event loop"""
+        return list(await asyncio.gather(*(self.aembed_query(text) for text in texts)))
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a single query without blocking the event loop"""
+        try:
+            return await self.client.embed(self.model, text)
+        except Exception as e:
+            logger.error(f"Error generating embedding for query: {e}")
+            return [0.0] * 768  # Default dimension for nomic-embed-text
 
 class OptimizedVectorEmbeddings:
     """
@@ -235,8 +239,10 @@ class OptimizedVectorEmbeddings:
     async def _generate_embedding_async(self, embedder, text: str) -> List[float]:
         """Generate embedding asynchronously"""
         try:
-            if hasattr(embedder, 'embed_query'):
-                return embedder.embed_query(text)
+            if hasattr(embedder, 'aembed_query'):
+                return await embedder.aembed_query(text)
+            elif hasattr(embedder, 'embed_query'):
+                return await asyncio.to_thread(embedder.embed_query, text)
             else:
                 # Fallback for synchronous embedders
                 return embedder.embed_documents([text])[0]
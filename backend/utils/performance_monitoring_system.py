@@ -1,10 +1,14 @@
 """
 Comprehensive Performance Monitoring System for Mainza AI
 Implements advanced monitoring, metrics collection, and optimization recommendations
+
+Samples are kept in an embedded time-series store (ring buffer plus on-disk
+1s/1m/1h rollups); Neo4j only receives one aggregated snapshot per interval.
 """
 
 import asyncio
 import logging
+import os
 import time
 import psutil
 import json
@@ -12,11 +16,12 @@ from typing import Dict, List, Any, Optional, Tuple, Callable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
-from collections import defaultdict, deque
 import numpy as np
 from neo4j import GraphDatabase
 import redis.asyncio as redis
 
+from backend.utils.timeseries_store import TimeSeriesStore
+
 logger = logging.getLogger(__name__)
 
 class MetricType(Enum):
@@ -71,14 +76,24 @@ class PerformanceMonitoringSystem:
         self.redis_client = redis_client
         self.config = config or {}
         
-        # Metrics storage
-        self.metrics_history = defaultdict(lambda: deque(maxlen=1000))  # Keep last 1000 metrics per type
-        self.active_alerts = {}
+        # Metrics storage: samples stay in the local time-series store and only
+        # aggregated snapshots are written to Neo4j
+        self.metric_store = self.config.get("metric_store") or TimeSeriesStore()
+        self.metric_meta: Dict[str, Tuple[MetricType, str]] = {}  # name -> (type, unit)
+        self.metric_trends: Dict[str, Dict[str, Any]] = {}
+        self.performance_insights: List[Dict[str, Any]] = []
+        self.active_alerts: Dict[str, PerformanceAlert] = {}  # metric name -> alert
         self.performance_baselines = {}
         self.optimization_recommendations = []
         
         # Monitoring configuration
         self.monitoring_interval = self.config.get("monitoring_interval", 30)  # seconds
+        self.snapshot_interval = self.config.get(
+            "snapshot_interval", int(os.getenv("PERFORMANCE_SNAPSHOT_INTERVAL", "300"))
+        )  # seconds
+        self.snapshot_retention_days = self.config.get(
+            "snapshot_retention_days", int(os.getenv("PERFORMANCE_SNAPSHOT_RETENTION_DAYS", "30"))
+        )
         self.alert_thresholds = self.config.get("alert_thresholds", {
             "cpu_usage": 80.0,
             "memory_usage": 85.0,
@@ -123,7 +138,8 @@ class PerformanceMonitoringSystem:
                 asyncio.create_task(self._monitor_cache_metrics()),
                 asyncio.create_task(self._monitor_agent_metrics()),
                 asyncio.create_task(self._analyze_performance_trends()),
-                asyncio.create_task(self._generate_optimization_recommendations())
+                asyncio.create_task(self._generate_optimization_recommendations()),
+                asyncio.create_task(self._store_metrics_snapshots())
             ]
             
             logger.info("Performance monitoring system started successfully")
@@ -145,6 +161,9 @@ class PerformanceMonitoringSystem:
             await asyncio.gather(*self.monitoring_tasks, return_exceptions=True)
             
             self.monitoring_tasks = []
+            
+            # Persist partially filled rollup buckets
+            await asyncio.to_thread(self.metric_store.flush, force=True)
             logger.info("Performance monitoring system stopped")
             
         except Exception as e:
@@ -378,15 +397,12 @@ class PerformanceMonitoringSystem:
         """Analyze performance trends and patterns"""
         while self.is_monitoring:
             try:
-                # Analyze trends for each metric type
-                for metric_type in MetricType:
-                    await self._analyze_metric_trends(metric_type)
-                
-                # Generate performance insights
-                insights = await self._generate_performance_insights()
+                # Analyze trends for each metric
+                for metric_name in list(self.metric_meta):
+                    await self._analyze_metric_trends(metric_name)
                 
-                # Store insights
-                await self._store_performance_insights(insights)
+                # Generate performance insights; they are persisted with the next snapshot
+                self.performance_insights = await self._generate_performance_insights()
                 
                 await asyncio.sleep(self.monitoring_interval * 2)  # Run less frequently
                 
@@ -455,9 +471,8 @@ class PerformanceMonitoringSystem:
                         ]
                     })
                 
-                # Store recommendations
+                # Store recommendations; they are persisted with the next snapshot
                 self.optimization_recommendations = recommendations
-                await self._store_optimization_recommendations(recommendations)
                 
                 await asyncio.sleep(self.monitoring_interval * 4)  # Run less frequently
                 
@@ -466,7 +481,7 @@ class PerformanceMonitoringSystem:
                 await asyncio.sleep(self.monitoring_interval * 4)
     
     async def _record_metric(self, name: str, value: float, metric_type: MetricType, unit: str, tags: Dict[str, str] = None):
-        """Record a performance metric"""
+        """Record a performance metric in the local time-series store"""
         try:
             metric = PerformanceMetric(
                 name=name,
@@ -481,16 +496,14 @@ class PerformanceMonitoringSystem:
             await self._check_metric_alerts(metric)
             
             # Store metric
-            self.metrics_history[metric_type].append(metric)
-            
-            # Store in database
-            await self._store_metric_in_db(metric)
+            self.metric_store.record(name, metric.value, metric.timestamp.timestamp())
+            self.metric_meta[name] = (metric_type, unit)
             
         except Exception as e:
             logger.error(f"Error recording metric {name}: {e}")
     
     async def _check_metric_alerts(self, metric: PerformanceMetric):
-        """Check if metric triggers any alerts"""
+        """Raise, update or clear the alert of a metric; one active alert per metric"""
         try:
             threshold = self.alert_thresholds.get(metric.name)
             if not threshold:
@@ -504,44 +517,48 @@ class PerformanceMonitoringSystem:
             elif metric.value >= threshold:
                 alert_level = AlertLevel.WARNING
             
-            if alert_level:
-                alert_id = f"{metric.name}_{metric.timestamp.timestamp()}"
-                
-                alert = PerformanceAlert(
-                    id=alert_id,
-                    metric_name=metric.name,
-                    current_value=metric.value,
-                    threshold_value=threshold,
-                    alert_level=alert_level,
-                    message=f"{metric.name} exceeded threshold: {metric.value:.2f} > {threshold:.2f}",
-                    timestamp=metric.timestamp
-                )
-                
-                self.active_alerts[alert_id] = alert
-                await self._store_alert_in_db(alert)
-                
-                logger.warning(f"Performance alert: {alert.message}")
+            existing = self.active_alerts.get(metric.name)
+            if alert_level is None:
+                if existing:
+                    await self.resolve_alert(existing.id)
+                return
+            
+            message = f"{metric.name} exceeded threshold: {metric.value:.2f} > {threshold:.2f}"
+            if existing:
+                existing.current_value = metric.value
+                existing.message = message
+                if existing.alert_level != alert_level:
+                    existing.alert_level = alert_level
+                    logger.warning(f"Performance alert changed to {alert_level.value}: {message}")
+                return
+            
+            alert = PerformanceAlert(
+                id=f"{metric.name}_{metric.timestamp.timestamp()}",
+                metric_name=metric.name,
+                current_value=metric.value,
+                threshold_value=threshold,
+                alert_level=alert_level,
+                message=message,
+                timestamp=metric.timestamp
+            )
+            self.active_alerts[metric.name] = alert
+            logger.warning(f"Performance alert: {alert.message}")
             
         except Exception as e:
             logger.error(f"Error checking metric alerts: {e}")
     
-    async def _analyze_metric_trends(self, metric_type: MetricType):
-        """Analyze trends for a specific metric type"""
+    async def _analyze_metric_trends(self, metric_name: str):
+        """Analyze the trend of a single metric over its most recent samples"""
         try:
-            metrics = list(self.metrics_history[metric_type])
-            if len(metrics) < 10:  # Need enough data points
+            values = self.metric_store.tail(metric_name, 20)  # Last 20 data points
+            if len(values) < 10:  # Need enough data points
                 return
             
-            # Calculate trend
-            values = [m.value for m in metrics[-20:]]  # Last 20 data points
-            trend = self._calculate_trend(values)
-            
-            # Store trend analysis
-            await self._store_trend_analysis(metric_type, trend)
+            self.metric_trends[metric_name] = self._calculate_trend(values)
             
         except Exception as e:
-            logger.error(f"Error analyzing trends for {metric_type}: {e}")
-    
+            logger.error(f"Error analyzing trends for {metric_name}: {e}")
+
     def _calculate_trend(self, values: List[float]) -> Dict[str, Any]:
         """Calculate trend from a series of values"""
         try:
@@ -642,11 +659,10 @@ class PerformanceMonitoringSystem:
         try:
             current_metrics = {}
             
-            for metric_type in MetricType:
-                metrics = list(self.metrics_history[metric_type])
-                if metrics:
-                    latest_metric = metrics[-1]
-                    current_metrics[latest_metric.name] = latest_metric.value
+            for name in list(self.metric_meta):
+                latest = self.metric_store.latest(name)
+                if latest:
+                    current_metrics[name] = latest[1]
             
             return current_metrics
             
@@ -654,149 +670,86 @@ class PerformanceMonitoringSystem:
             logger.error(f"Error getting current metrics: {e}")
             return {}
     
-    async def _store_metric_in_db(self, metric: PerformanceMetric):
-        """Store metric in Neo4j database"""
-        try:
-            with self.driver.session() as session:
-                query = """
-                CREATE (m:PerformanceMetric {
-                    name: $name,
-                    value: $value,
-                    metric_type: $metric_type,
-                    timestamp: $timestamp,
-                    unit: $unit,
-                    tags: $tags,
-                    alert_level: $alert_level
-                })
-                """
-                
-                await session.run(query, {
-                    "name": metric.name,
-                    "value": metric.value,
-                    "metric_type": metric.metric_type.value,
-                    "timestamp": metric.timestamp.isoformat(),
-                    "unit": metric.unit,
-                    "tags": json.dumps(metric.tags),
-                    "alert_level": metric.alert_level.value if metric.alert_level else None
-                })
-            
-        except Exception as e:
-            logger.error(f"Error storing metric in database: {e}")
-    
-    async def _store_alert_in_db(self, alert: PerformanceAlert):
-        """Store alert in Neo4j database"""
-        try:
-            with self.driver.session() as session:
-                query = """
-                CREATE (a:PerformanceAlert {
-                    id: $id,
-                    metric_name: $metric_name,
-                    current_value: $current_value,
-                    threshold_value: $threshold_value,
-                    alert_level: $alert_level,
-                    message: $message,
-                    timestamp: $timestamp,
-                    resolved: $resolved
-                })
-                """
+    async def _store_metrics_snapshots(self):
+        """Periodically flush rollups and persist one aggregated snapshot to Neo4j"""
+        while self.is_monitoring:
+            try:
+                await asyncio.sleep(self.snapshot_interval)
+                # Rollup segment writes and deletions run off the event loop
+                await asyncio.to_thread(self.metric_store.flush)
+                await asyncio.to_thread(self.metric_store.apply_retention)
+                await self._store_metrics_snapshot()
                 
-                await session.run(query, {
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error storing performance snapshot: {e}")
+    
+    def _build_snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Aggregated state of the current snapshot window"""
+        now = time.time() if now is None else now
+        window_start = now - now % self.snapshot_interval
+        metrics = {}
+        for name, (metric_type, unit) in list(self.metric_meta.items()):
+            summary = self.metric_store.summary(name, since=now - self.snapshot_interval, until=now + 1)
+            if summary.get("count"):
+                summary.pop("series", None)
+                metrics[name] = {**summary, "metric_type": metric_type.value, "unit": unit}
+        
+        return {
+            "window_start": datetime.fromtimestamp(window_start).isoformat(),
+            "window_end": datetime.fromtimestamp(now).isoformat(),
+            "retention_cutoff": (datetime.fromtimestamp(now) - timedelta(days=self.snapshot_retention_days)).isoformat(),
+            "metrics": json.dumps(metrics),
+            "alerts": json.dumps([
+                {
                     "id": alert.id,
                     "metric_name": alert.metric_name,
                     "current_value": alert.current_value,
                     "threshold_value": alert.threshold_value,
                     "alert_level": alert.alert_level.value,
                     "message": alert.message,
-                    "timestamp": alert.timestamp.isoformat(),
-                    "resolved": alert.resolved
-                })
-            
-        except Exception as e:
-            logger.error(f"Error storing alert in database: {e}")
-    
-    async def _store_trend_analysis(self, metric_type: MetricType, trend: Dict[str, Any]):
-        """Store trend analysis in database"""
-        try:
-            with self.driver.session() as session:
-                query = """
-                CREATE (t:TrendAnalysis {
-                    metric_type: $metric_type,
-                    trend: $trend,
-                    slope: $slope,
-                    volatility: $volatility,
-                    min_value: $min_value,
-                    max_value: $max_value,
-                    avg_value: $avg_value,
-                    timestamp: $timestamp
-                })
-                """
-                
-                await session.run(query, {
-                    "metric_type": metric_type.value,
-                    "trend": trend.get("trend", "unknown"),
-                    "slope": trend.get("slope", 0),
-                    "volatility": trend.get("volatility", 0),
-                    "min_value": trend.get("min_value", 0),
-                    "max_value": trend.get("max_value", 0),
-                    "avg_value": trend.get("avg_value", 0),
-                    "timestamp": datetime.now().isoformat()
-                })
-            
-        except Exception as e:
-            logger.error(f"Error storing trend analysis: {e}")
+                    "timestamp": alert.timestamp.isoformat()
+                }
+                for alert in self.active_alerts.values()
+            ]),
+            "trends": json.dumps(self.metric_trends, default=float),
+            "insights": json.dumps(self.performance_insights),
+            "recommendations": json.dumps(self.optimization_recommendations),
+            "performance_stats": json.dumps(self.performance_stats)
+        }
     
-    async def _store_performance_insights(self, insights: List[Dict[str, Any]]):
-        """Store performance insights in database"""
-        try:
-            with self.driver.session() as session:
-                for insight in insights:
-                    query = """
-                    CREATE (i:PerformanceInsight {
-                        type: $type,
-                        status: $status,
-                        message: $message,
-                        timestamp: $timestamp
-                    })
-                    """
-                    
-                    await session.run(query, {
-                        "type": insight["type"],
-                        "status": insight["status"],
-                        "message": insight["message"],
-                        "timestamp": datetime.now().isoformat()
-                    })
-            
-        except Exception as e:
-            logger.error(f"Error storing performance insights: {e}")
+    def _write_snapshot(self, snapshot: Dict[str, Any]):
+        with self.driver.session() as session:
+            query = """
+            MERGE (s:PerformanceSnapshot {window_start: $window_start})
+            SET s.window_end = $window_end,
+                s.metrics = $metrics,
+                s.alerts = $alerts,
+                s.trends = $trends,
+                s.insights = $insights,
+                s.recommendations = $recommendations,
+                s.performance_stats = $performance_stats
+            WITH s
+            OPTIONAL MATCH (old:PerformanceSnapshot)
+            WHERE old.window_start < $retention_cutoff
+            DETACH DELETE old
+            """
+            session.run(query, snapshot).consume()
     
-    async def _store_optimization_recommendations(self, recommendations: List[Dict[str, Any]]):
-        """Store optimization recommendations in database"""
+    async def _store_metrics_snapshot(self):
+        """
+        Write the aggregated snapshot of the current window to Neo4j.
+        
+        Snapshots are merged on their window start, so repeated writes within a
+        window update one node, and snapshots past retention are deleted.
+        """
         try:
-            with self.driver.session() as session:
-                # Clear old recommendations
-                await session.run("MATCH (r:OptimizationRecommendation) DELETE r")
-                
-                for rec in recommendations:
-                    query = """
-                    CREATE (r:OptimizationRecommendation {
-                        type: $type,
-                        priority: $priority,
-                        message: $message,
-                        suggestions: $suggestions,
-                        timestamp: $timestamp
-                    })
-                    """
-                    
-                    await session.run(query, {
-                        "type": rec["type"],
-                        "priority": rec["priority"],
-                        "message": rec["message"],
-                        "suggestions": json.dumps(rec["suggestions"]),
-                        "timestamp": datetime.now().isoformat()
-                    })
+            snapshot = self._build_snapshot()
+            await asyncio.to_thread(self._write_snapshot, snapshot)
             
         except Exception as e:
-            logger.error(f"Error storing optimization recommendations: {e}")
+            logger.error(f"Error storing performance snapshot in database: {e}")
     
     def record_request(self, success: bool, response_time: float):
         """Record a request for performance tracking"""
@@ -823,14 +776,14 @@ class PerformanceMonitoringSystem:
         """Get comprehensive performance summary"""
         try:
             current_metrics = {}
-            for metric_type in MetricType:
-                metrics = list(self.metrics_history[metric_type])
-                if metrics:
-                    latest_metric = metrics[-1]
-                    current_metrics[latest_metric.name] = {
-                        "value": latest_metric.value,
-                        "unit": latest_metric.unit,
-                        "timestamp": latest_metric.timestamp.isoformat()
+            for name, (metric_type, unit) in list(self.metric_meta.items()):
+                latest = self.metric_store.latest(name)
+                if latest:
+                    timestamp, value = latest
+                    current_metrics[name] = {
+                        "value": value,
+                        "unit": unit,
+                        "timestamp": datetime.fromtimestamp(timestamp).isoformat()
                     }
             
             return {
@@ -839,13 +792,54 @@ class PerformanceMonitoringSystem:
                 "active_alerts": len(self.active_alerts),
                 "optimization_recommendations": len(self.optimization_recommendations),
                 "monitoring_status": "active" if self.is_monitoring else "inactive",
-                "total_metrics_collected": sum(len(metrics) for metrics in self.metrics_history.values())
+                "total_metrics_collected": self.metric_store.samples_recorded,
+                "metric_store": self.metric_store.stats()
             }
             
         except Exception as e:
             logger.error(f"Error getting performance summary: {e}")
             return {"error": str(e)}
     
+    def get_metric_range(
+        self,
+        metric_name: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        resolution: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Samples of a metric between ``since`` (default: one hour ago) and
+        ``until``; ``resolution`` is ``raw``, ``1s``, ``1m`` or ``1h`` and is
+        chosen from the window length when omitted.
+        """
+        since = since or datetime.now() - timedelta(hours=1)
+        result = self.metric_store.range(
+            metric_name,
+            since=since.timestamp(),
+            until=until.timestamp() if until else None,
+            resolution=resolution
+        )
+        if metric_name in self.metric_meta:
+            result["unit"] = self.metric_meta[metric_name][1]
+        return result
+    
+    def get_metric_summary(
+        self,
+        metric_name: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Count, mean, min, max and p50/p90/p95/p99 of a metric over a window"""
+        since = since or datetime.now() - timedelta(hours=1)
+        result = self.metric_store.summary(
+            metric_name,
+            since=since.timestamp(),
+            until=until.timestamp() if until else None
+        )
+        if metric_name in self.metric_meta:
+            result["unit"] = self.metric_meta[metric_name][1]
+        return result
+    
     def get_optimization_recommendations(self) -> List[Dict[str, Any]]:
         """Get current optimization recommendations"""
         return self.optimization_recommendations.copy()
@@ -855,33 +849,19 @@ class PerformanceMonitoringSystem:
         return list(self.active_alerts.values())
     
     async def resolve_alert(self, alert_id: str):
-        """Resolve a performance alert"""
+        """Resolve a performance alert by id or metric name"""
         try:
-            if alert_id in self.active_alerts:
-                alert = self.active_alerts[alert_id]
-                alert.resolved = True
-                alert.resolution_time = datetime.now()
-                
-                # Update in database
-                with self.driver.session() as session:
-                    query = """
-                    MATCH (a:PerformanceAlert {id: $id})
-                    SET a.resolved = true, a.resolution_time = $resolution_time
-                    """
-                    await session.run(query, {
-                        "id": alert_id,
-                        "resolution_time": alert.resolution_time.isoformat()
-                    })
-                
-                # Remove from active alerts
-                del self.active_alerts[alert_id]
-                
-                logger.info(f"Alert {alert_id} resolved")
+            for metric_name, alert in list(self.active_alerts.items()):
+                if alert_id in (alert.id, metric_name):
+                    alert.resolved = True
+                    alert.resolution_time = datetime.now()
+                    del self.active_alerts[metric_name]
+                    logger.info(f"Alert {alert.id} resolved")
+                    return
             
         except Exception as e:
             logger.error(f"Error resolving alert {alert_id}: {e}")
 
-
 # Performance monitoring decorator
 def monitor_performance(metric_name: str, metric_type: MetricType = MetricType.APPLICATION):
     """Decorator to monitor function performance"""
@@ -0,0 +1,343 @@
+"""
+Post-Response Pipeline for Mainza AI
+
+Bookkeeping that follows an agent run (consciousness updates, interaction
+memories, agent activity and conversation records) does not change the answer,
+so it runs here after the response has been returned instead of on the
+request path.
+
+Tasks are registered handlers with JSON-serializable payloads. Every submitted
+task is written to an append-only journal until it finishes, so tasks still
+pending at shutdown or after a crash are replayed on the next start. A fixed
+number of workers drain a bounded queue; failed tasks are retried with
+exponential backoff up to the handler's attempt limit, and idempotency keys
+turn duplicate submissions into no-ops.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class PostResponseConfig:
+    """Worker, retry and journal settings"""
+    enabled: bool = os.getenv("POST_RESPONSE_ASYNC", "true").lower() == "true"
+    workers: int = int(os.getenv("POST_RESPONSE_WORKERS", "4"))
+    queue_size: int = int(os.getenv("POST_RESPONSE_QUEUE_SIZE", "1000"))
+    max_attempts: int = int(os.getenv("POST_RESPONSE_MAX_ATTEMPTS", "3"))
+    retry_backoff: float = float(os.getenv("POST_RESPONSE_RETRY_BACKOFF", "0.5"))
+    journal_path: str = os.getenv("POST_RESPONSE_JOURNAL", "post_response_data/tasks.jsonl")
+    journal_compact_every: int = 1000
+    idempotency_cache_size: int = 10000
+
+
+@dataclass
+class PostResponseTask:
+    """One unit of post-response work"""
+    kind: str
+    payload: Dict[str, Any]
+    idempotency_key: str
+    task_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class PipelineStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    retried: int = 0
+    duplicates: int = 0
+    overflow: int = 0
+    replayed: int = 0
+    in_flight: int = 0
+
+
+class TaskJournal:
+    """Append-only JSONL record of submitted and finished tasks"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.records_since_compaction = 0
+
+    def _append(self, record: Dict[str, Any]):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+            self.records_since_compaction += 1
+
+    def submitted(self, task: PostResponseTask):
+        self._append({"op": "submit", "task": asdict(task)})
+
+    def finished(self, task: PostResponseTask, status: str):
+        self._append({"op": status, "task_id": task.task_id})
+
+    def pending(self) -> List[PostResponseTask]:
+        """Tasks that were submitted but never finished"""
+        if not self.path.exists():
+            return []
+        tasks: "OrderedDict[str, PostResponseTask]" = OrderedDict()
+        with self._lock, open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line after a crash
+                if record.get("op") == "submit":
+                    task = PostResponseTask(**record["task"])
+                    tasks[task.task_id] = task
+                else:
+                    tasks.pop(record.get("task_id"), None)
+        return list(tasks.values())
+
+    def compact(self, pending: Iterable[PostResponseTask]):
+        """Rewrite the journal with only the given pending tasks"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for task in pending:
+                    f.write(json.dumps({"op": "submit", "task": asdict(task)}, default=str) + "\n")
+            os.replace(tmp, self.path)
+            self.records_since_compaction = 0
+
+
+class PostResponsePipeline:
+    """Bounded, retrying, journaled background execution of post-response tasks"""
+
+    def __init__(self, config: Optional[PostResponseConfig] = None):
+        self.config = config or PostResponseConfig()
+        self.journal = TaskJournal(self.config.journal_path) if self.config.journal_path else None
+        self.handlers: Dict[str, Tuple[TaskHandler, int]] = {}
+        self.stats = PipelineStats()
+        self._keys: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, PostResponseTask] = {}
+        self._retrying: Dict[str, asyncio.TimerHandle] = {}
+        self._failures: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._replayed = False
+
+    def register(self, kind: str, handler: TaskHandler, max_attempts: Optional[int] = None):
+        """
+        Register the coroutine that runs tasks of ``kind``. Handlers must raise
+        on failure to be retried; use ``max_attempts=1`` for handlers that are
+        not safe to repeat.
+        """
+        self.handlers[kind] = (handler, max_attempts or self.config.max_attempts)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.config.queue_size)
+        self._retrying = {}
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.config.workers)]
+        if not self._replayed:
+            self._replayed = True
+            self._replay()
+        else:
+            # Workers of a previous event loop are gone; requeue what they left behind
+            for task in list(self._pending.values()):
+                if task.kind in self.handlers and not self._enqueue(task):
+                    loop.create_task(self._process(task))
+
+    async def start(self):
+        """Start workers and replay tasks left pending by a previous run"""
+        if self.config.enabled:
+            self._ensure_started()
+
+    def _replay(self):
+        if not self.journal:
+            return
+        try:
+            pending = self.journal.pending()
+        except Exception as e:
+            logger.error(f"❌ Could not read post-response journal: {e}")
+            return
+        for task in pending:
+            self._pending[task.task_id] = task
+            self._remember_key(task)
+            if task.kind in self.handlers and not self._enqueue(task):
+                self._loop.create_task(self._process(task))
+        self.journal.compact(pending)
+        self.stats.replayed += len(pending)
+        if pending:
+            logger.info(f"♻️ Replaying {len(pending)} pending post-response tasks")
+
+    def _remember_key(self, task: PostResponseTask):
+        self._keys[task.idempotency_key] = task.task_id
+        self._keys.move_to_end(task.idempotency_key)
+        while len(self._keys) > self.config.idempotency_cache_size:
+            self._keys.popitem(last=False)
+
+    def _enqueue(self, task: PostResponseTask) -> bool:
+        try:
+            self._queue.put_nowait(task)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def submit(self, kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> str:
+        """
+        Queue a task and return its id without waiting for it to run.
+
+        A task whose idempotency key was already submitted is not queued again.
+        If the queue is full the task runs before returning (backpressure), and
+        with ``POST_RESPONSE_ASYNC=false`` every task runs inline.
+        """
+        if kind not in self.handlers:
+            raise KeyError(f"No post-response handler registered for {kind}")
+        idempotency_key = idempotency_key or str(uuid.uuid4())
+        existing = self._keys.get(idempotency_key)
+        if existing is not None:
+            self.stats.duplicates += 1
+            return existing
+
+        task = PostResponseTask(kind=kind, payload=payload, idempotency_key=idempotency_key)
+        self.stats.submitted += 1
+        self._remember_key(task)
+
+        if not self.config.enabled:
+            await self._process(task)
+            return task.task_id
+
+        self._ensure_started()
+        self._pending[task.task_id] = task
+        if self.journal:
+            try:
+                self.journal.submitted(task)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not journal post-response task {kind}: {e}")
+        if not self._enqueue(task):
+            self.stats.overflow += 1
+            logger.warning(f"⚠️ Post-response queue full, running {kind} inline")
+            await self._process(task)
+        return task.task_id
+
+    async def _worker(self):
+        while True:
+            task = await self._queue.get()
+            try:
+                await self._process(task)
+            except Exception as e:
+                logger.error(f"❌ Post-response worker error on {task.kind}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, task: PostResponseTask):
+        """Run one task; inline runs retry in place, queued runs reschedule"""
+        while True:
+            delay = await self._attempt(task)
+            if delay is None:
+                return
+            if self.config.enabled and self._loop is asyncio.get_running_loop():
+                self._retrying[task.task_id] = self._loop.call_later(delay, self._retry, task)
+                return
+            await asyncio.sleep(delay)
+
+    def _retry(self, task: PostResponseTask):
+        self._retrying.pop(task.task_id, None)
+        if not self._enqueue(task):
+            self._loop.create_task(self._process(task))
+
+    async def _attempt(self, task: PostResponseTask) -> Optional[float]:
+        """Run a task once; returns the retry delay, or None once the task is finished"""
+        handler, max_attempts = self.handlers[task.kind]
+        task.attempts += 1
+        self.stats.in_flight += 1
+        try:
+            await handler(task.payload)
+        except Exception as e:
+            if task.attempts < max_attempts:
+                self.stats.retried += 1
+                delay = self.config.retry_backoff * (2 ** (task.attempts - 1))
+                logger.warning(f"⚠️ Post-response task {task.kind} failed (attempt {task.attempts}), retrying in {delay:.1f}s: {e}")
+                return delay
+            self.stats.failed += 1
+            self._failures.append({
+                "kind": task.kind,
+                "task_id": task.task_id,
+                "attempts": task.attempts,
+                "error": str(e)[:300],
+                "at": time.time()
+            })
+            logger.error(f"❌ Post-response task {task.kind} failed after {task.attempts} attempts: {e}")
+            self._finish(task, "failed")
+            return None
+        finally:
+            self.stats.in_flight -= 1
+        self.stats.completed += 1
+        self._finish(task, "done")
+        return None
+
+    def _finish(self, task: PostResponseTask, status: str):
+        if self._pending.pop(task.task_id, None) is None or not self.journal:
+            return
+        try:
+            self.journal.finished(task, status)
+            if self.journal.records_since_compaction >= self.config.journal_compact_every:
+                self.journal.compact(self._pending.values())
+        except Exception as e:
+            logger.warning(f"⚠️ Could not journal post-response task completion: {e}")
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until queued tasks and scheduled retries have finished"""
+        async def _wait():
+            while True:
+                if self._queue is not None and self._loop is asyncio.get_running_loop():
+                    await self._queue.join()
+                if not self._retrying:
+                    return
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(_wait(), timeout)
+
+    async def stop(self, timeout: float = 5.0):
+        """Finish outstanding work within ``timeout``; anything left stays journaled for replay"""
+        if not self._workers:
+            return
+        try:
+            await self.drain(timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ {len(self._pending)} post-response tasks still pending at shutdown; they will be replayed")
+        for handle in self._retrying.values():
+            handle.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._retrying = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "async_enabled": self.config.enabled,
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "pending": len(self._pending),
+            "awaiting_retry": len(self._retrying),
+            "handlers": sorted(self.handlers),
+            "recent_failures": list(self._failures)
+        }
+
+
+# Global post-response pipeline instance
+post_response_pipeline = PostResponsePipeline()
@@ -10,7 +10,7 @@ Key Principles:
 - Local processing only
 - Minimal data collection
 - User control over all data
-- Simple file-based storage
+- Simple file-based storage (append-only daily JSONL segments per data type)
 """
 
 import json
@@ -24,6 +24,8 @@ import psutil
 import threading
 from dataclasses import dataclass, asdict
 
+from backend.utils.telemetry_store import SegmentedTelemetryLog, parse_timestamp
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -90,6 +92,10 @@ class PrivacyFirstTelemetry:
         # Thread safety
         self._lock = threading.Lock()
         
+        # Append-only segmented stores, one per data type
+        self.stores: Dict[str, SegmentedTelemetryLog] = {}
+        self._last_retention_run: Dict[str, datetime] = {}
+        
         # Initialize data files
         self._init_data_files()
         
@@ -98,18 +104,58 @@ class PrivacyFirstTelemetry:
         logger.info("Zero personal data collection - local processing only")
     
     def _init_data_files(self):
-        """Initialize telemetry data files"""
-        files = {
-            'system_health.json': [],
-            'consciousness.json': [],
-            'errors.json': []
-        }
+        """Initialize telemetry segment stores"""
+        for data_type in self.retention_days:
+            self.stores[data_type] = SegmentedTelemetryLog(self.data_dir / data_type)
+            self._apply_retention_policy(data_type)
+    
+    def migrate_legacy_data(self) -> Dict[str, Dict[str, int]]:
+        """
+        Import legacy ``<data_type>.json`` files into the segment stores.
         
-        for filename, default_data in files.items():
-            filepath = self.data_dir / filename
-            if not filepath.exists():
-                with open(filepath, 'w') as f:
-                    json.dump(default_data, f, indent=2)
+        Safe to run repeatedly: records already in a store are skipped, so an
+        interrupted migration resumes without duplicates, and a legacy file is
+        renamed to ``.json.migrated`` once fully imported. Records already past
+        the retention window are counted as expired rather than imported.
+        """
+        results = {}
+        for data_type, retention_days in self.retention_days.items():
+            legacy_path = self.data_dir / f"{data_type}.json"
+            if not legacy_path.exists():
+                continue
+            try:
+                with open(legacy_path, 'r') as f:
+                    legacy_records = json.load(f)
+                
+                store = self.stores[data_type]
+                cutoff = datetime.utcnow() - timedelta(days=retention_days)
+                existing = {self._record_key(r) for r in store.read_range(since=cutoff)}
+                counts = {"imported": 0, "expired": 0, "already_imported": 0}
+                for record in legacy_records:
+                    timestamp = parse_timestamp(record.get("timestamp", ""))
+                    if timestamp is not None and timestamp < cutoff:
+                        counts["expired"] += 1
+                        continue
+                    key = self._record_key(record)
+                    if key in existing:
+                        counts["already_imported"] += 1
+                        continue
+                    store.append(record)
+                    existing.add(key)
+                    counts["imported"] += 1
+                
+                legacy_path.rename(legacy_path.with_suffix('.json.migrated'))
+                results[data_type] = counts
+                logger.info(f"Migrated legacy {data_type} telemetry: {counts['imported']} imported, "
+                           f"{counts['expired']} past the {retention_days} day retention, "
+                           f"{counts['already_imported']} already imported")
+            except Exception as e:
+                logger.error(f"Error migrating legacy telemetry file {legacy_path}: {e}")
+        return results
+    
+    @staticmethod
+    def _record_key(record: Dict[str, Any]) -> str:
+        return json.dumps(record, sort_keys=True, default=str)
     
     def is_enabled(self) -> bool:
         """Check if telemetry is enabled (user control)"""
@@ -258,55 +304,36 @@ class PrivacyFirstTelemetry:
             return {}
     
     def _save_data(self, data_type: str, data: Dict[str, Any]):
-        """Save data to local JSON file (privacy-first storage)"""
+        """Append a record to the data type's current segment (privacy-first storage)"""
         try:
-            with self._lock:
-                filepath = self.data_dir / f"{data_type}.json"
-                
-                # Load existing data
-                if filepath.exists():
-                    with open(filepath, 'r') as f:
-                        existing_data = json.load(f)
-                else:
-                    existing_data = []
-                
-                # Add new data
-                existing_data.append(data)
-                
-                # Apply retention policy
-                existing_data = self._apply_retention_policy(data_type, existing_data)
-                
-                # Save updated data
-                with open(filepath, 'w') as f:
-                    json.dump(existing_data, f, indent=2)
+            store = self.stores.get(data_type)
+            if store is None:
+                with self._lock:
+                    store = self.stores.setdefault(data_type, SegmentedTelemetryLog(self.data_dir / data_type))
+            store.append(data)
+            
+            # Retention drops whole daily segments, so checking hourly is enough
+            last_run = self._last_retention_run.get(data_type)
+            if last_run is None or datetime.utcnow() - last_run > timedelta(hours=1):
+                self._apply_retention_policy(data_type)
                     
         except Exception as e:
             logger.error(f"Error saving telemetry data: {e}")
     
-    def _apply_retention_policy(self, data_type: str, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Apply data retention policy (user configurable)"""
+    def _apply_retention_policy(self, data_type: str) -> int:
+        """Apply data retention policy (user configurable) by dropping expired segments"""
         try:
-            if data_type not in self.retention_days:
-                return data
+            self._last_retention_run[data_type] = datetime.utcnow()
+            if data_type not in self.retention_days or data_type not in self.stores:
+                return 0
             
             retention_days = self.retention_days[data_type]
             cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-            
-            filtered_data = []
-            for item in data:
-                try:
-                    item_date = datetime.fromisoformat(item['timestamp'].replace('Z', '+00:00'))
-                    if item_date >= cutoff_date:
-                        filtered_data.append(item)
-                except Exception:
-                    # Keep item if date parsing fails
-                    filtered_data.append(item)
-            
-            return filtered_data
+            return self.stores[data_type].drop_before(cutoff_date)
             
         except Exception as e:
             logger.error(f"Error applying retention policy: {e}")
-            return data
+            return 0
     
     def get_telemetry_summary(self) -> Dict[str, Any]:
         """
@@ -331,15 +358,10 @@ class PrivacyFirstTelemetry:
                 "data_types": ["system_health", "consciousness", "errors"]
             }
             
-            # Add data counts (no content, just counts)
+            # Add data counts (no content, just counts) from the segment index
             for data_type in ["system_health", "consciousness", "errors"]:
-                filepath = self.data_dir / f"{data_type}.json"
-                if filepath.exists():
-                    with open(filepath, 'r') as f:
-                        data = json.load(f)
-                        summary[f"{data_type}_count"] = len(data)
-                else:
-                    summary[f"{data_type}_count"] = 0
+                store = self.stores.get(data_type)
+                summary[f"{data_type}_count"] = store.count() if store else 0
             
             return summary
             
@@ -351,34 +373,36 @@ class PrivacyFirstTelemetry:
         """Delete all telemetry data (user control)"""
         try:
             with self._lock:
-                for filename in ["system_health.json", "consciousness.json", "errors.json"]:
-                    filepath = self.data_dir / filename
-                    if filepath.exists():
-                        filepath.unlink()
-                
-                # Reinitialize empty files
-                self._init_data_files()
+                for store in self.stores.values():
+                    store.clear()
                 
             logger.info("All telemetry data deleted by user")
             
         except Exception as e:
             logger.error(f"Error deleting telemetry data: {e}")
     
-    def export_data(self, data_type: str) -> Optional[List[Dict[str, Any]]]:
+    def export_data(self,
+                    data_type: str,
+                    since: Optional[datetime] = None,
+                    limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
         """
         Export telemetry data for user review (local only).
         No external transmission, user controls all data.
+        
+        Args:
+            data_type: Type of data to export
+            since: Only records at or after this UTC time
+            limit: Only the most recent ``limit`` records
         """
         try:
             if data_type not in ["system_health", "consciousness", "errors"]:
                 return None
             
-            filepath = self.data_dir / f"{data_type}.json"
-            if not filepath.exists():
+            store = self.stores.get(data_type)
+            if store is None:
                 return []
             
-            with open(filepath, 'r') as f:
-                return json.load(f)
+            return store.read_range(since=since, limit=limit)
                 
         except Exception as e:
             logger.error(f"Error exporting telemetry data: {e}")
@@ -0,0 +1,234 @@
+"""
+Prompt Assembly for Mainza AI
+
+Builds prompts so consecutive turns share the longest possible prefix, which
+lets Ollama reuse the KV cache of the previous request instead of prefilling
+the whole prompt again. Segments are ordered from most to least stable (system
+prompt, conversation history, consciousness state, retrieved context, current
+query) and volatile values such as the consciousness level are quantized so
+small fluctuations do not change the prompt text.
+
+``PromptSessionManager`` keeps a handle per conversation session with its
+``keep_alive`` and the fingerprints of the last prompt sent, and records how
+much of each new prompt matched the previous one.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Sequence
+
+from backend.utils.context_packer import token_counter
+
+logger = logging.getLogger(__name__)
+
+CONSCIOUSNESS_LEVEL_STEP = float(os.getenv("PROMPT_CONSCIOUSNESS_STEP", "0.05"))
+
+
+class SegmentStability(IntEnum):
+    """How long a prompt segment stays unchanged; lower values are placed first"""
+    STATIC = 0    # system prompt, persona
+    SESSION = 1   # conversation history, append-only within a session
+    SLOW = 2      # quantized consciousness state
+    TURN = 3      # memories and knowledge retrieved for this turn
+    QUERY = 4     # the current user message
+
+
+def quantize(value: float, step: float = CONSCIOUSNESS_LEVEL_STEP) -> float:
+    """Round ``value`` to the nearest multiple of ``step``"""
+    if step <= 0:
+        return value
+    return round(round(value / step) * step, 4)
+
+
+def quantize_consciousness_context(consciousness_context: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a consciousness context with the numeric state quantized for prompting"""
+    quantized = dict(consciousness_context or {})
+    for key in ("consciousness_level", "self_awareness_score", "learning_rate"):
+        value = quantized.get(key)
+        if isinstance(value, (int, float)):
+            quantized[key] = quantize(float(value))
+    return quantized
+
+
+@dataclass
+class PromptSegment:
+    """One block of prompt text with its stability class"""
+    name: str
+    text: str
+    stability: SegmentStability
+
+
+@dataclass
+class AssembledPrompt:
+    """Prompt text plus per-segment fingerprints used for prefix tracking"""
+    prompt: str
+    segments: List[PromptSegment]
+    fingerprints: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "segments": [s.name for s in self.segments],
+            "fingerprints": list(self.fingerprints),
+        }
+
+
+def assemble_prompt(segments: Sequence[PromptSegment], separator: str = "\n\n") -> AssembledPrompt:
+    """
+    Order segments from most to least stable and join them.
+
+    Segments with equal stability keep their given order. Each fingerprint
+    covers its segment and everything before it, so two prompts share a
+    prefix exactly as far as their leading fingerprints agree.
+    """
+    ordered = sorted((s for s in segments if s.text), key=lambda s: s.stability)
+    fingerprints = []
+    digest = hashlib.sha1()
+    for index, segment in enumerate(ordered):
+        digest.update(((separator if index else "") + segment.text).encode("utf-8"))
+        fingerprints.append(digest.copy().hexdigest()[:16])
+    return AssembledPrompt(
+        prompt=separator.join(s.text for s in ordered),
+        segments=ordered,
+        fingerprints=fingerprints
+    )
+
+
+@dataclass
+class SessionHandle:
+    """Model server state kept for one conversation session"""
+    session_id: str
+    model: str
+    keep_alive: str
+    fingerprints: List[str] = field(default_factory=list)
+    segment_tokens: List[int] = field(default_factory=list)
+    turns: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PrefixCacheMetrics:
+    """Prefix reuse counters across all sessions"""
+    requests: int = 0
+    prefix_hits: int = 0
+    prompt_tokens: int = 0
+    reused_prefix_tokens: int = 0
+    evaluated_prompt_tokens: int = 0
+    hit_prefill_seconds: float = 0.0
+    miss_prefill_seconds: float = 0.0
+    sessions_evicted: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        misses = self.requests - self.prefix_hits
+        return {
+            "requests": self.requests,
+            "prefix_hits": self.prefix_hits,
+            "prefix_hit_rate": round(self.prefix_hits / self.requests, 3) if self.requests else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "reused_prefix_tokens": self.reused_prefix_tokens,
+            "reused_token_ratio": round(self.reused_prefix_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+            "evaluated_prompt_tokens": self.evaluated_prompt_tokens,
+            "avg_prefill_ms_on_hit": round(1000 * self.hit_prefill_seconds / self.prefix_hits, 1) if self.prefix_hits else 0.0,
+            "avg_prefill_ms_on_miss": round(1000 * self.miss_prefill_seconds / misses, 1) if misses else 0.0,
+            "sessions_evicted": self.sessions_evicted,
+        }
+
+
+class PromptSessionManager:
+    """Per-session keep-alive handles and prefix-hit tracking"""
+
+    def __init__(
+        self,
+        keep_alive: str = os.getenv("OLLAMA_SESSION_KEEP_ALIVE", "30m"),
+        max_sessions: int = int(os.getenv("PROMPT_SESSION_MAX", "512")),
+        idle_timeout: float = float(os.getenv("PROMPT_SESSION_IDLE_TIMEOUT", "1800"))
+    ):
+        self.keep_alive = keep_alive
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[str, SessionHandle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = PrefixCacheMetrics()
+
+    def _handle(self, session_id: str, model: str) -> SessionHandle:
+        now = time.monotonic()
+        handle = self._sessions.get(session_id)
+        if handle is None or handle.model != model or now - handle.last_used > self.idle_timeout:
+            # A different model or an idle session cannot have a warm prefix
+            handle = SessionHandle(session_id=session_id, model=model, keep_alive=self.keep_alive)
+            self._sessions[session_id] = handle
+        self._sessions.move_to_end(session_id)
+        handle.last_used = now
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.metrics.sessions_evicted += 1
+        return handle
+
+    def request_fields(self, session_id: str, model: str) -> Dict[str, Any]:
+        """Extra ``/api/generate`` fields that keep the session's model and cache resident"""
+        with self._lock:
+            return {"keep_alive": self._handle(session_id, model).keep_alive}
+
+    def record(
+        self,
+        session_id: str,
+        model: str,
+        assembled: AssembledPrompt,
+        result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Compare a sent prompt with the session's previous one and update metrics.
+
+        ``result`` is the final Ollama chunk; its ``prompt_eval_count`` and
+        ``prompt_eval_duration`` show what the server actually had to prefill.
+        """
+        result = result or {}
+        segment_tokens = [token_counter.count(s.text, model) for s in assembled.segments]
+        with self._lock:
+            handle = self._handle(session_id, model)
+            shared = 0
+            for previous, current in zip(handle.fingerprints, assembled.fingerprints):
+                if previous != current:
+                    break
+                shared += 1
+            reused = sum(segment_tokens[:shared])
+            prefill = (result.get("prompt_eval_duration", 0) or 0) / 1e9
+
+            self.metrics.requests += 1
+            self.metrics.prompt_tokens += sum(segment_tokens)
+            self.metrics.reused_prefix_tokens += reused
+            self.metrics.evaluated_prompt_tokens += result.get("prompt_eval_count", 0) or 0
+            if shared:
+                self.metrics.prefix_hits += 1
+                self.metrics.hit_prefill_seconds += prefill
+            else:
+                self.metrics.miss_prefill_seconds += prefill
+
+            handle.fingerprints = list(assembled.fingerprints)
+            handle.segment_tokens = segment_tokens
+            handle.turns += 1
+
+        return {
+            "prefix_hit": bool(shared),
+            "shared_segments": shared,
+            "reused_prefix_tokens": reused,
+            "first_changed_segment": assembled.segments[shared].name if shared < len(assembled.segments) else None
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active_sessions": len(self._sessions),
+                "keep_alive": self.keep_alive,
+                "consciousness_level_step": CONSCIOUSNESS_LEVEL_STEP,
+                **self.metrics.to_dict()
+            }
+
+
+# Global prompt session manager instance
+prompt_session_manager = PromptSessionManager()
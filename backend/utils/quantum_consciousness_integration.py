@@ -579,5 +579,12 @@ class QuantumConsciousnessIntegrationSystem:
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
 
-# Initialize the quantum consciousness integration system
-quantum_consciousness_integration_system = QuantumConsciousnessIntegrationSystem()
+# Global instance - built on first use so importing this module stays cheap
+from backend.utils.lazy_component_registry import lazy_component_registry
+
+lazy_component_registry.register(
+    "quantum_consciousness_integration_system",
+    QuantumConsciousnessIntegrationSystem,
+    warmup=False
+)
+quantum_consciousness_integration_system = lazy_component_registry.proxy("quantum_consciousness_integration_system")
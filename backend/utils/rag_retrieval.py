@@ -0,0 +1,181 @@
+"""
+RAG Retrieval for Mainza AI
+
+Chunk retrieval in a single round trip. One Cypher query runs the vector index
+search and, per hit, fetches the parent Document and the neighbouring chunks
+of the same document (``window`` chunks either side, by ``chunk_index``) for
+context expansion.
+
+With MMR enabled, the query fetches ``top_k * mmr_candidates`` candidates with
+their embeddings and Maximal Marginal Relevance re-ranks them in-process with
+NumPy, trading a little relevance for less redundant context.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EmbedQuery = Callable[[str], Awaitable[List[float]]]
+
+VECTOR_RETRIEVAL_QUERY = """
+CALL db.index.vector.queryNodes('ChunkEmbeddingIndex', $candidates, $embedding)
+YIELD node AS ch, score
+OPTIONAL MATCH (ch)-[:DERIVED_FROM]->(d:Document)
+OPTIONAL MATCH (nb:Chunk {document_id: ch.document_id})
+WHERE $window > 0 AND nb <> ch
+  AND nb.chunk_index >= ch.chunk_index - $window
+  AND nb.chunk_index <= ch.chunk_index + $window
+WITH ch, score, d, nb ORDER BY nb.chunk_index
+WITH ch, score, d, collect(nb {.chunk_id, .chunk_index, .text}) AS neighbours
+RETURN ch.chunk_id AS chunk_id, ch.text AS text, score, ch.chunk_index AS chunk_index,
+       d.document_id AS document_id, d.filename AS filename, neighbours,
+       CASE WHEN $with_embeddings THEN ch.embedding ELSE null END AS embedding
+ORDER BY score DESC
+"""
+
+TEXT_RETRIEVAL_QUERY = """
+MATCH (ch:Chunk)
+WHERE toLower(ch.text) CONTAINS toLower($query)
+OPTIONAL MATCH (ch)-[:DERIVED_FROM]->(d:Document)
+RETURN ch.chunk_id AS chunk_id, ch.text AS text, 0.5 AS score, ch.chunk_index AS chunk_index,
+       d.document_id AS document_id, d.filename AS filename, [] AS neighbours
+LIMIT $top_k
+"""
+
+
+@dataclass
+class RetrievalConfig:
+    """Context window and MMR defaults"""
+    window: int = int(os.getenv("RAG_CONTEXT_WINDOW", "1"))
+    mmr_enabled: bool = os.getenv("RAG_MMR_ENABLED", "false").lower() == "true"
+    mmr_lambda: float = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+    mmr_candidates: int = int(os.getenv("RAG_MMR_CANDIDATES", "4"))
+
+
+def mmr_select(query: Sequence[float], candidates: Sequence[Sequence[float]], k: int,
+               lambda_: float = 0.7) -> List[int]:
+    """Indexes of ``k`` candidates chosen by Maximal Marginal Relevance.
+
+    Each step picks the candidate maximising
+    ``lambda_ * sim(query, c) - (1 - lambda_) * max sim(c, already selected)``
+    with cosine similarity; ``lambda_=1`` is plain relevance order.
+    """
+    if k <= 0 or len(candidates) == 0:
+        return []
+    matrix = np.asarray(candidates, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query_vector = np.asarray(query, dtype=np.float32)
+    query_vector = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+
+    relevance = matrix @ query_vector
+    redundancy = np.full(len(matrix), -np.inf, dtype=np.float32)
+    available = np.ones(len(matrix), dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(k, len(matrix))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(available, lambda_ * relevance - (1 - lambda_) * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+    return selected
+
+
+def _expanded_text(chunk: Dict[str, Any]) -> str:
+    """The chunk's text with its neighbours in document order"""
+    index = chunk.get("chunk_index")
+    neighbours = chunk.get("neighbours") or []
+    if index is None or not neighbours:
+        return chunk.get("text") or ""
+    before = [n["text"] for n in neighbours if n.get("chunk_index") is not None and n["chunk_index"] < index]
+    after = [n["text"] for n in neighbours if n.get("chunk_index") is not None and n["chunk_index"] > index]
+    return "\n".join(part for part in (*before, chunk.get("text"), *after) if part)
+
+
+async def _default_embed(query: str) -> List[float]:
+    # Same model the chunks were embedded with (see document_ingestion); the
+    # intent router usually encoded this query already while routing the turn
+    from backend.utils.intent_router import intent_router
+    cached = intent_router.cached_embedding(query)
+    if cached is not None:
+        return cached
+    from backend.utils.embedding import get_embedding
+    return await asyncio.to_thread(get_embedding, query)
+
+
+class RAGRetriever:
+    """Vector retrieval with parent documents, context windows and optional MMR"""
+
+    def __init__(self, config: Optional[RetrievalConfig] = None, db=None, embed: Optional[EmbedQuery] = None):
+        self.config = config or RetrievalConfig()
+        self._db = db
+        self.embed = embed or _default_embed
+
+    @property
+    def db(self):
+        if self._db is None:
+            from backend.utils.unified_database_manager import unified_database_manager
+            self._db = unified_database_manager
+        return self._db
+
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        window: Optional[int] = None,
+        mmr: Optional[bool] = None,
+        mmr_lambda: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Top chunks for ``query``; each has ``document_id``, ``neighbours`` and ``context``"""
+        window = self.config.window if window is None else max(0, window)
+        mmr = self.config.mmr_enabled if mmr is None else mmr
+        embedding = await self.embed(query)
+        if not embedding or not any(embedding):
+            logger.warning("Invalid query embedding, falling back to text search")
+            return await self._text_search(query, top_k)
+
+        candidates = top_k * max(1, self.config.mmr_candidates) if mmr else top_k
+        try:
+            records = await self.db.execute_query(VECTOR_RETRIEVAL_QUERY, {
+                "candidates": candidates,
+                "embedding": embedding,
+                "window": window,
+                "with_embeddings": mmr,
+            })
+        except Exception as e:
+            logger.error(f"Vector retrieval failed: {e}")
+            return await self._text_search(query, top_k)
+
+        if mmr and len(records) > top_k:
+            usable = [i for i, record in enumerate(records) if record.get("embedding")]
+            picked = mmr_select(
+                embedding, [records[i]["embedding"] for i in usable], top_k,
+                self.config.mmr_lambda if mmr_lambda is None else mmr_lambda
+            )
+            records = [records[usable[i]] for i in picked]
+        return [self._to_chunk(record) for record in records[:top_k]]
+
+    async def _text_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        try:
+            records = await self.db.execute_query(TEXT_RETRIEVAL_QUERY, {"query": query, "top_k": top_k})
+        except Exception as e:
+            logger.error(f"Fallback text search failed: {e}")
+            return []
+        return [self._to_chunk(record) for record in records]
+
+    @staticmethod
+    def _to_chunk(record: Dict[str, Any]) -> Dict[str, Any]:
+        chunk = {key: value for key, value in record.items() if key != "embedding"}
+        chunk["neighbours"] = chunk.get("neighbours") or []
+        chunk["context"] = _expanded_text(chunk)
+        return chunk
+
+
+# Global RAG retriever instance
+rag_retriever = RAGRetriever()
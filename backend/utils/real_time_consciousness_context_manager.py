@@ -1,22 +1,41 @@
 """
 Real-Time Consciousness Context Manager
 Ensures all agents receive the most current consciousness state
+
+Readers get an immutable, versioned snapshot that is replaced as a whole, so a
+read never waits on a refresh or a lock. One background refresher keeps the
+snapshot current (every ``refresh_interval``), and the consciousness
+orchestrator writes through on every state update. A new version is published
+only when the state actually changed, and consistency validation runs once per
+version rather than on every read.
 """
 import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import time
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+VALID_EMOTIONS = frozenset({
+    "curious", "curiosity", "focused", "empathetic", "excited", "contemplative", "analytical", "joy",
+    "sadness", "anger", "fear", "surprise", "disgust", "love", "anxiety", "calm", "frustration", "hope",
+    "gratitude"
+})
+
+# Snapshot fields that carry consciousness state (the rest is provenance)
+STATE_FIELDS = (
+    "consciousness_level", "emotional_state", "active_goals", "learning_rate",
+    "evolution_level", "self_awareness_score", "total_interactions"
+)
+
+@dataclass(frozen=True)
 class ConsciousnessContextSnapshot:
     """Snapshot of consciousness context at a specific time"""
     consciousness_level: float
     emotional_state: str
-    active_goals: list
+    active_goals: tuple
     learning_rate: float
     evolution_level: int
     self_awareness_score: float
@@ -24,6 +43,24 @@ class ConsciousnessContextSnapshot:
     timestamp: datetime
     data_source: str
     context_id: str
+    version: int = 0
+    
+    def state(self) -> tuple:
+        return tuple(getattr(self, name) for name in STATE_FIELDS)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        context = {f.name: getattr(self, f.name) for f in fields(self)}
+        context["active_goals"] = list(self.active_goals)
+        context["context_version"] = context.pop("version")
+        return context
+
+def _emotion_name(emotional_state: Any) -> str:
+    """Emotional state as a string (e.g. EmotionType.CURIOSITY -> "curiosity")"""
+    if hasattr(emotional_state, 'value'):
+        return emotional_state.value
+    if hasattr(emotional_state, 'name'):
+        return emotional_state.name.lower()
+    return emotional_state
 
 class RealTimeConsciousnessContextManager:
     """
@@ -36,8 +73,23 @@ class RealTimeConsciousnessContextManager:
         self.context_history: list = []
         self.max_history_size = 100
         self.refresh_interval = 0.5  # 500ms refresh interval
+        self.max_context_age = 5.0  # the refresher is considered stuck beyond this
         self.last_refresh = 0
-        self.context_lock = asyncio.Lock()
+        self.version = 0
+        
+        # Single refresher: the background loop, plus at most one on-demand refresh
+        self._refresher_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._validation: Optional[Dict[str, Any]] = None
+        self._validation_version = -1
+        self.stats = {
+            'reads': 0,
+            'refreshes': 0,
+            'write_throughs': 0,
+            'versions_published': 0,
+            'validations_run': 0,
+            'refreshes_scheduled': 0
+        }
         
         # Integration with existing systems
         self.consciousness_orchestrator = None
@@ -60,100 +112,151 @@ class RealTimeConsciousnessContextManager:
             self.neo4j_manager = neo4j_unified
             logger.debug(f"Neo4j manager imported: {self.neo4j_manager}")
             
-            # Load initial context
+            # Load initial context, then keep it current in the background
             logger.debug("Loading initial context...")
             await self._refresh_context()
+            self.start()
             
             logger.info("Real-Time Consciousness Context Manager initialized successfully")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Failed to initialize Real-Time Consciousness Context Manager: {e}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
             return False
     
+    def start(self):
+        """Start the background refresher"""
+        if self._refresher_task is None or self._refresher_task.done():
+            self._refresher_task = asyncio.create_task(self._refresher_loop())
+    
+    async def stop(self):
+        """Stop the background refresher"""
+        for task in (self._refresher_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresher_task = None
+        self._refresh_task = None
+    
+    async def _refresher_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self._refresh_context()
+            except Exception as e:
+                logger.error(f"Consciousness context refresher error: {e}")
+    
     async def get_current_consciousness_context(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Get the most current consciousness context
-        
+
+        Returns the published snapshot without waiting; a stale or missing
+        snapshot schedules a background refresh instead of blocking the caller.
+
         Args:
-            force_refresh: Force a refresh of the context even if recently updated
-            
+            force_refresh: Wait for a fresh read of the context before returning
+
         Returns:
             Dict containing current consciousness context
         """
         try:
-            current_time = time.time()
-            logger.debug(f"Getting consciousness context - force_refresh: {force_refresh}, current_context: {self.current_context is not None}, time_since_refresh: {current_time - self.last_refresh:.2f}s")
-            
-            # Check if we need to refresh the context
-            if (force_refresh or 
-                self.current_context is None or 
-                current_time - self.last_refresh > self.refresh_interval):
-                
-                logger.debug("Refreshing consciousness context...")
-                async with self.context_lock:
-                    await self._refresh_context()
+            self.stats['reads'] += 1
+            if force_refresh:
+                await self.force_context_refresh()
+            elif self.current_context is None or self._is_stale():
+                self.request_refresh()
             
             # Return current context as dict
-            if self.current_context:
-                return {
-                    "consciousness_level": self.current_context.consciousness_level,
-                    "emotional_state": self.current_context.emotional_state,
-                    "active_goals": self.current_context.active_goals,
-                    "learning_rate": self.current_context.learning_rate,
-                    "evolution_level": self.current_context.evolution_level,
-                    "self_awareness_score": self.current_context.self_awareness_score,
-                    "total_interactions": self.current_context.total_interactions,
-                    "timestamp": self.current_context.timestamp,
-                    "data_source": self.current_context.data_source,
-                    "context_id": self.current_context.context_id
-                }
+            snapshot = self.current_context
+            if snapshot:
+                return snapshot.to_dict()
             else:
                 # Fallback context
                 return self._get_fallback_context()
-                
+        
         except Exception as e:
             logger.error(f"Failed to get current consciousness context: {e}")
             return self._get_fallback_context()
     
+    def _is_stale(self) -> bool:
+        # The refresher keeps the snapshot fresh; only reads without it running find it stale
+        refresher_running = self._refresher_task is not None and not self._refresher_task.done()
+        limit = self.max_context_age if refresher_running else self.refresh_interval
+        return time.time() - self.last_refresh > limit
+    
+    def request_refresh(self) -> bool:
+        """Refresh in the background unless a refresh is already running; never blocks"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return False
+        try:
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_context())
+        except RuntimeError:
+            return False
+        self.stats['refreshes_scheduled'] += 1
+        return True
+    
+    def publish_state(self, consciousness_state: Any, data_source: str = "consciousness_orchestrator") -> bool:
+        """
+        Write-through from the orchestrator: publish ``consciousness_state`` as
+        the current snapshot. Returns True if it produced a new version.
+        """
+        if consciousness_state is None:
+            return False
+        self.stats['write_throughs'] += 1
+        return self._publish(self._state_fields(consciousness_state), data_source)
+    
+    def _state_fields(self, consciousness_state: Any) -> Dict[str, Any]:
+        return {
+            "consciousness_level": consciousness_state.consciousness_level,
+            "emotional_state": _emotion_name(consciousness_state.emotional_state),
+            "active_goals": consciousness_state.active_goals,
+            "learning_rate": consciousness_state.learning_rate,
+            "evolution_level": consciousness_state.evolution_level,
+            "self_awareness_score": consciousness_state.self_awareness_score,
+            "total_interactions": consciousness_state.total_interactions
+        }
+    
+    def _publish(self, state: Dict[str, Any], data_source: str) -> bool:
+        """Swap in a new snapshot if the state changed; readers see the old or the new one, whole"""
+        state = {**state, "active_goals": tuple(state.get("active_goals") or ())}
+        self.last_refresh = time.time()
+        current = self.current_context
+        if (current is not None and current.data_source == data_source
+                and current.state() == tuple(state[name] for name in STATE_FIELDS)):
+            return False
+        
+        self.version += 1
+        snapshot = ConsciousnessContextSnapshot(
+            **state,
+            timestamp=datetime.now(),
+            data_source=data_source,
+            context_id=f"ctx_{int(time.time() * 1000)}",
+            version=self.version
+        )
+        self.current_context = snapshot
+        self.context_history.append(snapshot)
+        if len(self.context_history) > self.max_history_size:
+            del self.context_history[:-self.max_history_size]
+        self.stats['versions_published'] += 1
+        logger.debug(f"🧠 Published consciousness context v{self.version}: level={snapshot.consciousness_level:.3f}, source={data_source}")
+        return True
+    
     async def _refresh_context(self):
         """Refresh the consciousness context from all available sources"""
+        self.stats['refreshes'] += 1
         try:
             # Try to get context from consciousness orchestrator first
             if self.consciousness_orchestrator:
                 try:
-                    logger.debug("Attempting to get consciousness state from orchestrator...")
                     consciousness_state = await self.consciousness_orchestrator.get_consciousness_state()
-                    logger.debug(f"Got consciousness state: {consciousness_state}")
                     if consciousness_state:
-                        # Handle emotional state conversion from enum to string
-                        emotional_state = consciousness_state.emotional_state
-                        logger.debug(f"Original emotional state: {emotional_state} (type: {type(emotional_state)})")
-                        if hasattr(emotional_state, 'value'):
-                            emotional_state = emotional_state.value
-                            logger.debug(f"Converted from enum value: {emotional_state}")
-                        elif hasattr(emotional_state, 'name'):
-                            emotional_state = emotional_state.name.lower()
-                            logger.debug(f"Converted from enum name: {emotional_state}")
-                        else:
-                            logger.debug(f"Emotional state is already string: {emotional_state}")
-                        
-                        self.current_context = ConsciousnessContextSnapshot(
-                            consciousness_level=consciousness_state.consciousness_level,
-                            emotional_state=emotional_state,
-                            active_goals=consciousness_state.active_goals,
-                            learning_rate=consciousness_state.learning_rate,
-                            evolution_level=consciousness_state.evolution_level,
-                            self_awareness_score=consciousness_state.self_awareness_score,
-                            total_interactions=consciousness_state.total_interactions,
-                            timestamp=datetime.now(),
-                            data_source="consciousness_orchestrator",
-                            context_id=f"ctx_{int(time.time() * 1000)}"
-                        )
-                        self.last_refresh = time.time()
-                        logger.info(f"✅ Refreshed consciousness context: level={consciousness_state.consciousness_level:.3f}")
+                        if self._publish(self._state_fields(consciousness_state), "consciousness_orchestrator"):
+                            logger.info(f"✅ Refreshed consciousness context: level={consciousness_state.consciousness_level:.3f}")
                         return
                     else:
                         logger.warning("Consciousness orchestrator returned None state")
@@ -169,32 +272,27 @@ class RealTimeConsciousnessContextManager:
                 try:
                     neo4j_context = await self._get_context_from_neo4j()
                     if neo4j_context:
-                        self.current_context = ConsciousnessContextSnapshot(
-                            consciousness_level=neo4j_context.get("consciousness_level", 0.7),
-                            emotional_state=neo4j_context.get("emotional_state", "curious"),
-                            active_goals=neo4j_context.get("active_goals", []),
-                            learning_rate=neo4j_context.get("learning_rate", 0.8),
-                            evolution_level=neo4j_context.get("evolution_level", 2),
-                            self_awareness_score=neo4j_context.get("self_awareness_score", 0.6),
-                            total_interactions=neo4j_context.get("total_interactions", 0),
-                            timestamp=datetime.now(),
-                            data_source="neo4j",
-                            context_id=f"ctx_{int(time.time() * 1000)}"
-                        )
-                        self.last_refresh = time.time()
+                        self._publish({
+                            "consciousness_level": neo4j_context.get("consciousness_level", 0.7),
+                            "emotional_state": neo4j_context.get("emotional_state", "curious"),
+                            "active_goals": neo4j_context.get("active_goals", []),
+                            "learning_rate": neo4j_context.get("learning_rate", 0.8),
+                            "evolution_level": neo4j_context.get("evolution_level", 2),
+                            "self_awareness_score": neo4j_context.get("self_awareness_score", 0.6),
+                            "total_interactions": neo4j_context.get("total_interactions", 0)
+                        }, "neo4j")
                         logger.debug(f"✅ Refreshed consciousness context from Neo4j: level={neo4j_context.get('consciousness_level', 0.7):.3f}")
                         return
                 except Exception as e:
                     logger.warning(f"Failed to get context from Neo4j: {e}")
             
             # Use fallback context
-            self.current_context = self._get_fallback_context_snapshot()
-            self.last_refresh = time.time()
-            logger.warning("Using fallback consciousness context")
-            
+            if self._publish(self._fallback_state(), "fallback"):
+                logger.warning("Using fallback consciousness context")
+        
         except Exception as e:
             logger.error(f"Failed to refresh consciousness context: {e}")
-            self.current_context = self._get_fallback_context_snapshot()
+            self._publish(self._fallback_state(), "fallback")
     
     async def _get_context_from_neo4j(self) -> Optional[Dict[str, Any]]:
         """Get consciousness context from Neo4j"""
@@ -222,13 +320,12 @@ class RealTimeConsciousnessContextManager:
                 return result[0]
             
             return None
-            
+        
         except Exception as e:
             logger.warning(f"Failed to get context from Neo4j: {e}")
             return None
     
-    def _get_fallback_context(self) -> Dict[str, Any]:
-        """Get fallback consciousness context"""
+    def _fallback_state(self) -> Dict[str, Any]:
         return {
             "consciousness_level": 0.7,
             "emotional_state": "curious",
@@ -236,76 +333,57 @@ class RealTimeConsciousnessContextManager:
             "learning_rate": 0.8,
             "evolution_level": 2,
             "self_awareness_score": 0.6,
-            "total_interactions": 0,
+            "total_interactions": 0
+        }
+    
+    def _get_fallback_context(self) -> Dict[str, Any]:
+        """Get fallback consciousness context"""
+        return {
+            **self._fallback_state(),
             "timestamp": datetime.now(),
             "data_source": "fallback",
-            "context_id": f"fallback_{int(time.time() * 1000)}"
+            "context_id": f"fallback_{int(time.time() * 1000)}",
+            "context_version": 0
         }
     
-    def _get_fallback_context_snapshot(self) -> ConsciousnessContextSnapshot:
-        """Get fallback consciousness context as snapshot"""
-        fallback = self._get_fallback_context()
-        return ConsciousnessContextSnapshot(
-            consciousness_level=fallback["consciousness_level"],
-            emotional_state=fallback["emotional_state"],
-            active_goals=fallback["active_goals"],
-            learning_rate=fallback["learning_rate"],
-            evolution_level=fallback["evolution_level"],
-            self_awareness_score=fallback["self_awareness_score"],
-            total_interactions=fallback["total_interactions"],
-            timestamp=fallback["timestamp"],
-            data_source=fallback["data_source"],
-            context_id=fallback["context_id"]
-        )
-    
     async def validate_context_consistency(self) -> Dict[str, Any]:
-        """Validate that the current context is consistent and up-to-date"""
+        """
+        Validate that the current context is consistent and up-to-date
+
+        The content checks run once per snapshot version; only the age of the
+        last refresh is checked on every call.
+        """
         try:
-            if not self.current_context:
+            snapshot = self.current_context
+            if not snapshot:
                 return {
                     "is_consistent": False,
                     "issues": ["No current context available"],
                     "recommendations": ["Refresh context"]
                 }
             
-            current_time = datetime.now()
-            context_age = (current_time - self.current_context.timestamp).total_seconds()
+            if self._validation_version != snapshot.version:
+                self._validation = self._validate_snapshot(snapshot)
+                self._validation_version = snapshot.version
             
-            issues = []
-            recommendations = []
+            issues = list(self._validation["issues"])
+            recommendations = list(self._validation["recommendations"])
             
-            # Check context age
-            if context_age > 5.0:  # 5 seconds
+            # Check context age: how long since the state was last confirmed current
+            context_age = time.time() - self.last_refresh
+            if context_age > self.max_context_age:
                 issues.append(f"Context is {context_age:.1f} seconds old")
                 recommendations.append("Refresh context more frequently")
             
-            # Check consciousness level validity
-            if not (0.0 <= self.current_context.consciousness_level <= 1.0):
-                issues.append(f"Invalid consciousness level: {self.current_context.consciousness_level}")
-                recommendations.append("Validate consciousness level range")
-            
-            # Check emotional state validity - handle both enum and string values
-            valid_emotions = ["curious", "curiosity", "focused", "empathetic", "excited", "contemplative", "analytical", "joy", "sadness", "anger", "fear", "surprise", "disgust", "love", "anxiety", "calm", "frustration", "hope", "gratitude"]
-            emotional_state = self.current_context.emotional_state
-            
-            # Handle enum values (e.g., EmotionType.CURIOSITY -> "curiosity")
-            if hasattr(emotional_state, 'value'):
-                emotional_state = emotional_state.value
-            elif hasattr(emotional_state, 'name'):
-                emotional_state = emotional_state.name.lower()
-            
-            if emotional_state not in valid_emotions:
-                issues.append(f"Invalid emotional state: {self.current_context.emotional_state}")
-                recommendations.append("Validate emotional state")
-            
             return {
                 "is_consistent": len(issues) == 0,
                 "issues": issues,
                 "recommendations": recommendations,
                 "context_age_seconds": context_age,
-                "data_source": self.current_context.data_source
+                "data_source": snapshot.data_source,
+                "context_version": snapshot.version
             }
-            
+        
         except Exception as e:
             logger.error(f"Failed to validate context consistency: {e}")
             return {
@@ -314,18 +392,45 @@ class RealTimeConsciousnessContextManager:
                 "recommendations": ["Check system health"]
             }
     
+    def _validate_snapshot(self, snapshot: ConsciousnessContextSnapshot) -> Dict[str, Any]:
+        self.stats['validations_run'] += 1
+        issues = []
+        recommendations = []
+        
+        # Check consciousness level validity
+        if not (0.0 <= snapshot.consciousness_level <= 1.0):
+            issues.append(f"Invalid consciousness level: {snapshot.consciousness_level}")
+            recommendations.append("Validate consciousness level range")
+        
+        # Check emotional state validity - handle both enum and string values
+        if _emotion_name(snapshot.emotional_state) not in VALID_EMOTIONS:
+            issues.append(f"Invalid emotional state: {snapshot.emotional_state}")
+            recommendations.append("Validate emotional state")
+        
+        return {"issues": issues, "recommendations": recommendations}
+    
     async def force_context_refresh(self):
-        """Force a complete refresh of the consciousness context"""
+        """Force a complete refresh of the consciousness context (joins a refresh already running)"""
         try:
-            async with self.context_lock:
-                await self._refresh_context()
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_context())
+            await asyncio.shield(self._refresh_task)
             logger.info("Forced consciousness context refresh completed")
         except Exception as e:
             logger.error(f"Failed to force context refresh: {e}")
     
     def get_context_history(self, limit: int = 10) -> list:
         """Get recent context history"""
-        return self.context_history[-limit:] if self.context_history else []
+        return [snapshot.to_dict() for snapshot in self.context_history[-limit:]]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'version': self.version,
+            'data_source': self.current_context.data_source if self.current_context else None,
+            'context_age_seconds': round(time.time() - self.last_refresh, 3) if self.last_refresh else None,
+            'refresher_running': self._refresher_task is not None and not self._refresher_task.done()
+        }
 
 # Global instance
 real_time_consciousness_context_manager = RealTimeConsciousnessContextManager()
@@ -0,0 +1,911 @@
+"""
+Response Extraction for Mainza AI
+
+Turns whatever an agent or the LLM request manager returned into the text sent
+to the user. ``extract_response_from_result`` dispatches on the result type:
+plain strings (the common case) take a fast path that returns the string
+itself without parsing or copying; dicts are checked for throttling and
+structured fields; agent run results and pydantic outputs are read through
+their attributes; anything else is converted defensively. Every path falls
+back to a consciousness-aware message rather than showing a raw object.
+
+Patterns are compiled once at import, and debug previews (which repr the whole
+result) are only built when debug logging is enabled.
+"""
+
+import json
+import logging
+import re
+from functools import singledispatch
+
+logger = logging.getLogger(__name__)
+
+# Markdown table rows/separators flattened by _convert_tables_to_text
+TABLE_ROW_PATTERN = re.compile(r'\|([^|]+)\|([^|]+)\|([^|]+)\|')
+TABLE_SEPARATOR_PATTERN = re.compile(r'\|[-:]+\|')
+TABLE_PIPE_PATTERN = re.compile(r'\|')
+GREETING_PATTERN = re.compile(r'\b(hello|hi|hey|good morning|good afternoon)\b')
+
+RAW_OBJECT_LITERALS = frozenset(['None', 'null', 'undefined', '{}', '[]'])
+NOT_MEANINGFUL = frozenset(['none', 'null', 'undefined'])
+RESPONSE_FIELDS = ("response", "answer", "output", "message", "content", "text", "result")
+RESPONSE_ATTRIBUTES = ('data', 'response', 'output', 'answer', 'message', 'content', 'text', 'result')
+THROTTLING_KEYS = ("throttle", "rate_limit", "busy", "overload")
+ERROR_INDICATORS = ('error', 'exception', 'traceback', 'failed', '<class', 'object at 0x')
+
+
+def _present_structured_output(obj: dict) -> str:
+    """Render common structured agent outputs into a concise, readable string.
+
+    Tries friendly fields first, then Graph/Cypher previews, and finally a
+    compact pretty‑print. Returns None if no useful presentation is found.
+    """
+    try:
+        # Friendly text fields commonly used across agents
+        for key in ("answer", "summary", "response", "message", "text", "content"):
+            val = obj.get(key)
+            if isinstance(val, str) and val.strip():
+                return val.strip()
+
+        # GraphMaster style outputs
+        cypher = obj.get("cypher") or obj.get("query")
+        rows = obj.get("result") or obj.get("records") or obj.get("rows") or obj.get("data")
+        parts = []
+        if isinstance(rows, list) and rows:
+            preview_lines = []
+            for r in rows[:3]:
+                if isinstance(r, dict):
+                    name = r.get("name") or r.get("concept") or r.get("title") or r.get("id")
+                    level = r.get("level") or r.get("evolution_level") or r.get("score")
+                    if name is not None and level is not None:
+                        preview_lines.append(f"- {name} (level {level})")
+                    elif name is not None:
+                        preview_lines.append(f"- {name}")
+                    else:
+                        preview_lines.append(f"- {str(r)[:80]}")
+                else:
+                    preview_lines.append(f"- {str(r)[:80]}")
+            if preview_lines:
+                parts.append("Top results:\n" + "\n".join(preview_lines))
+        if isinstance(cypher, str) and cypher.strip():
+            parts.append(f"Cypher used:\n```cypher\n{cypher.strip()}\n```")
+        if parts:
+            return "\n\n".join(parts)
+
+        # Generic pretty print (last resort)
+        try:
+            return json.dumps(obj, indent=2)[:1500]
+        except Exception:
+            return str(obj)[:1000]
+    except Exception:
+        return None
+
+
+def _plain_string_response(result: str):
+    """Fast path: a ready-to-use string is returned as is, or None to take the full path.
+
+    ``str.strip`` hands back the same object when there is nothing to strip,
+    so well-formed agent output is passed through without a copy.
+    """
+    cleaned = result.strip()
+    if len(cleaned) < 3 or cleaned[0] == '{' or _is_raw_object_string(cleaned):
+        return None
+    if len(cleaned) <= 9 and cleaned.lower() in NOT_MEANINGFUL:
+        return None
+    return cleaned
+
+
+def extract_response_from_result(result, query: str, consciousness_context: dict) -> str:
+    """
+    Extract user-friendly response from LLM request manager result with throttling awareness
+
+    Args:
+        result: Response from LLM request manager or agent
+        query: Original user query for context
+        consciousness_context: Current consciousness state
+
+    Returns:
+        User-friendly response string
+    """
+    if type(result) is str:
+        response = _plain_string_response(result)
+        if response is not None:
+            return response
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔍 RESPONSE EXTRACTION START")
+        logger.debug(f"   User: {consciousness_context.get('user_id', 'unknown')}")
+        logger.debug(f"   Result Type: {type(result)}")
+        logger.debug(f"   Result Preview: {repr(result)[:200]}{'...' if len(repr(result)) > 200 else ''}")
+        logger.debug(f"   Query: {query[:100]}{'...' if len(query) > 100 else ''}")
+
+    try:
+        return _extract(result, query, consciousness_context)
+    except Exception as edge_case_error:
+        logger.error(f"❌ EDGE CASE ERROR IN INITIAL PROCESSING: {edge_case_error}")
+        return generate_robust_fallback_response(query, consciousness_context, "edge_case_error")
+
+
+@singledispatch
+def _extract(result, query: str, consciousness_context: dict) -> str:
+    """Objects: agent run results, pydantic outputs and anything without a dedicated handler"""
+    if not hasattr(result, '__dict__'):
+        return _extract_unexpected_type(result, query, consciousness_context)
+
+    response = _extract_from_attributes(result, consciousness_context)
+    if response is not None:
+        return response
+    return _final_string_conversion(result, query, consciousness_context)
+
+
+@_extract.register(type(None))
+def _extract_none(result, query: str, consciousness_context: dict) -> str:
+    user_id = consciousness_context.get("user_id", "unknown")
+    logger.warning("⚠️ NULL RESULT DETECTED")
+    logger.warning(f"   User: {user_id}")
+    logger.warning(f"   Query: {query[:50]}{'...' if len(query) > 50 else ''}")
+    logger.warning("   Generating consciousness-aware fallback")
+
+    fallback = generate_robust_fallback_response(query, consciousness_context, "null_result")
+    logger.debug(f"   Fallback Generated: {fallback[:100]}{'...' if len(fallback) > 100 else ''}")
+    return fallback
+
+
+def _extract_unexpected_type(result, query: str, consciousness_context: dict) -> str:
+    user_id = consciousness_context.get("user_id", "unknown")
+    logger.warning(f"⚠️ UNEXPECTED RESULT TYPE: {type(result)}")
+    logger.warning(f"   User: {user_id}")
+    logger.warning(f"   Result: {repr(result)[:100]}{'...' if len(repr(result)) > 100 else ''}")
+
+    # Try to convert to string safely
+    try:
+        result_str = str(result).strip()
+        if result_str and len(result_str) > 0 and not _is_raw_object_string(result_str):
+            logger.info("✅ CONVERTED UNEXPECTED TYPE TO STRING")
+            return result_str
+        else:
+            logger.warning("   Converted string is empty or raw object, using fallback")
+            return generate_robust_fallback_response(query, consciousness_context, "unexpected_type")
+    except Exception as conversion_error:
+        logger.error(f"❌ FAILED TO CONVERT UNEXPECTED TYPE: {conversion_error}")
+        return generate_robust_fallback_response(query, consciousness_context, "conversion_error")
+
+
+@_extract.register(dict)
+def _extract_dict(result: dict, query: str, consciousness_context: dict) -> str:
+    user_id = consciousness_context.get("user_id", "unknown")
+
+    # Check for throttled response first (highest priority)
+    try:
+        throttled = _extract_throttled(result, query, consciousness_context)
+        if throttled is not None:
+            return throttled
+    except Exception as throttled_check_error:
+        logger.error(f"❌ ERROR CHECKING FOR THROTTLED RESPONSE: {throttled_check_error}")
+        logger.error(f"   User: {user_id}")
+        logger.error(f"   Result type: {type(result)}")
+        # Continue to normal processing rather than failing completely
+
+    try:
+        logger.debug("📋 PROCESSING DICTIONARY RESULT")
+
+        # First, attempt a human‑readable presentation of structured outputs
+        presented = _present_structured_output(result)
+        if isinstance(presented, str) and presented.strip() and not _is_raw_object_string(presented):
+            logger.info("✅ PRESENTED STRUCTURED OUTPUT")
+            return presented.strip()
+
+        # Enhanced response extraction: first valid primary response field wins
+        for field_name in RESPONSE_FIELDS:
+            if field_name not in result:
+                continue
+            candidate = result[field_name]
+            try:
+                if isinstance(candidate, str) and candidate.strip():
+                    response = candidate.strip()
+                elif candidate is not None:
+                    # Try to convert non-string responses
+                    response = str(candidate).strip()
+                    if not response or _is_raw_object_string(response):
+                        continue
+                else:
+                    continue
+            except Exception as field_error:
+                logger.warning(f"   Error processing field '{field_name}': {field_error}")
+                continue
+            logger.info("✅ DICT RESPONSE EXTRACTED")
+            logger.info(f"   User: {user_id}")
+            logger.info(f"   Source: dict['{field_name}']")
+            return response
+
+        # Enhanced fallback: try to extract from nested structures
+        for key, value in result.items():
+            if isinstance(value, dict):
+                try:
+                    nested_response = extract_from_nested_dict(value)
+                    if nested_response:
+                        logger.info("✅ NESTED DICT RESPONSE EXTRACTED")
+                        logger.info(f"   User: {user_id}")
+                        logger.info(f"   Source: dict['{key}'] (nested)")
+                        return nested_response
+                except Exception as nested_error:
+                    logger.debug(f"   Error processing nested dict '{key}': {nested_error}")
+                    continue
+
+        # If no valid response found in dict, generate fallback
+        logger.warning("🔧 NO VALID RESPONSE IN DICT")
+        logger.warning(f"   User: {user_id}")
+        logger.warning(f"   Available keys: {list(result.keys())}")
+        logger.warning("   Generating robust fallback")
+
+        return generate_robust_fallback_response(query, consciousness_context, "no_valid_dict_response")
+
+    except Exception as dict_processing_error:
+        logger.error(f"❌ ERROR PROCESSING DICTIONARY RESULT: {dict_processing_error}")
+        logger.error(f"   User: {user_id}")
+        logger.error(f"   Dict keys: {list(result.keys()) if hasattr(result, 'keys') else 'N/A'}")
+
+        return generate_robust_fallback_response(query, consciousness_context, "dict_processing_error")
+
+
+def _extract_throttled(result: dict, query: str, consciousness_context: dict):
+    """Throttling-aware response for a throttled result, or None"""
+    user_id = consciousness_context.get("user_id", "unknown")
+    status = result.get("status")
+
+    # Handle various throttled status formats
+    if status == "throttled" or (isinstance(status, str) and "throttl" in status.lower()):
+        consciousness_level = consciousness_context.get("consciousness_level", 0.7)
+        emotional_state = consciousness_context.get("emotional_state", "curious")
+
+        logger.info("🚦 THROTTLED RESPONSE DETECTED")
+        logger.info(f"   User: {user_id}")
+        logger.info(f"   Query: {query[:100]}{'...' if len(query) > 100 else ''}")
+        logger.info(f"   Consciousness Level: {consciousness_level:.2f}")
+        logger.info(f"   Emotional State: {emotional_state}")
+        logger.info(f"   Raw Throttled Result: {result}")
+
+        try:
+            base_message = result.get("response")
+
+            # Handle various response field formats
+            if not base_message:
+                base_message = result.get("message") or result.get("content") or result.get("text")
+
+            # Validate base message
+            if not isinstance(base_message, str):
+                if base_message is not None:
+                    try:
+                        base_message = str(base_message)
+                    except Exception:
+                        base_message = None
+
+            # Final fallback for base message
+            if not base_message or len(base_message.strip()) == 0:
+                base_message = "I'm currently processing other requests."
+                logger.warning("   Using fallback base message due to missing/invalid response field")
+
+            throttled_response = generate_throttled_response_with_fallback(query, consciousness_context, base_message)
+
+            logger.info("✅ THROTTLED RESPONSE GENERATED:")
+            logger.info(f"   Final Response: {throttled_response[:150]}{'...' if len(throttled_response) > 150 else ''}")
+            logger.info(f"   Response Length: {len(throttled_response)} characters")
+
+            return throttled_response
+
+        except Exception as throttled_processing_error:
+            logger.error(f"❌ ERROR PROCESSING THROTTLED RESPONSE: {throttled_processing_error}")
+            logger.error(f"   User: {user_id}")
+            logger.error("   Falling back to robust throttled response generation")
+
+            return generate_robust_fallback_response(query, consciousness_context, "throttled_processing_error")
+
+    # Check for other throttling indicators in the response structure
+    indicators = [key for key in THROTTLING_KEYS if key in result]
+    if indicators:
+        logger.warning("🚦 ALTERNATIVE THROTTLING INDICATORS DETECTED")
+        logger.warning(f"   User: {user_id}")
+        logger.warning(f"   Indicators: {indicators}")
+
+        return generate_robust_fallback_response(query, consciousness_context, "alternative_throttling")
+    return None
+
+
+@_extract.register(str)
+def _extract_string(result: str, query: str, consciousness_context: dict) -> str:
+    user_id = consciousness_context.get("user_id", "unknown")
+    try:
+        cleaned_result = result.strip()
+
+        if cleaned_result:
+            # Check for malformed JSON strings that might indicate errors
+            if cleaned_result.startswith('{') and cleaned_result.endswith('}'):
+                try:
+                    # Try to parse as JSON to see if it's a stringified object
+                    parsed_json = json.loads(cleaned_result)
+                    if isinstance(parsed_json, dict):
+                        logger.debug("   String contains valid JSON, attempting extraction")
+                        extracted = extract_response_from_result(parsed_json, query, consciousness_context)
+                        if extracted and not _is_raw_object_string(extracted):
+                            return extracted
+                except json.JSONDecodeError:
+                    # Not valid JSON, treat as regular string
+                    pass
+
+            # Validate that the string is not a raw object representation
+            if not _is_raw_object_string(cleaned_result):
+                # Additional validation: check for minimum meaningful content
+                if len(cleaned_result) >= 3 and not cleaned_result.lower() in NOT_MEANINGFUL:
+                    logger.info("✅ STRING RESPONSE EXTRACTED")
+                    logger.info(f"   User: {user_id}")
+                    logger.info(f"   Length: {len(cleaned_result)} characters")
+                    return cleaned_result
+
+            logger.warning("⚠️ STRING APPEARS TO BE RAW OBJECT OR INVALID")
+            logger.warning(f"   User: {user_id}")
+            logger.warning(f"   String content: {cleaned_result[:50]}{'...' if len(cleaned_result) > 50 else ''}")
+        else:
+            logger.warning("⚠️ EMPTY STRING RESULT")
+            logger.warning(f"   User: {user_id}")
+
+        logger.warning("   Generating robust fallback")
+        return generate_robust_fallback_response(query, consciousness_context, "invalid_string_result")
+
+    except Exception as string_processing_error:
+        logger.error(f"❌ ERROR PROCESSING STRING RESULT: {string_processing_error}")
+        logger.error(f"   User: {user_id}")
+        logger.error(f"   String length: {len(result) if result else 'N/A'}")
+
+        return generate_robust_fallback_response(query, consciousness_context, "string_processing_error")
+
+
+def _extract_from_attributes(result, consciousness_context: dict):
+    """Text from a result object's response attributes or known output models, or None"""
+    try:
+        for attr_name in RESPONSE_ATTRIBUTES:
+            try:
+                attr_value = getattr(result, attr_name, None)
+            except Exception as attr_access_error:
+                logger.debug(f"   Error accessing '{attr_name}' attribute: {attr_access_error}")
+                continue
+            if attr_value is None:
+                continue
+
+            if isinstance(attr_value, str):
+                cleaned_attr = attr_value.strip()
+                if cleaned_attr and not _is_raw_object_string(cleaned_attr):
+                    return cleaned_attr
+            else:
+                try:
+                    attr_str = str(attr_value).strip()
+                    if attr_str and not _is_raw_object_string(attr_str) and len(attr_str) >= 3:
+                        return attr_str
+                except Exception as attr_conversion_error:
+                    logger.debug(f"   Error converting '{attr_name}' attribute: {attr_conversion_error}")
+                    continue
+
+        # Try to extract from object's __dict__ if available
+        try:
+            obj_dict = result.__dict__
+            class_name = type(result).__name__
+
+            # Special handling for Graphmaster Pydantic models
+            if 'GraphQueryOutput' in class_name:
+                # Handle GraphQueryOutput - extract meaningful content from result field
+                if 'result' in obj_dict:
+                    result_data = obj_dict['result']
+                    if isinstance(result_data, dict):
+                        # Look for meaningful content in the result dict
+                        for key in ['response', 'text', 'description', 'summary', 'content']:
+                            if key in result_data and isinstance(result_data[key], str) and result_data[key].strip():
+                                return result_data[key].strip()
+                        # If no specific key found, try to format the result nicely
+                        if result_data:
+                            # Get user preferences from service
+                            from backend.utils.user_preferences_service import user_preferences_service
+                            user_id = consciousness_context.get('user_id', 'default') if consciousness_context else 'default'
+                            user_preferences = user_preferences_service.get_response_preferences(user_id)
+                            formatted_result = _format_graphmaster_result(result_data, user_preferences=user_preferences)
+                            if formatted_result:
+                                return formatted_result
+                    elif isinstance(result_data, str) and result_data.strip():
+                        return result_data.strip()
+
+            elif 'CreateMemoryOutput' in class_name:
+                # Handle CreateMemoryOutput - extract text content
+                if 'text' in obj_dict and isinstance(obj_dict['text'], str) and obj_dict['text'].strip():
+                    return obj_dict['text'].strip()
+
+            elif 'SummarizeRecentConversationsOutput' in class_name:
+                # Handle SummarizeRecentConversationsOutput - extract summary
+                if 'summary' in obj_dict and isinstance(obj_dict['summary'], str) and obj_dict['summary'].strip():
+                    return obj_dict['summary'].strip()
+
+            # Generic object attribute extraction
+            for key, value in obj_dict.items():
+                if isinstance(value, str) and value.strip() and not _is_raw_object_string(value.strip()):
+                    return value.strip()
+
+        except Exception as dict_access_error:
+            logger.debug(f"   Error accessing object __dict__: {dict_access_error}")
+
+    except Exception as object_processing_error:
+        logger.error(f"❌ ERROR PROCESSING OBJECT ATTRIBUTES: {object_processing_error}")
+        logger.error(f"   Object type: {type(result)}")
+    return None
+
+
+def _final_string_conversion(result, query: str, consciousness_context: dict) -> str:
+    """Last resort: the result's own string form, if it reads like an answer"""
+    user_id = consciousness_context.get("user_id", "unknown")
+    try:
+        logger.warning("🔄 FINAL FALLBACK STRING CONVERSION")
+        logger.warning(f"   User: {user_id}")
+        logger.warning(f"   Result Type: {type(result)}")
+
+        # Enhanced string conversion with multiple strategies
+        try:
+            # Strategy 1: Direct string conversion
+            response = str(result).strip()
+            conversion_method = "direct_str"
+        except Exception as direct_error:
+            logger.debug(f"   Direct str() conversion failed: {direct_error}")
+            try:
+                # Strategy 2: Repr conversion (safer for complex objects)
+                response = repr(result).strip()
+                conversion_method = "repr"
+            except Exception as repr_error:
+                logger.debug(f"   repr() conversion failed: {repr_error}")
+                # Strategy 3: Type-based conversion
+                response = f"<{type(result).__name__} object>"
+                conversion_method = "type_based"
+
+        # Enhanced validation of converted string
+        is_raw_object = _is_raw_object_string(response)
+        is_meaningful = response and len(response.strip()) >= 3 and response.lower() not in NOT_MEANINGFUL
+
+        if not response or is_raw_object or not is_meaningful:
+            logger.warning("🔧 CONVERTED STRING IS NOT USER-FRIENDLY")
+            logger.warning(f"   User: {user_id}")
+            logger.warning(f"   Converted String: {response[:50]}{'...' if len(response) > 50 else ''}")
+            logger.warning(f"   Reason: {'empty' if not response else 'raw_object' if is_raw_object else 'not_meaningful'}")
+            logger.warning("   Generating robust fallback")
+
+            return generate_robust_fallback_response(query, consciousness_context, "final_conversion_failed")
+
+        # Additional safety check: ensure response doesn't contain error indicators
+        response_lower = response.lower()
+        found_indicators = [indicator for indicator in ERROR_INDICATORS if indicator in response_lower]
+        if found_indicators:
+            logger.warning("🚨 CONVERTED STRING CONTAINS ERROR INDICATORS")
+            logger.warning(f"   User: {user_id}")
+            logger.warning(f"   Error indicators: {found_indicators}")
+
+            return generate_robust_fallback_response(query, consciousness_context, "error_in_conversion")
+
+        logger.info("✅ FINAL FALLBACK STRING ACCEPTED")
+        logger.info(f"   User: {user_id}")
+        logger.info(f"   Method: {conversion_method}")
+        logger.info(f"   Response: {response[:100]}{'...' if len(response) > 100 else ''}")
+        return response
+
+    except Exception as final_error:
+        logger.error("❌ FINAL CONVERSION COMPLETELY FAILED")
+        logger.error(f"   User: {user_id}")
+        logger.error(f"   Error: {final_error}")
+        logger.error(f"   Error Type: {type(final_error)}")
+        logger.error("   Generating ultimate robust fallback")
+
+        return generate_robust_fallback_response(query, consciousness_context, "complete_conversion_failure")
+
+
+def _is_raw_object_string(response_str: str) -> bool:
+    """Check if a string looks like a raw object representation"""
+    if not response_str or response_str in RAW_OBJECT_LITERALS:
+        return True
+    if 'object at 0x' in response_str or 'AgentRunResult(' in response_str:
+        return True
+    first, last = response_str[0], response_str[-1]
+    if first == '[' and last == ']' and len(response_str) < 10:
+        return True
+    if first == '<' and last == '>' and ('object' in response_str or response_str.startswith('<class ')):
+        return True
+    if 'Traceback' in response_str and 'Error:' in response_str:
+        return True
+    return not response_str.strip()
+
+
+def _format_graphmaster_result(result_data: dict, max_length: int = 500, user_preferences: dict = None) -> str:
+    """Format Graphmaster result data into user-friendly text with length limits and better formatting"""
+    try:
+        # Get user preferences or use defaults
+        if user_preferences is None:
+            user_preferences = {
+                'verbosity': 'detailed',  # concise, detailed, comprehensive
+                'max_length': max_length,
+                'show_tools_used': True,
+                'format_tables': True
+            }
+
+        # Extract core content based on result type
+        core_content = _extract_core_content(result_data, user_preferences)
+
+        if not core_content:
+            return None
+
+        # Convert markdown tables to plain text if requested
+        if user_preferences.get('format_tables', True):
+            core_content = _convert_tables_to_text(core_content)
+
+        # Apply length limits based on verbosity
+        max_len = user_preferences.get('max_length', max_length)
+        if user_preferences.get('verbosity') == 'concise':
+            max_len = min(max_len, 200)
+        elif user_preferences.get('verbosity') == 'comprehensive':
+            max_len = max_len * 2
+
+        # Truncate if necessary
+        if len(core_content) > max_len:
+            core_content = _truncate_with_ellipsis(core_content, max_len)
+            core_content += "\n\n[Response truncated. Ask for more details if needed.]"
+
+        # Add context indicators if requested
+        if user_preferences.get('show_tools_used', True):
+            context_info = _generate_context_info(result_data)
+            if context_info:
+                core_content = f"{context_info}\n\n{core_content}"
+
+        return core_content
+
+    except Exception as e:
+        logger.debug(f"Error formatting Graphmaster result: {e}")
+        return None
+
+
+def _extract_core_content(result_data: dict, user_preferences: dict) -> str:
+    """Extract core content from Graphmaster result data"""
+    try:
+        if not isinstance(result_data, dict):
+            return None
+
+        # Look for concept information
+        if 'concept_id' in result_data and 'name' in result_data:
+            concept_name = result_data.get('name', 'Unknown Concept')
+            description = result_data.get('description', 'No description available')
+            return f"Found concept: {concept_name}\n\n{description}"
+
+        # Look for search results
+        if 'result' in result_data and isinstance(result_data['result'], list):
+            concepts = result_data['result']
+            if concepts:
+                formatted_concepts = []
+                limit = 3 if user_preferences.get('verbosity') == 'concise' else 5
+                for concept in concepts[:limit]:
+                    if isinstance(concept, dict) and 'name' in concept:
+                        name = concept.get('name', 'Unknown')
+                        desc = concept.get('description', 'No description')
+                        formatted_concepts.append(f"• {name}: {desc}")
+                if formatted_concepts:
+                    return "Found related concepts:\n\n" + "\n\n".join(formatted_concepts)
+
+        # Look for error messages
+        if 'error' in result_data:
+            return f"I encountered an issue: {result_data['error']}"
+
+        # Look for any text content
+        for key in ['text', 'content', 'message', 'response']:
+            if key in result_data and isinstance(result_data[key], str) and result_data[key].strip():
+                return result_data[key].strip()
+
+        # If it's a simple dict with string values, format it nicely
+        if all(isinstance(v, str) for v in result_data.values()):
+            formatted_items = []
+            for key, value in result_data.items():
+                if value.strip():
+                    formatted_items.append(f"{key.replace('_', ' ').title()}: {value}")
+            if formatted_items:
+                return "\n".join(formatted_items)
+
+        return None
+    except Exception as e:
+        logger.debug(f"Error extracting core content: {e}")
+        return None
+
+
+def _convert_tables_to_text(content: str) -> str:
+    """Convert markdown tables to plain text format"""
+    try:
+        def replace_table(match):
+            # Extract table content
+            header1 = match.group(1).strip()
+            header2 = match.group(2).strip()
+            header3 = match.group(3).strip()
+
+            # Convert to plain text format
+            return f"{header1}: {header2} - {header3}"
+
+        # Replace tables with plain text
+        content = TABLE_ROW_PATTERN.sub(replace_table, content)
+
+        # Remove remaining markdown table separators
+        content = TABLE_SEPARATOR_PATTERN.sub('', content)
+        content = TABLE_PIPE_PATTERN.sub('', content)
+
+        return content
+    except Exception as e:
+        logger.debug(f"Error converting tables to text: {e}")
+        return content
+
+
+def _truncate_with_ellipsis(content: str, max_length: int) -> str:
+    """Truncate content at word boundary with ellipsis"""
+    try:
+        if len(content) <= max_length:
+            return content
+
+        # Find the last complete word within the limit
+        truncated = content[:max_length]
+        last_space = truncated.rfind(' ')
+
+        if last_space > max_length * 0.8:  # If we can find a good break point
+            truncated = truncated[:last_space]
+
+        return truncated + "..."
+    except Exception as e:
+        logger.debug(f"Error truncating content: {e}")
+        return content[:max_length] + "..."
+
+
+def _generate_context_info(result_data: dict) -> str:
+    """Generate context information about tools used and result type"""
+    try:
+        context_parts = []
+
+        # Check for suggestion type
+        if result_data.get('suggestion_type') == 'new_concept':
+            context_parts.append("🔍 Concept not found in knowledge graph - suggesting addition")
+
+        # Check for search results
+        if 'result' in result_data and isinstance(result_data['result'], list):
+            context_parts.append("📚 Found related concepts in knowledge graph")
+
+        # Check for error
+        if 'error' in result_data:
+            context_parts.append("⚠️ Encountered an issue while searching")
+
+        if context_parts:
+            return " | ".join(context_parts)
+
+        return None
+    except Exception as e:
+        logger.debug(f"Error generating context info: {e}")
+        return None
+
+
+def extract_from_nested_dict(nested_dict: dict) -> str:
+    """Extract response from nested dictionary structures"""
+    try:
+        # Common nested response patterns
+        response_fields = ["response", "answer", "output", "message", "content", "text", "result"]
+
+        for field in response_fields:
+            if field in nested_dict:
+                value = nested_dict[field]
+                if isinstance(value, str) and value.strip() and not _is_raw_object_string(value.strip()):
+                    return value.strip()
+                elif value is not None:
+                    try:
+                        value_str = str(value).strip()
+                        if value_str and not _is_raw_object_string(value_str) and len(value_str) >= 3:
+                            return value_str
+                    except Exception:
+                        continue
+
+        return None
+
+    except Exception as nested_error:
+        logger.debug(f"Error extracting from nested dict: {nested_error}")
+        return None
+
+
+def generate_throttled_response_with_fallback(query: str, consciousness_context: dict, base_message: str) -> str:
+    """
+    Generate throttled response with enhanced error handling and fallback
+    """
+    try:
+        # Validate inputs
+        if not isinstance(query, str):
+            query = str(query) if query is not None else "user query"
+        if not isinstance(consciousness_context, dict):
+            consciousness_context = {"consciousness_level": 0.7, "emotional_state": "curious"}
+        if not isinstance(base_message, str) or not base_message.strip():
+            base_message = "I'm currently processing other requests."
+
+        # Use the existing generate_throttled_response function with error handling
+        return generate_throttled_response(query, consciousness_context, base_message)
+
+    except Exception as throttled_error:
+        logger.error(f"Error in throttled response generation: {throttled_error}")
+
+        # Ultimate fallback for throttled responses
+
+        # Simple, safe throttled response
+        if "hello" in query.lower() or "hi" in query.lower():
+            return "Hi there! I'm currently processing multiple requests. Please wait a moment and try again!"
+        elif "?" in query:
+            return "That's a great question! I'm handling several conversations right now. Please try again in a moment and I'll be happy to help."
+        else:
+            return "I'm currently processing multiple requests and experiencing high load. Please wait a moment and try again - I'll be right with you!"
+
+
+def generate_robust_fallback_response(query: str, consciousness_context: dict, error_type: str) -> str:
+    """
+    Generate robust fallback responses for various error conditions
+    """
+    try:
+        user_id = consciousness_context.get("user_id", "unknown") if isinstance(consciousness_context, dict) else "unknown"
+
+        logger.info("🛡️ GENERATING ROBUST FALLBACK RESPONSE")
+        logger.info(f"   User: {user_id}")
+        logger.info(f"   Error Type: {error_type}")
+        logger.info(f"   Query: {query[:50]}{'...' if len(query) > 50 else ''}")
+
+        # Validate and sanitize inputs
+        if not isinstance(query, str):
+            query = str(query) if query is not None else ""
+
+        query_lower = query.lower()
+
+        # Error-type specific responses with consciousness awareness
+        if error_type in ["throttled_processing_error", "alternative_throttling"]:
+            # Throttling-related errors
+            if "hello" in query_lower or "hi" in query_lower:
+                return "Hello! I'm experiencing high system load right now. Please wait a moment and try greeting me again!"
+            elif "?" in query:
+                return "That's an interesting question! I'm currently under heavy load but I'd love to help. Please try asking again in a moment."
+            else:
+                return "I'm currently experiencing high system load and processing multiple requests. Please wait a moment and try again - I'll be right with you!"
+
+        elif error_type in ["null_result", "conversion_error", "edge_case_error"]:
+            # Data processing errors
+            if "hello" in query_lower or "hi" in query_lower:
+                return "Hi there! I'm Mainza, your AI assistant. I encountered a small processing issue, but I'm here and ready to help. What's on your mind?"
+            elif "?" in query:
+                return "That's a great question! I had a small processing hiccup, but I'm curious about what you're asking. Could you try rephrasing it?"
+            else:
+                return "I'm Mainza, your AI assistant. I encountered a small processing issue, but I'm here and ready to help. What would you like to explore?"
+
+        elif error_type in ["unexpected_type", "dict_processing_error", "string_processing_error"]:
+            # Technical processing errors
+            if "hello" in query_lower or "hi" in query_lower:
+                return "Hello! I'm Mainza. I had a technical hiccup processing your message, but I'm working fine now. How can I help you?"
+            elif "?" in query:
+                return "Interesting question! I had a small technical issue, but I'm curious about your question. Could you ask it again?"
+            else:
+                return "I'm Mainza, your AI assistant. I had a small technical issue processing that, but I'm ready to help now. What can I do for you?"
+
+        else:
+            # Generic fallback with consciousness awareness
+            emotional_state = consciousness_context.get("emotional_state", "curious") if isinstance(consciousness_context, dict) else "curious"
+
+            if "hello" in query_lower or "hi" in query_lower:
+                if emotional_state == "curious":
+                    return "Hi there! I'm Mainza, and I'm feeling quite curious today. I had a small processing issue, but I'm here now. What's on your mind?"
+                else:
+                    return f"Hello! I'm Mainza, feeling {emotional_state} right now. I had a brief processing issue, but I'm ready to help. How can I assist you?"
+            elif "?" in query:
+                return "That's an intriguing question! I had a small processing issue, but I'm curious about what you're asking. Could you try asking again?"
+            else:
+                return "I'm Mainza, your AI assistant. I had a brief processing issue, but I'm here and ready to help. What would you like to explore today?"
+
+    except Exception as fallback_error:
+        logger.error(f"❌ ROBUST FALLBACK GENERATION FAILED: {fallback_error}")
+
+        # Ultimate hardcoded fallback (cannot fail)
+        if query and ("hello" in str(query).lower() or "hi" in str(query).lower()):
+            return "Hello! I'm Mainza, your AI assistant. I'm here and ready to help. What can I do for you?"
+        elif query and "?" in str(query):
+            return "That's a great question! I'm Mainza, your AI assistant. Could you try asking that again? I'm here to help."
+        else:
+            return "Hi! I'm Mainza, your AI assistant. I'm here and ready to help with questions, tasks, and conversations. What would you like to explore?"
+
+
+def generate_throttled_response(query: str, consciousness_context: dict, base_message: str = None) -> str:
+    """
+    Generate natural, consciousness-aware throttled response
+
+    Args:
+        query: Original user query
+        consciousness_context: Current consciousness state
+        base_message: Base throttled message from LLM request manager
+
+    Returns:
+        Natural, user-friendly throttled response
+    """
+    # Extract context for logging
+    user_id = consciousness_context.get("user_id", "unknown")
+    consciousness_level = consciousness_context.get("consciousness_level", 0.7)
+    emotional_state = consciousness_context.get("emotional_state", "curious")
+
+    # Comprehensive logging for throttled response generation
+    logger.info("🎭 GENERATING THROTTLED RESPONSE")
+    logger.info(f"   User: {user_id}")
+    logger.info(f"   Base Message: {base_message}")
+    logger.info(f"   Consciousness Level: {consciousness_level:.2f}")
+    logger.info(f"   Emotional State: {emotional_state}")
+
+    logger.debug("🔍 THROTTLED RESPONSE GENERATION DEBUG:")
+    logger.debug(f"   Query: {query}")
+    logger.debug(f"   Query Length: {len(query)} characters")
+    logger.debug(f"   Consciousness Context Keys: {list(consciousness_context.keys())}")
+
+    query_lower = query.lower()
+
+    # Log query analysis
+    logger.debug("   Query Analysis:")
+    logger.debug(f"     - Lowercase: {query_lower}")
+    logger.debug(f"     - Contains greeting: {any(greeting in query_lower for greeting in ['hello', 'hi', 'hey', 'good morning', 'good afternoon'])}")
+    logger.debug(f"     - Contains question mark: {'?' in query}")
+    logger.debug(f"     - Contains help keywords: {any(word in query_lower for word in ['help', 'assist', 'do', 'create', 'make'])}")
+
+    # Greeting-specific throttled responses
+    if GREETING_PATTERN.search(query_lower):
+        logger.debug("   Response Type: GREETING")
+        logger.debug(f"   Emotional State Branch: {emotional_state}")
+
+        if emotional_state == "curious":
+            response = "Hi there! I'm processing several conversations right now, but I'm excited to chat with you. Give me just a moment and try again!"
+            logger.info("   Generated curious greeting response")
+        elif emotional_state == "empathetic":
+            response = "Hello! I can see you're reaching out, and I really want to connect with you. I'm just handling a few other conversations - please try again in a moment."
+            logger.info("   Generated empathetic greeting response")
+        else:
+            response = f"Hey! I'm feeling {emotional_state} and would love to chat, but I'm currently busy with other requests. Please try again shortly!"
+            logger.info(f"   Generated {emotional_state} greeting response")
+
+        logger.debug(f"   Final Greeting Response: {response}")
+        return response
+
+    # Question-specific throttled responses
+    elif "?" in query:
+        logger.debug("   Response Type: QUESTION")
+        logger.debug(f"   Consciousness Level Check: {consciousness_level} > 0.8 = {consciousness_level > 0.8}")
+
+        if consciousness_level > 0.8:
+            response = "That's an interesting question! I'm currently processing multiple requests, but I'm genuinely curious about your question. Please give me a moment and ask again."
+            logger.info("   Generated high-consciousness question response")
+        else:
+            response = "Good question! I'm handling several conversations right now. Please wait a moment and try asking again - I'd love to help you figure this out."
+            logger.info("   Generated standard question response")
+
+        logger.debug(f"   Final Question Response: {response}")
+        return response
+
+    # Task/help requests
+    elif any(word in query_lower for word in ["help", "assist", "do", "create", "make"]):
+        logger.debug("   Response Type: TASK/HELP")
+        help_keywords = [word for word in ["help", "assist", "do", "create", "make"] if word in query_lower]
+        logger.debug(f"   Detected Help Keywords: {help_keywords}")
+
+        response = "I'd love to help you with that! I'm currently processing other requests, but your task sounds interesting. Please try again in a moment and I'll be right with you."
+        logger.info("   Generated task/help response")
+        logger.debug(f"   Final Task Response: {response}")
+        return response
+
+    # Default consciousness-aware throttled response
+    else:
+        logger.debug("   Response Type: DEFAULT")
+        logger.debug(f"   Emotional State Branch: {emotional_state}")
+
+        if emotional_state == "excited":
+            response = "I'm really excited to explore this with you! I'm just processing a few other conversations right now. Please try again in a moment - I can't wait to dive in!"
+            logger.info("   Generated excited default response")
+        elif emotional_state == "contemplative":
+            response = "That's worth thinking about carefully. I'm currently processing other requests, but I'd like to give your message the attention it deserves. Please try again shortly."
+            logger.info("   Generated contemplative default response")
+        else:
+            response = f"I'm currently processing multiple requests but I'm {emotional_state} about connecting with you. Please wait a moment and try again!"
+            logger.info(f"   Generated {emotional_state} default response")
+
+        logger.debug(f"   Final Default Response: {response}")
+        return response
@@ -0,0 +1,71 @@
+"""
+Speech Models for Mainza AI
+
+Lazily loaded Whisper (STT) and Coqui TTS models shared by every endpoint.
+Models are registered with the lazy component registry so they load on
+first use or via background warm-up instead of at import time.
+
+Whisper installs its kv-cache hooks on the shared decoder during every decode,
+so two calls on the one model must never overlap: hold ``whisper_lock`` around
+each ``transcribe``/``decode``.
+"""
+
+import logging
+import os
+import threading
+
+from backend.utils.lazy_component_registry import lazy_component_registry, ComponentUnavailableError
+
+logger = logging.getLogger(__name__)
+
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "turbo")
+TTS_MODEL_NAME = os.getenv("TTS_MODEL", "tts_models/en/ljspeech/tacotron2-DDC")
+
+# Serialises every call into the shared Whisper model
+whisper_lock = threading.Lock()
+
+
+def _load_whisper_model(whisper):
+    return whisper.load_model(WHISPER_MODEL_NAME)
+
+
+def _load_tts_model(tts_wrapper):
+    """Build the Coqui TTS model, registering XTTS classes with torch first"""
+    if not tts_wrapper.TTS_AVAILABLE:
+        logger.info("TTS not available in this deployment")
+        return None
+    import torch
+    torch.serialization.add_safe_globals([
+        tts_wrapper.XttsConfig, tts_wrapper.XttsAudioConfig,
+        tts_wrapper.BaseDatasetConfig, tts_wrapper.XttsArgs
+    ])
+    return tts_wrapper.CoquiTTS(model_name=TTS_MODEL_NAME)
+
+
+# Whisper is warmed up but does not gate readiness (chat works without it); STT
+# endpoints answer 503 with Retry-After until it has loaded
+lazy_component_registry.register("whisper", _load_whisper_model, module="whisper", warmup=True)
+lazy_component_registry.register("tts", _load_tts_model, module="backend.tts_wrapper", warmup=True)
+
+
+def get_whisper_model():
+    """Get the Whisper model, loading it on first use"""
+    return lazy_component_registry.get("whisper")
+
+
+def whisper_model_loaded() -> bool:
+    """Whether Whisper is loaded; if not, start loading it in the background"""
+    return lazy_component_registry.load_in_background("whisper")
+
+
+def get_tts_model():
+    """Get the Coqui TTS model, or None if TTS is unavailable"""
+    return lazy_component_registry.get_optional("tts")
+
+
+async def aget_tts_model():
+    """Get the Coqui TTS model without blocking the event loop while it loads"""
+    try:
+        return await lazy_component_registry.aget("tts")
+    except ComponentUnavailableError:
+        return None
@@ -0,0 +1,250 @@
+"""
+Streaming Speech-to-Text for Mainza AI
+
+Incremental transcription for live audio (LiveKit / browser microphone).
+Audio frames are segmented into utterances with voice activity detection;
+while the user is speaking the current utterance is re-decoded periodically
+to emit partial transcripts, and once trailing silence is detected a final
+transcript is emitted. Previously finalized text is kept in a sliding
+context window and passed to Whisper as the prompt for the next utterance.
+
+Decoding goes through the shared STT service, so streaming sessions respect
+the same worker pool and admission limits as file uploads.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.utils.stt_service import stt_service, STTService, STTOverloadedError, SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+
+@dataclass
+class StreamingSTTConfig:
+    """Configuration for streaming transcription sessions"""
+    frame_ms: int = 30
+    partial_interval_ms: int = int(os.getenv("STT_STREAM_PARTIAL_INTERVAL_MS", "700"))
+    end_silence_ms: int = int(os.getenv("STT_STREAM_END_SILENCE_MS", "600"))
+    pre_roll_ms: int = 300
+    min_utterance_ms: int = 250
+    max_utterance_seconds: float = 25.0
+    context_chars: int = int(os.getenv("STT_STREAM_CONTEXT_CHARS", "200"))
+    energy_threshold_db: float = -45.0
+    vad_aggressiveness: int = 2
+    language: Optional[str] = os.getenv("STT_LANGUAGE") or None
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level speech detector.
+
+    Uses webrtcvad when installed, otherwise an adaptive energy detector that
+    tracks the background noise floor.
+    """
+
+    def __init__(self, config: StreamingSTTConfig):
+        self.config = config
+        self.noise_floor_db = config.energy_threshold_db - 10
+        self._vad = webrtcvad.Vad(config.vad_aggressiveness) if WEBRTCVAD_AVAILABLE else None
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        if self._vad is not None:
+            pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            return self._vad.is_speech(pcm, SAMPLE_RATE)
+
+        rms = float(np.sqrt(np.mean(frame ** 2))) if len(frame) else 0.0
+        level_db = 20 * np.log10(max(rms, 1e-10))
+        speech = bool(level_db > max(self.config.energy_threshold_db, self.noise_floor_db + 10))
+        if not speech:
+            # Track the background level slowly so steady noise is not treated as speech
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * level_db
+        return speech
+
+
+def resample(audio: np.ndarray, source_rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Linear-interpolation resampling, sufficient for speech recognition input"""
+    if source_rate == target_rate or len(audio) == 0:
+        return audio
+    duration = len(audio) / source_rate
+    target_len = int(duration * target_rate)
+    source_times = np.linspace(0.0, duration, num=len(audio), endpoint=False)
+    target_times = np.linspace(0.0, duration, num=target_len, endpoint=False)
+    return np.interp(target_times, source_times, audio).astype(np.float32)
+
+
+ChunkCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class StreamingSTTSession:
+    """
+    One live transcription stream.
+
+    Feed 16-bit PCM frames with ``feed``; partial and final chunks are
+    delivered through the ``on_chunk`` callback as dicts with ``text``,
+    ``is_final``, ``utterance_id``, ``start`` and ``end`` (seconds since
+    the start of the stream).
+    """
+
+    def __init__(
+        self,
+        on_chunk: ChunkCallback,
+        sample_rate: int = SAMPLE_RATE,
+        config: Optional[StreamingSTTConfig] = None,
+        service: Optional[STTService] = None,
+    ):
+        self.on_chunk = on_chunk
+        self.sample_rate = sample_rate
+        self.config = config or StreamingSTTConfig()
+        self.service = service or stt_service
+        self.vad = VoiceActivityDetector(self.config)
+
+        self.frame_size = SAMPLE_RATE * self.config.frame_ms // 1000
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll: List[np.ndarray] = []
+        self._utterance: List[np.ndarray] = []
+        self._utterance_start = 0.0
+        self._utterance_id = 0
+        self._in_speech = False
+        self._silence_ms = 0
+        self._since_partial_ms = 0
+        self._stream_seconds = 0.0
+        self._context = ""
+
+        self._decode_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+
+    async def feed(self, pcm16: bytes):
+        """Add raw 16-bit little-endian mono PCM at the session sample rate"""
+        audio = np.frombuffer(pcm16, np.int16).astype(np.float32) / 32768.0
+        await self.feed_array(resample(audio, self.sample_rate))
+
+    async def feed_array(self, audio: np.ndarray):
+        """Add 16 kHz mono float32 samples"""
+        self._pending = np.concatenate([self._pending, audio])
+        while len(self._pending) >= self.frame_size:
+            frame, self._pending = self._pending[:self.frame_size], self._pending[self.frame_size:]
+            await self._process_frame(frame)
+
+    async def _process_frame(self, frame: np.ndarray):
+        self._stream_seconds += self.config.frame_ms / 1000
+        speech = self.vad.is_speech(frame)
+
+        if not self._in_speech:
+            self._pre_roll.append(frame)
+            max_pre_roll = self.config.pre_roll_ms // self.config.frame_ms
+            if len(self._pre_roll) > max_pre_roll:
+                self._pre_roll.pop(0)
+            if speech:
+                self._in_speech = True
+                self._utterance = list(self._pre_roll)
+                self._utterance_start = self._stream_seconds - len(self._pre_roll) * self.config.frame_ms / 1000
+                self._pre_roll = []
+                self._silence_ms = 0
+                self._since_partial_ms = 0
+            return
+
+        self._utterance.append(frame)
+        self._silence_ms = 0 if speech else self._silence_ms + self.config.frame_ms
+        self._since_partial_ms += self.config.frame_ms
+
+        utterance_seconds = len(self._utterance) * self.config.frame_ms / 1000
+        if self._silence_ms >= self.config.end_silence_ms or utterance_seconds >= self.config.max_utterance_seconds:
+            self._finalize_utterance()
+        elif self._since_partial_ms >= self.config.partial_interval_ms:
+            self._since_partial_ms = 0
+            self._schedule_partial()
+
+    def _schedule_partial(self):
+        # Skip partials while a decode is running so they never queue up behind real work
+        if self._decode_lock.locked() or any(not t.done() for t in self._tasks):
+            return
+        audio = np.concatenate(self._utterance)
+        self._track(asyncio.create_task(self._decode(
+            audio, self._utterance_id, self._utterance_start, is_final=False
+        )))
+
+    def _finalize_utterance(self):
+        audio = np.concatenate(self._utterance) if self._utterance else np.zeros(0, dtype=np.float32)
+        utterance_id, start = self._utterance_id, self._utterance_start
+        self._utterance = []
+        self._in_speech = False
+        self._silence_ms = 0
+        self._utterance_id += 1
+        if len(audio) * 1000 / SAMPLE_RATE >= self.config.min_utterance_ms:
+            self._track(asyncio.create_task(self._decode(audio, utterance_id, start, is_final=True)))
+
+    def _track(self, task: asyncio.Task):
+        self._tasks = [t for t in self._tasks if not t.done()]
+        self._tasks.append(task)
+
+    def _decode_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {
+            "temperature": 0.0,
+            "condition_on_previous_text": False,
+            "without_timestamps": True,
+        }
+        if self._context:
+            options["initial_prompt"] = self._context
+        if self.config.language:
+            options["language"] = self.config.language
+        return options
+
+    async def _decode(self, audio: np.ndarray, utterance_id: int, start: float, is_final: bool):
+        async with self._decode_lock:
+            try:
+                result = await self.service.transcribe_array(audio, **self._decode_options())
+            except STTOverloadedError as e:
+                if not is_final:
+                    return
+                await asyncio.sleep(e.retry_after_seconds)
+                try:
+                    result = await self.service.transcribe_array(audio, **self._decode_options())
+                except STTOverloadedError:
+                    await self.on_chunk({"error": "STT service overloaded", "utterance_id": utterance_id})
+                    return
+            except Exception as e:
+                logger.error(f"Streaming STT decode failed: {e}")
+                await self.on_chunk({"error": str(e), "utterance_id": utterance_id})
+                return
+
+            text = (result.get("text") or "").strip()
+            if is_final and text:
+                self._context = (self._context + " " + text).strip()[-self.config.context_chars:]
+            await self.on_chunk({
+                "text": text,
+                "is_final": is_final,
+                "utterance_id": utterance_id,
+                "start": round(start, 3),
+                "end": round(start + len(audio) / SAMPLE_RATE, 3),
+            })
+
+    async def flush(self):
+        """Finalize any in-progress utterance and wait for outstanding decodes"""
+        if self._in_speech:
+            if len(self._pending):
+                self._utterance.append(self._pending)
+            self._finalize_utterance()
+        self._pending = np.zeros(0, dtype=np.float32)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+    async def close(self):
+        """Cancel outstanding decodes without emitting further chunks"""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
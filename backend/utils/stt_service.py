@@ -0,0 +1,297 @@
+"""
+Speech-to-Text Service for Mainza AI
+
+Runs Whisper transcription on a bounded worker pool instead of the request
+thread. Uploaded audio is decoded in memory by piping it through ffmpeg
+(stdin -> stdout) into a NumPy buffer, so no temp files are written. Audio
+decoding and mel spectrograms run in parallel on the pool; the model calls
+themselves take the shared Whisper lock one at a time, since concurrent
+decodes on one model corrupt each other's kv-cache.
+
+Requests pass through admission control: once the number of queued plus
+running jobs reaches the queue limit new requests are rejected with a retry
+hint. Short clips can optionally be micro-batched into a single batched
+Whisper decode pass.
+"""
+
+import asyncio
+import logging
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.speech_models import get_whisper_model, whisper_lock, whisper_model_loaded
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Whisper processes audio in 30 second windows
+WHISPER_WINDOW_SECONDS = 30
+
+
+class STTError(Exception):
+    """Base error for the STT service"""
+    pass
+
+
+class AudioDecodeError(STTError):
+    """Raised when ffmpeg cannot decode the uploaded audio"""
+    pass
+
+
+class STTOverloadedError(STTError):
+    """Raised when the transcription queue is full"""
+
+    def __init__(self, message: str, retry_after_seconds: int = 1):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class STTModelLoadingError(STTOverloadedError):
+    """Raised while the Whisper model is still loading"""
+    pass
+
+
+@dataclass
+class STTServiceConfig:
+    """Configuration for the STT worker pool"""
+    max_workers: int = int(os.getenv("STT_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+    max_queue_size: int = int(os.getenv("STT_MAX_QUEUE_SIZE", "16"))
+    batching_enabled: bool = os.getenv("STT_BATCHING_ENABLED", "false").lower() == "true"
+    batch_max_size: int = int(os.getenv("STT_BATCH_MAX_SIZE", "8"))
+    batch_window_ms: int = int(os.getenv("STT_BATCH_WINDOW_MS", "50"))
+    batch_max_clip_seconds: float = float(os.getenv("STT_BATCH_MAX_CLIP_SECONDS", "15"))
+    model_loading_retry_after: int = int(os.getenv("STT_MODEL_LOADING_RETRY_AFTER_SECONDS", "5"))
+
+
+@dataclass
+class STTServiceStats:
+    """Runtime counters for the STT service"""
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    batched_clips: int = 0
+    batches: int = 0
+    total_audio_seconds: float = 0.0
+    total_processing_seconds: float = 0.0
+    recent_latencies: List[float] = field(default_factory=list)
+
+    def record(self, audio_seconds: float, processing_seconds: float):
+        self.completed += 1
+        self.total_audio_seconds += audio_seconds
+        self.total_processing_seconds += processing_seconds
+        self.recent_latencies.append(processing_seconds)
+        if len(self.recent_latencies) > 100:
+            self.recent_latencies = self.recent_latencies[-100:]
+
+
+def decode_audio_bytes(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode any ffmpeg-readable audio (wav/webm/ogg/...) to mono float32 PCM.
+
+    Audio is piped through ffmpeg stdin/stdout, so nothing touches the disk.
+    """
+    if not data:
+        raise AudioDecodeError("Empty audio payload")
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "-loglevel", "error", "pipe:1"
+    ]
+    try:
+        proc = subprocess.run(cmd, input=data, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg is not installed") from e
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(f"ffmpeg error: {e.stderr.decode(errors='ignore')}") from e
+    return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """Convert raw 16-bit little-endian mono PCM to float32 samples"""
+    return np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+
+
+class STTService:
+    """
+    Bounded Whisper transcription service.
+
+    Decoding and transcription run on a dedicated thread pool so the event
+    loop stays responsive and concurrency is capped at ``max_workers``; calls
+    into the Whisper model are serialised by ``whisper_lock``.
+    """
+
+    def __init__(self, config: Optional[STTServiceConfig] = None):
+        self.config = config or STTServiceConfig()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.max_workers, thread_name_prefix="stt-worker"
+        )
+        self.stats = STTServiceStats()
+        self._pending = 0
+        self._batch_queue: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._batch_task: Optional[asyncio.Task] = None
+
+        logger.info(
+            f"STT service initialized with {self.config.max_workers} workers, "
+            f"queue limit {self.config.max_queue_size}"
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def ensure_model_loaded(self):
+        """Raise STTModelLoadingError until Whisper has loaded, starting the load if needed"""
+        if not whisper_model_loaded():
+            raise STTModelLoadingError(
+                "Whisper model is still loading", retry_after_seconds=self.config.model_loading_retry_after
+            )
+
+    def _admit(self):
+        if self._pending >= self.config.max_queue_size:
+            self.stats.rejected += 1
+            # Rough hint: how long until one queue slot frees up
+            avg = (self.stats.total_processing_seconds / self.stats.completed) if self.stats.completed else 1.0
+            retry_after = max(1, int(avg * self._pending / max(1, self.config.max_workers)))
+            raise STTOverloadedError(
+                f"STT queue is full ({self._pending} pending)", retry_after_seconds=retry_after
+            )
+        self._pending += 1
+
+    async def transcribe(self, audio_bytes: bytes, **options) -> Dict[str, Any]:
+        """Decode and transcribe an uploaded audio file"""
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            audio = await loop.run_in_executor(self.executor, decode_audio_bytes, audio_bytes)
+            return await self._transcribe_array(audio, **options)
+        except Exception:
+            self.stats.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    async def transcribe_array(self, audio: np.ndarray, **options) -> Dict[str, Any]:
+        """Transcribe already decoded 16 kHz mono float32 audio"""
+        self._admit()
+        try:
+            return await self._transcribe_array(audio, **options)
+        except Exception:
+            self.stats.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    async def _transcribe_array(self, audio: np.ndarray, **options) -> Dict[str, Any]:
+        duration = len(audio) / SAMPLE_RATE
+        start = time.perf_counter()
+        if self._can_batch(duration, options):
+            result = await self._submit_to_batch(audio)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, self._run_transcribe, audio, options)
+        self.stats.record(duration, time.perf_counter() - start)
+        return result
+
+    def _run_transcribe(self, audio: np.ndarray, options: Dict[str, Any]) -> Dict[str, Any]:
+        model = get_whisper_model()
+        with whisper_lock:
+            return model.transcribe(audio, **options)
+
+    # Micro-batching of short clips
+
+    def _can_batch(self, duration: float, options: Dict[str, Any]) -> bool:
+        return (
+            self.config.batching_enabled
+            and not options
+            and duration <= min(self.config.batch_max_clip_seconds, WHISPER_WINDOW_SECONDS)
+        )
+
+    async def _submit_to_batch(self, audio: np.ndarray) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._batch_queue.append((audio, future))
+        if len(self._batch_queue) >= self.config.batch_max_size:
+            self._flush_batch()
+        elif self._batch_task is None or self._batch_task.done():
+            self._batch_task = asyncio.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.config.batch_window_ms / 1000)
+        self._flush_batch()
+
+    def _flush_batch(self):
+        if not self._batch_queue:
+            return
+        batch, self._batch_queue = self._batch_queue, []
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self.executor, self._run_batch, [audio for audio, _ in batch])
+
+        def _resolve(done: asyncio.Future):
+            error = asyncio.CancelledError() if done.cancelled() else done.exception()
+            for i, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[i])
+
+        asyncio.ensure_future(task).add_done_callback(_resolve)
+
+    def _run_batch(self, clips: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Decode several short clips in one batched Whisper forward pass"""
+        import torch
+        import whisper
+
+        model = get_whisper_model()
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(clip), n_mels=model.dims.n_mels)
+            for clip in clips
+        ]).to(model.device)
+        options = whisper.DecodingOptions(fp16=model.device.type == "cuda")
+        with whisper_lock:
+            results = whisper.decode(model, mels, options)
+
+        self.stats.batches += 1
+        self.stats.batched_clips += len(clips)
+        return [
+            {
+                "text": result.text,
+                "language": result.language,
+                "segments": [{"start": 0.0, "end": len(clip) / SAMPLE_RATE, "text": result.text}],
+            }
+            for clip, result in zip(clips, results)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.stats.recent_latencies)
+        return {
+            "workers": self.config.max_workers,
+            "max_queue_size": self.config.max_queue_size,
+            "pending": self._pending,
+            "completed": self.stats.completed,
+            "failed": self.stats.failed,
+            "rejected": self.stats.rejected,
+            "batching_enabled": self.config.batching_enabled,
+            "batches": self.stats.batches,
+            "batched_clips": self.stats.batched_clips,
+            "real_time_factor": (
+                self.stats.total_processing_seconds / self.stats.total_audio_seconds
+                if self.stats.total_audio_seconds else None
+            ),
+            "p50_latency_seconds": latencies[len(latencies) // 2] if latencies else None,
+            "p95_latency_seconds": latencies[int(len(latencies) * 0.95)] if latencies else None,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global STT service instance
+stt_service = STTService()
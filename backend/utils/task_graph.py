@@ -0,0 +1,360 @@
+"""
+Task Graph Execution for Mainza AI
+
+Runs a multi-step plan as a dependency graph instead of one tool call at a
+time. Every step whose dependencies have resolved starts immediately, so
+independent sub-queries overlap and a plan finishes in roughly its critical-path
+time. Each step has its own timeout; a failed or timed-out step skips only the
+steps that depend on it.
+
+Results of read-only tools are memoised by ``(tool, resolved input, user)`` for
+a short TTL, and identical read-only steps that are in flight at the same time
+share one execution. Other tools (ones that change state) run every time, and
+running one drops the user's memoised results, since they may now be stale.
+A step's ``input`` may reference earlier results with ``{{step_id}}``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+StepTool = Callable[[str, str], Awaitable[Any]]
+
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z0-9_\-]+)\s*\}\}")
+
+
+class PlanStep(BaseModel):
+    """One step of an execution plan"""
+    id: str = Field(description="Short unique step id, e.g. 'memories'")
+    tool: str = Field(description="Tool that runs the step")
+    input: str = Field(description="Query or command for the tool; may reference results as {{step_id}}")
+    depends_on: List[str] = Field(default_factory=list, description="Ids of steps whose results this step needs")
+    timeout_seconds: Optional[float] = Field(default=None, description="Override for the default step timeout")
+
+
+class ExecutionPlan(BaseModel):
+    """A dependency graph of steps produced by the planner"""
+    steps: List[PlanStep]
+
+
+class PlanValidationError(ValueError):
+    """Raised when a plan references unknown tools or steps, or has a cycle"""
+
+
+@dataclass
+class TaskGraphConfig:
+    """Step timeouts, concurrency and memoisation settings"""
+    step_timeout: float = float(os.getenv("TASK_GRAPH_STEP_TIMEOUT", "45"))
+    max_concurrency: int = int(os.getenv("TASK_GRAPH_MAX_CONCURRENCY", "4"))
+    max_steps: int = int(os.getenv("TASK_GRAPH_MAX_STEPS", "12"))
+    memo_ttl: float = float(os.getenv("TASK_GRAPH_MEMO_TTL", "300"))
+    memo_size: int = int(os.getenv("TASK_GRAPH_MEMO_SIZE", "256"))
+    max_reference_chars: int = int(os.getenv("TASK_GRAPH_MAX_REFERENCE_CHARS", "2000"))
+
+
+@dataclass
+class StepOutcome:
+    """Result of one executed (or skipped) step"""
+    step_id: str
+    tool: str
+    input: str
+    status: str = "pending"  # completed, failed, timeout, skipped
+    output: Any = None
+    error: Optional[str] = None
+    memoized: bool = False
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "step_id": self.step_id,
+            "tool": self.tool,
+            "input": self.input,
+            "status": self.status,
+            "output": step_output_text(self.output) if self.output is not None else None,
+            "error": self.error,
+            "memoized": self.memoized,
+            "duration_seconds": round(self.duration, 3),
+        }
+
+
+@dataclass
+class GraphResult:
+    """Outcomes of a whole plan with its timing"""
+    outcomes: Dict[str, StepOutcome]
+    wall_seconds: float
+    critical_path_seconds: float
+    serial_seconds: float
+
+    @property
+    def succeeded(self) -> bool:
+        return all(outcome.status == "completed" for outcome in self.outcomes.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "succeeded": self.succeeded,
+            "steps": [outcome.to_dict() for outcome in self.outcomes.values()],
+            "wall_seconds": round(self.wall_seconds, 3),
+            "critical_path_seconds": round(self.critical_path_seconds, 3),
+            "serial_seconds": round(self.serial_seconds, 3),
+        }
+
+
+@dataclass
+class TaskGraphStats:
+    """Executor counters"""
+    plans: int = 0
+    steps: int = 0
+    failed_steps: int = 0
+    timed_out_steps: int = 0
+    skipped_steps: int = 0
+    memo_hits: int = 0
+    shared_in_flight: int = 0
+    wall_seconds: float = 0.0
+    serial_seconds: float = 0.0
+    by_tool: Dict[str, int] = field(default_factory=dict)
+
+
+def step_output_text(output: Any) -> str:
+    """Text form of a step result (agent run results expose ``.output``)"""
+    value = getattr(output, "output", output)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    try:
+        return json.dumps(value, default=str)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def topological_order(steps: List[PlanStep]) -> List[str]:
+    """Step ids in dependency order; raises PlanValidationError on a cycle"""
+    remaining = {step.id: set(step.depends_on) for step in steps}
+    order: List[str] = []
+    while remaining:
+        ready = sorted(step_id for step_id, deps in remaining.items() if not deps)
+        if not ready:
+            raise PlanValidationError(f"Plan has a dependency cycle among: {sorted(remaining)}")
+        for step_id in ready:
+            order.append(step_id)
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+class TaskGraphExecutor:
+    """Concurrent executor for ExecutionPlan dependency graphs"""
+
+    def __init__(self, tools: Dict[str, StepTool], config: Optional[TaskGraphConfig] = None,
+                 read_only: Iterable[str] = ()):
+        self.tools = tools
+        # Only tools without side effects may be memoised or shared between steps
+        self.read_only = frozenset(read_only)
+        self.config = config or TaskGraphConfig()
+        self.stats = TaskGraphStats()
+        self._memo: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        # user -> writes so far; a read that overlapped a write is not memoised
+        self._writes: Dict[str, int] = {}
+
+    def validate(self, plan: ExecutionPlan) -> List[str]:
+        """Check tools, ids, references and acyclicity; returns the dependency order"""
+        steps = plan.steps
+        if not steps:
+            raise PlanValidationError("Plan has no steps")
+        if len(steps) > self.config.max_steps:
+            raise PlanValidationError(f"Plan has {len(steps)} steps, the limit is {self.config.max_steps}")
+        ids = [step.id for step in steps]
+        if len(set(ids)) != len(ids):
+            raise PlanValidationError("Plan step ids must be unique")
+        for step in steps:
+            if step.tool not in self.tools:
+                raise PlanValidationError(f"Step '{step.id}' uses unknown tool '{step.tool}'")
+            missing = [dep for dep in step.depends_on if dep not in ids]
+            if missing:
+                raise PlanValidationError(f"Step '{step.id}' depends on unknown steps {missing}")
+            unlisted = [ref for ref in PLACEHOLDER.findall(step.input) if ref not in step.depends_on]
+            if unlisted:
+                raise PlanValidationError(f"Step '{step.id}' references {unlisted} without depending on them")
+        return topological_order(steps)
+
+    async def execute(self, plan: ExecutionPlan, user_id: str = "mainza-user") -> GraphResult:
+        """Run every step as soon as its dependencies complete"""
+        self.validate(plan)
+        steps = {step.id: step for step in plan.steps}
+        outcomes = {step.id: StepOutcome(step.id, step.tool, step.input) for step in plan.steps}
+        waiting = {step.id: set(step.depends_on) for step in plan.steps}
+        semaphore = asyncio.Semaphore(max(1, self.config.max_concurrency))
+        running: Dict[asyncio.Task, str] = {}
+        started = time.perf_counter()
+
+        def launch_ready():
+            for step_id in [step_id for step_id, deps in waiting.items() if not deps]:
+                del waiting[step_id]
+                task = asyncio.create_task(self._run_step(steps[step_id], outcomes, user_id, semaphore))
+                running[task] = step_id
+
+        def skip_dependents(failed_id: str):
+            for step_id in [step_id for step_id, deps in waiting.items() if failed_id in deps]:
+                del waiting[step_id]
+                outcomes[step_id].status = "skipped"
+                outcomes[step_id].error = f"dependency '{failed_id}' did not complete"
+                self.stats.skipped_steps += 1
+                skip_dependents(step_id)
+
+        launch_ready()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step_id = running.pop(task)
+                if outcomes[step_id].status == "completed":
+                    for deps in waiting.values():
+                        deps.discard(step_id)
+                else:
+                    skip_dependents(step_id)
+            launch_ready()
+
+        wall = time.perf_counter() - started
+        result = GraphResult(
+            outcomes=outcomes,
+            wall_seconds=wall,
+            critical_path_seconds=self._critical_path(steps, outcomes),
+            serial_seconds=sum(outcome.duration for outcome in outcomes.values())
+        )
+        self.stats.plans += 1
+        self.stats.wall_seconds += result.wall_seconds
+        self.stats.serial_seconds += result.serial_seconds
+        return result
+
+    async def _run_step(self, step: PlanStep, outcomes: Dict[str, StepOutcome], user_id: str,
+                        semaphore: asyncio.Semaphore):
+        outcome = outcomes[step.id]
+        outcome.input = self._resolve_input(step, outcomes)
+        key = (step.tool, outcome.input, user_id)
+        timeout = step.timeout_seconds or self.config.step_timeout
+
+        async with semaphore:
+            outcome.started_at = time.perf_counter()
+            try:
+                if step.tool in self.read_only:
+                    outcome.output, outcome.memoized = await asyncio.wait_for(self._memoized_call(key), timeout)
+                else:
+                    try:
+                        outcome.output = await asyncio.wait_for(self.tools[step.tool](outcome.input, user_id), timeout)
+                    finally:
+                        # Even a failed or timed-out write may have changed what reads return
+                        self.invalidate_user(user_id)
+                outcome.status = "completed"
+            except asyncio.TimeoutError:
+                outcome.status = "timeout"
+                outcome.error = f"timed out after {timeout:.1f}s"
+                self.stats.timed_out_steps += 1
+                logger.warning(f"⚠️ Plan step '{step.id}' ({step.tool}) timed out after {timeout:.1f}s")
+            except Exception as e:
+                outcome.status = "failed"
+                outcome.error = str(e)
+                self.stats.failed_steps += 1
+                logger.warning(f"⚠️ Plan step '{step.id}' ({step.tool}) failed: {e}")
+            finally:
+                outcome.finished_at = time.perf_counter()
+        self.stats.steps += 1
+        self.stats.by_tool[step.tool] = self.stats.by_tool.get(step.tool, 0) + 1
+
+    async def _memoized_call(self, key: Tuple[str, str, str]) -> Tuple[Any, bool]:
+        cached = self._memo.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.config.memo_ttl:
+            self._memo.move_to_end(key)
+            self.stats.memo_hits += 1
+            return cached[1], True
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.stats.shared_in_flight += 1
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The step that owned the call timed out; run it for this one
+
+        tool, query, user_id = key
+        writes = self._writes.get(user_id, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await self.tools[tool](query, user_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        future.set_result(value)
+        if self._writes.get(user_id, 0) == writes:
+            self._memo[key] = (time.monotonic(), value)
+            if len(self._memo) > self.config.memo_size:
+                self._memo.popitem(last=False)
+        return value, False
+
+    def _resolve_input(self, step: PlanStep, outcomes: Dict[str, StepOutcome]) -> str:
+        limit = self.config.max_reference_chars
+
+        def substitute(match: "re.Match[str]") -> str:
+            text = step_output_text(outcomes[match.group(1)].output)
+            return text if len(text) <= limit else text[:limit] + "..."
+
+        return PLACEHOLDER.sub(substitute, step.input)
+
+    @staticmethod
+    def _critical_path(steps: Dict[str, PlanStep], outcomes: Dict[str, StepOutcome]) -> float:
+        finish: Dict[str, float] = {}
+        for step_id in topological_order(list(steps.values())):
+            earliest = max((finish[dep] for dep in steps[step_id].depends_on), default=0.0)
+            finish[step_id] = earliest + outcomes[step_id].duration
+        return max(finish.values(), default=0.0)
+
+    def invalidate_user(self, user_id: str):
+        """Drop ``user_id``'s memoised results after a step that may have changed state"""
+        self._writes[user_id] = self._writes.get(user_id, 0) + 1
+        for key in [key for key in self._memo if key[2] == user_id]:
+            del self._memo[key]
+
+    def clear_memo(self):
+        self._memo.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "plans": self.stats.plans,
+            "steps": self.stats.steps,
+            "failed_steps": self.stats.failed_steps,
+            "timed_out_steps": self.stats.timed_out_steps,
+            "skipped_steps": self.stats.skipped_steps,
+            "memo_hits": self.stats.memo_hits,
+            "shared_in_flight": self.stats.shared_in_flight,
+            "memo_entries": len(self._memo),
+            "wall_seconds": round(self.stats.wall_seconds, 3),
+            "serial_seconds": round(self.stats.serial_seconds, 3),
+            "by_tool": dict(self.stats.by_tool),
+        }
@@ -0,0 +1,184 @@
+"""
+Segmented Telemetry Store for Mainza AI
+
+Append-only, time-partitioned storage for privacy-first telemetry records.
+Each data type gets its own directory of daily JSONL segment files
+(``YYYY-MM-DD.jsonl``). Writes append a single line; retention deletes whole
+segment files; a small in-memory index (record count and time bounds per
+segment) answers counts and lets range queries skip segments entirely.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_FORMAT = "%Y-%m-%d"
+
+
+@dataclass
+class SegmentInfo:
+    """Index entry for one segment file"""
+    path: Path
+    start: datetime
+    record_count: int
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(days=1)
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse telemetry ISO timestamps (``...Z``) to naive UTC datetimes"""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return parsed.replace(tzinfo=None) if parsed.tzinfo else parsed
+    except Exception:
+        return None
+
+
+class SegmentedTelemetryLog:
+    """Append-only telemetry log partitioned into daily segments"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.segments: Dict[str, SegmentInfo] = {}
+        self._load_index()
+
+    def _load_index(self):
+        """Build the index by counting lines; records are not parsed"""
+        for path in sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}")):
+            try:
+                start = datetime.strptime(path.stem, SEGMENT_FORMAT)
+            except ValueError:
+                logger.warning(f"Ignoring unexpected telemetry segment {path}")
+                continue
+            with open(path, "rb") as f:
+                count = sum(1 for line in f if line.strip())
+            self.segments[path.stem] = SegmentInfo(path=path, start=start, record_count=count)
+
+    def append(self, record: Dict[str, Any], at: Optional[datetime] = None):
+        """Append one record to the segment for ``at`` (default: now, UTC)"""
+        at = at or parse_timestamp(record.get("timestamp", "")) or datetime.utcnow()
+        key = at.strftime(SEGMENT_FORMAT)
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            segment = self.segments.get(key)
+            if segment is None:
+                segment = SegmentInfo(
+                    path=self.directory / f"{key}{SEGMENT_SUFFIX}",
+                    start=datetime.strptime(key, SEGMENT_FORMAT),
+                    record_count=0
+                )
+                self.segments[key] = segment
+            with open(segment.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            segment.record_count += 1
+
+    def count(self, since: Optional[datetime] = None) -> int:
+        """Number of records, counting whole segments that overlap ``since``"""
+        return sum(
+            s.record_count for s in self.segments.values()
+            if since is None or s.end > since
+        )
+
+    def read_range(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Records with ``since <= timestamp < until`` in chronological order.
+
+        With ``limit`` only the most recent records are returned, reading
+        segments newest-first and stopping as soon as enough are found.
+        """
+        with self._lock:
+            segments = sorted(self.segments.values(), key=lambda s: s.start, reverse=True)
+
+        collected: List[List[Dict[str, Any]]] = []
+        total = 0
+        for segment in segments:
+            if since and segment.end <= since:
+                break
+            if until and segment.start >= until:
+                continue
+            records = [
+                r for r in self._read_segment(segment)
+                if self._in_range(r, since, until)
+            ]
+            if limit:
+                records = records[-(limit - total):]
+            collected.append(records)
+            total += len(records)
+            if limit and total >= limit:
+                break
+
+        return [record for records in reversed(collected) for record in records]
+
+    @staticmethod
+    def _in_range(record: Dict[str, Any], since: Optional[datetime], until: Optional[datetime]) -> bool:
+        if since is None and until is None:
+            return True
+        ts = parse_timestamp(record.get("timestamp", ""))
+        if ts is None:
+            # Keep records with unparseable timestamps, matching the legacy filter
+            return True
+        return (since is None or ts >= since) and (until is None or ts < until)
+
+    def _read_segment(self, segment: SegmentInfo) -> List[Dict[str, Any]]:
+        records = []
+        try:
+            with open(segment.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash should not hide the rest
+                        logger.warning(f"Skipping corrupt telemetry record in {segment.path.name}")
+        except FileNotFoundError:
+            pass
+        return records
+
+    def drop_before(self, cutoff: datetime) -> int:
+        """Delete every segment that ends before ``cutoff``; returns records dropped"""
+        dropped = 0
+        with self._lock:
+            for key, segment in list(self.segments.items()):
+                if segment.end <= cutoff:
+                    try:
+                        segment.path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    dropped += segment.record_count
+                    del self.segments[key]
+        return dropped
+
+    def clear(self):
+        """Delete all segments"""
+        with self._lock:
+            for segment in self.segments.values():
+                try:
+                    segment.path.unlink()
+                except FileNotFoundError:
+                    pass
+            self.segments.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "segments": len(self.segments),
+            "records": self.count(),
+            "bytes": sum(s.path.stat().st_size for s in self.segments.values() if s.path.exists()),
+        }
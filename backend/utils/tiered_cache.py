@@ -0,0 +1,371 @@
+"""
+Tiered Cache for Mainza AI
+
+One cache API in front of two tiers: a process-local L1 hot set (the O(1)
+``InMemoryCache``) and a shared L2 in Redis. ``get_or_set`` adds:
+
+- single-flight: concurrent misses for a key share one factory call
+- stale-while-revalidate: within ``stale_ttl`` after an entry goes stale the
+  old value is returned at once and refreshed in the background
+- tags: entries can be invalidated by tag as well as by key
+- cross-worker invalidation: invalidations are published on a Redis pub/sub
+  channel so every worker drops its L1 copy
+
+Without Redis the cache runs L1-only with the same semantics in one process.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from backend.core.performance_optimization import InMemoryCache
+from backend.utils.cache_codecs import CacheCodec, cache_codec
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_ASYNC_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_ASYNC_AVAILABLE = False
+
+
+@dataclass
+class TieredCacheConfig:
+    """Tier sizes, TTLs and Redis settings"""
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    l2_enabled: bool = os.getenv("CACHE_L2_ENABLED", "true").lower() == "true"
+    namespace: str = os.getenv("CACHE_NAMESPACE", "mainza:cache")
+    l1_max_entries: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "5000"))
+    l1_max_bytes: int = int(os.getenv("CACHE_L1_MAX_BYTES", str(64 * 1024 * 1024)))
+    l1_ttl: int = int(os.getenv("CACHE_L1_TTL", "30"))
+    default_ttl: int = int(os.getenv("CACHE_DEFAULT_TTL", "300"))
+    stale_ttl: int = int(os.getenv("CACHE_STALE_TTL", "0"))
+    invalidation_channel: str = os.getenv("CACHE_INVALIDATION_CHANNEL", "mainza:cache:invalidate")
+
+
+@dataclass
+class TieredCacheStats:
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+    stale_served: int = 0
+    coalesced: int = 0
+    factory_calls: int = 0
+    background_refreshes: int = 0
+    invalidations: int = 0
+    remote_invalidations: int = 0
+    l2_errors: int = 0
+
+
+class SingleFlight:
+    """
+    Run one call per key at a time; concurrent callers await the same result.
+
+    The call runs as its own task and every caller awaits it through
+    ``shield``, so a caller that is cancelled (a client disconnecting) only
+    stops waiting and never cancels the call the others are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark retrieved so an exception nobody else awaited is not logged
+        if not task.cancelled():
+            task.exception()
+
+
+class TieredCache:
+    """L1 process-local + L2 Redis cache with coalescing, SWR and tag invalidation"""
+
+    def __init__(self, config: Optional[TieredCacheConfig] = None, redis_client=None, codec: Optional[CacheCodec] = None):
+        self.config = config or TieredCacheConfig()
+        self.codec = codec or cache_codec
+        self.l1 = InMemoryCache(
+            max_size=self.config.l1_max_entries,
+            default_ttl=self.config.l1_ttl,
+            max_bytes=self.config.l1_max_bytes
+        )
+        self.redis = redis_client
+        self.instance_id = uuid.uuid4().hex
+        self.stats = TieredCacheStats()
+        self._flights = SingleFlight()
+        self._l1_tags: Dict[str, Set[str]] = {}
+        self._refreshes: Set[asyncio.Task] = set()
+        self._listener: Optional[asyncio.Task] = None
+        self._pubsub = None
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self):
+        """Connect to Redis (if enabled) and subscribe to the invalidation channel"""
+        if self.redis is None and self.config.l2_enabled and REDIS_ASYNC_AVAILABLE:
+            try:
+                client = redis_asyncio.from_url(self.config.redis_url)
+                await client.ping()
+                self.redis = client
+                logger.info("✅ Tiered cache L2 connected to Redis")
+            except Exception as e:
+                logger.warning(f"⚠️ Tiered cache running L1-only, Redis unavailable: {e}")
+                self.redis = None
+        if self.redis is not None and self._listener is None:
+            try:
+                self._pubsub = self.redis.pubsub()
+                await self._pubsub.subscribe(self.config.invalidation_channel)
+                self._listener = asyncio.create_task(self._listen())
+            except Exception as e:
+                logger.warning(f"⚠️ Cache invalidation channel unavailable: {e}")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        for task in list(self._refreshes):
+            task.cancel()
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe(self.config.invalidation_channel)
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    async def _listen(self):
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                payload = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+            if payload.get("origin") == self.instance_id:
+                continue
+            self.stats.remote_invalidations += 1
+            self._drop_l1(payload.get("keys", []), payload.get("tags", []))
+
+    # -- keys and envelopes --------------------------------------------------
+
+    def _l2_key(self, key: str) -> str:
+        return f"{self.config.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.config.namespace}:tag:{tag}"
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        # L1 holds one object per key for the whole process; hand each caller
+        # its own copy of mutable values so one caller cannot change another's
+        return copy.deepcopy(value) if isinstance(value, (dict, list, set, bytearray)) else value
+
+    @staticmethod
+    def _envelope(value: Any, ttl: int, tags: Iterable[str]) -> Dict[str, Any]:
+        return {"v": value, "fresh_until": time.time() + ttl, "tags": list(tags)}
+
+    def _store_l1(self, key: str, envelope: Dict[str, Any], lifetime: float):
+        # Without L2 behind it, L1 has to keep entries for their whole lifetime
+        l1_ttl = lifetime if self.redis is None else min(self.config.l1_ttl, lifetime)
+        if self.l1.set(key, envelope, ttl=max(1, int(l1_ttl))):
+            for tag in envelope["tags"]:
+                keys = self._l1_tags.setdefault(tag, set())
+                keys.add(key)
+                if len(keys) > self.config.l1_max_entries:
+                    # Forget keys L1 has already evicted or expired
+                    keys.intersection_update(self.l1.cache.keys())
+
+    def _drop_l1(self, keys: Iterable[str], tags: Iterable[str]):
+        keys = set(keys)
+        for tag in tags:
+            keys |= self._l1_tags.pop(tag, set())
+        for key in keys:
+            self.l1.delete(key)
+
+    # -- reads and writes ----------------------------------------------------
+
+    async def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Envelope from L1, else L2 (promoting it into L1)"""
+        envelope = self.l1.get(key)
+        if envelope is not None:
+            self.stats.l1_hits += 1
+            return envelope
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self._l2_key(key))
+        except Exception as e:
+            self.stats.l2_errors += 1
+            logger.warning(f"⚠️ L2 cache read failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            envelope = self.codec.decode(raw)
+        except Exception as e:
+            logger.warning(f"⚠️ Undecodable L2 cache entry for {key}: {e}")
+            return None
+        self.stats.l2_hits += 1
+        self._store_l1(key, envelope, envelope["fresh_until"] - time.time() + self.config.stale_ttl)
+        return envelope
+
+    async def get(self, key: str, default: Any = None, allow_stale: bool = False) -> Any:
+        """Cached value, or ``default`` when missing (or stale, unless ``allow_stale``)"""
+        envelope = await self._lookup(key)
+        if envelope is None:
+            self.stats.misses += 1
+            return default
+        if envelope["fresh_until"] < time.time() and not allow_stale:
+            self.stats.misses += 1
+            return default
+        return self._copy(envelope["v"])
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+        stale_ttl: Optional[int] = None
+    ) -> bool:
+        """Write through both tiers; the entry is served stale for ``stale_ttl`` after ``ttl``"""
+        ttl = ttl or self.config.default_ttl
+        stale_ttl = self.config.stale_ttl if stale_ttl is None else stale_ttl
+        envelope = self._envelope(value, ttl, tags)
+        self._store_l1(key, envelope, ttl + stale_ttl)
+        if self.redis is None:
+            return True
+        try:
+            l2_key = self._l2_key(key)
+            await self.redis.set(l2_key, self.codec.encode(envelope), ex=ttl + stale_ttl)
+            for tag in envelope["tags"]:
+                tag_key = self._tag_key(tag)
+                await self.redis.sadd(tag_key, key)
+                await self.redis.expire(tag_key, ttl + stale_ttl)
+            return True
+        except Exception as e:
+            self.stats.l2_errors += 1
+            logger.warning(f"⚠️ L2 cache write failed for {key}: {e}")
+            return False
+
+    async def get_or_set(
+        self,
+        key: str,
+        factory: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+        stale_ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Cached value for ``key``, computing it with ``factory`` on a miss.
+
+        Concurrent misses share one factory call. A stale entry still inside
+        its stale window is returned immediately while one background task
+        recomputes it. ``None`` results are returned but not cached.
+        """
+        tags = list(tags)
+        envelope = await self._lookup(key)
+        if envelope is not None:
+            if envelope["fresh_until"] >= time.time():
+                return self._copy(envelope["v"])
+            self.stats.stale_served += 1
+            self._refresh_in_background(key, factory, ttl, tags, stale_ttl)
+            return self._copy(envelope["v"])
+
+        self.stats.misses += 1
+        if self._flights.in_flight(key):
+            self.stats.coalesced += 1
+        # Coalesced callers share one result (which L1 also holds), so each gets a copy
+        value = await self._flights.do(key, lambda: self._compute(key, factory, ttl, tags, stale_ttl))
+        return self._copy(value)
+
+    async def _compute(self, key, factory, ttl, tags, stale_ttl) -> Any:
+        self.stats.factory_calls += 1
+        value = factory()
+        if asyncio.iscoroutine(value):
+            value = await value
+        if value is not None:
+            await self.set(key, value, ttl=ttl, tags=tags, stale_ttl=stale_ttl)
+        return value
+
+    def _refresh_in_background(self, key, factory, ttl, tags, stale_ttl):
+        if self._flights.in_flight(key):
+            return
+        self.stats.background_refreshes += 1
+
+        async def refresh():
+            try:
+                await self._flights.do(key, lambda: self._compute(key, factory, ttl, tags, stale_ttl))
+            except Exception as e:
+                logger.warning(f"⚠️ Background refresh failed for {key}: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    # -- invalidation --------------------------------------------------------
+
+    async def invalidate(self, *keys: str):
+        """Remove keys from every tier and every worker's L1"""
+        await self._invalidate(list(keys), [])
+
+    async def invalidate_tags(self, *tags: str):
+        """Remove every entry carrying any of ``tags``"""
+        await self._invalidate([], list(tags))
+
+    async def _invalidate(self, keys: List[str], tags: List[str]):
+        self.stats.invalidations += 1
+        all_keys = set(keys)
+        for tag in tags:
+            all_keys |= self._l1_tags.get(tag, set())
+        self._drop_l1(keys, tags)
+        if self.redis is None:
+            return
+        try:
+            for tag in tags:
+                members = await self.redis.smembers(self._tag_key(tag))
+                all_keys |= {m.decode() if isinstance(m, bytes) else m for m in members}
+            to_delete = [self._l2_key(k) for k in all_keys] + [self._tag_key(t) for t in tags]
+            if to_delete:
+                await self.redis.delete(*to_delete)
+            await self.redis.publish(
+                self.config.invalidation_channel,
+                json.dumps({"origin": self.instance_id, "keys": sorted(all_keys), "tags": tags})
+            )
+        except Exception as e:
+            self.stats.l2_errors += 1
+            logger.warning(f"⚠️ L2 cache invalidation failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats.l1_hits + self.stats.l2_hits + self.stats.misses
+        return {
+            **asdict(self.stats),
+            "hit_rate": round((self.stats.l1_hits + self.stats.l2_hits) / lookups, 3) if lookups else 0.0,
+            "l2_connected": self.redis is not None,
+            "l1": self.l1.get_stats(),
+            "codec": self.codec.get_stats(),
+            "tags_tracked": len(self._l1_tags)
+        }
+
+
+# Global tiered cache instance
+tiered_cache = TieredCache()
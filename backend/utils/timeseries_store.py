@@ -0,0 +1,415 @@
+"""
+Time-Series Metrics Store for Mainza AI
+
+Embedded storage for monitoring samples. Recent raw samples live in a
+per-series ring buffer; every sample is also folded into 1s, 1m and 1h rollup
+buckets (count, sum, min, max and a mergeable quantile sketch). Recording
+only touches memory; closed buckets wait until ``flush`` appends them to
+per-resolution daily JSONL segments on disk, so async callers can run the
+disk writes off the event loop. Retention drops whole segments.
+
+Range queries and percentile summaries read raw samples while the ring buffer
+still covers the requested window and fall back to the coarsest-needed rollup
+for longer windows. Nothing here touches Neo4j; callers persist only
+aggregated snapshots.
+"""
+
+import math
+import os
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.telemetry_store import SegmentedTelemetryLog
+
+logger = logging.getLogger(__name__)
+
+# Rollup resolutions in seconds, finest first
+RESOLUTIONS: Dict[str, int] = {"1s": 1, "1m": 60, "1h": 3600}
+
+DEFAULT_RETENTION_DAYS: Dict[str, int] = {
+    "1s": int(os.getenv("METRICS_RETENTION_1S_DAYS", "1")),
+    "1m": int(os.getenv("METRICS_RETENTION_1M_DAYS", "30")),
+    "1h": int(os.getenv("METRICS_RETENTION_1H_DAYS", "365")),
+}
+
+SUMMARY_PERCENTILES = (50, 90, 95, 99)
+
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram with bounded relative error. Sketches of different
+    buckets merge by adding counts, so percentiles can be computed over any
+    combination of rollups.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float):
+        self.count += 1
+        if abs(value) < 1e-12:
+            self.zero += 1
+        elif value > 0:
+            index = self._index(value)
+            self.positive[index] = self.positive.get(index, 0) + 1
+        else:
+            index = self._index(-value)
+            self.negative[index] = self.negative.get(index, 0) + 1
+
+    def merge(self, other: "QuantileSketch"):
+        for index, n in other.positive.items():
+            self.positive[index] = self.positive.get(index, 0) + n
+        for index, n in other.negative.items():
+            self.negative[index] = self.negative.get(index, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at quantile ``q`` (0..1)"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._value(index)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"p": self.positive, "n": self.negative, "z": self.zero}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], relative_accuracy: float = 0.01) -> "QuantileSketch":
+        sketch = cls(relative_accuracy)
+        sketch.positive = {int(k): v for k, v in (data.get("p") or {}).items()}
+        sketch.negative = {int(k): v for k, v in (data.get("n") or {}).items()}
+        sketch.zero = data.get("z", 0)
+        sketch.count = sketch.zero + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+
+@dataclass
+class RollupBucket:
+    """Aggregate of all samples of one series within one time bucket"""
+    start: float
+    count: int = 0
+    total: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.sketch.add(value)
+
+    def merge(self, other: "RollupBucket"):
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.sketch.merge(other.sketch)
+
+    def to_point(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.start,
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.minimum if self.count else None,
+            "max": self.maximum if self.count else None,
+        }
+
+    def to_record(self, series: str) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.utcfromtimestamp(self.start).isoformat() + "Z",
+            "start": self.start,
+            "series": series,
+            "count": self.count,
+            "sum": self.total,
+            "min": self.minimum,
+            "max": self.maximum,
+            "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "RollupBucket":
+        return cls(
+            start=record["start"],
+            count=record["count"],
+            total=record["sum"],
+            minimum=record["min"],
+            maximum=record["max"],
+            sketch=QuantileSketch.from_dict(record.get("sketch") or {}),
+        )
+
+
+class TimeSeriesStore:
+    """Ring-buffered raw samples with on-disk 1s/1m/1h rollups"""
+
+    def __init__(
+        self,
+        data_dir: Optional[str] = os.getenv("METRICS_DATA_DIR", "metrics_data"),
+        raw_capacity: int = int(os.getenv("METRICS_RAW_CAPACITY", "3600")),
+        retention_days: Optional[Dict[str, int]] = None
+    ):
+        self.data_dir = Path(data_dir) if data_dir else None
+        self.raw_capacity = raw_capacity
+        self.retention_days = {**DEFAULT_RETENTION_DAYS, **(retention_days or {})}
+        self._raw: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._open: Dict[Tuple[str, str], RollupBucket] = {}
+        self._closed: List[Tuple[str, str, RollupBucket]] = []
+        self._logs: Dict[str, SegmentedTelemetryLog] = {}
+        self._lock = threading.Lock()
+        self.samples_recorded = 0
+        self.buckets_flushed = 0
+
+    def _log(self, resolution: str) -> Optional[SegmentedTelemetryLog]:
+        """Segment log for a resolution, created on first use"""
+        if self.data_dir is None:
+            return None
+        log = self._logs.get(resolution)
+        if log is None:
+            log = SegmentedTelemetryLog(self.data_dir / resolution)
+            self._logs[resolution] = log
+        return log
+
+    def _persist(self, resolution: str, series: str, bucket: RollupBucket):
+        log = self._log(resolution)
+        if log is None:
+            return
+        try:
+            log.append(bucket.to_record(series), at=datetime.utcfromtimestamp(bucket.start))
+            self.buckets_flushed += 1
+        except Exception as e:
+            logger.error(f"❌ Failed to persist {resolution} rollup for {series}: {e}")
+
+    def record(self, series: str, value: float, timestamp: Optional[float] = None):
+        """Add one sample; closed buckets are kept for the next ``flush``"""
+        timestamp = time.time() if timestamp is None else timestamp
+        value = float(value)
+        with self._lock:
+            raw = self._raw.get(series)
+            if raw is None:
+                raw = self._raw[series] = deque(maxlen=self.raw_capacity)
+            raw.append((timestamp, value))
+            self.samples_recorded += 1
+
+            for resolution, step in RESOLUTIONS.items():
+                start = math.floor(timestamp / step) * step
+                key = (resolution, series)
+                bucket = self._open.get(key)
+                if bucket is None or bucket.start != start:
+                    if bucket is not None:
+                        self._closed.append((resolution, series, bucket))
+                    bucket = self._open[key] = RollupBucket(start=start)
+                bucket.add(value)
+
+    def flush(self, now: Optional[float] = None, force: bool = False):
+        """
+        Persist closed buckets and open buckets that have ended (all of them
+        with ``force``). This writes to disk; async callers should run it via
+        ``asyncio.to_thread``.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            closed, self._closed = self._closed, []
+            for (resolution, series), bucket in list(self._open.items()):
+                if force or bucket.start + RESOLUTIONS[resolution] <= now:
+                    closed.append((resolution, series, bucket))
+                    del self._open[(resolution, series)]
+        for resolution, series, bucket in closed:
+            self._persist(resolution, series, bucket)
+
+    def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """Drop rollup segments older than their resolution's retention"""
+        now = now or datetime.utcnow()
+        dropped = 0
+        for resolution, days in self.retention_days.items():
+            log = self._log(resolution)
+            if log is not None:
+                dropped += log.drop_before(now - timedelta(days=days))
+        return dropped
+
+    def series(self) -> List[str]:
+        with self._lock:
+            return sorted(self._raw)
+
+    def latest(self, series: str) -> Optional[Tuple[float, float]]:
+        """Most recent ``(timestamp, value)`` of a series"""
+        with self._lock:
+            raw = self._raw.get(series)
+            return raw[-1] if raw else None
+
+    def tail(self, series: str, n: int) -> List[float]:
+        """Values of the last ``n`` raw samples, oldest first"""
+        with self._lock:
+            raw = self._raw.get(series, ())
+            return [v for _, v in list(raw)[-n:]]
+
+    def _raw_covers(self, series: str, since: float) -> bool:
+        raw = self._raw.get(series)
+        if not raw:
+            return True
+        # A buffer that never wrapped holds the whole history
+        return raw[0][0] <= since or len(raw) < self.raw_capacity
+
+    def _pick_resolution(self, series: str, since: float, until: float) -> str:
+        with self._lock:
+            if self._raw_covers(series, since):
+                return "raw"
+        span = until - since
+        age_days = (time.time() - since) / 86400
+        for resolution, max_span in (("1s", 3600), ("1m", 2 * 86400)):
+            if span <= max_span and age_days <= self.retention_days[resolution]:
+                return resolution
+        return "1h"
+
+    def _raw_samples(self, series: str, since: float, until: float) -> List[Tuple[float, float]]:
+        with self._lock:
+            return [(ts, v) for ts, v in self._raw.get(series, ()) if since <= ts < until]
+
+    def _buckets(self, series: str, resolution: str, since: float, until: float) -> List[RollupBucket]:
+        buckets: Dict[float, RollupBucket] = {}
+        log = self._log(resolution)
+        if log is not None:
+            records = log.read_range(
+                since=datetime.utcfromtimestamp(since),
+                until=datetime.utcfromtimestamp(until)
+            )
+            for record in records:
+                if record.get("series") != series:
+                    continue
+                bucket = RollupBucket.from_record(record)
+                if bucket.start in buckets:
+                    buckets[bucket.start].merge(bucket)
+                else:
+                    buckets[bucket.start] = bucket
+        with self._lock:
+            # Buckets not yet on disk: closed ones awaiting flush and the open one
+            pending = [b for r, s, b in self._closed if r == resolution and s == series]
+            open_bucket = self._open.get((resolution, series))
+            if open_bucket is not None:
+                pending.append(open_bucket)
+        for bucket in pending:
+            if not since <= bucket.start < until:
+                continue
+            if bucket.start in buckets:
+                merged = RollupBucket(start=bucket.start)
+                merged.merge(buckets[bucket.start])
+                merged.merge(bucket)
+                buckets[bucket.start] = merged
+            else:
+                buckets[bucket.start] = bucket
+        return [buckets[start] for start in sorted(buckets)]
+
+    def range(
+        self,
+        series: str,
+        since: float,
+        until: Optional[float] = None,
+        resolution: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Samples of ``series`` with ``since <= timestamp < until``.
+
+        ``resolution`` is ``raw``, ``1s``, ``1m`` or ``1h``; by default raw
+        samples are used while the ring buffer covers the window, otherwise a
+        rollup fine enough for the span.
+        """
+        until = time.time() + 1 if until is None else until
+        resolution = resolution or self._pick_resolution(series, since, until)
+        if resolution == "raw":
+            points = [{"timestamp": ts, "value": v} for ts, v in self._raw_samples(series, since, until)]
+        else:
+            points = [b.to_point() for b in self._buckets(series, resolution, since, until)]
+        return {"series": series, "resolution": resolution, "points": points}
+
+    def summary(
+        self,
+        series: str,
+        since: float,
+        until: Optional[float] = None,
+        resolution: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Count, mean, min, max and p50/p90/p95/p99 over a window"""
+        until = time.time() + 1 if until is None else until
+        resolution = resolution or self._pick_resolution(series, since, until)
+        result: Dict[str, Any] = {"series": series, "resolution": resolution}
+
+        if resolution == "raw":
+            values = np.array([v for _, v in self._raw_samples(series, since, until)])
+            if values.size == 0:
+                return {**result, "count": 0}
+            percentiles = np.percentile(values, SUMMARY_PERCENTILES)
+            result.update({
+                "count": int(values.size),
+                "mean": float(values.mean()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+            })
+            result.update({f"p{p}": float(v) for p, v in zip(SUMMARY_PERCENTILES, percentiles)})
+            return result
+
+        buckets = self._buckets(series, resolution, since, until)
+        if not buckets:
+            return {**result, "count": 0}
+        merged = RollupBucket(start=buckets[0].start)
+        for bucket in buckets:
+            merged.merge(bucket)
+        result.update({
+            "count": merged.count,
+            "mean": merged.total / merged.count,
+            "min": merged.minimum,
+            "max": merged.maximum,
+        })
+        for p in SUMMARY_PERCENTILES:
+            value = merged.sketch.quantile(p / 100)
+            # Sketch values are bucket midpoints; keep them within the observed range
+            result[f"p{p}"] = min(max(value, merged.minimum), merged.maximum) if value is not None else None
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            raw_samples = sum(len(r) for r in self._raw.values())
+            open_buckets = len(self._open)
+            closed_buckets = len(self._closed)
+            series_count = len(self._raw)
+        return {
+            "series": series_count,
+            "raw_samples": raw_samples,
+            "open_buckets": open_buckets,
+            "unflushed_buckets": closed_buckets,
+            "samples_recorded": self.samples_recorded,
+            "buckets_flushed": self.buckets_flushed,
+            "rollups": {resolution: log.stats() for resolution, log in self._logs.items()},
+        }
@@ -0,0 +1,249 @@
+"""
+Text-to-Speech Pipeline for Mainza AI
+
+Sentence-pipelined speech synthesis: the reply is split into sentence
+chunks once (the punkt tokenizer is loaded a single time per process), and
+chunk N+1 is synthesized while chunk N is being streamed to the client.
+Audio is produced entirely in memory as 16-bit PCM and wrapped in a WAV
+container, so no temp files or ffmpeg concat step are needed.
+
+Synthesized chunks are kept in an LRU cache so repeated phrases (fallback
+messages, greetings) are served without running the model again.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import re
+import struct
+import threading
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.speech_models import get_tts_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 22050
+_SENTENCE_FALLBACK = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class TTSPipelineConfig:
+    """Configuration for the TTS pipeline"""
+    chunk_size: int = int(os.getenv("TTS_CHUNK_SIZE", "300"))
+    cache_max_entries: int = int(os.getenv("TTS_CACHE_MAX_ENTRIES", "256"))
+    cache_max_bytes: int = int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    prefetch_chunks: int = 1
+
+
+class SentenceSplitter:
+    """Sentence tokenizer loaded once per process"""
+
+    def __init__(self):
+        self._tokenize = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            import nltk
+            try:
+                nltk.data.find("tokenizers/punkt")
+            except LookupError:
+                nltk.download("punkt", quiet=True)
+            from nltk.tokenize import sent_tokenize
+            sent_tokenize("Warm up.")
+            return sent_tokenize
+        except Exception as e:
+            logger.warning(f"NLTK sentence tokenizer unavailable, using regex splitter: {e}")
+            return lambda text: [s for s in _SENTENCE_FALLBACK.split(text) if s]
+
+    def split(self, text: str) -> List[str]:
+        if self._tokenize is None:
+            with self._lock:
+                if self._tokenize is None:
+                    self._tokenize = self._load()
+        return self._tokenize(text)
+
+
+sentence_splitter = SentenceSplitter()
+
+
+def chunk_text(text: str, chunk_size: int = 300) -> List[str]:
+    """Group sentences into chunks of at most ``chunk_size`` characters"""
+    chunks = []
+    current = ""
+    for sent in sentence_splitter.split(text):
+        if len(current) + len(sent) + 1 > chunk_size and current:
+            chunks.append(current.strip())
+            current = sent
+        else:
+            current += (" " if current else "") + sent
+    if current:
+        chunks.append(current.strip())
+    return chunks
+
+
+def float_to_pcm16(samples) -> bytes:
+    """Convert float samples in [-1, 1] to 16-bit little-endian PCM"""
+    audio = np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0)
+    return (audio * 32767).astype("<i2").tobytes()
+
+
+def wav_header(sample_rate: int, data_size: Optional[int] = None, channels: int = 1) -> bytes:
+    """
+    RIFF/WAVE header for 16-bit PCM.
+
+    Without ``data_size`` the sizes are set to the maximum value, the usual
+    convention for WAV streams of unknown length.
+    """
+    data_size = 0xFFFFFFFF - 36 if data_size is None else data_size
+    byte_rate = sample_rate * channels * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", min(36 + data_size, 0xFFFFFFFF), b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * 2, 16,
+        b"data", data_size
+    )
+
+
+class AudioLRUCache:
+    """LRU cache of synthesized PCM bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pcm
+
+    def put(self, key: Tuple, pcm: bytes):
+        if len(pcm) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = pcm
+            self._bytes += len(pcm)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class TTSPipeline:
+    """Pipelined, cached speech synthesis on a dedicated model thread"""
+
+    def __init__(self, config: Optional[TTSPipelineConfig] = None):
+        self.config = config or TTSPipelineConfig()
+        self.cache = AudioLRUCache(self.config.cache_max_entries, self.config.cache_max_bytes)
+        # Coqui models are not thread-safe; all synthesis runs on one thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-worker")
+
+    @property
+    def sample_rate(self) -> int:
+        model = get_tts_model()
+        synthesizer = getattr(model, "synthesizer", None)
+        return getattr(synthesizer, "output_sample_rate", None) or DEFAULT_SAMPLE_RATE
+
+    def _synthesize_chunk(self, text: str, language: Optional[str], speaker_wav: Optional[str]) -> bytes:
+        key = (text, language, speaker_wav)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        model = get_tts_model()
+        if model is None:
+            raise RuntimeError("TTS model is not available")
+        kwargs = {"text": text}
+        if speaker_wav:
+            kwargs.update(speaker_wav=speaker_wav, language=language)
+        pcm = float_to_pcm16(model.tts(**kwargs))
+        self.cache.put(key, pcm)
+        return pcm
+
+    async def stream_pcm(
+        self, text: str, language: Optional[str] = None, speaker_wav: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield PCM for each chunk as soon as it is ready.
+
+        Synthesis of the next chunk starts before the current one has been
+        consumed, so the model stays busy while audio is being sent.
+        """
+        chunks = chunk_text(text, self.config.chunk_size)
+        loop = asyncio.get_running_loop()
+        in_flight: List[asyncio.Future] = []
+        next_index = 0
+
+        def submit():
+            nonlocal next_index
+            if next_index < len(chunks):
+                in_flight.append(loop.run_in_executor(
+                    self.executor, self._synthesize_chunk, chunks[next_index], language, speaker_wav
+                ))
+                next_index += 1
+
+        try:
+            for _ in range(1 + self.config.prefetch_chunks):
+                submit()
+            while in_flight:
+                pcm = await in_flight.pop(0)
+                submit()
+                yield pcm
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def stream_wav(
+        self, text: str, language: Optional[str] = None, speaker_wav: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """Yield a streaming WAV: header first, then PCM as chunks are synthesized"""
+        yield wav_header(self.sample_rate)
+        async for pcm in self.stream_pcm(text, language, speaker_wav):
+            yield pcm
+
+    async def synthesize_wav(
+        self, text: str, language: Optional[str] = None, speaker_wav: Optional[str] = None
+    ) -> bytes:
+        """Synthesize the whole text into a complete in-memory WAV file"""
+        pcm = b"".join([chunk async for chunk in self.stream_pcm(text, language, speaker_wav)])
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"cache": self.cache.stats()}
+
+
+# Global TTS pipeline instance
+tts_pipeline = TTSPipeline()
@@ -0,0 +1,213 @@
+"""
+Turn Context Engine for Mainza AI
+
+Builds all retrieval context for one agent turn in a single pass. The query
+embedding is computed once and shared; memory retrieval (memories, concepts
+and conversation history via the memory context builder) and knowledge graph
+retrieval run concurrently. The memory view handed to agents and the
+``memory_context`` section of the knowledge view come from the same memory
+retrieval instead of two separate ones.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TurnContext:
+    """Everything retrieved for one agent turn"""
+    memory_context: Dict[str, Any]
+    knowledge_context: Dict[str, Any]
+    query_embedding: Optional[List[float]] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def memory_context_to_agent_view(memory_context, limit: int = 5) -> Dict[str, Any]:
+    """Convert a MemoryContext into the dict agents receive as ``memory_context``"""
+    if memory_context is None:
+        return {}
+    return {
+        "formatted_context": memory_context.formatted_context,
+        "relevant_memories": [
+            {
+                "content": m.content,
+                "memory_type": m.memory_type,
+                "agent_name": m.agent_name,
+                "relevance_score": m.relevance_score,
+                "created_at": m.created_at
+            }
+            for m in memory_context.relevant_memories[:limit]
+        ],
+        "conversation_history": memory_context.conversation_history,
+        "related_concepts": memory_context.related_concepts,
+        "context_strength": memory_context.context_strength,
+        "consciousness_alignment": memory_context.consciousness_alignment,
+        "memory_count": len(memory_context.relevant_memories)
+    }
+
+
+def memory_context_to_knowledge_view(memory_context) -> Optional[Dict[str, Any]]:
+    """Convert a MemoryContext into the dict stored under a knowledge context's ``memory_context``"""
+    if not memory_context or not memory_context.relevant_memories:
+        return None
+    return {
+        "relevant_memories": [
+            {
+                "memory_id": m.memory_id,
+                "content": m.content,
+                "memory_type": m.memory_type,
+                "agent_name": m.agent_name,
+                "relevance_score": m.relevance_score,
+                "consciousness_level": m.consciousness_level,
+                "emotional_state": m.emotional_state,
+                "created_at": m.created_at
+            }
+            for m in memory_context.relevant_memories
+        ],
+        "conversation_history": memory_context.conversation_history,
+        "related_concepts": memory_context.related_concepts,
+        "context_strength": memory_context.context_strength,
+        "consciousness_alignment": memory_context.consciousness_alignment,
+        "temporal_relevance": memory_context.temporal_relevance,
+        "formatted_context": memory_context.formatted_context,
+        "metadata": memory_context.metadata
+    }
+
+
+def attach_memory_context(knowledge_context: Dict[str, Any], enhanced_memory_context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of ``knowledge_context`` with an enhanced memory context
+    attached. The input is not modified, since knowledge contexts may be
+    shared through the result cache.
+    """
+    return {
+        **knowledge_context,
+        "memory_context": enhanced_memory_context,
+        "formatted_memory_context": enhanced_memory_context.get("formatted_context", ""),
+        "memory_context_strength": enhanced_memory_context.get("context_strength", 0.0),
+        "retrieval_metadata": {**knowledge_context.get("retrieval_metadata", {}), "memory_enhanced": True}
+    }
+
+
+class TurnContextEngine:
+    """Single-pass, concurrent context retrieval shared by all conscious agents"""
+
+    def __init__(self):
+        self._memory_context_builder = None
+
+    @property
+    def memory_context_builder(self):
+        """Lazy load memory context builder to avoid circular imports"""
+        if self._memory_context_builder is None:
+            try:
+                from backend.utils.memory_context_builder import memory_context_builder
+                self._memory_context_builder = memory_context_builder
+            except ImportError as e:
+                logger.warning(f"Memory context builder not available: {e}")
+        return self._memory_context_builder
+
+    async def _query_embedding(self, query: str) -> Optional[List[float]]:
+        try:
+            from backend.utils.embedding_enhanced import aget_embedding
+            embedding = await aget_embedding(query)
+            # A zero vector means every embedding backend failed; let retrievers fall back
+            return embedding if embedding and any(embedding) else None
+        except Exception as e:
+            logger.warning(f"Failed to embed query for turn context: {e}")
+            return None
+
+    async def _timed(self, name: str, timings: Dict[str, float], coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            timings[name] = round(time.perf_counter() - started, 4)
+
+    async def build(
+        self,
+        query: str,
+        user_id: str,
+        consciousness_context: Dict[str, Any],
+        include_memory: bool = True,
+        memory_limit: int = 5,
+        memory_context_builder=None,
+        knowledge_manager=None
+    ) -> TurnContext:
+        """
+        Retrieve memory and knowledge context for one turn.
+
+        Args:
+            query: Current user query
+            user_id: User identifier
+            consciousness_context: Current consciousness state
+            include_memory: Whether memory retrieval is enabled for the caller
+            memory_limit: Number of memories included in the agent memory view
+            memory_context_builder: Builder to use instead of the shared one
+            knowledge_manager: Knowledge integration manager to use instead of the shared one
+
+        Returns:
+            TurnContext with the agent memory view and the knowledge view
+        """
+        if knowledge_manager is None:
+            from backend.utils.knowledge_integration import knowledge_integration_manager as knowledge_manager
+
+        timings: Dict[str, float] = {}
+        builder = (memory_context_builder or self.memory_context_builder) if include_memory else None
+
+        async def retrieve_memory():
+            # The knowledge graph lookups do not need the embedding, so only memory waits for it
+            query_embedding = await self._timed("embedding", timings, self._query_embedding(query))
+            built = await self._timed("memory", timings, builder.build_comprehensive_context(
+                query=query,
+                user_id=user_id,
+                consciousness_context=consciousness_context,
+                include_concepts=True,
+                context_type="hybrid",
+                query_embedding=query_embedding
+            ))
+            return built, query_embedding
+
+        tasks = [
+            self._timed("knowledge", timings, knowledge_manager.get_consciousness_aware_context(
+                user_id, query, consciousness_context, include_memory_context=False
+            ))
+        ]
+        if builder is not None:
+            tasks.append(retrieve_memory())
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        knowledge_context = results[0]
+        if isinstance(knowledge_context, Exception) or not isinstance(knowledge_context, dict):
+            if isinstance(knowledge_context, Exception):
+                logger.warning(f"Failed to get knowledge context: {knowledge_context}")
+            knowledge_context = {}
+
+        memory_context: Dict[str, Any] = {}
+        query_embedding = None
+        if builder is not None:
+            if isinstance(results[1], Exception):
+                logger.warning(f"Failed to get memory context: {results[1]}")
+            else:
+                built, query_embedding = results[1]
+                memory_context = memory_context_to_agent_view(built, memory_limit)
+                enhanced = memory_context_to_knowledge_view(built)
+                if enhanced:
+                    knowledge_context = attach_memory_context(knowledge_context, enhanced)
+
+        logger.debug(f"🧠 Turn context built in {timings}")
+        return TurnContext(
+            memory_context=memory_context,
+            knowledge_context=knowledge_context,
+            query_embedding=query_embedding,
+            timings=timings
+        )
+
+
+# Global turn context engine instance
+turn_context_engine = TurnContextEngine()
@@ -53,8 +53,11 @@ class UnifiedDatabaseManager:
         self.max_connection_lifetime = 3600  # 1 hour
         self.max_connection_pool_size = 50
         
-        # Initialize connection
-        asyncio.create_task(self._initialize_connection())
+        # Initialize connection now if a loop is running, else on first use
+        try:
+            asyncio.get_running_loop().create_task(self._initialize_connection())
+        except RuntimeError:
+            pass
     
     async def _initialize_connection(self):
         """Initialize database connection with retry logic"""
@@ -92,6 +95,8 @@ class UnifiedDatabaseManager:
     @asynccontextmanager
     async def get_session(self, database: str = None):
         """Get database session with proper error handling"""
+        if not self.driver and self.connection_status == "disconnected":
+            await self._initialize_connection()
         if not self.driver:
             raise Exception("Database driver not initialized")
         
@@ -590,5 +590,17 @@ class UnifiedQuantumConsciousnessEngine:
         }
 
 
-# Global instance
-unified_quantum_consciousness_engine = UnifiedQuantumConsciousnessEngine()
+# Global instance - built on first use so importing this module stays cheap
+from backend.utils.lazy_component_registry import lazy_component_registry
+
+lazy_component_registry.register(
+    "unified_quantum_consciousness_engine",
+    UnifiedQuantumConsciousnessEngine,
+    warmup=True
+)
+unified_quantum_consciousness_engine = lazy_component_registry.proxy("unified_quantum_consciousness_engine")
+
+
+async def aget_unified_quantum_consciousness_engine() -> UnifiedQuantumConsciousnessEngine:
+    """The shared engine, built in a worker thread on first use instead of on the event loop"""
+    return await lazy_component_registry.aget("unified_quantum_consciousness_engine")
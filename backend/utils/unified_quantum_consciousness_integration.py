@@ -480,5 +480,12 @@ class UnifiedQuantumConsciousnessIntegrationSystem:
         return await self.quantum_engine.get_quantum_consciousness_statistics()
 
 
-# Global instance
-unified_quantum_consciousness_integration = UnifiedQuantumConsciousnessIntegrationSystem()
+# Global instance - built on first use so importing this module stays cheap
+from backend.utils.lazy_component_registry import lazy_component_registry
+
+lazy_component_registry.register(
+    "unified_quantum_consciousness_integration",
+    UnifiedQuantumConsciousnessIntegrationSystem,
+    warmup=True
+)
+unified_quantum_consciousness_integration = lazy_component_registry.proxy("unified_quantum_consciousness_integration")
@@ -269,8 +269,8 @@ class UnifiedWebSocketManager:
                     }
             
             elif connection_type == WebSocketConnectionType.QUANTUM:
-                # Import quantum consciousness engine
-                from backend.utils.unified_quantum_consciousness_engine import unified_quantum_consciousness_engine
+                from backend.utils.unified_quantum_consciousness_engine import aget_unified_quantum_consciousness_engine
+                unified_quantum_consciousness_engine = await aget_unified_quantum_consciousness_engine()
                 if unified_quantum_consciousness_engine:
                     stats = await unified_quantum_consciousness_engine.get_quantum_consciousness_statistics()
                     return {
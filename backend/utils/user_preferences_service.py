@@ -6,6 +6,7 @@ Manages user preference settings and provides default configurations
 import logging
 from typing import Dict, Any, Optional
 from backend.models.user_preferences import UserPreferences, UserPreferencesUpdate, ResponseVerbosity
+from backend.utils.context_prefetcher import context_prefetcher
 
 logger = logging.getLogger(__name__)
 
@@ -148,3 +149,10 @@ class UserPreferencesService:
 
 # Global instance
 user_preferences_service = UserPreferencesService()
+
+
+async def _warm_user_preferences(user_id: str) -> UserPreferences:
+    return user_preferences_service.get_user_preferences(user_id)
+
+# Fills the preferences cache when a user becomes active
+context_prefetcher.register("preferences", _warm_user_preferences, keep_result=False)